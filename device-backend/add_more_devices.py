@@ -8,6 +8,8 @@ import boto3
 import os
 from datetime import datetime, timezone
 
+from app.provisioning import BulkLoader
+
 def add_more_devices():
     """DeviceMasterテーブルに追加のデバイスを投入"""
     
@@ -61,13 +63,11 @@ def add_more_devices():
         }
     ]
     
-    # デバイスを追加
-    for device in additional_devices:
-        try:
-            table.put_item(Item=device)
-            print(f"✅ デバイス {device['deviceId']} を追加しました")
-        except Exception as e:
-            print(f"❌ デバイス {device['deviceId']} の追加に失敗: {str(e)}")
+    # デバイスを追加（大量投入は load_devices.py を使用）
+    try:
+        BulkLoader(table_name, region_name='ap-northeast-1').load(additional_devices)
+    except Exception as e:
+        print(f"❌ デバイスの追加に失敗: {str(e)}")
     
     # 現在の利用可能デバイス数を確認
     try:
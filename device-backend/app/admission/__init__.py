@@ -0,0 +1,13 @@
+"""
+Timestreamクエリのアドミッション制御モジュール
+"""
+from .config import admission_config, AdmissionConfig
+from .controller import AdmissionController, AdmissionRejected, admission_controller
+
+__all__ = [
+    "admission_config",
+    "AdmissionConfig",
+    "AdmissionController",
+    "AdmissionRejected",
+    "admission_controller",
+]
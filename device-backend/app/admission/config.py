@@ -0,0 +1,35 @@
+"""
+アドミッション制御設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class AdmissionConfig(BaseSettings):
+    """Timestreamクエリのアドミッション制御設定"""
+
+    enabled: bool = Field(default=True, alias="ADMISSION_ENABLED")
+    # 同時実行クエリ数の上限（全体 / ユーザーごと）
+    global_concurrency: int = Field(default=16, alias="ADMISSION_GLOBAL_CONCURRENCY")
+    user_concurrency: int = Field(default=4, alias="ADMISSION_USER_CONCURRENCY")
+    # ユーザーごとのクエリ予算（トークンバケット、1クエリ1ページ = コスト1）
+    user_queries_per_second: float = Field(
+        default=10.0, alias="ADMISSION_USER_QUERIES_PER_SECOND"
+    )
+    user_burst: int = Field(default=100, alias="ADMISSION_USER_BURST")
+    # 1クエリあたりの待機上限（これを超える場合は待たずに429を返す）
+    max_wait_seconds: float = Field(default=2.0, alias="ADMISSION_MAX_WAIT_SECONDS")
+    # 1リクエスト内の待機時間の合計上限
+    max_queued_seconds_per_request: float = Field(
+        default=10.0, alias="ADMISSION_MAX_QUEUED_SECONDS_PER_REQUEST"
+    )
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+admission_config = AdmissionConfig()
@@ -0,0 +1,264 @@
+"""
+Timestreamクエリのアドミッション制御
+
+認証済みリクエストのユーザー（テナント）をコンテキスト変数に保持し、
+Timestreamへの各クエリ呼び出し（1ページ = コスト1）の前に次を行う。
+
+1. ユーザーごとのトークンバケットからコストを予約する。不足分の補充を待つ時間が短ければ待ち（キュー）、
+   長ければ待たずに429（Retry-After付き）で拒否する。
+2. 全体とユーザーごとの同時実行数の枠を取得する。全体の枠が空くと、待っているユーザーの間で
+   順番に（ラウンドロビンで）割り当てるため、大量のクエリを投げるユーザーがいても他のユーザーの待ちは1周分で済む。
+
+テナントが設定されていない処理（バックグラウンド更新など）は制御しない。
+"""
+import contextvars
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException
+
+from .config import AdmissionConfig, admission_config
+
+
+class AdmissionRejected(HTTPException):
+    """クエリ予算・同時実行枠の不足による拒否（429）"""
+
+    def __init__(self, retry_after: float, reason: str):
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+        super().__init__(
+            status_code=429,
+            detail=f"Too many Timestream queries ({reason}). "
+            f"Retry after {self.retry_after}s",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+class Tenant:
+    """1リクエスト分のテナント情報"""
+
+    __slots__ = ("user_id", "queued_seconds", "queries")
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.queued_seconds = 0.0
+        self.queries = 0
+
+
+_tenant: contextvars.ContextVar[Optional[Tenant]] = contextvars.ContextVar(
+    "admission_tenant", default=None
+)
+
+
+class CostBuckets:
+    """キーごとのトークンバケット（予約した分だけ残高を先に減らす）"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = float(burst)
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, cost: float, max_wait: float) -> float:
+        """
+        コストを予約し、補充を待つべき秒数を返す
+
+        待ち時間がmax_waitを超える場合は予約せずにその待ち時間を返す。
+        """
+        now = time.monotonic()
+        cost = min(cost, self.burst)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            wait = max(0.0, (cost - tokens) / self.rate)
+            bucket[1] = now
+            bucket[0] = tokens - cost if wait <= max_wait else tokens
+            return wait
+
+    def refund(self, key: str, cost: float) -> None:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(self.burst, bucket[0] + min(cost, self.burst))
+
+    def tokens(self, key: str) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return self.burst
+            return min(
+                self.burst, bucket[0] + (time.monotonic() - bucket[1]) * self.rate
+            )
+
+
+class FairSlots:
+    """全体の同時実行枠をユーザー間でラウンドロビンに割り当てる（ユーザーごとの上限付き）"""
+
+    def __init__(self, total: int, per_key: int):
+        self.total = total
+        self.per_key = per_key
+        self.in_flight: Dict[str, int] = {}
+        self._used = 0
+        # 待っているユーザー → 待ち順のチケット
+        self._waiting: "OrderedDict[str, Deque[List[bool]]]" = OrderedDict()
+        self._cond = threading.Condition()
+
+    def _eligible(self, key: str) -> bool:
+        return self.in_flight.get(key, 0) < self.per_key
+
+    def _take(self, key: str) -> None:
+        self._used += 1
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def _dispatch(self) -> None:
+        """空き枠を待っているユーザーに順番に割り当てる"""
+        granted = False
+        while self._used < self.total:
+            key = next((k for k in self._waiting if self._eligible(k)), None)
+            if key is None:
+                break
+            tickets = self._waiting.pop(key)
+            tickets.popleft()[0] = True
+            self._take(key)
+            granted = True
+            if tickets:
+                self._waiting[key] = tickets  # 末尾に回す
+        if granted:
+            self._cond.notify_all()
+
+    def acquire(self, key: str, timeout: float) -> bool:
+        with self._cond:
+            if not self._waiting and self._used < self.total and self._eligible(key):
+                self._take(key)
+                return True
+            ticket = [False]
+            self._waiting.setdefault(key, deque()).append(ticket)
+            self._dispatch()
+            deadline = time.monotonic() + timeout
+            while not ticket[0]:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    tickets = self._waiting.get(key)
+                    if tickets is not None:
+                        tickets.remove(ticket)
+                        if not tickets:
+                            del self._waiting[key]
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def release(self, key: str) -> None:
+        with self._cond:
+            self._used -= 1
+            count = self.in_flight.get(key, 1) - 1
+            if count:
+                self.in_flight[key] = count
+            else:
+                self.in_flight.pop(key, None)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "inFlight": self._used,
+                "waitingUsers": len(self._waiting),
+                "waiting": sum(len(t) for t in self._waiting.values()),
+            }
+
+
+class AdmissionController:
+    """ユーザーごと・全体のクエリ予算と同時実行数の制御"""
+
+    def __init__(self, config: AdmissionConfig = admission_config):
+        self.config = config
+        self.buckets = CostBuckets(config.user_queries_per_second, config.user_burst)
+        self.slots = FairSlots(config.global_concurrency, config.user_concurrency)
+        self.admitted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    # ---------- テナント ----------
+
+    def set_tenant(self, user_id: str) -> None:
+        """現在のリクエストのテナントを設定（認証時に呼ぶ）"""
+        _tenant.set(Tenant(user_id))
+
+    @contextmanager
+    def tenant(self, user_id: str) -> Iterator[Tenant]:
+        """ブロック内をテナントとして実行（スレッドプールで実行する処理用）"""
+        current = _tenant.get()
+        tenant = (
+            current
+            if current is not None and current.user_id == user_id
+            else Tenant(user_id)
+        )
+        token = _tenant.set(tenant)
+        try:
+            yield tenant
+        finally:
+            _tenant.reset(token)
+
+    def current(self) -> Optional[Tenant]:
+        return _tenant.get()
+
+    # ---------- 制御 ----------
+
+    def _reject(self, retry_after: float, reason: str) -> AdmissionRejected:
+        with self._lock:
+            self.rejected += 1
+        return AdmissionRejected(retry_after, reason)
+
+    @contextmanager
+    def admit(self, cost: float = 1.0) -> Iterator[None]:
+        """現在のテナントとしてクエリ1回分の実行を許可（拒否時はAdmissionRejected）"""
+        tenant = _tenant.get()
+        if tenant is None or not self.config.enabled:
+            yield
+            return
+
+        user_id = tenant.user_id
+        max_wait = min(
+            self.config.max_wait_seconds,
+            self.config.max_queued_seconds_per_request - tenant.queued_seconds,
+        )
+        wait = self.buckets.reserve(user_id, cost, max(max_wait, 0.0))
+        if wait > max_wait:
+            raise self._reject(wait, "query budget exhausted")
+        if wait > 0:
+            time.sleep(wait)
+
+        started = time.monotonic()
+        acquired = self.slots.acquire(user_id, max(max_wait - wait, 0.0))
+        tenant.queued_seconds += wait + (time.monotonic() - started)
+        if not acquired:
+            self.buckets.refund(user_id, cost)
+            raise self._reject(1.0, "concurrency limit")
+        with self._lock:
+            self.admitted += 1
+        tenant.queries += 1
+        try:
+            yield
+        finally:
+            self.slots.release(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.config.enabled,
+            "globalConcurrency": self.config.global_concurrency,
+            "userConcurrency": self.config.user_concurrency,
+            "userQueriesPerSecond": self.config.user_queries_per_second,
+            "userBurst": self.config.user_burst,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            **self.slots.stats(),
+        }
+
+
+# グローバルインスタンス
+admission_controller = AdmissionController()
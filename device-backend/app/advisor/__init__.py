@@ -0,0 +1,21 @@
+"""
+アドバイザー（チャット）モジュール
+"""
+from .background import summary_refresh_lifespan
+from .config import advisor_config, AdvisorConfig
+from .context import assemble_context, estimate_tokens
+from .model import AdvisorModel, StubAdvisorModel, advisor_model
+from .summaries import SummaryPipeline, summary_pipeline
+
+__all__ = [
+    "summary_refresh_lifespan",
+    "advisor_config",
+    "AdvisorConfig",
+    "assemble_context",
+    "estimate_tokens",
+    "AdvisorModel",
+    "StubAdvisorModel",
+    "advisor_model",
+    "SummaryPipeline",
+    "summary_pipeline",
+]
@@ -0,0 +1,33 @@
+"""
+要約のバックグラウンド更新
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from .config import advisor_config
+from .summaries import summary_pipeline
+
+
+async def refresh_loop(interval: float) -> None:
+    """一定間隔で要約を増分更新"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await loop.run_in_executor(None, summary_pipeline.refresh_tracked)
+            if report["changed"]:
+                print(f"DEBUG: Advisor summaries refreshed: {report}")
+        except Exception as e:
+            print(f"ERROR: Advisor summary refresh failed: {str(e)}")
+
+
+@asynccontextmanager
+async def summary_refresh_lifespan(app: Any) -> AsyncIterator[None]:
+    """要約更新タスクを起動・停止するlifespan"""
+    task = None
+    if advisor_config.refresh_enabled:
+        task = asyncio.create_task(refresh_loop(advisor_config.refresh_seconds))
+    yield
+    if task is not None:
+        task.cancel()
@@ -0,0 +1,32 @@
+"""
+アドバイザー（チャット）設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class AdvisorConfig(BaseSettings):
+    """コンテキスト要約・モデル設定"""
+
+    # 要約に使う期間（時間）とTimestream側で集計するビン幅（分）
+    summary_window_hours: int = Field(default=72, alias="ADVISOR_SUMMARY_WINDOW_HOURS")
+    summary_bin_minutes: int = Field(default=60, alias="ADVISOR_SUMMARY_BIN_MINUTES")
+    # バックグラウンド更新の間隔（秒）
+    refresh_seconds: float = Field(default=300.0, alias="ADVISOR_REFRESH_SECONDS")
+    refresh_enabled: bool = Field(default=True, alias="ADVISOR_REFRESH_ENABLED")
+    # 共有キャッシュに保持する要約のTTL（秒）
+    summary_ttl: float = Field(default=7 * 24 * 3600.0, alias="ADVISOR_SUMMARY_TTL")
+    # コンテキストの既定トークン予算
+    context_token_budget: int = Field(default=1500, alias="ADVISOR_CONTEXT_TOKENS")
+    # stub: ローカルのスタブモデル（外部LLM接続前の動作確認用）
+    model: str = Field(default="stub", alias="ADVISOR_MODEL")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+advisor_config = AdvisorConfig()
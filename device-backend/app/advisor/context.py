@@ -0,0 +1,187 @@
+"""
+トークン予算付きコンテキスト組み立て
+
+保存済みの要約をテキストに整形し、優先度の高い順（指定デバイス → 圃場 → 注意が必要なデバイス）に
+トークン予算に収まるだけ詰める。予算を超えるデバイスは1行の簡易表記に切り替え、それも入らなければ省略する。
+"""
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from .summaries import SummaryPipeline, field_key, summary_pipeline
+
+TokenCounter = Callable[[str], int]
+
+# 残り予算がこれを下回ったら以降のセクションは整形せずに省略する
+MIN_SECTION_TOKENS = 12
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（日本語は1文字≒1トークン、ASCIIは4文字≒1トークン）"""
+    ascii_chars = sum(1 for c in text if c < "\x80")
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
+def attention_score(summary: Dict[str, Any]) -> float:
+    """注意度（低水位・異常・急な変化が大きいほど高い）"""
+    if not summary.get("hasData"):
+        return 0.5
+    score = 0.0
+    if summary["latest"] < summary["lowLevelCm"]:
+        score += 10
+    score += 3 * len(summary["anomalies"])
+    score += min(summary["lowHours"], 24) / 4
+    score += abs(summary["trendCmPerHour"] or 0) * 2
+    return score
+
+
+def render_device(summary: Dict[str, Any], compact: bool = False) -> str:
+    site = summary.get("agriculturalSite") or "-"
+    field = summary.get("fieldName") or "-"
+    name = f"{summary['deviceId']}（{site}/{field}）"
+    if not summary.get("hasData"):
+        return f"- {name}: 期間内データなし"
+    if compact:
+        return (
+            f"- {name}: 現在{summary['latest']}cm 傾き{summary['trendCmPerHour']:+}cm/h"
+            f" 異常{len(summary['anomalies'])}件"
+        )
+    lines = [
+        f"- {name} v{summary['version']}",
+        f"  現在{summary['latest']}cm（〜{summary['dataThrough']}）"
+        f" 平均{summary['mean']}cm 最小{summary['min']['level']}cm"
+        f" 最大{summary['max']['level']}cm",
+        f"  傾き{summary['trendCmPerHour']:+}cm/h 24h変化{summary['change24h']:+}cm"
+        f" 低水位（<{summary['lowLevelCm']:g}cm）{summary['lowHours']}時間",
+    ]
+    if summary["anomalies"]:
+        lines.append(
+            "  異常: "
+            + ", ".join(
+                f"{a['time']} {a['level']}cm(z={a['z']})" for a in summary["anomalies"]
+            )
+        )
+    return "\n".join(lines)
+
+
+def render_field(summary: Dict[str, Any]) -> str:
+    name = f"{summary['agriculturalSite'] or '-'}/{summary['fieldName'] or '-'}"
+    if not summary.get("devicesWithData"):
+        return f"- 圃場 {name}: デバイス{len(summary['devices'])}台（データなし）"
+    return (
+        f"- 圃場 {name} v{summary['version']}: デバイス{len(summary['devices'])}台"
+        f" 現在平均{summary['latestMean']}cm"
+        f"（{summary['latestMin']}〜{summary['latestMax']}cm）"
+        f" 傾き{summary['trendCmPerHour']:+}cm/h 低水位{summary['devicesLow']}台"
+        f" 異常あり{summary['devicesWithAnomalies']}台"
+    )
+
+
+def pack(
+    sections: List[Dict[str, Any]], budget: int, count: TokenCounter
+) -> Dict[str, Any]:
+    """
+    セクションを順に予算内へ詰める
+
+    sectionsの各要素は {"id", "text", "compact"(任意)}。textとcompactは文字列または
+    文字列を返す関数で、関数の場合は実際に詰める候補になった時点で整形する
+    （予算を使い切った後のセクションは整形せずに省略数だけ数える）。
+    """
+    parts: List[str] = []
+    included: List[str] = []
+    compacted: List[str] = []
+    used = 0
+    for section in sections:
+        if budget - used < MIN_SECTION_TOKENS:
+            break
+        for text, bucket in (
+            (section["text"], included),
+            (section.get("compact"), compacted),
+        ):
+            if text is None:
+                continue
+            if callable(text):
+                text = text()
+            tokens = count(text) + 1  # 改行分
+            if used + tokens <= budget:
+                parts.append(text)
+                used += tokens
+                bucket.append(section["id"])
+                break
+    return {
+        "context": "\n".join(parts),
+        "tokens": used,
+        "included": included,
+        "compacted": compacted,
+        "omitted": len(sections) - len(included) - len(compacted),
+    }
+
+
+def assemble_context(
+    user_id: str,
+    budget: int,
+    device_id: Optional[str] = None,
+    count: TokenCounter = estimate_tokens,
+    pipeline: SummaryPipeline = summary_pipeline,
+) -> Dict[str, Any]:
+    """ユーザーのデバイス要約からトークン予算内のコンテキストを組み立てる"""
+    started = time.perf_counter()
+    device_ids = pipeline.user_devices(user_id)
+    devices, fields = pipeline.summaries(user_id, device_ids)
+
+    ordered = sorted(devices.values(), key=attention_score, reverse=True)
+    if device_id in devices:
+        ordered.remove(devices[device_id])
+        ordered.insert(0, devices[device_id])
+
+    header = f"【圃場データ要約】デバイス{len(devices)}台・圃場{len(fields)}件" f"（水位はcm、ビン平均ベース）"
+    sections: List[Dict[str, Any]] = [{"id": "header", "text": header}]
+    if device_id in devices:
+        focus = devices[device_id]
+        sections.append(
+            {
+                "id": f"device:{device_id}",
+                "text": render_device(focus),
+                "compact": render_device(focus, compact=True),
+            }
+        )
+        focus_field = fields.get(field_key(focus))
+        if focus_field:
+            sections.append(
+                {
+                    "id": f"field:{focus_field['fieldKey']}",
+                    "text": render_field(focus_field),
+                }
+            )
+        ordered = ordered[1:]
+    for key, summary in sorted(fields.items()):
+        sections.append({"id": f"field:{key}", "text": render_field(summary)})
+    for summary in ordered:
+        sections.append(
+            {
+                "id": f"device:{summary['deviceId']}",
+                "text": partial(render_device, summary),
+                "compact": partial(render_device, summary, compact=True),
+            }
+        )
+
+    # 同じ圃場を重複して入れない
+    seen = set()
+    unique = [s for s in sections if not (s["id"] in seen or seen.add(s["id"]))]
+
+    result = pack(unique, budget, count)
+    versions = {f"device:{k}": v.get("version") for k, v in devices.items()}
+    versions.update({f"field:{k}": v.get("version") for k, v in fields.items()})
+    result.update(
+        {
+            "budget": budget,
+            # コンテキストに含めた要約のバージョン（回答の再現・キャッシュ判定用）
+            "versions": {
+                key: versions[key]
+                for key in result["included"] + result["compacted"]
+                if key in versions
+            },
+            "elapsedMs": round((time.perf_counter() - started) * 1000, 2),
+        }
+    )
+    return result
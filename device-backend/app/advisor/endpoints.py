@@ -0,0 +1,65 @@
+"""
+アドバイザー（チャット）エンドポイント
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.auth.dependencies import get_current_user_id
+
+from .config import advisor_config
+from .context import assemble_context
+from .model import advisor_model
+from .models import AdvisorChatRequest
+
+router = APIRouter(prefix="/advisor", tags=["アドバイザー"])
+
+
+@router.get(
+    "/context",
+    summary="チャット用コンテキストを取得",
+    description="保存済みのデバイス・圃場要約から、トークン予算内のコンテキストを組み立てます。",
+)
+def advisor_context(
+    deviceId: Optional[str] = None,
+    budget: Optional[int] = Query(None, ge=100, le=32000),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    コンテキスト取得
+
+    - **deviceId**: 優先して含めるデバイス
+    - **budget**: トークン予算（未指定時はADVISOR_CONTEXT_TOKENS）
+    """
+    return assemble_context(
+        user_id,
+        budget or advisor_config.context_token_budget,
+        device_id=deviceId,
+        count=advisor_model.count_tokens,
+    )
+
+
+@router.post(
+    "/chat", summary="アドバイザーに質問", description="圃場データの要約をコンテキストとしてモデルに渡し、回答を返します。"
+)
+def advisor_chat(body: AdvisorChatRequest, user_id: str = Depends(get_current_user_id)):
+    """チャット1ターン"""
+    context = assemble_context(
+        user_id,
+        body.budget or advisor_config.context_token_budget,
+        device_id=body.deviceId,
+        count=advisor_model.count_tokens,
+    )
+    reply = advisor_model.reply(body.message, context["context"])
+    return {
+        **reply,
+        "context": {
+            "tokens": context["tokens"],
+            "budget": context["budget"],
+            "included": context["included"],
+            "compacted": context["compacted"],
+            "omitted": context["omitted"],
+            "versions": context["versions"],
+            "elapsedMs": context["elapsedMs"],
+        },
+    }
@@ -0,0 +1,75 @@
+"""
+アドバイザーモデル
+
+外部LLMへの接続は未導入のため、ローカルで動くスタブモデルを提供する。
+モデルを差し替える場合はAdvisorModelを継承してcreate_modelに追加する。
+"""
+from typing import Any, Dict, List
+
+from .config import AdvisorConfig, advisor_config
+from .context import estimate_tokens
+
+SYSTEM_PROMPT = "あなたは経験豊富な農業専門家です。以下の圃場データ要約を基に、具体的で実用的な水管理のアドバイスを提供してください。"
+
+
+class AdvisorModel:
+    """アドバイザーモデルの共通インターフェース"""
+
+    name = "base"
+
+    def count_tokens(self, text: str) -> int:
+        return estimate_tokens(text)
+
+    def reply(self, message: str, context: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class StubAdvisorModel(AdvisorModel):
+    """
+    ローカルのスタブモデル
+
+    コンテキストの注意項目（低水位・異常）を拾って定型文で回答する。
+    外部通信を行わず、同じ入力には常に同じ回答を返す。
+    """
+
+    name = "stub"
+
+    def reply(self, message: str, context: str) -> Dict[str, Any]:
+        lines = context.splitlines()
+        devices = [
+            line for line in lines if line.startswith("- ") and "圃場 " not in line
+        ]
+        notable = [
+            line
+            for line in lines
+            if "異常:" in line or ("低水位（" in line and "）0時間" not in line)
+        ]
+        answer: List[str] = [
+            f"（スタブ応答）ご質問「{message}」について、" f"デバイス{len(devices)}台分の要約を参照しました。"
+        ]
+        if notable:
+            answer.append("注意が必要な項目:")
+            answer.extend(line.strip() for line in notable[:3])
+            suggestions = ["灌水計画の作成", "排水口の点検手順", "センサーの点検方法"]
+        else:
+            answer.append("現在、要約上で大きな異常は見当たりません。")
+            suggestions = ["水位の推移を確認", "作業提案を確認"]
+        return {
+            "model": self.name,
+            "message": "\n".join(answer),
+            "suggestions": suggestions,
+            "promptTokens": self.count_tokens(SYSTEM_PROMPT)
+            + self.count_tokens(context)
+            + self.count_tokens(message),
+        }
+
+
+def create_model(config: AdvisorConfig = advisor_config) -> AdvisorModel:
+    """設定からモデルを生成"""
+    if config.model.lower() != "stub":
+        print(f"WARNING: Unknown ADVISOR_MODEL '{config.model}', using stub")
+    return StubAdvisorModel()
+
+
+# グローバルインスタンス
+advisor_model = create_model()
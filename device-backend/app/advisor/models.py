@@ -0,0 +1,13 @@
+"""
+アドバイザー関連のPydanticモデル
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class AdvisorChatRequest(BaseModel):
+    """チャットリクエスト"""
+
+    message: str = Field(..., min_length=1, max_length=2000)
+    deviceId: Optional[str] = None  # 指定したデバイスの要約を優先してコンテキストに含める
+    budget: Optional[int] = Field(None, ge=100, le=32000)  # コンテキストのトークン予算
@@ -0,0 +1,472 @@
+"""
+デバイス・圃場のコンテキスト要約
+
+Timestreamの時間ビン集計（平均・最小・最大・件数）をデバイスごとにプロセス内で保持し、
+前回の最終ビン以降だけを取得して増分更新する。要約はバージョン付きで共有キャッシュに保存し、
+内容が変わった場合だけバージョンを上げる。圃場要約はユーザーごとに、そのユーザーが所有するデバイスだけから
+作成する（所属デバイスの要約か所有デバイスが変わった場合だけ再作成）。
+チャットの各ターンは保存済みの要約を読むだけで、生データは参照しない。
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.aws.dynamodb import chunked
+from app.cache import CacheNamespace, shared_cache
+from app.devices.cache import device_master_cache
+from app.devices.ownership import list_user_ownerships
+from app.suggestions import suggestion_config
+from app.suggestions.rules import thresholds_for
+from app.timeseries import split_by_key, timeseries
+
+from .config import AdvisorConfig, advisor_config
+
+# 1クエリのIN句に含めるデバイス数
+QUERY_DEVICE_CHUNK = 200
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_MINUTE = 60_000_000_000
+# ロバストzスコアがこの値を超えたビンを異常として扱う
+ANOMALY_Z = 3.5
+
+Fetch = Callable[[List[str], int, int], Dict[str, np.ndarray]]
+ROLLUP_COLUMNS = ("time", "avgLevel", "minLevel", "maxLevel", "samples")
+
+
+def fetch_rollups(
+    device_ids: List[str], since_ns: int, bin_minutes: int
+) -> Dict[str, np.ndarray]:
+    """時系列リポジトリから時間ビン集計を列配列で取得"""
+    return timeseries.rollup_since(device_ids, since_ns, bin_minutes)
+
+
+def iso_from_ns(value_ns: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value_ns / 1e9))
+
+
+def field_key(device: Dict[str, Any]) -> str:
+    return f"{device.get('agriculturalSite') or ''}/{device.get('fieldName') or ''}"
+
+
+def field_store_key(user_id: str, key: str) -> str:
+    """圃場要約の保存キー（他のユーザーのデバイスを含めないためユーザーごとに分ける）"""
+    return f"field:{user_id}:{key}"
+
+
+def _round(value: float, digits: int = 1) -> Optional[float]:
+    return None if value != value else round(float(value), digits)
+
+
+def summarize_device(
+    device: Dict[str, Any], rollup: Dict[str, np.ndarray], low_level_cm: float
+) -> Dict[str, Any]:
+    """時間ビン集計からデバイス要約を作成（時刻を除く内容が同じなら同じ結果になる）"""
+    summary: Dict[str, Any] = {
+        "deviceId": device["deviceId"],
+        "agriculturalSite": device.get("agriculturalSite"),
+        "fieldName": device.get("fieldName"),
+        "physicalLocation": device.get("physicalLocation"),
+        "deviceType": device.get("deviceType"),
+        "lowLevelCm": low_level_cm,
+    }
+    times = rollup["time"]
+    if not len(times):
+        summary["hasData"] = False
+        return summary
+
+    avg, low, high, samples = (
+        rollup["avgLevel"],
+        rollup["minLevel"],
+        rollup["maxLevel"],
+        rollup["samples"],
+    )
+    hours = (times - times[-1]) / NS_PER_HOUR
+    weights = samples.astype(np.float64)
+
+    # 直近24時間の傾き（cm/時）
+    recent = hours >= -24
+    trend = 0.0
+    if recent.sum() >= 2:
+        trend = float(np.polyfit(hours[recent], avg[recent], 1)[0])
+    # 24時間前のビンとの差
+    day_ago = int(np.searchsorted(times, times[-1] - 24 * NS_PER_HOUR, side="left"))
+
+    # ビン平均のロバストzスコア（中央値・MAD）で異常ビンを抽出
+    median = float(np.median(avg))
+    mad = float(np.median(np.abs(avg - median))) * 1.4826
+    anomalies: List[Dict[str, Any]] = []
+    if mad > 0:
+        z = (avg - median) / mad
+        for index in np.flatnonzero(np.abs(z) > ANOMALY_Z)[-3:].tolist():
+            anomalies.append(
+                {
+                    "time": iso_from_ns(int(times[index])),
+                    "level": _round(avg[index]),
+                    "z": _round(z[index]),
+                }
+            )
+
+    min_at, max_at = int(np.argmin(low)), int(np.argmax(high))
+    summary.update(
+        {
+            "hasData": True,
+            "dataThrough": iso_from_ns(int(times[-1])),
+            "windowHours": _round(-hours[0] + 1, 0),
+            "samples": int(samples.sum()),
+            "latest": _round(avg[-1]),
+            "mean": _round(np.average(avg, weights=weights)),
+            "min": {
+                "level": _round(low[min_at]),
+                "time": iso_from_ns(int(times[min_at])),
+            },
+            "max": {
+                "level": _round(high[max_at]),
+                "time": iso_from_ns(int(times[max_at])),
+            },
+            "trendCmPerHour": _round(trend, 2),
+            "change24h": _round(avg[-1] - avg[day_ago]),
+            "lowHours": int((avg < low_level_cm).sum()),
+            "anomalies": anomalies,
+        }
+    )
+    return summary
+
+
+def summarize_field(key: str, summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """所属デバイスの要約から圃場要約を作成"""
+    site, _, field = key.partition("/")
+    with_data = [s for s in summaries if s.get("hasData")]
+    field_summary: Dict[str, Any] = {
+        "fieldKey": key,
+        "agriculturalSite": site,
+        "fieldName": field,
+        "devices": sorted(s["deviceId"] for s in summaries),
+        "devicesWithData": len(with_data),
+    }
+    if with_data:
+        latest = np.array([s["latest"] for s in with_data], dtype=np.float64)
+        field_summary.update(
+            {
+                "latestMean": _round(latest.mean()),
+                "latestMin": _round(latest.min()),
+                "latestMax": _round(latest.max()),
+                "trendCmPerHour": _round(
+                    np.mean([s["trendCmPerHour"] for s in with_data]), 2
+                ),
+                "devicesLow": sum(
+                    1 for s in with_data if s["latest"] < s["lowLevelCm"]
+                ),
+                "devicesWithAnomalies": sum(1 for s in with_data if s["anomalies"]),
+            }
+        )
+    return field_summary
+
+
+def content_digest(summary: Dict[str, Any]) -> str:
+    return hashlib.sha1(
+        json.dumps(summary, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+class DeviceRollup:
+    """デバイスごとの時間ビン集計（要約期間分）"""
+
+    __slots__ = ("columns", "checked_at", "summarized_for")
+
+    def __init__(self):
+        self.columns: Dict[str, np.ndarray] = {
+            "time": np.empty(0, dtype=np.int64),
+            "avgLevel": np.empty(0),
+            "minLevel": np.empty(0),
+            "maxLevel": np.empty(0),
+            "samples": np.empty(0, dtype=np.int64),
+        }
+        self.checked_at = 0.0
+        # 最後に要約を作成したときのメタデータ（変わったら集計が同じでも作り直す）
+        self.summarized_for: Optional[Tuple[Any, ...]] = None
+
+    @property
+    def last_bin_ns(self) -> Optional[int]:
+        times = self.columns["time"]
+        return int(times[-1]) if len(times) else None
+
+    def merge(
+        self, new: Optional[Dict[str, np.ndarray]], since_ns: int, floor_ns: int
+    ) -> bool:
+        """
+        since_ns以降のビンを新しい集計で置き換え、期間外のビンを捨てる
+
+        Returns:
+            集計が変わった場合True
+        """
+        times = self.columns["time"]
+        keep = (times < since_ns) & (times >= floor_ns)
+        replaced = times >= since_ns
+        changed = bool((times < floor_ns).any())
+        if new is None:
+            changed = changed or bool(replaced.any())
+        else:
+            changed = (
+                changed
+                or len(new["time"]) != int(replaced.sum())
+                or any(
+                    not np.array_equal(self.columns[name][replaced], new[name])
+                    for name in ROLLUP_COLUMNS
+                )
+            )
+        if not changed:
+            return False
+        merged = {}
+        for name in ROLLUP_COLUMNS:
+            parts = [self.columns[name][keep]]
+            if new is not None:
+                parts.append(new[name].astype(self.columns[name].dtype))
+            merged[name] = np.concatenate(parts)
+        self.columns = merged
+        return True
+
+
+class SummaryPipeline:
+    """要約の増分更新と保存"""
+
+    def __init__(
+        self,
+        config: AdvisorConfig = advisor_config,
+        store: Optional[CacheNamespace] = None,
+        fetch: Fetch = fetch_rollups,
+    ):
+        self.config = config
+        self.store = store or shared_cache.namespace(
+            "advisor_summary", config.summary_ttl
+        )
+        self.fetch = fetch
+        self._rollups: Dict[str, DeviceRollup] = {}
+        # バックグラウンド更新対象（deviceId → DeviceMaster）とユーザーごとのデバイス一覧
+        self._tracked: Dict[str, Dict[str, Any]] = {}
+        self._user_devices: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    # ---------- 更新 ----------
+
+    def refresh(
+        self, masters: Dict[str, Dict[str, Any]], force: bool = False
+    ) -> Dict[str, int]:
+        """
+        要約を増分更新
+
+        前回の最終ビン（集計途中の可能性があるため）以降だけを取得し、
+        内容が変わったデバイス・圃場の要約だけを保存する。
+        """
+        now = time.monotonic()
+        now_ns = time.time_ns()
+        bin_ns = self.config.summary_bin_minutes * NS_PER_MINUTE
+        floor_ns = (
+            (now_ns - self.config.summary_window_hours * NS_PER_HOUR) // bin_ns * bin_ns
+        )
+
+        due: List[str] = []
+        with self._lock:
+            for device_id in masters:
+                rollup = self._rollups.setdefault(device_id, DeviceRollup())
+                if force or now - rollup.checked_at >= self.config.refresh_seconds:
+                    rollup.checked_at = now
+                    due.append(device_id)
+
+        changed: List[str] = []
+        # 初回（集計なし）のデバイスと既知のデバイスで取得開始時刻が大きく異なるため分けて問い合わせる
+        cold = [d for d in due if self._rollups[d].last_bin_ns is None]
+        warm = [d for d in due if self._rollups[d].last_bin_ns is not None]
+        for group in (cold, warm):
+            for chunk in chunked(group, QUERY_DEVICE_CHUNK):
+                since_ns = max(
+                    min(self._rollups[d].last_bin_ns or floor_ns for d in chunk),
+                    floor_ns,
+                )
+                by_device = split_by_key(
+                    self.fetch(chunk, since_ns, self.config.summary_bin_minutes)
+                )
+                for device_id in chunk:
+                    rollup = self._rollups[device_id]
+                    merged = rollup.merge(by_device.get(device_id), since_ns, floor_ns)
+                    if self._save_device(masters[device_id], rollup, merged):
+                        changed.append(device_id)
+
+        fields_changed = self._refresh_fields(masters, changed)
+        return {
+            "checked": len(due),
+            "changed": len(changed),
+            "fieldsChanged": fields_changed,
+        }
+
+    def _save_device(
+        self, device: Dict[str, Any], rollup: DeviceRollup, merged: bool
+    ) -> bool:
+        """集計かメタデータが変わったデバイスだけ要約を作り直す"""
+        low = thresholds_for(device, suggestion_config).low_level_cm
+        meta = (
+            low,
+            device.get("agriculturalSite"),
+            device.get("fieldName"),
+            device.get("physicalLocation"),
+            device.get("deviceType"),
+        )
+        if not merged and rollup.summarized_for == meta:
+            return False
+        rollup.summarized_for = meta
+        summary = summarize_device(device, rollup.columns, low)
+        return self._save(f"device:{device['deviceId']}", summary)
+
+    def _save(self, key: str, summary: Dict[str, Any]) -> bool:
+        """内容が変わった場合だけバージョンを上げて保存"""
+        digest = content_digest(summary)
+        previous = self.store.get(key)
+        if previous is not None and previous.get("digest") == digest:
+            return False
+        summary.update(
+            {
+                "version": (previous or {}).get("version", 0) + 1,
+                "digest": digest,
+                "updatedAt": iso_from_ns(time.time_ns()),
+            }
+        )
+        self.store.set(key, summary)
+        return True
+
+    def _refresh_fields(
+        self, masters: Dict[str, Dict[str, Any]], changed: List[str]
+    ) -> int:
+        """要約が変わったデバイスを所有するユーザーの、そのデバイスが属する圃場要約を作り直す"""
+        if not changed:
+            return 0
+        with self._lock:
+            users = {u: list(ids) for u, ids in self._user_devices.items()}
+            known = dict(self._tracked)
+        known.update(masters)
+        changed_ids = set(changed)
+        count = 0
+        for user_id, device_ids in users.items():
+            keys = {
+                field_key(known[d])
+                for d in device_ids
+                if d in changed_ids and d in known
+            }
+            if keys:
+                count += self._save_user_fields(user_id, device_ids, known, keys)
+        return count
+
+    def _save_user_fields(
+        self,
+        user_id: str,
+        device_ids: List[str],
+        known: Dict[str, Dict[str, Any]],
+        keys: Optional[Iterable[str]] = None,
+    ) -> int:
+        """ユーザーの所有デバイスだけから圃場要約を作成（keys省略時は全圃場）"""
+        members: Dict[str, List[str]] = {}
+        for device_id in device_ids:
+            if device_id in known:
+                members.setdefault(field_key(known[device_id]), []).append(device_id)
+        count = 0
+        for key in members if keys is None else keys:
+            summaries = self.store.get_many(f"device:{d}" for d in members.get(key, []))
+            summary = summarize_field(key, list(summaries.values()))
+            if self._save(field_store_key(user_id, key), summary):
+                count += 1
+        return count
+
+    def reload_users(self) -> None:
+        """記録済みユーザーの所有権を読み直し、更新対象を作り直す"""
+        with self._lock:
+            previous = dict(self._user_devices)
+        user_devices: Dict[str, List[str]] = {}
+        tracked: Dict[str, Dict[str, Any]] = {}
+        for user_id in previous:
+            ids = list(
+                dict.fromkeys(o["deviceId"] for o in list_user_ownerships(user_id))
+            )
+            masters = device_master_cache.get_many(ids)
+            user_devices[user_id] = list(masters)
+            tracked.update(masters)
+        with self._lock:
+            self._user_devices.update(user_devices)
+            self._tracked = tracked
+        # 所有デバイスが変わったユーザーは圃場要約を作り直す
+        for user_id, device_ids in user_devices.items():
+            if set(device_ids) != set(previous[user_id]):
+                self._save_user_fields(user_id, device_ids, tracked)
+
+    def refresh_tracked(self) -> Dict[str, int]:
+        """バックグラウンド更新（チャットで参照されたユーザーのデバイスが対象）"""
+        self.reload_users()
+        with self._lock:
+            masters = dict(self._tracked)
+        if not masters:
+            return {"checked": 0, "changed": 0, "fieldsChanged": 0}
+        return self.refresh(masters)
+
+    # ---------- 参照 ----------
+
+    def remember_user(self, user_id: str, masters: Dict[str, Dict[str, Any]]) -> None:
+        """ユーザーのデバイス一覧を記録し、バックグラウンド更新の対象に加える"""
+        with self._lock:
+            self._user_devices[user_id] = list(masters)
+            self._tracked.update(masters)
+
+    def user_devices(self, user_id: str) -> List[str]:
+        """
+        ユーザーのデバイスID一覧
+
+        2回目以降は記録済みの一覧を返す（所有権の変更はreload_usersで反映）。
+        初回は所有権とDeviceMasterを読み、要約がなければその場で作成する。
+        """
+        with self._lock:
+            device_ids = self._user_devices.get(user_id)
+        if device_ids is not None:
+            return device_ids
+
+        ids = list(dict.fromkeys(o["deviceId"] for o in list_user_ownerships(user_id)))
+        masters = device_master_cache.get_many(ids)
+        self.remember_user(user_id, masters)
+        stored = self.store.get_many(f"device:{d}" for d in masters)
+        missing = {d: m for d, m in masters.items() if f"device:{d}" not in stored}
+        if missing:
+            with self._lock:
+                for device_id in missing:
+                    if device_id in self._rollups:
+                        # 共有キャッシュから消えた要約は集計が同じでも保存し直す
+                        self._rollups[device_id].summarized_for = None
+            self.refresh(missing, force=True)
+        self._save_user_fields(user_id, list(masters), masters)
+        return list(masters)
+
+    def forget_user(self, user_id: str) -> None:
+        """次回参照時に所有権を読み直す"""
+        with self._lock:
+            self._user_devices.pop(user_id, None)
+
+    def summaries(
+        self, user_id: str, device_ids: Iterable[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """デバイス要約と、それらが属するユーザーの圃場要約を返す"""
+        devices = {
+            key.split(":", 1)[1]: value
+            for key, value in self.store.get_many(
+                f"device:{d}" for d in device_ids
+            ).items()
+        }
+        prefix = len(field_store_key(user_id, ""))
+        fields = {
+            key[prefix:]: value
+            for key, value in self.store.get_many(
+                field_store_key(user_id, k)
+                for k in {field_key(s) for s in devices.values()}
+            ).items()
+        }
+        return devices, fields
+
+
+# グローバルインスタンス
+summary_pipeline = SummaryPipeline()
@@ -0,0 +1,31 @@
+"""
+水位系列の異常検知モジュール
+
+公開名は初回アクセス時にサブモジュールから読み込む（app.lazy）。
+"""
+from app.lazy import lazy_exports
+
+__all__ = [
+    "anomaly_config",
+    "AnomalyConfig",
+    "KINDS",
+    "SeriesState",
+    "score_batch",
+    "score_one",
+    "AnomalyEngine",
+    "anomaly_engine",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "anomaly_config": ".config",
+        "AnomalyConfig": ".config",
+        "KINDS": ".config",
+        "SeriesState": ".detectors",
+        "score_batch": ".detectors",
+        "score_one": ".detectors",
+        "AnomalyEngine": ".engine",
+        "anomaly_engine": ".engine",
+    },
+)
@@ -0,0 +1,47 @@
+"""
+異常検知設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+# 判定する異常の種類
+KINDS = ("spike", "sudden_drop", "sudden_rise", "flatline")
+
+
+class AnomalyConfig(BaseSettings):
+    """水位系列の異常検知（スパイク・張り付き・急変）の設定"""
+
+    # スパイク: 直前window_points点の平均からの偏差が標準偏差のz_threshold倍以上
+    window_points: int = Field(default=60, alias="ANOMALY_WINDOW_POINTS")
+    z_threshold: float = Field(default=4.0, alias="ANOMALY_Z_THRESHOLD")
+    # ウィンドウにこの点数が溜まるまではスパイクを判定しない
+    min_points: int = Field(default=20, alias="ANOMALY_MIN_POINTS")
+    # 標準偏差の下限（cm）。ほぼ一定の系列で微小な揺れをスパイクと判定しないため
+    min_std_cm: float = Field(default=0.5, alias="ANOMALY_MIN_STD_CM")
+
+    # 急変: 前の点からの変化がstep_cm以上、かつ変化率（cm/分、間隔は1分以上として計算）がrate_cm_per_minute以上
+    step_cm: float = Field(default=3.0, alias="ANOMALY_STEP_CM")
+    rate_cm_per_minute: float = Field(default=0.5, alias="ANOMALY_RATE_CM_PER_MINUTE")
+
+    # 張り付き: 前の点との差がstuck_epsilon_cm以下の点がstuck_points点以上続く
+    stuck_points: int = Field(default=36, alias="ANOMALY_STUCK_POINTS")
+    stuck_epsilon_cm: float = Field(default=0.0, alias="ANOMALY_STUCK_EPSILON_CM")
+
+    # 初回に読む直近データの期間（時間）と、同じデバイスの新着データを確認する最短間隔（秒）
+    lookback_hours: int = Field(default=24, alias="ANOMALY_LOOKBACK_HOURS")
+    refresh_seconds: float = Field(default=60.0, alias="ANOMALY_REFRESH_SECONDS")
+    # 取り込み経由の測定値を時刻順に並べ直すために溜める時間（秒、0で即時に判定）。
+    # 取り込みの並列書き込み・再試行で前後して届く範囲をカバーする長さにする
+    reorder_seconds: float = Field(default=5.0, alias="ANOMALY_REORDER_SECONDS")
+    # デバイスごとに保持する異常（連続した点は1件にまとめる）の件数
+    max_episodes: int = Field(default=200, alias="ANOMALY_MAX_EPISODES")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+anomaly_config = AnomalyConfig()
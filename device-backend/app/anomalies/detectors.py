@@ -0,0 +1,179 @@
+"""
+水位系列の異常判定
+
+各点を次の3種類で判定する。
+  - spike: 直前window_points点（その点を含まない）の平均・標準偏差によるzスコア
+  - sudden_drop / sudden_rise: 前の点からの変化量と変化率（cm/分）
+  - flatline: 前の点とほぼ同じ値が続いた点数
+状態（直前ウィンドウの値と合計・二乗和、前の点、同じ値の連続数）はデバイスごとに持ち越すため、
+新しい点は score_one でO(1)、まとまった系列は score_batch で累積和を使った配列演算で判定でき、
+どちらも同じ結果になる（浮動小数点の丸め誤差を除く）。
+"""
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .config import AnomalyConfig
+
+NS_PER_MINUTE = 60_000_000_000
+
+# 種類 → (判定結果の配列, スコアの配列)。スコアはspikeがzスコア、急変が変化率（cm/分）、flatlineが連続点数
+BatchFlags = Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+class SeriesState:
+    """デバイスごとの判定状態"""
+
+    __slots__ = (
+        "window",
+        "total",
+        "total_sq",
+        "ref",
+        "last_ns",
+        "last_value",
+        "run_length",
+        "run_start_ns",
+        "since_resum",
+    )
+
+    def __init__(self, window_points: int):
+        # 直前window_points点の値（refからの差）と、その合計・二乗和
+        self.window: deque = deque(maxlen=window_points)
+        self.total = 0.0
+        self.total_sq = 0.0
+        # 桁落ちを避けるため、最初の値を基準にした差で合計する
+        self.ref: Optional[float] = None
+        self.last_ns: Optional[int] = None
+        self.last_value = math.nan
+        # 最後の点までの同じ値の連続数と、その開始時刻
+        self.run_length = 0
+        self.run_start_ns = 0
+        # 合計・二乗和を差分更新した回数（ウィンドウ1周ごとに計算し直して誤差をリセットする）
+        self.since_resum = 0
+
+
+def score_one(
+    state: SeriesState, time_ns: int, value: float, config: AnomalyConfig
+) -> Dict[str, float]:
+    """
+    1点を判定して状態を進める（O(1)）
+
+    Returns:
+        該当した種類 → スコア
+    """
+    if state.ref is None:
+        state.ref = value
+    offset = value - state.ref
+    flags: Dict[str, float] = {}
+
+    count = len(state.window)
+    if count >= config.min_points:
+        mean = state.total / count
+        std = max(
+            math.sqrt(max(state.total_sq / count - mean * mean, 0.0)), config.min_std_cm
+        )
+        z = (offset - mean) / std
+        if abs(z) >= config.z_threshold:
+            flags["spike"] = z
+
+    same = False
+    if state.last_ns is not None:
+        delta = value - state.last_value
+        rate = delta / max((time_ns - state.last_ns) / NS_PER_MINUTE, 1.0)
+        if delta <= -config.step_cm and rate <= -config.rate_cm_per_minute:
+            flags["sudden_drop"] = rate
+        elif delta >= config.step_cm and rate >= config.rate_cm_per_minute:
+            flags["sudden_rise"] = rate
+        same = abs(delta) <= config.stuck_epsilon_cm
+    if same:
+        state.run_length += 1
+    else:
+        state.run_length, state.run_start_ns = 1, time_ns
+    if state.run_length >= config.stuck_points:
+        flags["flatline"] = float(state.run_length)
+
+    window = state.window
+    if len(window) == window.maxlen:
+        oldest = window[0]
+        state.total -= oldest
+        state.total_sq -= oldest * oldest
+    window.append(offset)
+    state.total += offset
+    state.total_sq += offset * offset
+    state.since_resum += 1
+    if state.since_resum >= window.maxlen:
+        state.total = math.fsum(window)
+        state.total_sq = math.fsum(v * v for v in window)
+        state.since_resum = 0
+    state.last_ns, state.last_value = time_ns, value
+    return flags
+
+
+def score_batch(
+    state: SeriesState, time_ns: np.ndarray, values: np.ndarray, config: AnomalyConfig
+) -> Tuple[BatchFlags, np.ndarray]:
+    """
+    時刻順の系列をまとめて判定して状態を進める
+
+    ウィンドウの合計・二乗和は（持ち越したウィンドウ + 系列）の累積和の差で求める。
+
+    Returns:
+        (種類 → (判定結果, スコア), 各点の同じ値の連続の開始時刻)
+    """
+    n = len(values)
+    if state.ref is None:
+        state.ref = float(values[0])
+    offsets = values - state.ref
+    carried = np.fromiter(state.window, dtype=np.float64, count=len(state.window))
+    joined = np.concatenate((carried, offsets))
+    sums = np.concatenate(([0.0], np.cumsum(joined)))
+    sums_sq = np.concatenate(([0.0], np.cumsum(joined * joined)))
+
+    # i番目の点のウィンドウは joined[lo:pos]（その点を含まない直前window_points点）
+    pos = len(carried) + np.arange(n)
+    lo = np.maximum(pos - config.window_points, 0)
+    count = pos - lo
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (sums[pos] - sums[lo]) / count
+        var = np.maximum((sums_sq[pos] - sums_sq[lo]) / count - mean * mean, 0.0)
+        z = (offsets - mean) / np.maximum(np.sqrt(var), config.min_std_cm)
+    spike = (count >= config.min_points) & (np.abs(z) >= config.z_threshold)
+
+    prev_values = np.concatenate(([state.last_value], values[:-1]))
+    prev_times = np.concatenate(
+        ([state.last_ns if state.last_ns is not None else 0], time_ns[:-1])
+    )
+    delta = values - prev_values
+    rate = delta / np.maximum((time_ns - prev_times) / NS_PER_MINUTE, 1.0)
+    drop = (delta <= -config.step_cm) & (rate <= -config.rate_cm_per_minute)
+    rise = (delta >= config.step_cm) & (rate >= config.rate_cm_per_minute)
+    # 前の点がない（NaN）場合は比較結果がFalseになり、連続が途切れる
+    same = np.abs(delta) <= config.stuck_epsilon_cm
+
+    index = np.arange(n)
+    last_break = np.maximum.accumulate(np.where(same, -1, index))
+    continued = last_break < 0
+    run_length = np.where(
+        continued, state.run_length + index + 1, index - last_break + 1
+    )
+    run_start = np.where(
+        continued, state.run_start_ns, time_ns[np.maximum(last_break, 0)]
+    )
+
+    state.window.clear()
+    state.window.extend(joined[-config.window_points :].tolist())
+    state.total = math.fsum(state.window)
+    state.total_sq = math.fsum(v * v for v in state.window)
+    state.since_resum = 0
+    state.last_ns, state.last_value = int(time_ns[-1]), float(values[-1])
+    state.run_length, state.run_start_ns = int(run_length[-1]), int(run_start[-1])
+
+    flags: BatchFlags = {
+        "spike": (spike, z),
+        "sudden_drop": (drop, rate),
+        "sudden_rise": (rise, rate),
+        "flatline": (run_length >= config.stuck_points, run_length.astype(np.float64)),
+    }
+    return flags, run_start
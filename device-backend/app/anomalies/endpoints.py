@@ -0,0 +1,83 @@
+"""
+異常検知エンドポイント
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth.dependencies import get_current_user_id
+from app.devices.ownership import find_ownership, list_user_ownerships
+
+from .config import KINDS
+
+router = APIRouter(prefix="/anomalies", tags=["異常検知"])
+
+KIND_PATTERN = f"^({'|'.join(KINDS)})$"
+
+
+def list_anomalies(
+    device_ids: List[str], hours: int, kind: Optional[str], limit: int
+) -> Dict[str, Any]:
+    from .engine import NS_PER_HOUR, anomaly_engine
+
+    refreshed = anomaly_engine.refresh(device_ids)
+    since_ns = time.time_ns() - hours * NS_PER_HOUR
+    anomalies = anomaly_engine.anomalies(device_ids, since_ns, [kind] if kind else None)
+    counts = {k: 0 for k in KINDS}
+    for anomaly in anomalies:
+        counts[anomaly["kind"]] += 1
+    print(
+        f"DEBUG: Anomalies for {len(device_ids)} devices: {len(anomalies)} found,"
+        f" refresh {refreshed}"
+    )
+    return {
+        "totalDevices": len(device_ids),
+        "hours": hours,
+        "counts": counts,
+        "anomalies": anomalies[:limit],
+    }
+
+
+@router.get(
+    "", summary="ユーザーのデバイスの異常を取得", description="ユーザーの全デバイスで検出したスパイク・張り付き・急変を新しい順に返します。"
+)
+def user_anomalies(
+    hours: int = Query(24, ge=1, le=720),
+    kind: Optional[str] = Query(None, pattern=KIND_PATTERN),
+    limit: int = Query(200, ge=1, le=2000),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    異常一覧
+
+    - **hours**: この時間内に続いていた異常を返す
+    - **kind**: spike / sudden_drop / sudden_rise / flatline のいずれかに絞り込む
+    - **limit**: 返す件数の上限
+    """
+    device_ids = list(
+        dict.fromkeys(o["deviceId"] for o in list_user_ownerships(user_id))
+    )
+    return {"userId": user_id, **list_anomalies(device_ids, hours, kind, limit)}
+
+
+@router.get(
+    "/{deviceId}",
+    summary="デバイスの異常を取得",
+    description="指定したデバイスで検出したスパイク・張り付き・急変を新しい順に返します。",
+)
+def device_anomalies(
+    deviceId: str,
+    hours: int = Query(24, ge=1, le=720),
+    kind: Optional[str] = Query(None, pattern=KIND_PATTERN),
+    limit: int = Query(200, ge=1, le=2000),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    デバイスの異常一覧
+
+    - **deviceId**: デバイスID
+    """
+    if not find_ownership(user_id, deviceId):
+        raise HTTPException(404, "Device not found or not owned by user")
+    return {"deviceId": deviceId, **list_anomalies([deviceId], hours, kind, limit)}
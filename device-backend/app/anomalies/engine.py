@@ -0,0 +1,351 @@
+"""
+異常検知エンジン
+
+デバイスごとに判定状態（detectors.SeriesState）と検出した異常を保持する。取り込みAPIで書き込んだ測定値は
+少数ずつ1点ごとに（O(1)）判定し、それ以外のデータは時系列リポジトリから前回の最終時刻より後の新着だけを読んで
+配列演算でまとめて判定する。同じ種類の異常が連続した点は1件（開始・終了時刻、点数、最大スコア）にまとめる。
+取り込みの書き込みは並列で完了順が前後するため、取り込み経由の測定値はデバイスごとにreorder_seconds溜めて
+時刻順に並べ直してから判定する（判定済みの時刻より前に届いた点は遅着として数えて捨てる）。
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.aws.dynamodb import chunked
+from app.liveness import liveness_index
+from app.timeseries import split_by_key, timeseries
+
+from .config import KINDS, AnomalyConfig, anomaly_config
+from .detectors import SeriesState, score_batch, score_one
+
+NS_PER_HOUR = 3_600_000_000_000
+# 1クエリのIN句に含めるデバイス数
+QUERY_DEVICE_CHUNK = 200
+# この点数以下の新着は1点ずつ判定する（配列演算の固定コストの方が大きいため）
+SCALAR_MAX_POINTS = 8
+
+Fetch = Callable[[List[str], int], Dict[str, np.ndarray]]
+# デバイスID → 継続中の異常があるか（変化したデバイスだけ渡す）
+AlertsHook = Callable[[Dict[str, bool]], Any]
+
+
+def fetch_series_since(device_ids: List[str], since_ns: int) -> Dict[str, np.ndarray]:
+    """時系列リポジトリから新着データを列配列で取得（取得した受信時刻は死活インデックスにも反映）"""
+    columns = timeseries.series_since(device_ids, since_ns)
+    liveness_index.observe_columns(columns)
+    return columns
+
+
+def iso_from_ns(value_ns: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value_ns / 1e9))
+
+
+class DeviceAnomalies:
+    """デバイスごとの判定状態と検出済みの異常"""
+
+    __slots__ = ("series", "episodes", "open", "checked_at", "pending", "held_at")
+
+    def __init__(self, config: AnomalyConfig):
+        self.series = SeriesState(config.window_points)
+        self.episodes: deque = deque(maxlen=config.max_episodes)
+        # 種類 → 直前の点まで続いている異常（次の点も該当すれば延長する）
+        self.open: Dict[str, Dict[str, Any]] = {}
+        self.checked_at = 0.0
+        # 判定待ちの測定値（時刻, 値）と、最後に追加した時刻
+        self.pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.held_at = 0.0
+
+
+class AnomalyEngine:
+    """デバイス単位で状態を持ち越す異常検知エンジン"""
+
+    def __init__(
+        self, config: AnomalyConfig = anomaly_config, fetch: Fetch = fetch_series_since
+    ):
+        self.config = config
+        self.fetch = fetch
+        self._states: Dict[str, DeviceAnomalies] = {}
+        # 判定待ちの測定値があるデバイス
+        self._held: Set[str] = set()
+        self._lock = threading.Lock()
+        self.points = 0
+        self.detected = 0
+        self.late = 0
+        # 継続中の異常の有無が変わったデバイスを受け取るコールバック（圃場集計用）
+        self.on_alerts: Optional[AlertsHook] = None
+
+    def _state(self, device_id: str) -> DeviceAnomalies:
+        state = self._states.get(device_id)
+        if state is None:
+            state = self._states[device_id] = DeviceAnomalies(self.config)
+        return state
+
+    def _extend(
+        self,
+        device: DeviceAnomalies,
+        kind: str,
+        start_ns: int,
+        end_ns: int,
+        points: int,
+        value: float,
+        score: float,
+    ) -> int:
+        """異常を記録（直前から続いている場合は延長）し、新しく記録した件数を返す"""
+        episode = device.open.get(kind)
+        if episode is not None:
+            episode["endNs"] = end_ns
+            episode["points"] += points
+            if abs(score) >= abs(episode["score"]):
+                episode["score"], episode["value"] = score, value
+            return 0
+        episode = {
+            "kind": kind,
+            "startNs": start_ns,
+            "endNs": end_ns,
+            "points": points,
+            "value": value,
+            "score": score,
+        }
+        device.episodes.append(episode)
+        device.open[kind] = episode
+        return 1
+
+    def _observe_one(self, device: DeviceAnomalies, time_ns: int, value: float) -> int:
+        flags = score_one(device.series, time_ns, value, self.config)
+        added = 0
+        for kind in KINDS:
+            score = flags.get(kind)
+            if score is None:
+                device.open.pop(kind, None)
+                continue
+            start_ns = device.series.run_start_ns if kind == "flatline" else time_ns
+            added += self._extend(device, kind, start_ns, time_ns, 1, value, score)
+        return added
+
+    def _observe_batch(
+        self, device: DeviceAnomalies, time_ns: np.ndarray, values: np.ndarray
+    ) -> int:
+        flags, run_start = score_batch(device.series, time_ns, values, self.config)
+        added = 0
+        for kind in KINDS:
+            mask, scores = flags[kind]
+            edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+            starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+            if not len(starts) or starts[0] != 0:
+                device.open.pop(kind, None)
+            for start, stop in zip(starts.tolist(), stops.tolist()):
+                peak = start + int(np.argmax(np.abs(scores[start:stop])))
+                start_ns = (
+                    int(run_start[start]) if kind == "flatline" else int(time_ns[start])
+                )
+                added += self._extend(
+                    device,
+                    kind,
+                    start_ns,
+                    int(time_ns[stop - 1]),
+                    stop - start,
+                    float(values[peak]),
+                    float(scores[peak]),
+                )
+                if stop < len(mask):
+                    device.open.pop(kind, None)
+        return added
+
+    def _release(
+        self, device_id: str, device: DeviceAnomalies, changes: Dict[str, bool]
+    ) -> int:
+        """判定待ちの測定値を時刻順に並べて判定し、新しく記録した異常の件数を返す"""
+        parts, device.pending = device.pending, []
+        self._held.discard(device_id)
+        if not parts:
+            return 0
+        time_ns = np.concatenate([t for t, _ in parts])
+        values = np.concatenate([v for _, v in parts])
+        order = np.argsort(time_ns, kind="stable")
+        time_ns, values = time_ns[order], values[order]
+        # 同じ時刻の点（再送・リポジトリからの再取得との重複）は最初の1点だけ
+        unique = np.concatenate(([True], time_ns[1:] != time_ns[:-1]))
+        if device.series.last_ns is not None:
+            unique &= time_ns > device.series.last_ns
+        time_ns, values = time_ns[unique], values[unique]
+        if not len(time_ns):
+            return 0
+        alerting = bool(device.open)
+        if len(time_ns) <= SCALAR_MAX_POINTS:
+            added = sum(
+                self._observe_one(device, t, v)
+                for t, v in zip(time_ns.tolist(), values.tolist())
+            )
+        else:
+            added = self._observe_batch(device, time_ns, values)
+        self.points += len(time_ns)
+        self.detected += added
+        if alerting != bool(device.open):
+            changes[device_id] = not alerting
+        return added
+
+    def _release_due(self, now: float, changes: Dict[str, bool], force: bool) -> int:
+        added = 0
+        for device_id in list(self._held):
+            device = self._states[device_id]
+            if force or now - device.held_at >= self.config.reorder_seconds:
+                added += self._release(device_id, device, changes)
+        return added
+
+    def _notify(self, changes: Dict[str, bool]) -> None:
+        if not changes or self.on_alerts is None:
+            return
+        try:
+            self.on_alerts(changes)
+        except Exception as e:
+            print(f"ERROR: Alerts hook failed for {list(changes)}: {str(e)}")
+
+    def observe(
+        self,
+        device_id: str,
+        time_ns: np.ndarray,
+        values: np.ndarray,
+        hold: bool = True,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        測定値を判定して状態を進める（欠測は無視）
+
+        hold=True（取り込み経由）の場合は判定待ちに加え、最後の追加からreorder_seconds経った
+        デバイスの分をまとめて時刻順に判定する。hold=False（リポジトリから時刻順に読んだ系列）の場合は
+        判定待ちの分と合わせてその場で判定する。
+
+        Returns:
+            この呼び出しで新しく記録した異常の件数
+        """
+        now = time.monotonic() if now is None else now
+        changes: Dict[str, bool] = {}
+        with self._lock:
+            device = self._state(device_id)
+            keep = ~np.isnan(values)
+            last_ns = device.series.last_ns
+            if hold and last_ns is not None:
+                late = keep & (time_ns <= last_ns)
+                self.late += int(late.sum())
+                keep &= ~late
+            if keep.any():
+                device.pending.append((time_ns[keep], values[keep]))
+                device.held_at = now
+                self._held.add(device_id)
+            added = 0
+            if not hold or self.config.reorder_seconds <= 0:
+                added += self._release(device_id, device, changes)
+            added += self._release_due(now, changes, force=False)
+        self._notify(changes)
+        return added
+
+    def flush(self, force: bool = False, now: Optional[float] = None) -> int:
+        """判定待ちの測定値を判定（force=Trueの場合は待ち時間を経過していなくても判定）"""
+        now = time.monotonic() if now is None else now
+        changes: Dict[str, bool] = {}
+        with self._lock:
+            added = self._release_due(now, changes, force)
+        self._notify(changes)
+        return added
+
+    def observe_columns(self, columns: Dict[str, np.ndarray], hold: bool = True) -> int:
+        """deviceId・time・distance列（取り込みAPIの書き込み結果など）をまとめて判定"""
+        if not columns or not len(columns.get("time", ())):
+            return 0
+        return sum(
+            self.observe(device_id, cols["time"], cols["distance"], hold=hold)
+            for device_id, cols in split_by_key(columns).items()
+        )
+
+    def refresh(self, device_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        確認間隔を過ぎたデバイスの新着データを取得して判定
+
+        初回のデバイスはlookback_hours分、既知のデバイスは最後に判定した時刻より後だけを読む。
+        """
+        now = time.monotonic()
+        floor_ns = time.time_ns() - self.config.lookback_hours * NS_PER_HOUR
+        due: List[str] = []
+        with self._lock:
+            for device_id in dict.fromkeys(device_ids):
+                device = self._state(device_id)
+                if now - device.checked_at < self.config.refresh_seconds:
+                    continue
+                device.checked_at = now
+                due.append(device_id)
+
+        detected = 0
+        for chunk in chunked(due, QUERY_DEVICE_CHUNK):
+            since_ns = min(self._states[d].series.last_ns or floor_ns for d in chunk)
+            columns = self.fetch(chunk, max(since_ns, floor_ns))
+            detected += self.observe_columns(columns, hold=False)
+        return {"checked": len(due), "detected": detected}
+
+    def anomalies(
+        self,
+        device_ids: Iterable[str],
+        since_ns: int = 0,
+        kinds: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """since_ns以降も続いていた異常（新しい順）"""
+        self.flush()
+        wanted = set(kinds) if kinds else set(KINDS)
+        result: List[Dict[str, Any]] = []
+        with self._lock:
+            for device_id in dict.fromkeys(device_ids):
+                device = self._states.get(device_id)
+                if device is None:
+                    continue
+                for episode in device.episodes:
+                    if episode["endNs"] >= since_ns and episode["kind"] in wanted:
+                        result.append(self._view(device_id, device, episode))
+        result.sort(key=lambda a: a["end"], reverse=True)
+        return result
+
+    @staticmethod
+    def _view(
+        device_id: str, device: DeviceAnomalies, episode: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return {
+            "deviceId": device_id,
+            "kind": episode["kind"],
+            "start": iso_from_ns(episode["startNs"]),
+            "end": iso_from_ns(episode["endNs"]),
+            "points": episode["points"],
+            "value": round(episode["value"], 2),
+            "score": round(episode["score"], 2),
+            "ongoing": device.open.get(episode["kind"]) is episode,
+        }
+
+    def alerting(self, device_ids: Iterable[str]) -> Dict[str, bool]:
+        """デバイスごとの継続中の異常の有無"""
+        self.flush()
+        with self._lock:
+            return {
+                device_id: bool(self._states[device_id].open)
+                if device_id in self._states
+                else False
+                for device_id in device_ids
+            }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "trackedDevices": len(self._states),
+                "scoredPoints": self.points,
+                "heldDevices": len(self._held),
+                "latePoints": self.late,
+                "detected": self.detected,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._held.clear()
+
+
+# グローバルインスタンス
+anomaly_engine = AnomalyEngine()
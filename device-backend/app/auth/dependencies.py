@@ -5,6 +5,8 @@ from fastapi import HTTPException, Depends, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Dict, Any, Optional
 
+from app.admission import admission_controller
+
 from .jwt_handler import jwt_validator, CognitoJWTError
 
 
@@ -91,6 +93,8 @@ async def get_current_user_id(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="ユーザーIDを取得できません"
         )
+    # このリクエストのTimestreamクエリをユーザー単位で制御する
+    admission_controller.set_tenant(user_id)
     return user_id
 
 
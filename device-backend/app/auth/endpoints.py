@@ -1,7 +1,6 @@
 """
 認証エンドポイント
 """
-import boto3
 import secrets
 import os
 import time
@@ -16,16 +15,18 @@ from .models import (
 )
 from .dependencies import get_current_user
 from .config import cognito_config
+from app.aws import aws_clients
 
 router = APIRouter(prefix="/auth", tags=["認証"])
 
-# Cognitoクライアント
-cognito_client = boto3.client('cognito-idp', region_name=cognito_config.region)
+# Cognitoクライアント（初回利用時に生成）
+cognito_client = aws_clients.lazy_client(
+    'cognito-idp', region_name=cognito_config.region
+)
 
 # DynamoDB接続
-dynamodb = boto3.resource("dynamodb", region_name=cognito_config.region)
 USER_TBL = os.getenv("USER_TABLE", "UserRegistry")
-user_tbl = dynamodb.Table(USER_TBL)
+user_tbl = aws_clients.table(USER_TBL, region_name=cognito_config.region)
 
 def now_utc_iso():
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
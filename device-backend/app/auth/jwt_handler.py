@@ -2,14 +2,15 @@
 JWT認証ハンドラー
 """
 import json
-import requests
-from typing import Dict, Optional, Any
-from jose import jwt, JWTError
-from jose.backends import RSAKey
-from jose.utils import base64url_decode
+from typing import TYPE_CHECKING, Dict, Optional, Any
 import time
 
 from .config import cognito_config
+from app.cache import cache_config, shared_cache
+
+# requests / jose(cryptography) はインポートが重いため初回利用時に読み込む
+if TYPE_CHECKING:
+    from jose.backends import RSAKey
 
 
 class CognitoJWTError(Exception):
@@ -23,7 +24,13 @@ class CognitoJWTValidator:
     def __init__(self):
         self.jwks_cache = {}
         self.jwks_cache_time = 0
-        self.cache_duration = 3600  # 1時間
+        # プロセス内キャッシュは短く保ち、共有キャッシュの無効化に追従させる
+        self.cache_duration = min(60.0, cache_config.jwks_ttl)
+        # 未知のkidによる再取得の最短間隔（不正なトークンで取得元に負荷をかけさせない）
+        self.rotation_check_interval = 30.0
+        self.rotation_checked_at = 0.0
+        # ワーカー間で共有するJWKSキャッシュ
+        self.shared_jwks = shared_cache.namespace("jwks", cache_config.jwks_ttl)
     
     def _get_jwks(self) -> Dict[str, Any]:
         """JWKS（JSON Web Key Set）を取得"""
@@ -33,17 +40,57 @@ class CognitoJWTValidator:
         if (current_time - self.jwks_cache_time) < self.cache_duration and self.jwks_cache:
             return self.jwks_cache
         
+        # 他のワーカーが取得済みであれば共有キャッシュから読む
+        shared = self.shared_jwks.get(cognito_config.jwks_url or "")
+        if shared:
+            self.jwks_cache = shared
+            self.jwks_cache_time = current_time
+            return self.jwks_cache
+
         try:
+            import requests
+
             response = requests.get(cognito_config.jwks_url, timeout=10)
             response.raise_for_status()
             self.jwks_cache = response.json()
             self.jwks_cache_time = current_time
+            self.shared_jwks.set(cognito_config.jwks_url or "", self.jwks_cache)
             return self.jwks_cache
         except Exception as e:
             raise CognitoJWTError(f"JWKS取得エラー: {str(e)}")
     
-    def _get_public_key(self, token: str) -> RSAKey:
+    def invalidate(self) -> None:
+        """JWKSキャッシュを破棄（鍵ローテーション時、全ワーカーに反映）"""
+        self.jwks_cache = {}
+        self.jwks_cache_time = 0
+        self.shared_jwks.invalidate(cognito_config.jwks_url or "")
+
+    def prefetch(self) -> bool:
+        """JWKSを先読みしてキャッシュする（ウォームアップ用）"""
+        if not cognito_config.jwks_url:
+            return False
+        self._get_jwks()
+        return True
+
+    def _find_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        """JWKSからkidに対応する鍵を探す"""
+        for key in self._get_jwks().get('keys', []):
+            if key.get('kid') == kid:
+                return key
+        return None
+
+    def _should_check_rotation(self) -> bool:
+        current_time = time.time()
+        if current_time - self.rotation_checked_at < self.rotation_check_interval:
+            return False
+        self.rotation_checked_at = current_time
+        return True
+
+    def _get_public_key(self, token: str) -> "RSAKey":
         """JWTトークンから公開鍵を取得"""
+        from jose import jwt, JWTError
+        from jose.backends import RSAKey
+
         try:
             # JWTヘッダーをデコード
             header = jwt.get_unverified_header(token)
@@ -53,10 +100,13 @@ class CognitoJWTValidator:
                 raise CognitoJWTError("JWTヘッダーにkidがありません")
             
             # JWKSから対応する鍵を取得
-            jwks = self._get_jwks()
-            for key in jwks.get('keys', []):
-                if key.get('kid') == kid:
-                    return RSAKey(key, algorithm='RS256')
+            key = self._find_key(kid)
+            if key is None and self._should_check_rotation():
+                # 鍵ローテーション後はキャッシュに新しい鍵がないため、破棄して取り直す
+                self.invalidate()
+                key = self._find_key(kid)
+            if key is not None:
+                return RSAKey(key, algorithm='RS256')
             
             raise CognitoJWTError(f"kid {kid} に対応する公開鍵が見つかりません")
             
@@ -65,6 +115,8 @@ class CognitoJWTValidator:
     
     def verify_token(self, token: str) -> Dict[str, Any]:
         """JWTトークンを検証してペイロードを返す"""
+        from jose import jwt, JWTError
+
         try:
             # 公開鍵を取得
             public_key = self._get_public_key(token)
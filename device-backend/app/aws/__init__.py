@@ -0,0 +1,14 @@
+"""
+AWSクライアントモジュール
+"""
+from .clients import aws_clients, AWSClientRegistry, LazyProxy, PoolGauge
+from .config import aws_config, AWSConfig
+
+__all__ = [
+    "aws_clients",
+    "AWSClientRegistry",
+    "LazyProxy",
+    "PoolGauge",
+    "aws_config",
+    "AWSConfig",
+]
@@ -0,0 +1,162 @@
+"""
+AWSクライアントレジストリ
+
+boto3のクライアント/リソースを初回利用時に生成し、プロセス内で共有する。
+"""
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import AWSConfig, aws_config
+
+
+class PoolGauge:
+    """クライアントごとの接続プール使用状況"""
+
+    def __init__(self, name: str, max_connections: int):
+        self.name = name
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.peak = 0
+        self.total_requests = 0
+        self._lock = threading.Lock()
+
+    def on_send(self, **kwargs: Any) -> None:
+        """HTTPリクエスト送信前（リトライ含む試行ごと）"""
+        with self._lock:
+            self.in_flight += 1
+            self.total_requests += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def on_response(self, **kwargs: Any) -> None:
+        """HTTPレスポンス受信後（例外時も呼ばれる）"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """現在値を返す"""
+        with self._lock:
+            return {
+                "client": self.name,
+                "maxConnections": self.max_connections,
+                "inFlight": self.in_flight,
+                "peak": self.peak,
+                "totalRequests": self.total_requests,
+                "utilization": round(self.in_flight / self.max_connections, 3),
+            }
+
+
+class LazyProxy:
+    """初回の属性アクセス時に実体を生成するプロキシ"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._target: Optional[Any] = None
+
+    def _resolve(self) -> Any:
+        if self._target is None:
+            self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+
+class AWSClientRegistry:
+    """boto3クライアント/リソースの遅延生成レジストリ"""
+
+    def __init__(self, config: AWSConfig = aws_config):
+        self._config = config
+        self._session: Any = None
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._resources: Dict[Tuple[str, str], Any] = {}
+        self._gauges: Dict[str, PoolGauge] = {}
+        self._lock = threading.RLock()
+
+    def _get_session(self) -> Any:
+        # boto3のインポート自体も初回利用まで遅延させる
+        if self._session is None:
+            import boto3
+
+            self._session = boto3.session.Session()
+        return self._session
+
+    def _botocore_config(self, region_name: str) -> Any:
+        from botocore.config import Config
+
+        return Config(
+            region_name=region_name,
+            max_pool_connections=self._config.pool_size,
+            tcp_keepalive=self._config.tcp_keepalive,
+            connect_timeout=self._config.connect_timeout,
+            read_timeout=self._config.read_timeout,
+            retries={"mode": "adaptive", "max_attempts": self._config.max_attempts},
+        )
+
+    def _instrument(self, label: str, client: Any) -> None:
+        gauge = PoolGauge(label, self._config.pool_size)
+        client.meta.events.register("before-send", gauge.on_send)
+        client.meta.events.register("response-received", gauge.on_response)
+        self._gauges[label] = gauge
+
+    def client(self, service_name: str, region_name: Optional[str] = None) -> Any:
+        """共有クライアントを取得（初回のみ生成）"""
+        region = region_name or self._config.region
+        key = (service_name, region)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        # botocoreのSessionはスレッドセーフではないため生成はロック下で行う
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._get_session().client(
+                    service_name,
+                    config=self._botocore_config(region),
+                    endpoint_url=self._config.endpoint_url(service_name),
+                )
+                self._instrument(f"{service_name}:{region}", client)
+                self._clients[key] = client
+        return client
+
+    def resource(self, service_name: str, region_name: Optional[str] = None) -> Any:
+        """共有リソースを取得（初回のみ生成）"""
+        region = region_name or self._config.region
+        key = (service_name, region)
+        resource = self._resources.get(key)
+        if resource is not None:
+            return resource
+
+        with self._lock:
+            resource = self._resources.get(key)
+            if resource is None:
+                resource = self._get_session().resource(
+                    service_name,
+                    config=self._botocore_config(region),
+                    endpoint_url=self._config.endpoint_url(service_name),
+                )
+                self._instrument(
+                    f"{service_name}-resource:{region}", resource.meta.client
+                )
+                self._resources[key] = resource
+        return resource
+
+    def table(self, table_name: str, region_name: Optional[str] = None) -> Any:
+        """DynamoDBテーブルの遅延プロキシを返す"""
+        return LazyProxy(
+            lambda: self.resource("dynamodb", region_name).Table(table_name)
+        )
+
+    def lazy_client(self, service_name: str, region_name: Optional[str] = None) -> Any:
+        """クライアントの遅延プロキシを返す"""
+        return LazyProxy(lambda: self.client(service_name, region_name))
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """生成済みクライアントの接続プール使用状況"""
+        with self._lock:
+            gauges = list(self._gauges.values())
+        return {gauge.name: gauge.snapshot() for gauge in gauges}
+
+
+# グローバルインスタンス
+aws_clients = AWSClientRegistry()
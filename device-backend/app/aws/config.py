@@ -0,0 +1,72 @@
+"""
+AWS接続設定
+"""
+from typing import Optional
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class AWSConfig(BaseSettings):
+    """AWS設定"""
+
+    region: str = Field(default="us-east-1", alias="AWS_REGION")
+    # dynamodb-local等を使う場合に指定（例: http://localhost:8001）
+    dynamodb_endpoint_url: Optional[str] = Field(
+        default=None, alias="DYNAMODB_ENDPOINT_URL"
+    )
+
+    # テーブル設定
+    user_table: str = Field(default="UserRegistry", alias="USER_TABLE")
+    device_master_table: str = Field(
+        default="DeviceMaster", alias="DEVICE_MASTER_TABLE"
+    )
+    device_ownership_table: str = Field(
+        default="DeviceOwnership", alias="DEVICE_OWNERSHIP_TABLE"
+    )
+    # デバイスごとの最新測定値（書き込み時に更新、読み取りはBatchGetItem）
+    latest_reading_table: str = Field(
+        default="LatestReading", alias="LATEST_READING_TABLE"
+    )
+    # dynamodb: LatestReadingテーブル / memory: プロセス内（開発・計測用）
+    latest_store_backend: str = Field(default="dynamodb", alias="LATEST_STORE_BACKEND")
+    # ストアの値がこれより古い（秒）場合はTimestreamを確認する（/ingest以外の取り込み経路の新着を拾うため）。0で無制限
+    latest_store_max_age_seconds: float = Field(
+        default=900.0, alias="LATEST_STORE_MAX_AGE_SECONDS"
+    )
+    ts_db: str = Field(default="iot_waterlevel_db", alias="TS_DB")
+    ts_table: str = Field(default="distance_table", alias="TS_TABLE")
+
+    # コネクションプール設定
+    # Starlette(anyio)は同期エンドポイントをデフォルト40スレッドで実行する
+    worker_threads: int = Field(default=40, alias="WORKER_THREADS")
+    # 0の場合はworker_threadsから自動算出
+    max_pool_connections: int = Field(default=0, alias="AWS_MAX_POOL_CONNECTIONS")
+    tcp_keepalive: bool = Field(default=True, alias="AWS_TCP_KEEPALIVE")
+    max_attempts: int = Field(default=5, alias="AWS_MAX_ATTEMPTS")
+    connect_timeout: float = Field(default=3.0, alias="AWS_CONNECT_TIMEOUT")
+    read_timeout: float = Field(default=10.0, alias="AWS_READ_TIMEOUT")
+
+    def endpoint_url(self, service_name: str) -> Optional[str]:
+        """サービスごとのエンドポイント上書き"""
+        if service_name == "dynamodb":
+            return self.dynamodb_endpoint_url or None
+        return None
+
+    @property
+    def pool_size(self) -> int:
+        """クライアントあたりの接続プールサイズ"""
+        if self.max_pool_connections > 0:
+            return self.max_pool_connections
+        # バックグラウンド処理用に余裕を持たせる
+        return self.worker_threads + 10
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+aws_config = AWSConfig()
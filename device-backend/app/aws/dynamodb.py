@@ -0,0 +1,86 @@
+"""
+DynamoDBバッチ操作ヘルパー
+"""
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .clients import aws_clients
+
+# BatchGetItemの1リクエストあたりの最大キー数
+BATCH_GET_LIMIT = 100
+MAX_UNPROCESSED_RETRIES = 8
+
+
+def chunked(items: List[Any], size: int) -> Iterable[List[Any]]:
+    """リストを指定サイズごとに分割"""
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def batch_get_items(
+    table_name: str,
+    keys: List[Dict[str, Any]],
+    projection: Optional[str] = None,
+    consistent_read: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    BatchGetItemで複数アイテムを取得（UnprocessedKeysはバックオフ付きで再試行）
+
+    Args:
+        table_name: テーブル名
+        keys: 主キーのリスト
+        projection: ProjectionExpression（省略時は全属性）
+        consistent_read: 強い整合性読み込みを行うか
+
+    Returns:
+        取得できたアイテムのリスト（順序は保証されない）
+    """
+    dynamodb = aws_clients.resource("dynamodb")
+    items: List[Dict[str, Any]] = []
+
+    for chunk in chunked(keys, BATCH_GET_LIMIT):
+        request: Dict[str, Any] = {"Keys": chunk, "ConsistentRead": consistent_read}
+        if projection:
+            request["ProjectionExpression"] = projection
+        pending: Dict[str, Any] = {table_name: request}
+
+        attempt = 0
+        while pending:
+            response = dynamodb.batch_get_item(RequestItems=pending)
+            items.extend(response.get("Responses", {}).get(table_name, []))
+            pending = response.get("UnprocessedKeys") or {}
+            if pending:
+                attempt += 1
+                if attempt > MAX_UNPROCESSED_RETRIES:
+                    raise RuntimeError(f"BatchGetItem: {table_name} の未処理キーが残りました")
+                time.sleep(min(0.05 * (2**attempt), 2.0))
+
+    return items
+
+
+# BatchWriteItemの1リクエストあたりの最大件数
+BATCH_WRITE_LIMIT = 25
+
+
+def batch_write_items(table_name: str, items: List[Dict[str, Any]]) -> int:
+    """
+    BatchWriteItemで複数アイテムを書き込み（UnprocessedItemsはバックオフ付きで再試行）
+
+    Returns:
+        書き込んだ件数
+    """
+    dynamodb = aws_clients.resource("dynamodb")
+    for chunk in chunked(items, BATCH_WRITE_LIMIT):
+        pending: Dict[str, Any] = {
+            table_name: [{"PutRequest": {"Item": item}} for item in chunk]
+        }
+        attempt = 0
+        while pending:
+            response = dynamodb.batch_write_item(RequestItems=pending)
+            pending = response.get("UnprocessedItems") or {}
+            if pending:
+                attempt += 1
+                if attempt > MAX_UNPROCESSED_RETRIES:
+                    raise RuntimeError(f"BatchWriteItem: {table_name} の未処理アイテムが残りました")
+                time.sleep(min(0.05 * (2**attempt), 2.0))
+    return len(items)
@@ -0,0 +1,24 @@
+"""
+共有キャッシュモジュール
+"""
+from .backends import (
+    CacheBackend,
+    FileCacheBackend,
+    LocalCacheBackend,
+    RedisCacheBackend,
+)
+from .config import cache_config, CacheConfig
+from .shared import shared_cache, CacheNamespace, SharedCache, create_backend
+
+__all__ = [
+    "CacheBackend",
+    "FileCacheBackend",
+    "LocalCacheBackend",
+    "RedisCacheBackend",
+    "cache_config",
+    "CacheConfig",
+    "shared_cache",
+    "CacheNamespace",
+    "SharedCache",
+    "create_backend",
+]
@@ -0,0 +1,221 @@
+"""
+共有キャッシュバックエンド
+
+ワーカープロセス間で共有できるキャッシュストアの実装。
+値はJSON（Decimalを含むDynamoDBアイテムにも対応）でシリアライズする。
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} はシリアライズできません")
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__decimal__" in obj:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def dumps(value: Any) -> str:
+    return json.dumps(value, default=_json_default, ensure_ascii=False)
+
+
+def loads(data: str) -> Any:
+    return json.loads(data, object_hook=_json_object_hook)
+
+
+class CacheBackend:
+    """キャッシュバックエンドの基底クラス"""
+
+    name = "base"
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str) -> int:
+        """プレフィックスに一致するキーを全て削除し、削除件数を返す"""
+        raise NotImplementedError
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        result = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+
+class LocalCacheBackend(CacheBackend):
+    """プロセス内メモリキャッシュ（単一ワーカー用）"""
+
+    name = "local"
+
+    def __init__(self) -> None:
+        self._items: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            self.delete(key)
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._items[key] = (time.time() + ttl, value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._items if key.startswith(prefix)]
+            for key in keys:
+                del self._items[key]
+        return len(keys)
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    ディスク上の共有キャッシュ（同一ホストの複数ワーカー用）
+
+    1キー1ファイルで保存し、書き込みはos.replaceでアトミックに行う。
+    削除は即座に全ワーカーから見える。
+    """
+
+    name = "file"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, quote(key, safe="") + ".json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry["expiresAt"] < time.time():
+            self.delete(key)
+            return None
+        return entry["value"]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = dumps({"expiresAt": time.time() + ttl, "value": value})
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix: str) -> int:
+        quoted = quote(prefix, safe="")
+        count = 0
+        for filename in os.listdir(self.directory):
+            if filename.startswith(quoted) and filename.endswith(".json"):
+                try:
+                    os.unlink(os.path.join(self.directory, filename))
+                    count += 1
+                except FileNotFoundError:
+                    pass
+        return count
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis互換ストアを使う共有キャッシュ（複数ホスト用）
+
+    redis-py互換のクライアント（get/set/delete/mget/scan_iter）を受け取る。
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any, key_prefix: str = "iot-waterlevel:"):
+        self._client = client
+        self.key_prefix = key_prefix
+
+    def _key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    @staticmethod
+    def _decode(raw: Any) -> Optional[Any]:
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return loads(raw)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._decode(self._client.get(self._key(key)))
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        # Redisの有効期限は整数秒のため切り上げる
+        self._client.set(self._key(key), dumps(value), ex=max(1, int(ttl + 0.999)))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._key(key))
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys: List[Any] = list(self._client.scan_iter(match=self._key(prefix) + "*"))
+        if keys:
+            self._client.delete(*keys)
+        return len(keys)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        raws = self._client.mget([self._key(key) for key in keys])
+        result = {}
+        for key, raw in zip(keys, raws):
+            value = self._decode(raw)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        pipeline = self._client.pipeline()
+        expire = max(1, int(ttl + 0.999))
+        for key, value in items.items():
+            pipeline.set(self._key(key), dumps(value), ex=expire)
+        pipeline.execute()
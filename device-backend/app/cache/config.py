@@ -0,0 +1,29 @@
+"""
+共有キャッシュ設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class CacheConfig(BaseSettings):
+    """キャッシュ設定"""
+
+    # local: プロセス内 / file: 同一ホストのワーカー間で共有 / redis: ホスト間で共有
+    backend: str = Field(default="local", alias="CACHE_BACKEND")
+    directory: str = Field(default="/tmp/iot-waterlevel-cache", alias="CACHE_DIR")
+    redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
+
+    # TTL（秒）
+    jwks_ttl: float = Field(default=3600.0, alias="JWKS_CACHE_TTL")
+    device_master_ttl: float = Field(default=300.0, alias="DEVICE_MASTER_CACHE_TTL")
+    latest_reading_ttl: float = Field(default=30.0, alias="LATEST_READING_CACHE_TTL")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+cache_config = CacheConfig()
@@ -0,0 +1,98 @@
+"""
+共有キャッシュ
+
+名前空間ごとにTTLを持つキャッシュをバックエンド上に構築する。
+無効化はバックエンドから直接削除するため、全ワーカーに即座に反映される。
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from .backends import (
+    CacheBackend,
+    FileCacheBackend,
+    LocalCacheBackend,
+    RedisCacheBackend,
+)
+from .config import CacheConfig, cache_config
+
+
+class CacheNamespace:
+    """名前空間付きキャッシュ"""
+
+    def __init__(self, shared: "SharedCache", name: str, ttl: float):
+        self._shared = shared
+        self.name = name
+        self.ttl = ttl
+
+    @property
+    def backend(self) -> CacheBackend:
+        # バックエンドの差し替えに追従するため毎回参照する
+        return self._shared.backend
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.backend.get(self._key(key))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.backend.set(self._key(key), value, ttl if ttl is not None else self.ttl)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        prefix_len = len(self.name) + 1
+        found = self.backend.get_many(self._key(key) for key in keys)
+        return {full_key[prefix_len:]: value for full_key, value in found.items()}
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        if not items:
+            return
+        self.backend.set_many(
+            {self._key(key): value for key, value in items.items()},
+            ttl if ttl is not None else self.ttl,
+        )
+
+    def invalidate(self, key: str) -> None:
+        """1件を無効化（全ワーカーに反映）"""
+        self.backend.delete(self._key(key))
+
+    def clear(self) -> int:
+        """名前空間内の全件を無効化"""
+        return self.backend.delete_prefix(f"{self.name}:")
+
+
+def create_backend(config: CacheConfig = cache_config) -> CacheBackend:
+    """設定からバックエンドを生成"""
+    backend = config.backend.lower()
+    if backend == "file":
+        return FileCacheBackend(config.directory)
+    if backend == "redis":
+        import redis
+
+        return RedisCacheBackend(redis.Redis.from_url(config.redis_url))
+    if backend != "local":
+        print(f"WARNING: Unknown CACHE_BACKEND '{config.backend}', using local")
+    return LocalCacheBackend()
+
+
+class SharedCache:
+    """アプリ全体で共有するキャッシュ（バックエンドは初回利用時に生成）"""
+
+    def __init__(self, config: CacheConfig = cache_config):
+        self._config = config
+        self._backend: Optional[CacheBackend] = None
+
+    @property
+    def backend(self) -> CacheBackend:
+        if self._backend is None:
+            self._backend = create_backend(self._config)
+        return self._backend
+
+    def use_backend(self, backend: CacheBackend) -> None:
+        """バックエンドを差し替える（ローカル検証用）"""
+        self._backend = backend
+
+    def namespace(self, name: str, ttl: float) -> CacheNamespace:
+        return CacheNamespace(self, name, ttl)
+
+
+# グローバルインスタンス
+shared_cache = SharedCache()
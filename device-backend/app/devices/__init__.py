@@ -0,0 +1,15 @@
+"""
+デバイス管理モジュール
+"""
+from .cache import device_master_cache, latest_reading_cache, DeviceMasterCache
+from .latest import LatestReadingStore, latest_store, read_stored, write_back
+
+__all__ = [
+    "device_master_cache",
+    "latest_reading_cache",
+    "DeviceMasterCache",
+    "LatestReadingStore",
+    "latest_store",
+    "read_stored",
+    "write_back",
+]
@@ -0,0 +1,181 @@
+"""
+バッチAPI
+
+複数のGET操作を1リクエストで受け取り、認証を1回だけ行った上で並列に実行する。
+各操作は内部のハンドラ関数を直接呼び出すため、ミドルウェアやJWT検証は繰り返さない。
+バッチ実行中は所有権などの参照結果をリクエストスコープのキャッシュで共有する。
+"""
+import contextvars
+import inspect
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from urllib.parse import parse_qsl, urlsplit
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from app.admission import admission_controller
+
+BATCH_MAX_WORKERS = 8
+
+_scope: contextvars.ContextVar[Optional["RequestScope"]] = contextvars.ContextVar(
+    "batch_request_scope", default=None
+)
+
+
+class RequestScope:
+    """1バッチの間だけ有効な参照結果キャッシュ（同じキーの同時参照は1回にまとめる）"""
+
+    def __init__(self):
+        self._values: Dict[Any, Any] = {}
+        self._locks: Dict[Any, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Any, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._values:
+                    return self._values[key]
+            value = loader()
+            with self._lock:
+                self._values[key] = value
+            return value
+
+
+def in_request_scope() -> bool:
+    """バッチ実行中かどうか"""
+    return _scope.get() is not None
+
+
+def scoped(key: Any, loader: Callable[[], Any]) -> Any:
+    """バッチ実行中ならリクエストスコープで共有し、それ以外は毎回loaderを呼ぶ"""
+    scope = _scope.get()
+    if scope is None:
+        return loader()
+    return scope.get_or_load(key, loader)
+
+
+def _coerce(value: str, annotation: Any) -> Any:
+    """クエリ文字列をハンドラ引数の型に変換"""
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        annotation = args[0] if args else str
+    if annotation is bool:
+        return value.lower() in ("1", "true", "yes", "on")
+    if annotation in (int, float):
+        return annotation(value)
+    return value
+
+
+class BatchRoute:
+    """パステンプレートとハンドラの対応"""
+
+    def __init__(self, template: str, handler: Callable[..., Any]):
+        self.template = template
+        self.handler = handler
+        pattern = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template)
+        self.regex = re.compile(f"^{pattern}$")
+        self.signature = inspect.signature(handler)
+        self.hints = get_type_hints(handler)
+
+    def build_kwargs(
+        self, path_params: Dict[str, str], query: Dict[str, str], user_id: str
+    ) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {}
+        for name, param in self.signature.parameters.items():
+            if name == "user_id":
+                kwargs[name] = user_id
+            elif name in path_params:
+                kwargs[name] = path_params[name]
+            elif name in query:
+                try:
+                    kwargs[name] = _coerce(query[name], self.hints.get(name, str))
+                except ValueError:
+                    raise HTTPException(
+                        422, f"Invalid value for query parameter '{name}'"
+                    )
+            elif param.default is inspect.Parameter.empty:
+                raise HTTPException(422, f"Missing query parameter '{name}'")
+            else:
+                default = param.default
+                # Query(...) で宣言された既定値は実体の値を使う
+                kwargs[name] = getattr(default, "default", default)
+        return kwargs
+
+
+class BatchRouter:
+    """バッチで実行可能なGET操作のレジストリ"""
+
+    def __init__(self):
+        self.routes: List[BatchRoute] = []
+
+    def register(self, template: str, handler: Callable[..., Any]) -> None:
+        """操作を登録（固定パスはパスパラメータを持つパスより先に登録する）"""
+        self.routes.append(BatchRoute(template, handler))
+
+    def resolve(self, path: str) -> Tuple[BatchRoute, Dict[str, str], Dict[str, str]]:
+        parts = urlsplit(path)
+        for route in self.routes:
+            match = route.regex.match(parts.path.rstrip("/") or "/")
+            if match:
+                return route, match.groupdict(), dict(parse_qsl(parts.query))
+        raise HTTPException(404, f"Unsupported batch operation: {parts.path}")
+
+    def _run_one(self, operation: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"id": operation.get("id"), "path": operation["path"]}
+        try:
+            route, path_params, query = self.resolve(operation["path"])
+            body = route.handler(**route.build_kwargs(path_params, query, user_id))
+            result.update(status=200, body=jsonable_encoder(body))
+        except HTTPException as e:
+            result.update(status=e.status_code, detail=e.detail)
+        except Exception as e:
+            print(f"ERROR: Batch operation {operation['path']} failed: {str(e)}")
+            result.update(status=500, detail=str(e))
+        return result
+
+    def execute(
+        self, operations: List[Dict[str, Any]], user_id: str
+    ) -> List[Dict[str, Any]]:
+        """
+        操作を並列に実行し、入力順の結果を返す
+
+        1件の失敗は他の操作に影響せず、その操作のstatus/detailとして返す。
+        """
+        scope = RequestScope()
+
+        def run(operation: Dict[str, Any]) -> Dict[str, Any]:
+            token = _scope.set(scope)
+            try:
+                with admission_controller.tenant(user_id):
+                    return self._run_one(operation, user_id)
+            finally:
+                _scope.reset(token)
+
+        if len(operations) == 1:
+            return [run(operations[0])]
+        with ThreadPoolExecutor(
+            max_workers=min(BATCH_MAX_WORKERS, len(operations))
+        ) as executor:
+            return list(executor.map(run, operations))
+
+
+# グローバルインスタンス
+batch_router = BatchRouter()
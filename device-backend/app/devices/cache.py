@@ -0,0 +1,65 @@
+"""
+DeviceMasterキャッシュ
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from app.aws import aws_clients, aws_config
+from app.aws.dynamodb import batch_get_items
+from app.cache import cache_config, shared_cache, CacheNamespace
+
+
+class DeviceMasterCache:
+    """DeviceMasterアイテムのキャッシュ（共有キャッシュ上に保持）"""
+
+    def __init__(self, table_name: str, cache: CacheNamespace):
+        self.table_name = table_name
+        self._table = aws_clients.table(table_name)
+        self._cache = cache
+
+    def get(self, device_id: str) -> Optional[Dict[str, Any]]:
+        """1件取得（キャッシュミス時はGetItem）"""
+        item = self._cache.get(device_id)
+        if item is not None:
+            return item
+
+        item = self._table.get_item(Key={"deviceId": device_id}).get("Item")
+        if item:
+            self._cache.set(device_id, item)
+        return item
+
+    def get_many(self, device_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """複数取得（キャッシュミス分はBatchGetItemでまとめて取得）"""
+        device_ids = list(dict.fromkeys(device_ids))
+        result: Dict[str, Dict[str, Any]] = self._cache.get_many(device_ids)
+        missing = [device_id for device_id in device_ids if device_id not in result]
+
+        if missing:
+            fetched = batch_get_items(
+                self.table_name, [{"deviceId": device_id} for device_id in missing]
+            )
+            fetched_by_id = {item["deviceId"]: item for item in fetched}
+            self._cache.set_many(fetched_by_id)
+            result.update(fetched_by_id)
+        return result
+
+    def prefetch(self, device_ids: Iterable[str]) -> int:
+        """指定デバイスを先読みし、取得件数を返す"""
+        return len(self.get_many(device_ids))
+
+    def invalidate(self, device_id: str) -> None:
+        """1件を無効化（全ワーカーに反映）"""
+        self._cache.invalidate(device_id)
+
+    def clear(self) -> None:
+        """全件を無効化"""
+        self._cache.clear()
+
+
+# グローバルインスタンス
+device_master_cache = DeviceMasterCache(
+    aws_config.device_master_table,
+    shared_cache.namespace("device_master", cache_config.device_master_ttl),
+)
+latest_reading_cache = shared_cache.namespace(
+    "latest_reading", cache_config.latest_reading_ttl
+)
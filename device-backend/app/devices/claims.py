@@ -0,0 +1,305 @@
+"""
+デバイスクレーム処理
+
+DeviceMasterの更新とDeviceOwnershipの登録を1つのTransactWriteItemsで行う。
+DeviceMasterの `claimedBy` 属性をクレーム済みマーカーとして条件式に使うため、
+同じデバイスへの同時クレームはどちらか一方だけが成功する。
+"""
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.aws import aws_clients, aws_config
+from app.aws.dynamodb import batch_get_items, chunked
+
+# TransactWriteItemsの上限は100アクション。1デバイスあたり2アクションを使う
+BULK_CLAIM_CHUNK_SIZE = 50
+BULK_CLAIM_MAX_WORKERS = 4
+BULK_CLAIM_MAX_ATTEMPTS = 4
+
+
+class DeviceClaimError(Exception):
+    """デバイスクレームエラー"""
+
+    def __init__(self, device_id: str, message: str):
+        super().__init__(message)
+        self.device_id = device_id
+
+
+class DeviceNotFoundError(DeviceClaimError):
+    """DeviceMasterに存在しないデバイス"""
+
+    def __init__(self, device_id: str):
+        super().__init__(device_id, f"Device {device_id} not found in DeviceMaster")
+
+
+class DeviceAlreadyClaimedError(DeviceClaimError):
+    """既に他のユーザーがクレーム済みのデバイス"""
+
+    def __init__(self, device_id: str):
+        super().__init__(
+            device_id, f"Device {device_id} is already claimed by another user"
+        )
+
+
+def now_utc_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def new_ownership_item(device_id: str, user_id: str, now: str) -> Dict[str, Any]:
+    """DeviceOwnershipアイテムを作成（IDは採番スキャン不要のUUID）"""
+    return {
+        "ownershipId": uuid.uuid4().hex,
+        "userId": user_id,
+        "deviceId": device_id,
+        "ownershipType": "owner",
+        "assignedAt": now,
+        "assignedBy": "user",
+        "isActive": "true",
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+
+def build_claim_transaction(
+    device_id: str, user_id: str, lat: float, lon: float, now: str
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    1デバイス分のクレーム用TransactItemsを作成
+
+    Returns:
+        (TransactItems（低レベルAPI形式）, 登録するDeviceOwnershipアイテム)
+    """
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+    ownership_item = new_ownership_item(device_id, user_id, now)
+
+    def av(value: Any) -> Dict[str, Any]:
+        return serializer.serialize(value)
+
+    items = [
+        {
+            # DeviceMaster: 位置更新 + クレーム済みマーカー（未クレームの場合のみ）
+            "Update": {
+                "TableName": aws_config.device_master_table,
+                "Key": {"deviceId": av(device_id)},
+                "UpdateExpression": (
+                    "SET lat = :lat, lon = :lon, updatedAt = :updated_at, "
+                    "claimedBy = :user_id, ownershipId = :ownership_id"
+                ),
+                "ConditionExpression": (
+                    "attribute_exists(deviceId) AND attribute_not_exists(claimedBy)"
+                ),
+                "ExpressionAttributeValues": {
+                    ":lat": av(Decimal(str(lat))),
+                    ":lon": av(Decimal(str(lon))),
+                    ":updated_at": av(now),
+                    ":user_id": av(user_id),
+                    ":ownership_id": av(ownership_item["ownershipId"]),
+                },
+                # 失敗理由（未登録 / クレーム済み）の判別に使う
+                "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+            }
+        },
+        {
+            # DeviceOwnership: 所有権を登録
+            "Put": {
+                "TableName": aws_config.device_ownership_table,
+                "Item": {key: av(value) for key, value in ownership_item.items()},
+                "ConditionExpression": "attribute_not_exists(ownershipId)",
+            }
+        },
+    ]
+    return items, ownership_item
+
+
+def claim_failure(device_id: str, reason: Dict[str, Any]) -> DeviceClaimError:
+    """CancellationReasonから例外を作成"""
+    if reason.get("Code") == "ConditionalCheckFailed" and not reason.get("Item"):
+        return DeviceNotFoundError(device_id)
+    # ConditionalCheckFailed（クレーム済み）/ TransactionConflict（同時クレーム）
+    return DeviceAlreadyClaimedError(device_id)
+
+
+def claim_device_atomically(
+    device_id: str, user_id: str, lat: float, lon: float
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    デバイスをクレーム（テーブルサイズに依存せず2往復で完了）
+
+    1. TransactWriteItems（DeviceMaster更新 + DeviceOwnership登録）
+    2. GetItem（強い整合性でDeviceMasterの更新後アイテムを取得）
+
+    Returns:
+        (更新後のDeviceMasterアイテム, 登録したDeviceOwnershipアイテム)
+
+    Raises:
+        DeviceNotFoundError: DeviceMasterに存在しない場合
+        DeviceAlreadyClaimedError: 既にクレーム済み、または同時クレームに負けた場合
+    """
+    from botocore.exceptions import ClientError
+
+    dynamodb = aws_clients.resource("dynamodb")
+    transact_items, ownership_item = build_claim_transaction(
+        device_id, user_id, lat, lon, now_utc_iso()
+    )
+
+    try:
+        dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "TransactionCanceledException":
+            raise
+        reasons = e.response.get("CancellationReasons") or []
+        reason = next((r for r in reasons if r.get("Code") not in (None, "None")), {})
+        raise claim_failure(device_id, reason)
+
+    device_master = dynamodb.Table(aws_config.device_master_table).get_item(
+        Key={"deviceId": device_id}, ConsistentRead=True
+    )["Item"]
+    return device_master, ownership_item
+
+
+def bulk_claim_result(
+    device_id: str, status: str, detail: Optional[str] = None
+) -> Dict[str, Any]:
+    return {"deviceId": device_id, "status": status, "detail": detail}
+
+
+def _claim_chunk(
+    user_id: str, claims: List[Tuple[str, float, float]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    1トランザクション分（最大50デバイス）をクレーム
+
+    一部のデバイスが条件式で失敗した場合はトランザクション全体が取り消されるため、
+    失敗したデバイスを除いて再実行する。
+    """
+    from botocore.exceptions import ClientError
+
+    client = aws_clients.resource("dynamodb").meta.client
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = list(claims)
+
+    for attempt in range(BULK_CLAIM_MAX_ATTEMPTS):
+        if not pending:
+            break
+        now = now_utc_iso()
+        transact_items: List[Dict[str, Any]] = []
+        ownership_items = []
+        for device_id, lat, lon in pending:
+            items, ownership_item = build_claim_transaction(
+                device_id, user_id, lat, lon, now
+            )
+            transact_items.extend(items)
+            ownership_items.append(ownership_item)
+
+        try:
+            client.transact_write_items(TransactItems=transact_items)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                # チャンク単位で失敗として返し、他のチャンクは継続する
+                print(f"ERROR: Bulk claim transaction failed: {str(e)}")
+                for device_id, _, _ in pending:
+                    results[device_id] = bulk_claim_result(device_id, "error", str(e))
+                return results
+            reasons = e.response.get("CancellationReasons") or []
+            retry = []
+            for index, claim in enumerate(pending):
+                device_reasons = reasons[index * 2 : index * 2 + 2]
+                failed = [
+                    r
+                    for r in device_reasons
+                    if r.get("Code") not in (None, "None", "TransactionConflict")
+                ]
+                if failed and failed[0].get("Code") == "ConditionalCheckFailed":
+                    error = claim_failure(claim[0], failed[0])
+                    status = (
+                        "not_found"
+                        if isinstance(error, DeviceNotFoundError)
+                        else "conflict"
+                    )
+                    results[claim[0]] = bulk_claim_result(claim[0], status, str(error))
+                else:
+                    # 競合・スロットリング等で巻き込まれて取り消されたものは再試行
+                    retry.append(claim)
+            pending = retry
+            time.sleep(min(0.05 * (2**attempt), 1.0))
+            continue
+
+        for (device_id, _, _), ownership_item in zip(pending, ownership_items):
+            result = bulk_claim_result(device_id, "claimed")
+            result["assignedAt"] = ownership_item["assignedAt"]
+            results[device_id] = result
+        pending = []
+
+    for device_id, _, _ in pending:
+        results[device_id] = bulk_claim_result(
+            device_id, "error", "Transaction retries exhausted"
+        )
+    return results
+
+
+def claim_devices_bulk(
+    user_id: str, claims: List[Tuple[str, float, float]]
+) -> List[Dict[str, Any]]:
+    """
+    複数デバイスを一括クレーム
+
+    1. BatchGetItemで全デバイスの存在とクレーム状態を事前検証
+    2. 残りを50デバイスずつのトランザクションに分割し並列に書き込み
+
+    Returns:
+        リクエスト順のデバイスごとの結果（status: claimed / conflict / not_found / duplicate / error）
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    unique: Dict[str, Tuple[str, float, float]] = {}
+    duplicates = []
+    for claim in claims:
+        if claim[0] in unique:
+            duplicates.append(claim[0])
+        else:
+            unique[claim[0]] = claim
+
+    # 1. 事前検証（書き込み前に明らかな失敗を除外する）
+    masters = {
+        item["deviceId"]: item
+        for item in batch_get_items(
+            aws_config.device_master_table,
+            [{"deviceId": device_id} for device_id in unique],
+            projection="deviceId, claimedBy",
+        )
+    }
+    candidates = []
+    for device_id, claim in unique.items():
+        master = masters.get(device_id)
+        if master is None:
+            results[device_id] = bulk_claim_result(
+                device_id, "not_found", str(DeviceNotFoundError(device_id))
+            )
+        elif master.get("claimedBy"):
+            results[device_id] = bulk_claim_result(
+                device_id, "conflict", str(DeviceAlreadyClaimedError(device_id))
+            )
+        else:
+            candidates.append(claim)
+
+    # 2. チャンク単位のトランザクションを並列実行
+    chunks = list(chunked(candidates, BULK_CLAIM_CHUNK_SIZE))
+    if chunks:
+        with ThreadPoolExecutor(
+            max_workers=min(BULK_CLAIM_MAX_WORKERS, len(chunks))
+        ) as executor:
+            for chunk_results in executor.map(
+                lambda chunk: _claim_chunk(user_id, chunk), chunks
+            ):
+                results.update(chunk_results)
+
+    ordered = [results[device_id] for device_id in unique]
+    ordered.extend(
+        bulk_claim_result(device_id, "duplicate", "Duplicate deviceId in request")
+        for device_id in duplicates
+    )
+    return ordered
@@ -0,0 +1,71 @@
+"""
+複数デバイスの履歴比較
+
+同じ圃場・拠点のデバイスの水位を並べて見るため、指定したデバイスの時間ビン平均を
+1回の集約クエリ（deviceId・時間ビンでGROUP BY）で取得し、共通の時刻軸に揃えた列で返す。
+データのないビンはnull。
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.timeseries import float_or_none, format_timestamps, timeseries
+
+NS_PER_MINUTE = 60_000_000_000
+# 1回の比較で指定できるデバイス数（1クエリのIN句に収まる範囲）と、時刻軸のビン数の上限
+MAX_COMPARE_DEVICES = 50
+MAX_COMPARE_BINS = 2000
+
+
+def align_bins(
+    columns: Dict[str, np.ndarray],
+    device_ids: List[str],
+    start_ns: int,
+    bin_ns: int,
+    bins: int,
+) -> np.ndarray:
+    """deviceId・time・distance列を (デバイス数, ビン数) の行列に並べる（データのないビンはNaN）"""
+    matrix = np.full((len(device_ids), bins), np.nan)
+    if not columns:
+        return matrix
+    row_of = {device_id: i for i, device_id in enumerate(device_ids)}
+    rows = np.fromiter(
+        (row_of.get(d, -1) for d in columns["deviceId"]),
+        dtype=np.int64,
+        count=len(columns["deviceId"]),
+    )
+    cols = (columns["time"] - start_ns) // bin_ns
+    valid = (rows >= 0) & (cols >= 0) & (cols < bins)
+    matrix[rows[valid], cols[valid]] = columns["distance"][valid]
+    return matrix
+
+
+def build_comparison(
+    device_ids: List[str], hours: int, bucket_minutes: int, now_ns: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    直近hours時間をbucket_minutes分ビンで揃えた比較データを作成
+
+    Returns:
+        {"deviceIds", "hours", "bucketMinutes", "time": ビン開始時刻,
+         "series": {deviceId: 時刻軸と同じ長さの平均水位（nullあり）}}
+    """
+    now_ns = now_ns or time.time_ns()
+    bin_ns = bucket_minutes * NS_PER_MINUTE
+    # Timestreamのbin()と同じくエポック基準で切り下げた時刻軸
+    start_ns = (now_ns - hours * 60 * NS_PER_MINUTE) // bin_ns * bin_ns
+    bins = int((now_ns // bin_ns * bin_ns - start_ns) // bin_ns) + 1
+
+    columns = timeseries.aggregate(device_ids, hours, bucket_minutes)
+    matrix = align_bins(columns, device_ids, start_ns, bin_ns, bins)
+    axis = start_ns + np.arange(bins, dtype=np.int64) * bin_ns
+    return {
+        "deviceIds": device_ids,
+        "hours": hours,
+        "bucketMinutes": bucket_minutes,
+        "time": format_timestamps(axis),
+        "series": {
+            device_id: float_or_none(row) for device_id, row in zip(device_ids, matrix)
+        },
+    }
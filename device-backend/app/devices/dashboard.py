@@ -0,0 +1,140 @@
+"""
+ダッシュボード集約
+
+ユーザーのデバイス一覧・最新値・24時間スパークラインを、
+所有権参照1回 + DeviceMasterバッチ読み込み + 集約済みTimestreamクエリで作成する。
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from app.aws.dynamodb import chunked
+from app.liveness import liveness_index
+from app.timeseries import (
+    float_or_none,
+    format_timestamps,
+    split_by_key,
+    timeseries,
+)
+
+from .cache import device_master_cache, latest_reading_cache
+from .latest import read_stored, write_back
+from .ownership import list_user_ownerships
+
+# 1クエリのIN句に含めるデバイス数
+QUERY_DEVICE_CHUNK = 200
+
+
+def fetch_latest_readings(
+    device_ids: List[str], window_hours: int
+) -> Dict[str, Dict[str, Any]]:
+    """最新値をまとめて取得（共有キャッシュ → 最新値ストア → 集約クエリ）"""
+    latest: Dict[str, Dict[str, Any]] = latest_reading_cache.get_many(device_ids)
+    missing = [device_id for device_id in device_ids if device_id not in latest]
+
+    fetched: Dict[str, Dict[str, Any]] = read_stored(missing)
+    missing = [device_id for device_id in missing if device_id not in fetched]
+    for chunk in chunked(missing, QUERY_DEVICE_CHUNK):
+        columns = timeseries.batch_latest(chunk, window_hours)
+        liveness_index.observe_columns(columns)
+        write_back(columns)
+        for device_id, cols in split_by_key(columns).items():
+            fetched[device_id] = {
+                "time": format_timestamps(cols["time"])[0],
+                "distance": float_or_none(cols["distance"])[0],
+            }
+    # 見つかった値だけキャッシュする（期間内に値がないデバイスを空の値で固定しない）
+    latest_reading_cache.set_many(fetched)
+    latest.update(fetched)
+    for device_id in missing:
+        latest.setdefault(device_id, {"time": None, "distance": None})
+    return latest
+
+
+def fetch_sparklines(
+    device_ids: List[str], hours: int, bucket_minutes: int
+) -> Dict[str, Dict[str, List[Any]]]:
+    """時間ビン平均のスパークラインをまとめて取得"""
+    series: Dict[str, Dict[str, List[Any]]] = {}
+    for chunk in chunked(device_ids, QUERY_DEVICE_CHUNK):
+        columns = timeseries.aggregate(chunk, hours, bucket_minutes)
+        for device_id, cols in split_by_key(columns).items():
+            series[device_id] = {
+                "time": format_timestamps(cols["time"]),
+                "distance": float_or_none(cols["distance"]),
+            }
+    return series
+
+
+def to_float(value: Any) -> Any:
+    return float(value) if value is not None else None
+
+
+def build_dashboard(
+    user_id: str,
+    sparkline_hours: int = 24,
+    bucket_minutes: int = 30,
+    latest_window_hours: int = 168,
+) -> Dict[str, Any]:
+    """ダッシュボード用の集約レスポンスを作成"""
+    ownerships = list_user_ownerships(user_id)
+    device_ids = list(dict.fromkeys(o["deviceId"] for o in ownerships))
+    masters = device_master_cache.get_many(device_ids)
+    device_ids = [device_id for device_id in device_ids if device_id in masters]
+
+    latest: Dict[str, Dict[str, Any]] = {}
+    sparklines: Dict[str, Dict[str, List[Any]]] = {}
+    if device_ids:
+        # 最新値とスパークラインのクエリは独立しているため並行実行する
+        # （リクエストのコンテキスト（アドミッション制御のユーザー）を引き継ぐ）
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            latest_future = executor.submit(
+                contextvars.copy_context().run,
+                fetch_latest_readings,
+                device_ids,
+                latest_window_hours,
+            )
+            sparkline_future = executor.submit(
+                contextvars.copy_context().run,
+                fetch_sparklines,
+                device_ids,
+                sparkline_hours,
+                bucket_minutes,
+            )
+            latest = latest_future.result()
+            sparklines = sparkline_future.result()
+
+    devices = []
+    for ownership in ownerships:
+        device = masters.get(ownership["deviceId"])
+        if not device:
+            continue
+        device_id = device["deviceId"]
+        reading = latest.get(device_id, {})
+        devices.append(
+            {
+                "deviceId": device_id,
+                "deviceType": device.get("deviceType"),
+                "agriculturalSite": device.get("agriculturalSite"),
+                "fieldName": device.get("fieldName"),
+                "physicalLocation": device.get("physicalLocation"),
+                "lat": to_float(device.get("lat")),
+                "lon": to_float(device.get("lon")),
+                "isActive": device.get("isActive"),
+                "ownershipType": ownership["ownershipType"],
+                "assignedAt": ownership["assignedAt"],
+                "latestDistance": reading.get("distance"),
+                "lastUpdate": reading.get("time"),
+                "sparkline": sparklines.get(device_id, {"time": [], "distance": []}),
+            }
+        )
+
+    return {
+        "userId": user_id,
+        "totalDevices": len(devices),
+        "generatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sparklineHours": sparkline_hours,
+        "bucketMinutes": bucket_minutes,
+        "devices": devices,
+    }
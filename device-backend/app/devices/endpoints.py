@@ -0,0 +1,144 @@
+"""
+デバイス関連エンドポイント
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth.dependencies import get_current_user_id
+
+from .batch import batch_router
+from .cache import device_master_cache
+from .claims import claim_devices_bulk
+from .compare import MAX_COMPARE_BINS, MAX_COMPARE_DEVICES, build_comparison
+from .dashboard import build_dashboard
+from .models import BatchRequest, BatchResponse, BulkClaimRequest, BulkClaimResponse
+from .ownership import list_user_ownerships
+
+router = APIRouter(prefix="/devices", tags=["デバイス"])
+
+
+@router.post(
+    "/claim/bulk",
+    response_model=BulkClaimResponse,
+    summary="デバイスを一括クレーム",
+    description="複数デバイスをまとめてクレームし、デバイスごとの結果を返します。",
+)
+def bulk_claim_devices(
+    body: BulkClaimRequest, user_id: str = Depends(get_current_user_id)
+):
+    """
+    デバイス一括クレーム（最大500台）
+
+    - **devices**: {deviceId, lat, lon} のリスト
+    """
+    from app.sites import site_index
+
+    results = claim_devices_bulk(
+        user_id, [(d.deviceId, d.lat, d.lon) for d in body.devices]
+    )
+    claimed = [r["deviceId"] for r in results if r["status"] == "claimed"]
+    for device_id in claimed:
+        device_master_cache.invalidate(device_id)
+    if claimed and not site_index.needs_build(user_id):
+        # 作成済みの圃場集計にクレームしたデバイスを追加する
+        for device_id, master in device_master_cache.get_many(claimed).items():
+            site_index.assign(
+                user_id,
+                device_id,
+                master.get("agriculturalSite") or "",
+                master.get("fieldName") or "",
+            )
+
+    print(f"DEBUG: Bulk claim by user {user_id}: {len(claimed)}/{len(results)} claimed")
+    return BulkClaimResponse(
+        claimed=len(claimed),
+        failed=len(results) - len(claimed),
+        results=results,
+    )
+
+
+@router.get(
+    "/dashboard",
+    summary="ダッシュボード情報を一括取得",
+    description="ユーザーのデバイス一覧・最新値・24時間スパークラインを1回のリクエストで取得します。",
+)
+def devices_dashboard(
+    sparklineHours: int = Query(24, ge=1, le=168),
+    bucketMinutes: int = Query(30, ge=1, le=1440),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    ダッシュボード一括取得
+
+    - **sparklineHours**: スパークラインの対象期間（時間）
+    - **bucketMinutes**: スパークラインの集計間隔（分）
+    """
+    return build_dashboard(
+        user_id, sparkline_hours=sparklineHours, bucket_minutes=bucketMinutes
+    )
+
+
+@router.get(
+    "/compare",
+    summary="複数デバイスの履歴を時刻を揃えて比較",
+    description="指定したデバイスの時間ビン平均を1回の集約クエリで取得し、共通の時刻軸に揃えた列で返します。",
+)
+def devices_compare(
+    deviceIds: str = Query(..., description="カンマ区切りのデバイスID"),
+    hours: int = Query(24, ge=1, le=720),
+    bucketMinutes: int = Query(30, ge=1, le=1440),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    履歴比較
+
+    - **deviceIds**: 比較するデバイスID（カンマ区切り、最大50台）
+    - **hours**: 対象期間（時間）
+    - **bucketMinutes**: 集計間隔（分）。time と series の各デバイスの値は同じ長さで、データのないビンはnull
+    """
+    device_ids = list(
+        dict.fromkeys(d.strip() for d in deviceIds.split(",") if d.strip())
+    )
+    if not device_ids:
+        raise HTTPException(400, "deviceIds is required")
+    if len(device_ids) > MAX_COMPARE_DEVICES:
+        raise HTTPException(
+            400, f"Compare accepts at most {MAX_COMPARE_DEVICES} devices"
+        )
+    if hours * 60 // bucketMinutes > MAX_COMPARE_BINS:
+        raise HTTPException(
+            400, f"Too many bins (max {MAX_COMPARE_BINS}); increase bucketMinutes"
+        )
+
+    # 所有権は1回の参照でまとめて確認する
+    owned = {o["deviceId"] for o in list_user_ownerships(user_id)}
+    missing = [d for d in device_ids if d not in owned]
+    if missing:
+        raise HTTPException(
+            404, f"Devices not found or not owned by user: {', '.join(missing)}"
+        )
+
+    return build_comparison(device_ids, hours, bucketMinutes)
+
+
+@router.post(
+    "/batch",
+    response_model=BatchResponse,
+    summary="複数のGET操作を一括実行",
+    description="デバイス関連のGET操作をまとめて受け取り、並列に実行して操作ごとの結果を返します。",
+)
+def batch_operations(body: BatchRequest, user_id: str = Depends(get_current_user_id)):
+    """
+    バッチ実行（最大50操作）
+
+    - **operations**: {id, path} のリスト。pathはクエリ文字列を含めてよい
+      （/devices, /devices/stats, /devices/{deviceId}, /devices/{deviceId}/latest,
+      /devices/{deviceId}/history）
+    """
+    results = batch_router.execute([op.model_dump() for op in body.operations], user_id)
+    succeeded = sum(1 for r in results if r["status"] < 400)
+    print(f"DEBUG: Batch by user {user_id}: {succeeded}/{len(results)} succeeded")
+    return BatchResponse(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results,
+    )
@@ -0,0 +1,121 @@
+"""
+フリートインベントリ集計
+
+DeviceMasterを1回のストリーミングスキャンで集計する。
+保持するのは集計値とサンプルのみのため、メモリ使用量はテーブルサイズに依存しない
+（グループ数にのみ比例する）。
+"""
+import random
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.aws import aws_clients
+
+# 集計に使う属性（statusとlocationはDynamoDBの予約語のため名前を置換する）
+INVENTORY_ATTRIBUTES = [
+    "deviceId",
+    "deviceType",
+    "label",
+    "status",
+    "agriculturalSite",
+    "location",
+    "fieldName",
+    "firmwareVersion",
+    "claimedBy",
+    "isActive",
+]
+
+
+class FleetInventory:
+    """ストリーミング集計器"""
+
+    def __init__(self, sample_size: int = 5, seed: Optional[int] = None):
+        self.sample_size = sample_size
+        self.total = 0
+        self.claimed = 0
+        self.by_status: Counter = Counter()
+        self.by_site: Counter = Counter()
+        self.by_firmware: Counter = Counter()
+        self.sample: List[Dict[str, Any]] = []
+        self._random = random.Random(seed)
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """1件を集計（サンプルはリザーバサンプリングで一様に選ぶ）"""
+        self.total += 1
+        if item.get("claimedBy"):
+            self.claimed += 1
+        self.by_status[item.get("status", "unknown")] += 1
+        self.by_site[item.get("agriculturalSite") or item.get("location") or "未設定"] += 1
+        self.by_firmware[item.get("firmwareVersion", "unknown")] += 1
+
+        if len(self.sample) < self.sample_size:
+            self.sample.append(item)
+        else:
+            j = self._random.randrange(self.total)
+            if j < self.sample_size:
+                self.sample[j] = item
+
+    def add_all(self, items: Iterable[Dict[str, Any]]) -> "FleetInventory":
+        for item in items:
+            self.add(item)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "totalItems": self.total,
+            "claimedItems": self.claimed,
+            "byStatus": dict(self.by_status.most_common()),
+            "bySite": dict(self.by_site.most_common()),
+            "byFirmware": dict(self.by_firmware.most_common()),
+            "sample": self.sample,
+        }
+
+
+def iter_table_items(
+    table_name: str, page_size: int = 1000
+) -> Iterable[Dict[str, Any]]:
+    """集計用属性だけを射影してページ単位でスキャン"""
+    table = aws_clients.table(table_name)
+    names = {f"#a{i}": attr for i, attr in enumerate(INVENTORY_ATTRIBUTES)}
+    scan_kwargs: Dict[str, Any] = {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+        "Limit": page_size,
+    }
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def table_metadata(table_name: str) -> Dict[str, Any]:
+    """DescribeTableのメタデータ（件数・サイズは約6時間ごとに更新される概算値）"""
+    table = aws_clients.table(table_name)
+    table.load()
+    return {
+        "tableName": table.table_name,
+        "tableStatus": table.table_status,
+        "approximateItemCount": table.item_count,
+        "tableSizeBytes": table.table_size_bytes,
+    }
+
+
+def build_inventory(
+    table_name: str, sample_size: int = 5, scan: bool = True
+) -> Dict[str, Any]:
+    """
+    インベントリを作成
+
+    Args:
+        table_name: DeviceMasterテーブル名
+        sample_size: 返すサンプル件数
+        scan: Falseの場合はメタデータのみ（スキャンしない）
+    """
+    report: Dict[str, Any] = {"table": table_metadata(table_name)}
+    if scan:
+        report.update(
+            FleetInventory(sample_size).add_all(iter_table_items(table_name)).to_dict()
+        )
+    return report
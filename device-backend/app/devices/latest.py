@@ -0,0 +1,199 @@
+"""
+最新測定値ストア
+
+デバイスIDをキーに最新の測定値を1件だけ保持する。取り込み時に「保持している時刻より新しい場合だけ」
+条件付きで書き込み、読み取りはBatchGetItemでまとめて行う。ストアにないデバイスと、
+保持している値が latest_store_max_age_seconds より古いデバイス（/ingest以外の経路で取り込まれた
+新着がある可能性がある）は呼び出し側がTimestreamにフォールバックし、取得した値をストアに書き戻す。
+"""
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from app.aws import aws_clients, aws_config
+from app.aws.dynamodb import batch_get_items
+from app.timeseries import format_timestamps, split_by_key
+
+
+def latest_per_device(columns: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+    """deviceId・time・distance列からデバイスごとの最新値を取り出す"""
+    latest: Dict[str, Dict[str, Any]] = {}
+    if not columns or not len(columns.get("deviceId", ())):
+        return latest
+    for device_id, cols in split_by_key(columns).items():
+        valid = ~np.isnan(cols["distance"])
+        if not valid.any():
+            continue
+        index = int(np.argmax(np.where(valid, cols["time"], np.iinfo(np.int64).min)))
+        latest[device_id] = {
+            "timeNs": int(cols["time"][index]),
+            "distance": float(cols["distance"][index]),
+        }
+    return latest
+
+
+def to_reading(item: Dict[str, Any]) -> Dict[str, Any]:
+    """ストアのアイテムを最新値形式（time, distance と鮮度判定用のtimeNs）に変換"""
+    return {
+        "time": item["time"],
+        "distance": float(item["distance"]),
+        "timeNs": int(item["timeNs"]),
+    }
+
+
+class LatestReadingStore:
+    """最新測定値ストアの共通インターフェース"""
+
+    name = "base"
+
+    def get_many(self, device_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """保持しているデバイスの最新値（{time, distance, timeNs}）"""
+        raise NotImplementedError
+
+    def put_if_newer(self, device_id: str, time_ns: int, distance: float) -> bool:
+        """保持している時刻より新しい場合だけ書き込み、書き込んだらTrue"""
+        raise NotImplementedError
+
+    def put_columns(self, columns: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+        """
+        deviceId・time・distance列の各デバイスの最新値を書き込む（デバイスごとに1回）
+
+        Returns:
+            更新したデバイスの最新値（{time, distance}）
+        """
+        latest = latest_per_device(columns)
+        if not latest:
+            return {}
+        times = format_timestamps(
+            np.array([v["timeNs"] for v in latest.values()], dtype=np.int64)
+        )
+        updated = {}
+        for (device_id, value), time_str in zip(latest.items(), times):
+            if self.put_if_newer(device_id, value["timeNs"], value["distance"]):
+                updated[device_id] = {"time": time_str, "distance": value["distance"]}
+        return updated
+
+
+class DynamoLatestStore(LatestReadingStore):
+    """
+    DynamoDBのLatestReadingテーブル
+
+    テーブル: パーティションキー deviceId。timeNs（エポックナノ秒）で新旧を比較する
+    """
+
+    name = "dynamodb"
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.table = aws_clients.table(table_name)
+
+    def get_many(self, device_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        keys = [{"deviceId": device_id} for device_id in dict.fromkeys(device_ids)]
+        if not keys:
+            return {}
+        # アイテムは数属性だけなので射影はしない（timeは予約語のため属性名の置換が必要になる）
+        items = batch_get_items(self.table_name, keys)
+        return {item["deviceId"]: to_reading(item) for item in items}
+
+    def put_if_newer(self, device_id: str, time_ns: int, distance: float) -> bool:
+        from botocore.exceptions import ClientError
+
+        time_str = format_timestamps(np.array([time_ns], dtype=np.int64))[0]
+        try:
+            self.table.put_item(
+                Item={
+                    "deviceId": device_id,
+                    "timeNs": time_ns,
+                    "time": time_str,
+                    "distance": Decimal(repr(distance)),
+                    "updatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                },
+                ConditionExpression="attribute_not_exists(deviceId) OR timeNs < :t",
+                ExpressionAttributeValues={":t": time_ns},
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
+
+
+class MemoryLatestStore(LatestReadingStore):
+    """プロセス内の最新測定値ストア（開発・計測用）"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, device_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                device_id: to_reading(self.items[device_id])
+                for device_id in device_ids
+                if device_id in self.items
+            }
+
+    def put_if_newer(self, device_id: str, time_ns: int, distance: float) -> bool:
+        with self._lock:
+            current: Optional[Dict[str, Any]] = self.items.get(device_id)
+            if current is not None and current["timeNs"] >= time_ns:
+                return False
+            self.items[device_id] = {
+                "timeNs": time_ns,
+                "time": format_timestamps(np.array([time_ns], dtype=np.int64))[0],
+                "distance": distance,
+            }
+            return True
+
+
+def create_latest_store(
+    backend: str = aws_config.latest_store_backend,
+) -> LatestReadingStore:
+    """設定から最新測定値ストアを生成"""
+    if backend.lower() == "memory":
+        return MemoryLatestStore()
+    if backend.lower() != "dynamodb":
+        print(f"WARNING: Unknown LATEST_STORE_BACKEND '{backend}', using dynamodb")
+    return DynamoLatestStore(aws_config.latest_reading_table)
+
+
+# グローバルインスタンス
+latest_store = create_latest_store()
+
+
+def read_stored(
+    device_ids: Iterable[str],
+    max_age_seconds: float = aws_config.latest_store_max_age_seconds,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    ストアから最新値（{time, distance}）をまとめて取得
+
+    max_age_secondsより古い値と、ストア障害時は返さない（呼び出し側はTimestreamにフォールバック）。
+    """
+    try:
+        stored = latest_store.get_many(device_ids)
+    except Exception as e:
+        print(f"WARNING: Latest reading store read failed: {str(e)}")
+        return {}
+    oldest_ns = (
+        time.time_ns() - int(max_age_seconds * 1e9) if max_age_seconds > 0 else 0
+    )
+    return {
+        device_id: {"time": reading["time"], "distance": reading["distance"]}
+        for device_id, reading in stored.items()
+        if reading["timeNs"] >= oldest_ns
+    }
+
+
+def write_back(columns: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+    """Timestreamから取得した最新値をストアに書き戻す（既により新しい値があれば書き込まない）"""
+    try:
+        return latest_store.put_columns(columns)
+    except Exception as e:
+        print(f"WARNING: Latest reading store write failed: {str(e)}")
+        return {}
@@ -0,0 +1,67 @@
+"""
+デバイス関連のPydanticモデル
+"""
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+
+class ClaimRequest(BaseModel):
+    """デバイスクレームリクエスト"""
+
+    deviceId: str
+    lat: float
+    lon: float
+
+
+class BulkClaimRequest(BaseModel):
+    """一括クレームリクエスト"""
+
+    devices: List[ClaimRequest] = Field(..., min_length=1, max_length=500)
+
+
+class BulkClaimResult(BaseModel):
+    """デバイスごとのクレーム結果"""
+
+    deviceId: str
+    status: str  # claimed / conflict / not_found / duplicate / error
+    detail: Optional[str] = None
+    assignedAt: Optional[str] = None
+
+
+class BulkClaimResponse(BaseModel):
+    """一括クレームレスポンス"""
+
+    claimed: int
+    failed: int
+    results: List[BulkClaimResult]
+
+
+class BatchOperation(BaseModel):
+    """バッチ内の1操作（GET）"""
+
+    id: Optional[str] = None  # 結果との対応付け用（任意）
+    path: str  # 例: /devices/{deviceId}/history?hours=24
+
+
+class BatchRequest(BaseModel):
+    """バッチリクエスト"""
+
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=50)
+
+
+class BatchResult(BaseModel):
+    """操作ごとの結果"""
+
+    id: Optional[str] = None
+    path: str
+    status: int  # HTTPステータスコード相当
+    body: Optional[Any] = None
+    detail: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    """バッチレスポンス"""
+
+    succeeded: int
+    failed: int
+    results: List[BatchResult]
@@ -0,0 +1,79 @@
+"""
+デバイス所有権の参照
+"""
+from typing import Any, Dict, List, Optional
+
+from app.aws import aws_clients, aws_config
+
+from .batch import in_request_scope, scoped
+
+ownership_tbl = aws_clients.table(aws_config.device_ownership_table)
+
+
+def _scan_all(**scan_kwargs: Any) -> List[Dict[str, Any]]:
+    items: List[Dict[str, Any]] = []
+    while True:
+        response = ownership_tbl.scan(**scan_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def list_user_ownerships(user_id: str) -> List[Dict[str, Any]]:
+    """ユーザーの有効な所有権を全件取得（バッチ実行中は1回のスキャンを共有）"""
+    return scoped(
+        ("ownerships", user_id),
+        lambda: _scan_all(
+            FilterExpression="userId = :user_id AND isActive = :active",
+            ExpressionAttributeValues={":user_id": user_id, ":active": "true"},
+        ),
+    )
+
+
+def find_ownership(user_id: str, device_id: str) -> Optional[Dict[str, Any]]:
+    """ユーザーが指定デバイスを所有していればその所有権を返す"""
+    if in_request_scope():
+        # バッチ内では他の操作と共有しているユーザー単位の一覧から引く
+        for item in list_user_ownerships(user_id):
+            if item["deviceId"] == device_id:
+                return item
+        return None
+    items = _scan_all(
+        FilterExpression=(
+            "userId = :user_id AND deviceId = :device_id AND isActive = :active"
+        ),
+        ExpressionAttributeValues={
+            ":user_id": user_id,
+            ":device_id": device_id,
+            ":active": "true",
+        },
+    )
+    return items[0] if items else None
+
+
+def owned_device_ids(user_id: str, device_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """指定デバイスのうちユーザーが所有するものを1回の参照でまとめて確認"""
+    requested = set(device_ids)
+    return {
+        item["deviceId"]: item
+        for item in list_user_ownerships(user_id)
+        if item["deviceId"] in requested
+    }
+
+
+def owners_of(device_ids: List[str]) -> List[str]:
+    """指定デバイスのいずれかを所有するユーザーID（重複なし）"""
+    users: Dict[str, None] = {}
+    unique = list(dict.fromkeys(device_ids))
+    # IN句のオペランドは最大100個
+    for start in range(0, len(unique), 100):
+        chunk = unique[start : start + 100]
+        names = {f":d{i}": device_id for i, device_id in enumerate(chunk)}
+        items = _scan_all(
+            FilterExpression=f"deviceId IN ({', '.join(names)}) AND isActive = :active",
+            ExpressionAttributeValues={**names, ":active": "true"},
+            ProjectionExpression="userId",
+        )
+        users.update((item["userId"], None) for item in items)
+    return list(users)
@@ -0,0 +1,25 @@
+"""
+履歴エクスポートモジュール
+
+公開名は初回アクセス時にサブモジュールから読み込む（app.lazy）。
+"""
+from app.lazy import lazy_exports
+
+__all__ = [
+    "export_config",
+    "ExportConfig",
+    "ExportUnavailable",
+    "export_history",
+    "stream_export",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "export_config": ".config",
+        "ExportConfig": ".config",
+        "ExportUnavailable": ".writer",
+        "export_history": ".writer",
+        "stream_export": ".writer",
+    },
+)
@@ -0,0 +1,32 @@
+"""
+履歴エクスポート設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class ExportConfig(BaseSettings):
+    """Parquet / Arrow IPCエクスポートの設定"""
+
+    # 1回のエクスポートで指定できるデバイス数・期間の上限
+    max_devices: int = Field(default=500, alias="EXPORT_MAX_DEVICES")
+    max_days: int = Field(default=400, alias="EXPORT_MAX_DAYS")
+    # 1クエリのIN句に含めるデバイス数
+    device_chunk: int = Field(default=200, alias="EXPORT_DEVICE_CHUNK")
+    # 行グループ（Arrow IPCではレコードバッチ）の行数。ページをこの行数まで溜めてから書き出す
+    row_group_rows: int = Field(default=131072, alias="EXPORT_ROW_GROUP_ROWS")
+    # zstd / lz4 / snappy（Parquetのみ）/ none
+    compression: str = Field(default="zstd", alias="EXPORT_COMPRESSION")
+    # ストリーミング応答: 送信チャンクのバイト数と、書き出し済みで未送信のチャンク数の上限（超えると読み取りを待たせる）
+    chunk_bytes: int = Field(default=1048576, alias="EXPORT_CHUNK_BYTES")
+    queue_chunks: int = Field(default=8, alias="EXPORT_QUEUE_CHUNKS")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+export_config = ExportConfig()
@@ -0,0 +1,107 @@
+"""
+履歴エクスポートエンドポイント
+"""
+import contextvars
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.admission import admission_controller
+from app.auth.dependencies import get_current_user_id
+from app.devices.ownership import list_user_ownerships
+
+from .config import export_config
+
+router = APIRouter(prefix="/export", tags=["エクスポート"])
+
+
+def parse_time(value: str, name: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(400, f"Invalid {name}: {value}")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@router.get(
+    "/history",
+    summary="履歴データをParquet / Arrow IPCでエクスポート",
+    description="指定したデバイス・期間の生データを列形式のファイルとしてストリーミングで返します。",
+)
+def export_history_file(
+    deviceIds: Optional[str] = Query(None, description="カンマ区切りのデバイスID（省略時は所有する全デバイス）"),
+    start: Optional[str] = Query(None, description="開始時刻（ISO 8601、省略時は end の days 日前）"),
+    end: Optional[str] = Query(None, description="終了時刻（ISO 8601、含まない。省略時は現在）"),
+    days: int = Query(30, ge=1),
+    format: str = Query("parquet", description="parquet / arrow（Arrow IPCストリーム）"),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    履歴データのエクスポート
+
+    行はdeviceId・時刻順で、列は deviceId（文字列）・time（UTCのナノ秒タイムスタンプ）・distance（float64）。
+    """
+    from .writer import FORMATS, ExportUnavailable, stream_export
+
+    if format not in FORMATS:
+        raise HTTPException(400, f"Unsupported export format: {format}")
+    end_at = parse_time(end, "end") if end else datetime.now(timezone.utc)
+    start_at = parse_time(start, "start") if start else end_at - timedelta(days=days)
+    if start_at >= end_at:
+        raise HTTPException(400, "start must be before end")
+    if end_at - start_at > timedelta(days=export_config.max_days):
+        raise HTTPException(400, f"Export range exceeds {export_config.max_days} days")
+
+    owned = list(dict.fromkeys(o["deviceId"] for o in list_user_ownerships(user_id)))
+    if deviceIds:
+        requested = list(
+            dict.fromkeys(d.strip() for d in deviceIds.split(",") if d.strip())
+        )
+        owned_set = set(owned)
+        missing = [d for d in requested if d not in owned_set]
+        if missing:
+            raise HTTPException(
+                404, f"Devices not found or not owned by user: {', '.join(missing)}"
+            )
+        device_ids = requested
+    else:
+        device_ids = owned
+    if len(device_ids) > export_config.max_devices:
+        raise HTTPException(
+            400, f"Export accepts at most {export_config.max_devices} devices"
+        )
+
+    since_ns = int(start_at.timestamp() * 1_000_000) * 1000
+    until_ns = int(end_at.timestamp() * 1_000_000) * 1000
+
+    def run_as_user(fn):
+        # 書き出しスレッドのクエリもこのユーザーの予算で実行する
+        with admission_controller.tenant(user_id):
+            return fn()
+
+    try:
+        chunks = stream_export(
+            device_ids,
+            since_ns,
+            until_ns,
+            format,
+            context_run=lambda fn: contextvars.copy_context().run(run_as_user, fn),
+        )
+        # pyarrowの有無は最初のチャンクを要求する前に確認する
+        first = next(chunks, b"")
+    except ExportUnavailable as e:
+        raise HTTPException(503, str(e))
+
+    def body():
+        yield first
+        yield from chunks
+
+    media_type, extension = FORMATS[format]
+    filename = f"history-{start_at:%Y%m%dT%H%M%SZ}-{end_at:%Y%m%dT%H%M%SZ}.{extension}"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,247 @@
+"""
+履歴のParquet / Arrow IPC書き出し
+
+時系列リポジトリのページ（Timestreamの場合はクエリ結果の1ページ）を受け取るたびに列配列のまま
+Arrowテーブルに変換し、row_group_rows行に達したら1つの行グループとして書き出す。
+保持するのは書き出し前の1行グループ分だけなので、期間やデバイス数によらずメモリは一定に収まる。
+pyarrowはエクスポートを使う場合だけ必要（未インストールの場合はExportUnavailable）。
+"""
+import io
+import queue
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from app.aws.dynamodb import chunked
+from app.timeseries import TimeSeriesRepository, timeseries
+
+from .config import ExportConfig, export_config
+
+# 形式 → (Content-Type, 拡張子)
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+class ExportUnavailable(Exception):
+    """pyarrowがインストールされていない"""
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ExportUnavailable("pyarrow is required for history export")
+    return pyarrow
+
+
+def history_schema() -> Any:
+    pa = _pyarrow()
+    return pa.schema(
+        [
+            ("deviceId", pa.string()),
+            ("time", pa.timestamp("ns", tz="UTC")),
+            ("distance", pa.float64()),
+        ]
+    )
+
+
+def to_table(columns: Dict[str, np.ndarray], schema: Any) -> Any:
+    """列配列（deviceId, time: エポックns, distance）をArrowテーブルに変換（NaNはnull）"""
+    pa = _pyarrow()
+    return pa.Table.from_arrays(
+        [
+            pa.array(columns["deviceId"], type=pa.string()),
+            pa.array(columns["time"], type=pa.int64()).cast(schema.field("time").type),
+            pa.array(columns["distance"], type=pa.float64(), from_pandas=True),
+        ],
+        schema=schema,
+    )
+
+
+class TableWriter:
+    """ParquetWriter / IPCストリームの共通ラッパー"""
+
+    def __init__(self, fmt: str, sink: Any, schema: Any, compression: str):
+        pa = _pyarrow()
+        codec = None if compression == "none" else compression
+        self.fmt = fmt
+        if fmt == "parquet":
+            self._writer = pa.parquet.ParquetWriter(
+                sink, schema, compression=codec or "none"
+            )
+        elif fmt == "arrow":
+            options = pa.ipc.IpcWriteOptions(compression=codec)
+            self._writer = pa.ipc.new_stream(sink, schema, options=options)
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+    def write(self, table: Any) -> None:
+        if self.fmt == "parquet":
+            self._writer.write_table(table, row_group_size=table.num_rows)
+        else:
+            for batch in table.combine_chunks().to_batches():
+                self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def export_history(
+    device_ids: Iterable[str],
+    since_ns: int,
+    until_ns: int,
+    fmt: str,
+    sink: Any,
+    repository: TimeSeriesRepository = timeseries,
+    config: ExportConfig = export_config,
+) -> Dict[str, int]:
+    """
+    デバイス群の [since_ns, until_ns) の生データをsinkに書き出す（deviceId・時刻順）
+
+    Returns:
+        {"rows", "rowGroups", "pages"}
+    """
+    pa = _pyarrow()
+    schema = history_schema()
+    writer = TableWriter(fmt, sink, schema, config.compression.lower())
+    stats = {"rows": 0, "rowGroups": 0, "pages": 0}
+    pending: List[Any] = []
+    pending_rows = 0
+
+    def flush() -> None:
+        nonlocal pending, pending_rows
+        if pending:
+            writer.write(pa.concat_tables(pending))
+            stats["rowGroups"] += 1
+            stats["rows"] += pending_rows
+        pending, pending_rows = [], 0
+
+    try:
+        for chunk in chunked(list(dict.fromkeys(device_ids)), config.device_chunk):
+            for page in repository.iter_series(chunk, since_ns, until_ns):
+                stats["pages"] += 1
+                pending.append(to_table(page, schema))
+                pending_rows += len(page["time"])
+                if pending_rows >= config.row_group_rows:
+                    flush()
+        flush()
+    finally:
+        writer.close()
+    return stats
+
+
+class ExportCancelled(Exception):
+    """クライアントが切断した"""
+
+
+class QueueSink(io.RawIOBase):
+    """
+    書き出されたバイト列をchunk_bytesごとにまとめて有限キューへ渡すシンク
+
+    キューが一杯の間は書き込みを待たせるため、クライアントが遅くてもメモリは queue_chunks × chunk_bytes で頭打ちになる。
+    """
+
+    def __init__(self, chunks: "queue.Queue[Any]", chunk_bytes: int):
+        super().__init__()
+        self.chunks = chunks
+        self.chunk_bytes = chunk_bytes
+        self.position = 0
+        self.cancelled = threading.Event()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def write(self, data: Any) -> int:
+        if self.cancelled.is_set():
+            raise ExportCancelled()
+        size = len(data)
+        self._buffer += data
+        self.position += size
+        if len(self._buffer) >= self.chunk_bytes:
+            self.flush()
+        return size
+
+    def flush(self) -> None:
+        if self._buffer and not self.cancelled.is_set():
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _put(self, item: Any) -> None:
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise ExportCancelled()
+
+    def close(self) -> None:
+        # pyarrowが書き出し終了時に閉じるが、残りの送信は呼び出し側がflushで行う
+        pass
+
+
+_DONE = object()
+
+
+def stream_export(
+    device_ids: List[str],
+    since_ns: int,
+    until_ns: int,
+    fmt: str,
+    context_run: Optional[Any] = None,
+    config: ExportConfig = export_config,
+    repository: TimeSeriesRepository = timeseries,
+) -> Iterator[bytes]:
+    """
+    書き出しを別スレッドで行い、バイト列のチャンクを順に返す（ストリーミング応答用）
+
+    context_runにはcontextvars.Context.runを渡す（アドミッション制御のテナントを書き出しスレッドに引き継ぐ）。
+    """
+    _pyarrow()
+    chunks: "queue.Queue[Any]" = queue.Queue(maxsize=config.queue_chunks)
+    sink = QueueSink(chunks, config.chunk_bytes)
+
+    def run() -> None:
+        try:
+            stats = export_history(
+                device_ids, since_ns, until_ns, fmt, sink, repository, config
+            )
+            sink.flush()
+            print(f"DEBUG: Export finished: {stats}, {sink.position} bytes")
+        except ExportCancelled:
+            print("DEBUG: Export cancelled by client")
+            return
+        except Exception as e:
+            print(f"ERROR: Export failed: {str(e)}")
+            sink._put(e)
+            return
+        sink._put(_DONE)
+
+    thread = threading.Thread(
+        target=(lambda: context_run(run)) if context_run else run,
+        name="export",
+        daemon=True,
+    )
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                # 送信開始前の失敗（クエリ予算切れなど）は呼び出し側がエラー応答にする。
+                # 送信開始後も例外を送出してASGIサーバーにチャンク応答を中断させる
+                # （正常終了に見える途中までのファイルを返さない）
+                raise item
+            yield item
+    finally:
+        sink.cancelled.set()
@@ -0,0 +1,31 @@
+"""
+水位予測モジュール
+
+公開名は初回アクセス時にサブモジュールから読み込む（app.lazy）。
+"""
+from app.lazy import lazy_exports
+
+__all__ = [
+    "forecast_config",
+    "ForecastConfig",
+    "Forecaster",
+    "forecaster",
+    "ForecastModel",
+    "fit",
+    "predict",
+    "update",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "forecast_config": ".config",
+        "ForecastConfig": ".config",
+        "Forecaster": ".forecaster",
+        "forecaster": ".forecaster",
+        "ForecastModel": ".model",
+        "fit": ".model",
+        "predict": ".model",
+        "update": ".model",
+    },
+)
@@ -0,0 +1,36 @@
+"""
+水位予測設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class ForecastConfig(BaseSettings):
+    """デバイスごとの予測モデル（時間平均に対する季節付き指数平滑化）の設定"""
+
+    # 学習に使う直近の期間（日）と季節周期（時間）
+    history_days: int = Field(default=14, alias="FORECAST_HISTORY_DAYS")
+    season_hours: int = Field(default=24, alias="FORECAST_SEASON_HOURS")
+    # これより少ない時間ビンしかないデバイスは予測しない（季節成分は2周期分から使う）
+    min_bins: int = Field(default=12, alias="FORECAST_MIN_BINS")
+    # トレンドの減衰係数（1に近いほど長くトレンドを延長する）
+    damping: float = Field(default=0.98, alias="FORECAST_DAMPING")
+
+    horizon_hours: int = Field(default=48, alias="FORECAST_HORIZON_HOURS")
+    max_horizon_hours: int = Field(default=168, alias="FORECAST_MAX_HORIZON_HOURS")
+
+    # キャッシュ済みモデルの新着データを確認する間隔（秒）。確認・更新はバックグラウンドで行う
+    refresh_seconds: float = Field(default=300.0, alias="FORECAST_REFRESH_SECONDS")
+    # 前回の学習からこの数の時間ビンが増えたらパラメータを選び直す（それまでは状態だけ増分更新）
+    refit_after_bins: int = Field(default=24, alias="FORECAST_REFIT_AFTER_BINS")
+    workers: int = Field(default=2, alias="FORECAST_WORKERS")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+forecast_config = ForecastConfig()
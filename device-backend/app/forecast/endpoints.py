@@ -0,0 +1,104 @@
+"""
+水位予測エンドポイント
+"""
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth.dependencies import get_current_user_id
+from app.devices.ownership import find_ownership
+
+from .config import forecast_config
+
+router = APIRouter(tags=["予測"])
+
+
+def iso_from_ns(value_ns: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value_ns / 1e9))
+
+
+def threshold_crossing(
+    result: Dict[str, Any], threshold: float, direction: str
+) -> Dict[str, Any]:
+    """予測値が最初にしきい値に達する時刻（予測期間内に達しなければnull）"""
+    import numpy as np
+
+    values = result["distance"]
+    reached = values <= threshold if direction == "below" else values >= threshold
+    hits = np.flatnonzero(reached)
+    crossing: Dict[str, Any] = {
+        "value": threshold,
+        "direction": direction,
+        "crossesAt": None,
+        "hoursUntil": None,
+    }
+    if len(hits):
+        at_ns = int(result["time"][hits[0]])
+        crossing.update(
+            crossesAt=iso_from_ns(at_ns),
+            hoursUntil=round((at_ns - time.time_ns()) / 3_600_000_000_000, 1),
+        )
+    return crossing
+
+
+@router.get(
+    "/devices/{deviceId}/forecast",
+    summary="水位の予測を取得",
+    description="キャッシュ済みのデバイス別モデル（季節付き指数平滑化）で今後の時間平均水位と、しきい値に達する時刻を返します。",
+)
+def device_forecast(
+    deviceId: str,
+    hours: int = Query(
+        forecast_config.horizon_hours, ge=1, le=forecast_config.max_horizon_hours
+    ),
+    threshold: Optional[float] = Query(None, description="到達時刻を求める水位（cm）"),
+    direction: Optional[str] = Query(
+        None,
+        pattern="^(below|above)$",
+        description="below: しきい値以下になる時刻 / above: 以上になる時刻（省略時は現在の水準から判断）",
+    ),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    水位予測
+
+    - **hours**: 予測する期間（時間）
+    - **threshold**: 指定した場合、予測値がこの水位に達する最初の時刻を返す
+    """
+    if not find_ownership(user_id, deviceId):
+        raise HTTPException(404, "Device not found or not owned by user")
+    import numpy as np
+
+    from app.forecast import forecaster
+    from app.timeseries import float_or_none, format_timestamps
+
+    result = forecaster.forecast(deviceId, hours)
+    if result is None:
+        raise HTTPException(404, "Not enough history to forecast")
+
+    model = result["model"]
+    crossing = None
+    if threshold is not None:
+        direction = direction or ("below" if model["level"] > threshold else "above")
+        crossing = threshold_crossing(result, threshold, direction)
+    return {
+        "deviceId": deviceId,
+        "horizonHours": hours,
+        "source": result["source"],
+        "model": {
+            **{k: v for k, v in model.items() if not k.endswith("Ns")},
+            "trainedThrough": iso_from_ns(model["trainedThroughNs"]),
+            "fittedAt": iso_from_ns(model["fittedAtNs"]),
+        },
+        "points": [
+            {"time": t, "distance": d, "lower": lo, "upper": up}
+            for t, d, lo, up in zip(
+                format_timestamps(result["time"]),
+                float_or_none(np.round(result["distance"], 2)),
+                float_or_none(np.round(result["lower"], 2)),
+                float_or_none(np.round(result["upper"], 2)),
+            )
+        ],
+        "threshold": crossing,
+    }
@@ -0,0 +1,164 @@
+"""
+予測モデルのキャッシュ
+
+デバイスごとの学習済みモデルをプロセス内に保持し、予測はキャッシュ済みの状態から計算する（時系列は読まない）。
+refresh_seconds を過ぎたモデルは、応答とは別にワーカープールで最後に取り込んだビンより後の時間ビンだけを読んで
+増分更新し、前回の学習から refit_after_bins 以上のビンが増えた場合だけパラメータを選び直す。
+学習には時間単位のロールアップ（確定済みのビン + 直近の生データ）を使う。
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from app.rollups import history_planner, rollup_config
+from app.timeseries import timeseries
+
+from .config import ForecastConfig, forecast_config
+from .model import HOUR_NS, ForecastModel, fit, predict, update
+
+Load = Callable[[str, int, int], Tuple[np.ndarray, np.ndarray]]
+
+
+def load_hourly(
+    device_id: str, hours: int, now_ns: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """直近hours時間の確定した時間ビン（開始時刻, 平均水位）。集計中の現在の時間ビンは含めない"""
+    if rollup_config.enabled:
+        bins = history_planner.history(device_id, hours, "1h", now_ns)["bins"]
+        if not bins:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        times, values = bins["time"], bins["sumLevel"] / bins["samples"]
+    else:
+        columns = timeseries.rollup_since(
+            [device_id], (now_ns - hours * HOUR_NS) // HOUR_NS * HOUR_NS, 60
+        )
+        if not columns:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        times, values = columns["time"], columns["avgLevel"]
+    complete = times < now_ns // HOUR_NS * HOUR_NS
+    return times[complete], values[complete]
+
+
+class Forecaster:
+    """デバイスごとの予測モデルキャッシュとバックグラウンド更新"""
+
+    def __init__(
+        self, config: ForecastConfig = forecast_config, load: Load = load_hourly
+    ):
+        self.config = config
+        self.load = load
+        self._models: Dict[str, ForecastModel] = {}
+        self._checked: Dict[str, float] = {}
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.fits = 0
+        self.updates = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.workers, thread_name_prefix="forecast"
+            )
+        return self._executor
+
+    def _fit(self, device_id: str) -> Optional[ForecastModel]:
+        now_ns = time.time_ns()
+        model = fit(
+            *self.load(device_id, self.config.history_days * 24, now_ns), self.config
+        )
+        with self._lock:
+            self.fits += 1
+            self._checked[device_id] = time.monotonic()
+            if model is not None:
+                self._models[device_id] = model
+        return model
+
+    def _refresh(self, device_id: str) -> None:
+        """新着の時間ビンを取り込み、十分に増えていれば学習し直す（ワーカープールで実行）"""
+        try:
+            with self._lock:
+                model = self._models.get(device_id)
+            if model is None:
+                return
+            now_ns = time.time_ns()
+            hours = int((now_ns - model.last_hour * HOUR_NS) // HOUR_NS) + 1
+            times, values = self.load(device_id, hours, now_ns)
+            with self._lock:
+                added = update(model, times, values)
+                self.updates += 1
+                refit = model.bins_since_fit >= self.config.refit_after_bins
+            if refit:
+                self._fit(device_id)
+            print(
+                f"DEBUG: Forecast model {device_id} updated with {added} bins"
+                f" (refit={refit})"
+            )
+        except Exception as e:
+            print(f"ERROR: Forecast refresh failed for {device_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(device_id)
+
+    def model(self, device_id: str) -> Tuple[Optional[ForecastModel], str]:
+        """
+        キャッシュ済みのモデル（ない場合はその場で学習）
+
+        Returns:
+            (モデル, "cache" / "cold")。確認間隔を過ぎたモデルはそのまま返し、更新をワーカーに依頼する
+        """
+        with self._lock:
+            model = self._models.get(device_id)
+            if model is not None:
+                stale = (
+                    time.monotonic() - self._checked.get(device_id, 0.0)
+                    >= self.config.refresh_seconds
+                )
+                if stale and device_id not in self._pending:
+                    self._pending.add(device_id)
+                    self._checked[device_id] = time.monotonic()
+                    self.executor.submit(self._refresh, device_id)
+                return model, "cache"
+        return self._fit(device_id), "cold"
+
+    def forecast(self, device_id: str, horizon: int) -> Optional[Dict[str, Any]]:
+        """horizon時間分の予測（データ不足で学習できない場合はNone）"""
+        model, source = self.model(device_id)
+        if model is None:
+            return None
+        with self._lock:
+            result = predict(model, horizon)
+            info = {
+                "kind": model.kind,
+                "alpha": model.alpha,
+                "beta": model.beta,
+                "gamma": model.gamma,
+                "sigma": round(model.sigma, 3),
+                "level": round(model.level, 2),
+                "bins": model.bins,
+                "trainedThroughNs": model.last_hour * HOUR_NS,
+                "fittedAtNs": model.fitted_at_ns,
+            }
+        return {"source": source, "model": info, **result}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "cachedModels": len(self._models),
+                "pending": len(self._pending),
+                "fits": self.fits,
+                "updates": self.updates,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._checked.clear()
+
+
+# グローバルインスタンス
+forecaster = Forecaster()
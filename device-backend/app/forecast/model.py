@@ -0,0 +1,249 @@
+"""
+季節付き指数平滑化（加法Holt-Winters、減衰トレンド）
+
+時間平均の系列を対象にする。欠けている時間ビンはその時点の予測値を観測値として扱い（誤差に数えない）、
+季節成分の位置はエポック基準の時間番号で決めるため、後から届いたビンをそのまま増分更新できる。
+パラメータ（alpha, beta, gamma）は候補の組み合わせを配列の1次元に並べ、全候補を1回の走査で評価して
+1ステップ先予測の二乗誤差が最小のものを選ぶ。
+"""
+import itertools
+import time
+import warnings
+from typing import Dict, Optional
+
+import numpy as np
+
+from .config import ForecastConfig
+
+HOUR_NS = 3_600_000_000_000
+
+GRID_ALPHA = (0.1, 0.3, 0.5, 0.8)
+GRID_BETA = (0.0, 0.05, 0.2)
+GRID_GAMMA = (0.0, 0.1, 0.3)
+
+
+class ForecastModel:
+    """学習済みのパラメータと状態（最後に取り込んだ時間ビンまで）"""
+
+    __slots__ = (
+        "alpha",
+        "beta",
+        "gamma",
+        "damping",
+        "period",
+        "level",
+        "trend",
+        "season",
+        "sse",
+        "errors",
+        "last_hour",
+        "bins",
+        "bins_since_fit",
+        "fitted_at_ns",
+    )
+
+    def __init__(
+        self,
+        alpha: float,
+        beta: float,
+        gamma: float,
+        damping: float,
+        period: int,
+        level: float,
+        trend: float,
+        season: np.ndarray,
+        sse: float,
+        errors: int,
+        last_hour: int,
+        bins: int,
+    ):
+        self.alpha, self.beta, self.gamma, self.damping = alpha, beta, gamma, damping
+        self.period = period
+        self.level, self.trend, self.season = level, trend, season
+        # 1ステップ先予測の二乗誤差の合計と件数（予測区間の幅に使う）
+        self.sse, self.errors = sse, errors
+        # 最後に取り込んだ時間ビンの番号（エポックからの時間数）
+        self.last_hour = last_hour
+        self.bins = bins
+        self.bins_since_fit = 0
+        self.fitted_at_ns = time.time_ns()
+
+    @property
+    def kind(self) -> str:
+        return "holt-winters" if self.gamma > 0 or self.season.any() else "holt"
+
+    @property
+    def sigma(self) -> float:
+        return float(np.sqrt(self.sse / self.errors)) if self.errors else 0.0
+
+
+def to_grid(times_ns: np.ndarray, values: np.ndarray, after_hour: Optional[int] = None):
+    """時間ビン（開始時刻・平均値）を欠けのない時間番号の配列に並べる（欠けはNaN）"""
+    hours = times_ns // HOUR_NS
+    keep = ~np.isnan(values)
+    if after_hour is not None:
+        keep &= hours > after_hour
+    hours, values = hours[keep], values[keep]
+    if not len(hours):
+        return None, np.empty(0)
+    first = int(hours.min()) if after_hour is None else after_hour + 1
+    grid = np.full(int(hours.max()) - first + 1, np.nan)
+    grid[hours - first] = values
+    return first, grid
+
+
+def smooth(
+    x: np.ndarray,
+    first_hour: int,
+    alpha: np.ndarray,
+    beta: np.ndarray,
+    gamma: np.ndarray,
+    phi: float,
+    level: np.ndarray,
+    trend: np.ndarray,
+    season: np.ndarray,
+):
+    """
+    候補ごと（配列の1次元目）に系列xを順に取り込む
+
+    level・trend・seasonは更新後の値で置き換える。Returns: (level, trend, sse, 誤差の件数)
+    """
+    period = season.shape[1]
+    sse = np.zeros(len(alpha))
+    errors = 0
+    for t, y in enumerate(x.tolist()):
+        j = (first_hour + t) % period
+        s = season[:, j]
+        base = level + phi * trend
+        if y != y:
+            observed = base + s
+        else:
+            error = y - base - s
+            sse += error * error
+            errors += 1
+            observed = y
+        new_level = alpha * (observed - s) + (1 - alpha) * base
+        trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        season[:, j] = gamma * (observed - new_level) + (1 - gamma) * s
+        level = new_level
+    return level, trend, sse, errors
+
+
+def initial_state(x: np.ndarray, first_hour: int, period: int, seasonal: bool):
+    """最初の数周期から水準・トレンド・季節成分の初期値を求める"""
+    season = np.zeros(period)
+    if not seasonal:
+        observed = x[~np.isnan(x)]
+        return float(observed[0]), 0.0, season
+    cycles = len(x) // period
+    block = x[: cycles * period].reshape(cycles, period)
+    with warnings.catch_warnings():
+        # 全て欠けている周期・時刻はNaNのまま扱う
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nanmean(block, axis=1)
+        offsets = np.nanmean(block - means[:, None], axis=0)
+        offsets = np.nan_to_num(offsets - np.nanmean(offsets))
+    valid = ~np.isnan(means)
+    level = float(means[valid][0])
+    trend = 0.0
+    if valid.sum() >= 2:
+        positions = np.flatnonzero(valid)
+        trend = float(
+            (means[positions[-1]] - means[positions[0]])
+            / ((positions[-1] - positions[0]) * period)
+        )
+    # offsetsは系列の先頭からの位置。季節成分はエポック基準の時間番号で持つ
+    season[(first_hour + np.arange(period)) % period] = offsets
+    return level, trend, season
+
+
+def fit(
+    times_ns: np.ndarray, values: np.ndarray, config: ForecastConfig
+) -> Optional[ForecastModel]:
+    """時間ビンの系列からパラメータを選んで学習する（データ不足の場合はNone）"""
+    first, x = to_grid(times_ns, values)
+    if first is None or int((~np.isnan(x)).sum()) < config.min_bins:
+        return None
+    period = config.season_hours
+    seasonal = len(x) >= 2 * period
+    level0, trend0, season0 = initial_state(x, first, period, seasonal)
+
+    grid = np.array(
+        list(
+            itertools.product(GRID_ALPHA, GRID_BETA, GRID_GAMMA if seasonal else (0.0,))
+        )
+    )
+    size = len(grid)
+    season = np.tile(season0, (size, 1))
+    level, trend, sse, errors = smooth(
+        x,
+        first,
+        grid[:, 0],
+        grid[:, 1],
+        grid[:, 2],
+        config.damping,
+        np.full(size, level0),
+        np.full(size, trend0),
+        season,
+    )
+    best = int(np.argmin(sse))
+    alpha, beta, gamma = grid[best].tolist()
+    return ForecastModel(
+        alpha,
+        beta,
+        gamma,
+        config.damping,
+        period,
+        float(level[best]),
+        float(trend[best]),
+        season[best].copy(),
+        float(sse[best]),
+        errors,
+        first + len(x) - 1,
+        int((~np.isnan(x)).sum()),
+    )
+
+
+def update(model: ForecastModel, times_ns: np.ndarray, values: np.ndarray) -> int:
+    """学習済みのパラメータのまま、最後に取り込んだビンより後の時間ビンを取り込む（1ビンあたりO(1)）"""
+    first, x = to_grid(times_ns, values, after_hour=model.last_hour)
+    if first is None:
+        return 0
+    season = model.season[None, :].copy()
+    level, trend, sse, errors = smooth(
+        x,
+        first,
+        np.array([model.alpha]),
+        np.array([model.beta]),
+        np.array([model.gamma]),
+        model.damping,
+        np.array([model.level]),
+        np.array([model.trend]),
+        season,
+    )
+    model.level, model.trend, model.season = float(level[0]), float(trend[0]), season[0]
+    model.sse += float(sse[0])
+    model.errors += errors
+    model.last_hour = first + len(x) - 1
+    model.bins += errors
+    model.bins_since_fit += errors
+    return errors
+
+
+def predict(model: ForecastModel, horizon: int) -> Dict[str, np.ndarray]:
+    """
+    最後に取り込んだビンの次からhorizon時間分の予測
+
+    予測区間（95%）は1ステップ先誤差の標準偏差を sqrt(1 + alpha^2 (h-1)) 倍に広げた近似。
+    """
+    steps = np.arange(1, horizon + 1)
+    hours = model.last_hour + steps
+    damped = np.cumsum(model.damping**steps)
+    mean = model.level + damped * model.trend + model.season[hours % model.period]
+    width = 1.96 * model.sigma * np.sqrt(1 + model.alpha**2 * (steps - 1))
+    return {
+        "time": hours * HOUR_NS,
+        "distance": mean,
+        "lower": mean - width,
+        "upper": mean + width,
+    }
@@ -0,0 +1,37 @@
+"""
+センサーデータ取り込みモジュール
+
+公開名は初回アクセス時にサブモジュールから読み込む（app.lazy）。
+"""
+from app.lazy import lazy_exports
+
+__all__ = [
+    "ingest_lifespan",
+    "IngestBackpressure",
+    "IngestBuffer",
+    "Reading",
+    "build_batches",
+    "ingest_buffer",
+    "ingest_config",
+    "IngestConfig",
+    "MemoryRecordWriter",
+    "RecordWriter",
+    "TimestreamRecordWriter",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "ingest_lifespan": ".background",
+        "IngestBackpressure": ".buffer",
+        "IngestBuffer": ".buffer",
+        "Reading": ".buffer",
+        "build_batches": ".buffer",
+        "ingest_buffer": ".buffer",
+        "ingest_config": ".config",
+        "IngestConfig": ".config",
+        "MemoryRecordWriter": ".writer",
+        "RecordWriter": ".writer",
+        "TimestreamRecordWriter": ".writer",
+    },
+)
@@ -0,0 +1,16 @@
+"""
+取り込みバッファのフラッシュスレッド
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from .buffer import ingest_buffer
+
+
+@asynccontextmanager
+async def ingest_lifespan(app: Any) -> AsyncIterator[None]:
+    """フラッシュスレッドを起動し、終了時に残りを書き込むlifespan"""
+    ingest_buffer.start()
+    yield
+    await asyncio.get_running_loop().run_in_executor(None, ingest_buffer.stop)
@@ -0,0 +1,356 @@
+"""
+取り込みバッファ
+
+受け付けた測定値をメモリ上に溜め、WriteRecords（最大100レコード）にまとめて書き込む。
+
+- フラッシュ条件: 溜まった件数がbatch_records以上（その倍数分だけ書き込む）、
+  または最後のフラッシュからflush_interval_seconds経過（残りをすべて書き込む）
+- まとめ方: 同じデバイスのレコードがbatch_records件以上あれば、deviceIdを共通属性に入れて
+  1デバイス分で書き込む（レコードごとのディメンションを省略できる）。残りは複数デバイスを混ぜて詰める
+- 書き込みはflush_workers並列。書き込み中とバッファ内の件数がbuffer_limitを超える取り込みは拒否する
+- 拒否されたレコードは再試行可能なものだけ指数バックオフで再投入し、それ以外とmax_attemptsに
+  達したものはデッドレターに残す
+"""
+import heapq
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.timeseries import timeseries
+
+from .config import IngestConfig, ingest_config
+from .writer import (
+    NS_PER_MS,
+    WRITE_RECORDS_LIMIT,
+    MemoryRecordWriter,
+    RecordWriter,
+    Rejection,
+    RepositoryRecordWriter,
+    TimestreamRecordWriter,
+)
+
+WrittenHook = Callable[[Dict[str, np.ndarray]], Any]
+
+
+class Reading(NamedTuple):
+    """取り込み待ちの測定値（timeはエポックミリ秒）"""
+
+    device_id: str
+    time_ms: int
+    distance: float
+    attempts: int = 0
+
+
+class IngestBackpressure(Exception):
+    """バッファが上限に達している"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Ingest buffer is full. Retry after {retry_after:.0f}s")
+
+
+class Batch(NamedTuple):
+    """WriteRecords 1回分"""
+
+    common: Dict[str, Any]
+    records: List[Dict[str, Any]]
+    readings: List[Reading]
+
+
+def build_batches(readings: List[Reading], measure_name: str, size: int) -> List[Batch]:
+    """測定値をWriteRecordsの単位にまとめる"""
+    size = min(size, WRITE_RECORDS_LIMIT)
+    base = {
+        "MeasureName": measure_name,
+        "MeasureValueType": "DOUBLE",
+        "TimeUnit": "MILLISECONDS",
+    }
+    by_device: Dict[str, List[Reading]] = {}
+    for reading in readings:
+        by_device.setdefault(reading.device_id, []).append(reading)
+
+    batches: List[Batch] = []
+    mixed: List[Reading] = []
+    for device_id, items in by_device.items():
+        full = len(items) - len(items) % size
+        common = {**base, "Dimensions": [{"Name": "deviceId", "Value": device_id}]}
+        for start in range(0, full, size):
+            chunk = items[start : start + size]
+            records = [
+                {"Time": str(r.time_ms), "MeasureValue": repr(r.distance)}
+                for r in chunk
+            ]
+            batches.append(Batch(common, records, chunk))
+        mixed.extend(items[full:])
+
+    for start in range(0, len(mixed), size):
+        chunk = mixed[start : start + size]
+        records = [
+            {
+                "Dimensions": [{"Name": "deviceId", "Value": r.device_id}],
+                "Time": str(r.time_ms),
+                "MeasureValue": repr(r.distance),
+            }
+            for r in chunk
+        ]
+        batches.append(Batch(base, records, chunk))
+    return batches
+
+
+class IngestBuffer:
+    """測定値のバッファとバックグラウンド書き込み"""
+
+    def __init__(self, writer: RecordWriter, config: IngestConfig = ingest_config):
+        self.config = config
+        self.writer = writer
+        self.on_written: Optional[WrittenHook] = None
+        self._pending: Deque[Reading] = deque()
+        # (再投入時刻, 連番, 測定値)
+        self._retry: List[Tuple[float, int, Reading]] = []
+        self._retry_seq = 0
+        self._in_flight = 0
+        self._last_flush = time.monotonic()
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(config.flush_workers * 2)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.dead_letters: Deque[Dict[str, Any]] = deque(
+            maxlen=config.dead_letter_limit
+        )
+        self.counters = {
+            "accepted": 0,
+            "written": 0,
+            "batches": 0,
+            "retried": 0,
+            "deadLettered": 0,
+            "rejectedRequests": 0,
+            "writeErrors": 0,
+        }
+
+    # ---------- 受け付け ----------
+
+    def buffered(self) -> int:
+        return len(self._pending) + len(self._retry) + self._in_flight
+
+    def accept(self, readings: List[Reading]) -> int:
+        """測定値をバッファに追加（上限を超える場合はIngestBackpressure）"""
+        with self._cond:
+            if self.buffered() + len(readings) > self.config.buffer_limit:
+                self.counters["rejectedRequests"] += 1
+                raise IngestBackpressure(max(1.0, self.config.flush_interval_seconds))
+            self._pending.extend(readings)
+            self.counters["accepted"] += len(readings)
+            if len(self._pending) >= self.config.batch_records:
+                self._cond.notify()
+        return len(readings)
+
+    # ---------- 書き込み ----------
+
+    def _due_retries(self, now: float) -> List[Reading]:
+        due = []
+        while self._retry and self._retry[0][0] <= now:
+            due.append(heapq.heappop(self._retry)[2])
+        return due
+
+    def _take(self, force: bool) -> List[Reading]:
+        """書き込む測定値を取り出す（lock内で呼ぶ）"""
+        now = time.monotonic()
+        timed_out = now - self._last_flush >= self.config.flush_interval_seconds
+        if force or timed_out:
+            count = len(self._pending)
+        else:
+            count = len(self._pending) - len(self._pending) % self.config.batch_records
+        taken = [self._pending.popleft() for _ in range(count)]
+        if force or timed_out:
+            taken.extend(self._due_retries(float("inf") if force else now))
+        if taken or timed_out:
+            self._last_flush = now
+        self._in_flight += len(taken)
+        return taken
+
+    def _requeue(self, reading: Reading, reason: str, retryable: bool) -> None:
+        """失敗した測定値を再投入またはデッドレターへ（lock内で呼ぶ）"""
+        attempts = reading.attempts + 1
+        if retryable and attempts < self.config.max_attempts:
+            delay = self.config.retry_backoff_seconds * (2 ** (attempts - 1))
+            self._retry_seq += 1
+            heapq.heappush(
+                self._retry,
+                (
+                    time.monotonic() + delay,
+                    self._retry_seq,
+                    reading._replace(attempts=attempts),
+                ),
+            )
+            self.counters["retried"] += 1
+        else:
+            self.dead_letters.append(
+                {
+                    "deviceId": reading.device_id,
+                    "time": reading.time_ms,
+                    "distance": reading.distance,
+                    "attempts": attempts,
+                    "reason": reason,
+                }
+            )
+            self.counters["deadLettered"] += 1
+
+    def _write(self, batch: Batch) -> None:
+        try:
+            rejections: List[Rejection] = self.writer.write(batch.common, batch.records)
+        except Exception as e:
+            print(
+                f"ERROR: WriteRecords failed ({len(batch.records)} records): {str(e)}"
+            )
+            with self._cond:
+                self.counters["writeErrors"] += 1
+                for reading in batch.readings:
+                    self._requeue(reading, str(e), retryable=True)
+                self._in_flight -= len(batch.readings)
+            return
+
+        rejected = {r.index: r for r in rejections}
+        written = [r for i, r in enumerate(batch.readings) if i not in rejected]
+        with self._cond:
+            for index, rejection in rejected.items():
+                self._requeue(
+                    batch.readings[index], rejection.reason, rejection.retryable
+                )
+            self.counters["written"] += len(written)
+            self.counters["batches"] += 1
+            self._in_flight -= len(batch.readings)
+        if written and self.on_written is not None:
+            try:
+                self.on_written(
+                    {
+                        "deviceId": np.array([r.device_id for r in written]),
+                        "time": np.array([r.time_ms for r in written], dtype=np.int64)
+                        * NS_PER_MS,
+                        "distance": np.array(
+                            [r.distance for r in written], dtype=np.float64
+                        ),
+                    }
+                )
+            except Exception as e:
+                print(f"ERROR: Ingest written hook failed: {str(e)}")
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.flush_workers, thread_name_prefix="ingest"
+            )
+        return self._executor
+
+    def _submit(self, readings: List[Reading]) -> int:
+        batches = build_batches(
+            readings, self.config.measure_name, self.config.batch_records
+        )
+        for batch in batches:
+            # 書き込み中のバッチ数を制限する（空くまでフラッシュを待たせる）
+            self._slots.acquire()
+            future = self._pool().submit(self._write, batch)
+            future.add_done_callback(lambda _: self._slots.release())
+        return len(batches)
+
+    def flush(self, force: bool = True) -> int:
+        """バッファを書き込みに回し、投入したバッチ数を返す（完了は待たない）"""
+        with self._cond:
+            readings = self._take(force)
+        return self._submit(readings) if readings else 0
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """再試行分も含めてバッファが空になるまで書き込む"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.flush(force=True)
+            with self._cond:
+                if not self.buffered():
+                    return True
+                self._cond.wait(0.01)
+        return False
+
+    # ---------- バックグラウンド ----------
+
+    def _ready(self) -> bool:
+        if len(self._pending) >= self.config.batch_records:
+            return True
+        elapsed = time.monotonic() - self._last_flush
+        return elapsed >= self.config.flush_interval_seconds and bool(
+            self._pending or self._retry
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and not self._ready():
+                    remaining = self.config.flush_interval_seconds - (
+                        time.monotonic() - self._last_flush
+                    )
+                    self._cond.wait(max(remaining, 0.01))
+                if not self._running:
+                    return
+                readings = self._take(force=False)
+            if readings:
+                self._submit(readings)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="ingest-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """フラッシュスレッドを止め、残りを書き込む"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if not self.drain(timeout):
+            print(
+                f"WARNING: Ingest buffer not drained on shutdown"
+                f" ({self.buffered()} readings left)"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "writer": self.writer.name,
+                "pending": len(self._pending),
+                "retrying": len(self._retry),
+                "inFlight": self._in_flight,
+                "bufferLimit": self.config.buffer_limit,
+                **self.counters,
+                "recentDeadLetters": list(self.dead_letters)[-10:],
+            }
+
+
+def create_writer(config: IngestConfig = ingest_config) -> RecordWriter:
+    """設定から書き込み先を生成"""
+    name = config.writer.lower()
+    if name == "memory":
+        return MemoryRecordWriter()
+    if name == "sqlite":
+        if timeseries.name == "sqlite":
+            return RepositoryRecordWriter(timeseries)
+        print(
+            "WARNING: INGEST_WRITER=sqlite requires TS_BACKEND=sqlite, using timestream"
+        )
+        return TimestreamRecordWriter()
+    if name != "timestream":
+        print(f"WARNING: Unknown INGEST_WRITER '{config.writer}', using timestream")
+    return TimestreamRecordWriter()
+
+
+# グローバルインスタンス
+ingest_buffer = IngestBuffer(create_writer())
@@ -0,0 +1,49 @@
+"""
+データ取り込み設定
+"""
+from typing import List
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class IngestConfig(BaseSettings):
+    """センサーデータ取り込み（Timestream書き込み）設定"""
+
+    # X-Api-Keyで受け付けるキー（カンマ区切り、未設定時は取り込みAPIを受け付けない）
+    api_keys: str = Field(default="", alias="INGEST_API_KEYS")
+    # timestream: WriteRecords / sqlite: 組み込みSQLite（TS_BACKEND=sqlite と併用）
+    # memory: プロセス内の書き込み先（開発・計測用）
+    writer: str = Field(default="timestream", alias="INGEST_WRITER")
+    measure_name: str = Field(default="distance", alias="INGEST_MEASURE_NAME")
+
+    # フラッシュ条件: バッファがbatch_records件に達した時、または最後のフラッシュからflush_interval_seconds経過時
+    batch_records: int = Field(default=100, alias="INGEST_BATCH_RECORDS")
+    flush_interval_seconds: float = Field(
+        default=1.0, alias="INGEST_FLUSH_INTERVAL_SECONDS"
+    )
+    flush_workers: int = Field(default=4, alias="INGEST_FLUSH_WORKERS")
+    # バッファ上限（超える取り込みは503 + Retry-Afterで拒否）
+    buffer_limit: int = Field(default=50000, alias="INGEST_BUFFER_LIMIT")
+
+    # 拒否・失敗したレコードの再試行
+    max_attempts: int = Field(default=5, alias="INGEST_MAX_ATTEMPTS")
+    retry_backoff_seconds: float = Field(
+        default=0.5, alias="INGEST_RETRY_BACKOFF_SECONDS"
+    )
+    # 再試行しないレコードを保持する件数（GET /ingest/statsで確認）
+    dead_letter_limit: int = Field(default=1000, alias="INGEST_DEAD_LETTER_LIMIT")
+
+    @property
+    def api_key_list(self) -> List[str]:
+        return [k.strip() for k in self.api_keys.split(",") if k.strip()]
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+ingest_config = IngestConfig()
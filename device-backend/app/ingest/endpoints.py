@@ -0,0 +1,72 @@
+"""
+センサーデータ取り込みエンドポイント
+"""
+import hmac
+import math
+from datetime import timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from .config import ingest_config
+from .models import IngestRequest, IngestResponse
+
+router = APIRouter(prefix="/ingest", tags=["データ取り込み"])
+
+
+def require_api_key(x_api_key: Optional[str] = Header(None)) -> str:
+    """X-Api-Keyを検証（ゲートウェイ・デバイスからの呼び出し用）"""
+    if not x_api_key or not any(
+        hmac.compare_digest(x_api_key, key) for key in ingest_config.api_key_list
+    ):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+    return x_api_key
+
+
+def to_epoch_ms(value) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+@router.post(
+    "/readings",
+    response_model=IngestResponse,
+    status_code=202,
+    summary="測定値を取り込む",
+    description=(
+        "測定値をバッファに受け付け、WriteRecordsにまとめてTimestreamへ書き込みます。バッファが上限に達している場合は503を返します。"
+    ),
+)
+def ingest_readings(body: IngestRequest, _: str = Depends(require_api_key)):
+    """
+    測定値の取り込み（最大5000件）
+
+    - **readings**: {deviceId, time, distance} のリスト
+    """
+    from .buffer import IngestBackpressure, Reading, ingest_buffer
+
+    readings = [
+        Reading(r.deviceId, to_epoch_ms(r.time), r.distance)
+        for r in body.readings
+        if math.isfinite(r.distance)
+    ]
+    try:
+        accepted = ingest_buffer.accept(readings)
+    except IngestBackpressure as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    return IngestResponse(accepted=accepted, buffered=ingest_buffer.buffered())
+
+
+@router.get(
+    "/stats", summary="取り込み状況を取得", description="バッファ内・書き込み中の件数、書き込み・再試行・デッドレターの件数を返します。"
+)
+def ingest_stats(_: str = Depends(require_api_key)):
+    """取り込み状況"""
+    from .buffer import ingest_buffer
+
+    return ingest_buffer.stats()
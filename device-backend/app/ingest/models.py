@@ -0,0 +1,27 @@
+"""
+データ取り込み関連のPydanticモデル
+"""
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class ReadingIn(BaseModel):
+    """測定値1件"""
+
+    deviceId: str = Field(..., min_length=1, max_length=64)
+    time: datetime  # ISO 8601またはエポック秒
+    distance: float
+
+
+class IngestRequest(BaseModel):
+    """取り込みリクエスト"""
+
+    readings: List[ReadingIn] = Field(..., min_length=1, max_length=5000)
+
+
+class IngestResponse(BaseModel):
+    """取り込みレスポンス（バッファへの受け付け件数。Timestreamへの書き込みは非同期）"""
+
+    accepted: int
+    buffered: int
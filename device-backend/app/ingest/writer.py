@@ -0,0 +1,158 @@
+"""
+Timestream書き込み
+
+WriteRecordsの1回分（共通属性 + 最大100レコード）を書き込み、拒否されたレコードを返す。
+"""
+import random
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple
+
+import numpy as np
+
+from app.aws import aws_clients, aws_config
+
+# WriteRecords 1回あたりのレコード数の上限
+WRITE_RECORDS_LIMIT = 100
+NS_PER_MS = 1_000_000
+
+
+class Rejection(NamedTuple):
+    """拒否されたレコード（indexは書き込んだレコード列内の位置）"""
+
+    index: int
+    reason: str
+    retryable: bool
+
+
+class RecordWriter:
+    """書き込み先の共通インターフェース"""
+
+    name = "base"
+
+    def write(
+        self, common: Dict[str, Any], records: List[Dict[str, Any]]
+    ) -> List[Rejection]:
+        """
+        1回分を書き込み、拒否されたレコードを返す
+
+        バッチ全体が失敗した場合（スロットリングなど）は例外を送出する。
+        """
+        raise NotImplementedError
+
+
+class TimestreamRecordWriter(RecordWriter):
+    """TimestreamのWriteRecords"""
+
+    name = "timestream"
+
+    def __init__(
+        self, database: str = aws_config.ts_db, table: str = aws_config.ts_table
+    ):
+        self.database = database
+        self.table = table
+        self.client = aws_clients.lazy_client("timestream-write")
+
+    def write(
+        self, common: Dict[str, Any], records: List[Dict[str, Any]]
+    ) -> List[Rejection]:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.write_records(
+                DatabaseName=self.database,
+                TableName=self.table,
+                CommonAttributes=common,
+                Records=records,
+            )
+            return []
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "RejectedRecordsException":
+                raise
+            rejections = []
+            for rejected in e.response.get("RejectedRecords", []):
+                reason = rejected.get("Reason", "")
+                # 同じ時刻・ディメンションの既存値との衝突や保持期間外は再試行しても通らない
+                retryable = (
+                    "ExistingVersion" not in rejected
+                    and "retention" not in reason.lower()
+                )
+                rejections.append(Rejection(rejected["RecordIndex"], reason, retryable))
+            return rejections
+
+
+class MemoryRecordWriter(RecordWriter):
+    """
+    プロセス内の書き込み先（開発・計測用）
+
+    latency_secondsでWriteRecords 1回分の応答時間を、reject_rateで再試行可能な拒否を模擬する。
+    """
+
+    name = "memory"
+
+    def __init__(
+        self, latency_seconds: float = 0.0, reject_rate: float = 0.0, seed: int = 0
+    ):
+        self.latency_seconds = latency_seconds
+        self.reject_rate = reject_rate
+        self.calls = 0
+        self.records = 0
+        self.rows: List[Dict[str, Any]] = []
+        self.keep_rows = True
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def write(
+        self, common: Dict[str, Any], records: List[Dict[str, Any]]
+    ) -> List[Rejection]:
+        if len(records) > WRITE_RECORDS_LIMIT:
+            raise ValueError(
+                f"WriteRecords accepts at most {WRITE_RECORDS_LIMIT} records"
+            )
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        with self._lock:
+            rejected = [
+                Rejection(i, "Simulated rejection", True)
+                for i in range(len(records))
+                if self._random.random() < self.reject_rate
+            ]
+            accepted = len(records) - len(rejected)
+            self.calls += 1
+            self.records += accepted
+            if self.keep_rows:
+                skip = {r.index for r in rejected}
+                self.rows.extend(
+                    {**common, **record}
+                    for i, record in enumerate(records)
+                    if i not in skip
+                )
+        return rejected
+
+
+class RepositoryRecordWriter(RecordWriter):
+    """時系列リポジトリへの書き込み（TS_BACKEND=sqlite でローカル実行する場合）"""
+
+    name = "sqlite"
+
+    def __init__(self, repository: Any):
+        self.repository = repository
+
+    def write(
+        self, common: Dict[str, Any], records: List[Dict[str, Any]]
+    ) -> List[Rejection]:
+        device_ids, times, values = [], [], []
+        for record in records:
+            merged = {**common, **record}
+            dimensions = {d["Name"]: d["Value"] for d in merged["Dimensions"]}
+            device_ids.append(dimensions["deviceId"])
+            times.append(int(merged["Time"]) * NS_PER_MS)
+            values.append(float(merged["MeasureValue"]))
+        self.repository.write(
+            {
+                "deviceId": np.array(device_ids, dtype=object),
+                "time": np.array(times, dtype=np.int64),
+                "distance": np.array(values, dtype=np.float64),
+            }
+        )
+        return []
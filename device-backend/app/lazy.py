@@ -0,0 +1,35 @@
+"""
+パッケージの遅延読み込み
+
+パッケージの__init__で公開名とそれを定義するサブモジュールを登録し、初回アクセス時に読み込む。
+NumPyを使う判定・集計エンジンなどを、そのエンドポイントやバックグラウンド処理が初めて使うまで
+読み込まないことで、`import main` とコールドスタート後の最初の応答を短くする。
+"""
+import sys
+from importlib import import_module
+from typing import Any, Callable, Dict
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    パッケージの __getattr__（PEP 562）を作成
+
+    Args:
+        package: パッケージ名（__name__）
+        exports: 公開名 → 定義しているサブモジュール（".engine" など）
+
+    読み込んだ値はパッケージの属性に置くため、2回目以降は通常の属性参照になる。
+    公開名と同じ名前のサブモジュール（forecast.forecaster など）を先に直接importすると
+    その属性がモジュールで上書きされるため、パッケージ内でもパッケージ経由で参照する。
+    """
+    namespace = sys.modules[package].__dict__
+
+    def __getattr__(name: str) -> Any:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(module, package), name)
+        namespace[name] = value
+        return value
+
+    return __getattr__
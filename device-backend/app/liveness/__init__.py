@@ -0,0 +1,14 @@
+"""
+デバイス死活監視モジュール
+"""
+from .background import liveness_lifespan
+from .config import liveness_config, LivenessConfig
+from .index import LivenessIndex, liveness_index
+
+__all__ = [
+    "liveness_lifespan",
+    "liveness_config",
+    "LivenessConfig",
+    "LivenessIndex",
+    "liveness_index",
+]
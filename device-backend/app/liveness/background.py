@@ -0,0 +1,75 @@
+"""
+死活インデックスの初期化と期限判定スケジューラ
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+from app.aws import aws_clients, aws_config
+
+from .config import liveness_config
+from .index import fetch_latest, liveness_index
+
+
+def active_device_ids() -> List[str]:
+    """所有済み（アクティブ）のデバイスID"""
+    ownership_tbl = aws_clients.table(aws_config.device_ownership_table)
+    scan_kwargs: Dict[str, Any] = {
+        "FilterExpression": "isActive = :active",
+        "ExpressionAttributeValues": {":active": "true"},
+        "ProjectionExpression": "deviceId",
+    }
+    device_ids: Dict[str, None] = {}
+    while True:
+        response = ownership_tbl.scan(**scan_kwargs)
+        device_ids.update(
+            dict.fromkeys(item["deviceId"] for item in response.get("Items", []))
+        )
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return list(device_ids)
+
+
+def seed_from_latest() -> int:
+    """
+    所有済みデバイスの最終受信時刻を集約クエリ（デバイス200台ごとに1回）で取得して登録
+
+    再起動直後にインデックスが空になるのを防ぐためだけに使い、以降は読み取り経路の観測で更新する。
+    """
+    columns = fetch_latest(active_device_ids(), liveness_config.seed_window_hours)
+    return liveness_index.observe_columns(columns)
+
+
+async def check_loop(interval: float) -> None:
+    """一定間隔で期限切れのデバイスを判定"""
+    loop = asyncio.get_running_loop()
+    if liveness_config.seed_on_startup:
+        try:
+            seeded = await loop.run_in_executor(None, seed_from_latest)
+            print(f"INFO: Liveness index seeded with {seeded} devices")
+        except Exception as e:
+            print(f"WARNING: Liveness seed failed: {str(e)}")
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # 期限切れの候補は時系列で確認するためイベントループの外で判定する
+            report = await loop.run_in_executor(None, liveness_index.check)
+            if report["flagged"]:
+                print(
+                    f"DEBUG: Devices went offline:"
+                    f" {[d['deviceId'] for d in report['flagged']]}"
+                )
+        except Exception as e:
+            print(f"ERROR: Liveness check failed: {str(e)}")
+
+
+@asynccontextmanager
+async def liveness_lifespan(app: Any) -> AsyncIterator[None]:
+    """期限判定タスクを起動・停止するlifespan"""
+    task = None
+    if liveness_config.scheduler_enabled:
+        task = asyncio.create_task(check_loop(liveness_config.scheduler_seconds))
+    yield
+    if task is not None:
+        task.cancel()
@@ -0,0 +1,56 @@
+"""
+死活監視設定
+"""
+from typing import List
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class LivenessConfig(BaseSettings):
+    """デバイス死活インデックス設定"""
+
+    # 送信間隔の初期値（観測した間隔から指数移動平均で推定し直す）
+    default_interval_seconds: float = Field(
+        default=300.0, alias="LIVENESS_DEFAULT_INTERVAL_SECONDS"
+    )
+    min_interval_seconds: float = Field(
+        default=30.0, alias="LIVENESS_MIN_INTERVAL_SECONDS"
+    )
+    max_interval_seconds: float = Field(
+        default=86400.0, alias="LIVENESS_MAX_INTERVAL_SECONDS"
+    )
+    interval_smoothing: float = Field(default=0.2, alias="LIVENESS_INTERVAL_SMOOTHING")
+    # 最終受信から「送信間隔 × grace_factor」（最低min_grace_seconds）を過ぎたらオフライン
+    grace_factor: float = Field(default=3.0, alias="LIVENESS_GRACE_FACTOR")
+    min_grace_seconds: float = Field(default=600.0, alias="LIVENESS_MIN_GRACE_SECONDS")
+
+    # 期限切れデバイスを判定するスケジューラ
+    scheduler_enabled: bool = Field(default=True, alias="LIVENESS_SCHEDULER_ENABLED")
+    scheduler_seconds: float = Field(default=30.0, alias="LIVENESS_SCHEDULER_SECONDS")
+    # オフラインにする前に期限切れの候補の最終受信時刻を時系列から確認する
+    # （アプリを経由しない取り込み経路のデータは読み取りがない限り観測できないため）
+    verify_before_offline: bool = Field(
+        default=True, alias="LIVENESS_VERIFY_BEFORE_OFFLINE"
+    )
+
+    # 起動時に所有済みデバイスの最終受信時刻を1回だけ集約クエリで取得する
+    seed_on_startup: bool = Field(default=True, alias="LIVENESS_SEED_ON_STARTUP")
+    seed_window_hours: int = Field(default=168, alias="LIVENESS_SEED_WINDOW_HOURS")
+
+    # 全体のオフライン一覧（/liveness/offline/all）を参照できる運用者のユーザーID（カンマ区切り）
+    operator_user_ids: str = Field(default="", alias="LIVENESS_OPERATOR_USER_IDS")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+    @property
+    def operator_user_id_list(self) -> List[str]:
+        return [u.strip() for u in self.operator_user_ids.split(",") if u.strip()]
+
+
+# グローバル設定インスタンス
+liveness_config = LivenessConfig()
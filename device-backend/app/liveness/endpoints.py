@@ -0,0 +1,59 @@
+"""
+死活監視エンドポイント
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth.dependencies import get_current_user_id
+from app.devices.ownership import list_user_ownerships
+
+from .config import liveness_config
+from .index import liveness_index
+
+router = APIRouter(prefix="/liveness", tags=["死活監視"])
+
+
+def require_operator(user_id: str = Depends(get_current_user_id)) -> str:
+    """全デバイスの情報を参照できる運用者か確認（LIVENESS_OPERATOR_USER_IDS）"""
+    if user_id not in liveness_config.operator_user_id_list:
+        raise HTTPException(status_code=403, detail="Operator access required")
+    return user_id
+
+
+@router.get(
+    "/offline",
+    summary="オフラインのデバイスを取得",
+    description="ユーザーのデバイスのうち、推定送信間隔を大きく超えて受信のないデバイスを返します。",
+)
+def offline_devices(user_id: str = Depends(get_current_user_id)):
+    """ユーザーのオフラインデバイス"""
+    device_ids = list(
+        dict.fromkeys(o["deviceId"] for o in list_user_ownerships(user_id))
+    )
+    status = liveness_index.status(device_ids)
+    return {
+        "userId": user_id,
+        "totalDevices": len(device_ids),
+        "unknownDevices": sum(1 for s in status.values() if s == "unknown"),
+        "devices": liveness_index.offline(device_ids),
+    }
+
+
+@router.get(
+    "/offline/all",
+    summary="全体のオフラインデバイスを取得",
+    description="死活インデックスで追跡している全デバイスのうち、オフラインのデバイスを判定順に返します（運用者のみ）。",
+)
+def fleet_offline_devices(
+    limit: int = Query(500, ge=1, le=5000),
+    user_id: str = Depends(require_operator),
+):
+    """
+    全体のオフラインデバイス
+
+    - **limit**: 返す件数の上限
+    """
+    devices = liveness_index.offline()
+    return {
+        **liveness_index.stats(),
+        "devices": devices[:limit],
+    }
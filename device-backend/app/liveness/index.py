@@ -0,0 +1,339 @@
+"""
+デバイス死活インデックス
+
+デバイスごとに最終受信時刻と推定送信間隔を保持し、読み取り経路で観測したデータから増分更新する
+（Timestreamを走査しない）。各デバイスのオフライン期限は最小ヒープに1件だけ積み、
+スケジューラは期限を過ぎたエントリだけを取り出す。取り出したデバイスに新しい受信があれば
+新しい期限で積み直し、なければ期限切れの候補だけをまとめて1回の最新値クエリで確認してから
+オフラインにする（アプリを経由しない取り込み経路のデータは読み取りがない限り観測できないため）。
+1回の判定の処理量は期限を迎えたデバイス数に比例する。
+"""
+import heapq
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.aws.dynamodb import chunked
+from app.timeseries import concat_pages, split_by_key, timeseries
+
+from .config import LivenessConfig, liveness_config
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_HOUR = 3600 * NS_PER_SECOND
+# 1クエリのIN句に含めるデバイス数
+QUERY_DEVICE_CHUNK = 200
+
+TransitionHook = Callable[[List[Dict[str, Any]]], Any]
+# オフライン候補のデバイスID・探す期間（時間） → deviceId・time列
+Verify = Callable[[List[str], int], Dict[str, np.ndarray]]
+
+
+def fetch_latest(device_ids: List[str], window_hours: int) -> Dict[str, np.ndarray]:
+    """オフライン候補の最終受信時刻を集約クエリ（デバイス200台ごとに1回）で取得"""
+    pages = [
+        timeseries.batch_latest(chunk, window_hours)
+        for chunk in chunked(device_ids, QUERY_DEVICE_CHUNK)
+    ]
+    return concat_pages(page for page in pages if page and len(page.get("time", ())))
+
+
+def iso_from_ns(value_ns: Optional[int]) -> Optional[str]:
+    if value_ns is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value_ns / 1e9))
+
+
+class DeviceLiveness:
+    """デバイスごとの死活状態"""
+
+    __slots__ = (
+        "last_seen_ns",
+        "interval_s",
+        "samples",
+        "offline_since_ns",
+        "scheduled_ns",
+    )
+
+    def __init__(self, interval_s: float):
+        self.last_seen_ns = 0
+        self.interval_s = interval_s
+        # 送信間隔の推定に使った受信間隔の数
+        self.samples = 0
+        self.offline_since_ns: Optional[int] = None
+        # ヒープに積んでいる期限（積んでいなければNone）
+        self.scheduled_ns: Optional[int] = None
+
+
+class LivenessIndex:
+    """最終受信時刻と期限ヒープによる死活インデックス"""
+
+    def __init__(
+        self,
+        config: LivenessConfig = liveness_config,
+        verify: Optional[Verify] = fetch_latest,
+    ):
+        self.config = config
+        # オフラインにする前に最終受信時刻を確認する関数（Noneなら確認しない）
+        self.verify = verify if config.verify_before_offline else None
+        self._states: Dict[str, DeviceLiveness] = {}
+        self._heap: List[Tuple[int, str]] = []
+        # オフライン中のデバイスID（挿入順 = オフライン判定順）
+        self._offline: Dict[str, None] = {}
+        self._lock = threading.Lock()
+        self.on_offline: Optional[TransitionHook] = None
+        self.on_online: Optional[TransitionHook] = None
+        self.popped = 0
+
+    def _grace_ns(self, state: DeviceLiveness) -> int:
+        grace = max(
+            state.interval_s * self.config.grace_factor, self.config.min_grace_seconds
+        )
+        return int(grace * NS_PER_SECOND)
+
+    def deadline_ns(self, state: DeviceLiveness) -> int:
+        return state.last_seen_ns + self._grace_ns(state)
+
+    def _schedule(self, device_id: str, state: DeviceLiveness) -> None:
+        deadline = self.deadline_ns(state)
+        # 既に積んでいる期限より早まった場合だけ積み直す（遅くなった場合は取り出し時に積み直す）
+        if state.scheduled_ns is None or deadline < state.scheduled_ns:
+            state.scheduled_ns = deadline
+            heapq.heappush(self._heap, (deadline, device_id))
+
+    def _update_interval(self, state: DeviceLiveness, gap_s: float, count: int) -> None:
+        """受信間隔（gap_s: 今回観測した間隔の中央値）で推定送信間隔を更新"""
+        alpha = self.config.interval_smoothing if state.samples else 1.0
+        interval = (1 - alpha) * state.interval_s + alpha * gap_s
+        state.interval_s = min(
+            max(interval, self.config.min_interval_seconds),
+            self.config.max_interval_seconds,
+        )
+        state.samples += count
+
+    def _state(self, device_id: str) -> DeviceLiveness:
+        state = self._states.get(device_id)
+        if state is None:
+            state = self._states[device_id] = DeviceLiveness(
+                self.config.default_interval_seconds
+            )
+        return state
+
+    def _observe_latest(
+        self, device_id: str, latest: int, recovered: List[Dict[str, Any]]
+    ) -> bool:
+        """最新値1件の観測（最も多い経路なので配列演算を使わない）"""
+        state = self._state(device_id)
+        if latest <= state.last_seen_ns:
+            return False
+        # オフラインからの復帰時は途絶期間を送信間隔の推定に使わない
+        if state.last_seen_ns and state.offline_since_ns is None:
+            self._update_interval(
+                state, (latest - state.last_seen_ns) / NS_PER_SECOND, 1
+            )
+        return self._advance(device_id, state, latest, recovered)
+
+    def _observe_locked(
+        self, device_id: str, times_ns: np.ndarray, recovered: List[Dict[str, Any]]
+    ) -> bool:
+        if len(times_ns) == 1:
+            return self._observe_latest(device_id, int(times_ns[0]), recovered)
+        state = self._state(device_id)
+        times_ns = np.unique(times_ns[times_ns > state.last_seen_ns])
+        if not len(times_ns):
+            return False
+        if state.last_seen_ns and state.offline_since_ns is None:
+            times_ns = np.concatenate(([state.last_seen_ns], times_ns))
+        gaps = np.diff(times_ns)
+        if len(gaps):
+            self._update_interval(
+                state, float(np.median(gaps)) / NS_PER_SECOND, len(gaps)
+            )
+        return self._advance(device_id, state, int(times_ns[-1]), recovered)
+
+    def _advance(
+        self,
+        device_id: str,
+        state: DeviceLiveness,
+        latest: int,
+        recovered: List[Dict[str, Any]],
+    ) -> bool:
+        state.last_seen_ns = latest
+        if state.offline_since_ns is not None:
+            recovered.append(self._view(device_id, state))
+            state.offline_since_ns = None
+            self._offline.pop(device_id, None)
+        self._schedule(device_id, state)
+        return True
+
+    def _fire(
+        self, hook: Optional[TransitionHook], devices: List[Dict[str, Any]]
+    ) -> None:
+        if devices and hook is not None:
+            try:
+                hook(devices)
+            except Exception as e:
+                print(f"ERROR: Liveness hook failed: {str(e)}")
+
+    def observe(self, device_id: str, times_ns: Any) -> bool:
+        """
+        受信を観測（times_nsはエポックナノ秒の整数または配列）
+
+        Returns:
+            最終受信時刻が進んだ場合True
+        """
+        times = np.atleast_1d(np.asarray(times_ns, dtype=np.int64))
+        recovered: List[Dict[str, Any]] = []
+        with self._lock:
+            changed = self._observe_locked(device_id, times, recovered)
+        self._fire(self.on_online, recovered)
+        return changed
+
+    def observe_columns(self, columns: Dict[str, np.ndarray]) -> int:
+        """deviceId・time列を持つクエリ結果をまとめて観測し、更新したデバイス数を返す"""
+        if not columns or "deviceId" not in columns or not len(columns["time"]):
+            return 0
+        changed = 0
+        recovered: List[Dict[str, Any]] = []
+        keys = columns["deviceId"]
+        with self._lock:
+            if len(np.unique(keys)) == len(keys):
+                # 最新値クエリなどデバイスごとに1行の結果は分割せずに処理する
+                for device_id, latest in zip(keys.tolist(), columns["time"].tolist()):
+                    changed += self._observe_latest(device_id, latest, recovered)
+            else:
+                for device_id, cols in split_by_key(columns).items():
+                    changed += self._observe_locked(device_id, cols["time"], recovered)
+        self._fire(self.on_online, recovered)
+        return changed
+
+    def _verify(self, candidates: List[str], now_ns: int) -> bool:
+        """
+        期限切れの候補の最終受信時刻を時系列から取得して観測する
+
+        Returns:
+            確認できた場合True（確認に失敗した場合は候補をオフラインにしない）
+        """
+        if self.verify is None or not candidates:
+            return True
+        with self._lock:
+            oldest = min(self._states[d].last_seen_ns for d in candidates)
+        window_hours = min(
+            -(-(now_ns - oldest) // NS_PER_HOUR) + 1, self.config.seed_window_hours
+        )
+        try:
+            self.observe_columns(self.verify(candidates, window_hours))
+            return True
+        except Exception as e:
+            print(
+                f"WARNING: Liveness verify failed for {len(candidates)} devices:"
+                f" {str(e)}"
+            )
+            return False
+
+    def check(self, now_ns: Optional[int] = None) -> Dict[str, Any]:
+        """
+        期限を過ぎたデバイスをオフラインにする（期限を迎えたヒープエントリだけを処理）
+
+        期限切れの候補は最新値を1回の集約クエリで確認し、新しい受信があったものは積み直す。
+        """
+        now_ns = now_ns or time.time_ns()
+        candidates: List[str] = []
+        rescheduled = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now_ns:
+                deadline, device_id = heapq.heappop(self._heap)
+                self.popped += 1
+                state = self._states.get(device_id)
+                if state is None or state.scheduled_ns != deadline:
+                    continue  # 積み直し済みの古いエントリ
+                state.scheduled_ns = None
+                if self.deadline_ns(state) > now_ns:
+                    self._schedule(device_id, state)
+                    rescheduled += 1
+                    continue
+                candidates.append(device_id)
+
+        verified = self._verify(candidates, now_ns)
+        flagged: List[Dict[str, Any]] = []
+        with self._lock:
+            for device_id in candidates:
+                state = self._states.get(device_id)
+                if state is None or state.scheduled_ns is not None:
+                    rescheduled += 1  # 確認で新しい受信があり積み直し済み
+                    continue
+                current = self.deadline_ns(state)
+                if current > now_ns or not verified:
+                    # 確認できなかった候補は次回の判定で確認し直す
+                    state.scheduled_ns = current
+                    heapq.heappush(self._heap, (current, device_id))
+                    rescheduled += 1
+                    continue
+                state.offline_since_ns = current
+                self._offline[device_id] = None
+                flagged.append(self._view(device_id, state, now_ns))
+        self._fire(self.on_offline, flagged)
+        return {
+            "flagged": flagged,
+            "rescheduled": rescheduled,
+            "verified": len(candidates),
+        }
+
+    def _view(
+        self, device_id: str, state: DeviceLiveness, now_ns: Optional[int] = None
+    ) -> Dict[str, Any]:
+        now_ns = now_ns or time.time_ns()
+        return {
+            "deviceId": device_id,
+            "lastSeen": iso_from_ns(state.last_seen_ns or None),
+            "expectedIntervalSeconds": round(state.interval_s, 1),
+            "offlineSince": iso_from_ns(state.offline_since_ns),
+            "silentSeconds": round((now_ns - state.last_seen_ns) / NS_PER_SECOND)
+            if state.last_seen_ns
+            else None,
+        }
+
+    def offline(
+        self, device_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """オフラインのデバイス（device_ids指定時はその中だけ）"""
+        now_ns = time.time_ns()
+        with self._lock:
+            if device_ids is None:
+                ids: Iterable[str] = list(self._offline)
+            else:
+                ids = [d for d in dict.fromkeys(device_ids) if d in self._offline]
+            return [self._view(d, self._states[d], now_ns) for d in ids]
+
+    def status(self, device_ids: Iterable[str]) -> Dict[str, str]:
+        """デバイスごとの状態（online / offline / unknown）"""
+        with self._lock:
+            result = {}
+            for device_id in device_ids:
+                state = self._states.get(device_id)
+                if state is None or not state.last_seen_ns:
+                    result[device_id] = "unknown"
+                else:
+                    result[device_id] = (
+                        "offline" if state.offline_since_ns is not None else "online"
+                    )
+            return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "trackedDevices": len(self._states),
+                "offlineDevices": len(self._offline),
+                "scheduled": len(self._heap),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._heap.clear()
+            self._offline.clear()
+
+
+# グローバルインスタンス
+liveness_index = LivenessIndex()
@@ -0,0 +1,32 @@
+"""
+通知モジュール
+"""
+from .background import notification_dispatch_lifespan
+from .channels import InboxChannel, MemoryChannel, NotificationChannel, create_channels
+from .config import notification_config, NotificationConfig
+from .dispatcher import (
+    NotificationDispatcher,
+    TokenBucketLimiter,
+    notification_dispatcher,
+)
+from .events import notify_findings, notify_offline
+from .outbox import DynamoOutboxStore, MemoryOutboxStore, OutboxStore, create_outbox
+
+__all__ = [
+    "notification_dispatch_lifespan",
+    "InboxChannel",
+    "MemoryChannel",
+    "NotificationChannel",
+    "create_channels",
+    "notification_config",
+    "NotificationConfig",
+    "NotificationDispatcher",
+    "TokenBucketLimiter",
+    "notification_dispatcher",
+    "notify_findings",
+    "notify_offline",
+    "DynamoOutboxStore",
+    "MemoryOutboxStore",
+    "OutboxStore",
+    "create_outbox",
+]
@@ -0,0 +1,36 @@
+"""
+通知配信のバックグラウンドワーカー
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from .config import notification_config
+from .dispatcher import notification_dispatcher
+
+
+async def dispatch_loop(interval: float) -> None:
+    """配信待ちのイベントを一定間隔で配信（配信があった場合は間を空けずに続ける）"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            stats = await loop.run_in_executor(
+                None, notification_dispatcher.dispatch_once
+            )
+            if stats["events"] or stats["failed"]:
+                print(f"DEBUG: Notifications dispatched: {stats}")
+                continue
+        except Exception as e:
+            print(f"ERROR: Notification dispatch failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def notification_dispatch_lifespan(app: Any) -> AsyncIterator[None]:
+    """通知配信タスクを起動・停止するlifespan"""
+    task = None
+    if notification_config.dispatch_enabled:
+        task = asyncio.create_task(dispatch_loop(notification_config.poll_seconds))
+    yield
+    if task is not None:
+        task.cancel()
@@ -0,0 +1,236 @@
+"""
+通知配信チャネル
+
+チャネルはユーザーごとの通知をバッチで受け取って配信する。
+受信箱として読み出せるチャネル（readable）は、通知ページ用の一覧取得・既読化も提供する。
+"""
+import base64
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from app.aws import aws_clients
+from app.aws.dynamodb import batch_write_items
+
+from .config import NotificationConfig, notification_config
+
+UNREAD_INDEX = "UnreadIndex"
+
+
+def sort_key(notification: Dict[str, Any]) -> str:
+    """受信箱のソートキー（作成時刻順 + イベントIDで一意）"""
+    return f"{notification['createdAt']}#{notification['eventId']}"
+
+
+def encode_cursor(key: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def to_view(item: Dict[str, Any]) -> Dict[str, Any]:
+    """受信箱アイテムをAPIレスポンス形式に変換"""
+    return {
+        "id": item["sortKey"],
+        "eventId": item["eventId"],
+        "type": item["type"],
+        "title": item["title"],
+        "message": item["message"],
+        "target": item.get("target"),
+        "timestamp": item["createdAt"],
+        "read": bool(item.get("read")),
+    }
+
+
+class NotificationChannel:
+    """配信チャネルの共通インターフェース"""
+
+    name = "base"
+    readable = False
+
+    def deliver(self, notifications: List[Dict[str, Any]]) -> int:
+        """ユーザーごとの通知をまとめて配信し、配信件数を返す（同じ通知の再配信は上書き）"""
+        raise NotImplementedError
+
+    def list_for_user(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        unread_only: bool = False,
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def mark_read(self, user_id: str, ids: List[str]) -> int:
+        raise NotImplementedError
+
+
+class InboxChannel(NotificationChannel):
+    """
+    DynamoDBの受信箱
+
+    テーブル: パーティションキー userId、ソートキー sortKey、TTL expiresAt
+    GSI UnreadIndex（userId, unreadAt）は未読の間だけunreadAtを持つスパースインデックス
+    """
+
+    name = "inbox"
+    readable = True
+
+    def __init__(self, table_name: str, retention_days: int = 30):
+        self.table_name = table_name
+        self.table = aws_clients.table(table_name)
+        self.retention_days = retention_days
+
+    def deliver(self, notifications: List[Dict[str, Any]]) -> int:
+        expires_at = int(time.time()) + self.retention_days * 86400
+        items = [
+            {
+                "userId": n["userId"],
+                "sortKey": sort_key(n),
+                "eventId": n["eventId"],
+                "type": n["type"],
+                "title": n["title"],
+                "message": n["message"],
+                "target": n.get("target") or {},
+                "createdAt": n["createdAt"],
+                "unreadAt": n["createdAt"],
+                "read": False,
+                "expiresAt": expires_at,
+            }
+            for n in notifications
+        ]
+        return batch_write_items(self.table_name, items)
+
+    def list_for_user(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        unread_only: bool = False,
+    ) -> Dict[str, Any]:
+        from boto3.dynamodb.conditions import Key
+
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("userId").eq(user_id),
+            "ScanIndexForward": False,  # 新しい順
+            "Limit": limit,
+        }
+        if unread_only:
+            kwargs["IndexName"] = UNREAD_INDEX
+        start_key = decode_cursor(cursor)
+        if start_key:
+            if start_key.get("userId") != user_id:
+                raise ValueError("Invalid cursor")
+            kwargs["ExclusiveStartKey"] = start_key
+        response = self.table.query(**kwargs)
+        return {
+            "items": [to_view(item) for item in response.get("Items", [])],
+            "nextCursor": encode_cursor(response.get("LastEvaluatedKey")),
+        }
+
+    def mark_read(self, user_id: str, ids: List[str]) -> int:
+        from botocore.exceptions import ClientError
+
+        count = 0
+        for key in ids:
+            try:
+                self.table.update_item(
+                    Key={"userId": user_id, "sortKey": key},
+                    UpdateExpression="SET #r = :true REMOVE unreadAt",
+                    ConditionExpression="attribute_exists(sortKey)",
+                    ExpressionAttributeNames={"#r": "read"},
+                    ExpressionAttributeValues={":true": True},
+                )
+                count += 1
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        return count
+
+
+class MemoryChannel(NotificationChannel):
+    """プロセス内の受信箱（開発・計測用）"""
+
+    name = "memory"
+    readable = True
+
+    def __init__(self):
+        # userId → {sortKey: item}
+        self.inbox: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self.delivered = 0
+        self._lock = threading.Lock()
+
+    def deliver(self, notifications: List[Dict[str, Any]]) -> int:
+        with self._lock:
+            for n in notifications:
+                key = sort_key(n)
+                self.inbox[n["userId"]][key] = {
+                    **n,
+                    "sortKey": key,
+                    "read": False,
+                    "target": n.get("target") or {},
+                }
+            self.delivered += len(notifications)
+        return len(notifications)
+
+    def list_for_user(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        unread_only: bool = False,
+    ) -> Dict[str, Any]:
+        start_key = decode_cursor(cursor)
+        with self._lock:
+            keys = sorted(self.inbox.get(user_id, {}), reverse=True)
+            items = [self.inbox[user_id][k] for k in keys] if keys else []
+        if unread_only:
+            items = [item for item in items if not item["read"]]
+        if start_key:
+            items = [item for item in items if item["sortKey"] < start_key["sortKey"]]
+        page = items[:limit]
+        next_key = (
+            {"userId": user_id, "sortKey": page[-1]["sortKey"]}
+            if len(items) > limit
+            else None
+        )
+        return {
+            "items": [to_view(item) for item in page],
+            "nextCursor": encode_cursor(next_key),
+        }
+
+    def mark_read(self, user_id: str, ids: List[str]) -> int:
+        count = 0
+        with self._lock:
+            for key in ids:
+                item = self.inbox.get(user_id, {}).get(key)
+                if item is not None:
+                    item["read"] = True
+                    count += 1
+        return count
+
+
+def create_channels(
+    config: NotificationConfig = notification_config,
+) -> List[NotificationChannel]:
+    """設定から配信チャネルを生成"""
+    channels: List[NotificationChannel] = []
+    for name in config.channel_names:
+        if name == "inbox":
+            channels.append(InboxChannel(config.inbox_table, config.retention_days))
+        elif name == "memory":
+            channels.append(MemoryChannel())
+        else:
+            print(f"WARNING: Unknown notification channel '{name}', skipped")
+    return channels
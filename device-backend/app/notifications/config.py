@@ -0,0 +1,56 @@
+"""
+通知設定
+"""
+from typing import List
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class NotificationConfig(BaseSettings):
+    """通知アウトボックス・配信設定"""
+
+    outbox_table: str = Field(
+        default="NotificationOutbox", alias="NOTIFICATION_OUTBOX_TABLE"
+    )
+    inbox_table: str = Field(
+        default="UserNotifications", alias="NOTIFICATION_INBOX_TABLE"
+    )
+    # dynamodb: 永続アウトボックス / memory: プロセス内（開発・計測用）
+    outbox_backend: str = Field(default="dynamodb", alias="NOTIFICATION_OUTBOX_BACKEND")
+    # カンマ区切りで配信チャネルを指定（inbox: DynamoDB受信箱 / memory: プロセス内）
+    channels: str = Field(default="inbox", alias="NOTIFICATION_CHANNELS")
+
+    # 配信ワーカー
+    dispatch_enabled: bool = Field(default=True, alias="NOTIFICATION_DISPATCH_ENABLED")
+    workers: int = Field(default=8, alias="NOTIFICATION_WORKERS")
+    batch_size: int = Field(default=25, alias="NOTIFICATION_BATCH_SIZE")
+    claim_limit: int = Field(default=50, alias="NOTIFICATION_CLAIM_LIMIT")
+    poll_seconds: float = Field(default=2.0, alias="NOTIFICATION_POLL_SECONDS")
+    lease_seconds: float = Field(default=60.0, alias="NOTIFICATION_LEASE_SECONDS")
+    max_attempts: int = Field(default=5, alias="NOTIFICATION_MAX_ATTEMPTS")
+
+    # 重複排除: 同じ種類・対象のイベントはこの時間枠内で1回だけ
+    dedup_window_seconds: int = Field(
+        default=3600, alias="NOTIFICATION_DEDUP_WINDOW_SECONDS"
+    )
+    # ユーザーごとのレート制限（トークンバケット）
+    rate_per_minute: float = Field(default=10.0, alias="NOTIFICATION_RATE_PER_MINUTE")
+    rate_burst: int = Field(default=20, alias="NOTIFICATION_RATE_BURST")
+
+    # 受信箱・アウトボックスの保持期間（DynamoDB TTL）
+    retention_days: int = Field(default=30, alias="NOTIFICATION_RETENTION_DAYS")
+
+    @property
+    def channel_names(self) -> List[str]:
+        return [c.strip().lower() for c in self.channels.split(",") if c.strip()]
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+notification_config = NotificationConfig()
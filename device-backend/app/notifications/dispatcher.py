@@ -0,0 +1,211 @@
+"""
+通知の発行と配信
+
+publishはアウトボックスへの追加だけを行い（重複排除キーで集約）、
+配信ワーカーがイベントを宛先ユーザーに展開してチャネルへバッチで書き込む。
+ユーザーごとのレート制限を超えた通知は配信せず、件数だけ記録する。
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.aws.dynamodb import chunked
+
+from .channels import NotificationChannel, create_channels
+from .config import NotificationConfig, notification_config
+from .outbox import OutboxStore, create_outbox, dedup_key, now_utc_iso
+from .recipients import resolve_recipients
+
+NOTIFICATION_TYPES = ("alert", "warning", "info", "success")
+
+Resolver = Callable[[Dict[str, Any]], List[str]]
+
+
+class TokenBucketLimiter:
+    """キーごとのトークンバケット"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = float(burst)
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        now = now or time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            allowed = tokens >= 1.0
+            bucket[0] = tokens - 1.0 if allowed else tokens
+            bucket[1] = now
+            return allowed
+
+    def refund(self, key: str) -> None:
+        """allowで消費したトークンを1つ戻す（配信に失敗した場合）"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(self.burst, bucket[0] + 1.0)
+
+
+class NotificationDispatcher:
+    """アウトボックスからの配信"""
+
+    def __init__(
+        self,
+        store: Optional[OutboxStore] = None,
+        channels: Optional[List[NotificationChannel]] = None,
+        resolve: Resolver = resolve_recipients,
+        config: NotificationConfig = notification_config,
+    ):
+        self.config = config
+        self.store = store if store is not None else create_outbox(config)
+        self.channels = channels if channels is not None else create_channels(config)
+        self.resolve = resolve
+        self.limiter = TokenBucketLimiter(config.rate_per_minute, config.rate_burst)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def inbox(self) -> Optional[NotificationChannel]:
+        """通知ページが読み出すチャネル"""
+        return next((c for c in self.channels if c.readable), None)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.config.workers, thread_name_prefix="notify"
+                    )
+        return self._executor
+
+    # ---------- 発行 ----------
+
+    def publish(
+        self,
+        kind: str,
+        subject: str,
+        title: str,
+        message: str,
+        target: Dict[str, Any],
+        notification_type: str = "info",
+        dedup_window_seconds: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        通知イベントをアウトボックスに追加
+
+        Args:
+            kind: イベントの種類（重複排除キーに使う）
+            subject: 対象（サイト名・デバイスIDなど、重複排除キーに使う）
+            target: 宛先 {"userIds"} / {"deviceIds"} / {"site"}
+            dedup_window_seconds: 0の場合は重複排除しない
+
+        Returns:
+            追加したイベントID（同じ時間枠に同じイベントがあればNone）
+        """
+        if notification_type not in NOTIFICATION_TYPES:
+            raise ValueError(f"Unknown notification type: {notification_type}")
+        window = (
+            self.config.dedup_window_seconds
+            if dedup_window_seconds is None
+            else dedup_window_seconds
+        )
+        event_id = (
+            dedup_key(kind, subject, window)
+            if window
+            else f"{kind}:{subject}:{uuid.uuid4().hex}"
+        )
+        event = {
+            "eventId": event_id,
+            "kind": kind,
+            "subject": subject,
+            "type": notification_type,
+            "title": title,
+            "message": message,
+            "target": target,
+            "createdAt": now_utc_iso(),
+        }
+        if not self.store.put(event):
+            return None
+        return event_id
+
+    # ---------- 配信 ----------
+
+    def _deliver_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        バッチをチャネルに書き込む
+
+        失敗したバッチの宛先はトークンを戻す（再試行時にレート制限で落とさないため）。
+        """
+        try:
+            for channel in self.channels:
+                channel.deliver(batch)
+        except Exception:
+            for notification in batch:
+                self.limiter.refund(notification["userId"])
+            raise
+        return len(batch)
+
+    def _fan_out(self, event: Dict[str, Any]) -> Dict[str, int]:
+        recipients = self.resolve(event.get("target") or {})
+        allowed = [user_id for user_id in recipients if self.limiter.allow(user_id)]
+        notifications = [
+            {
+                "userId": user_id,
+                "eventId": event["eventId"],
+                "type": event["type"],
+                "title": event["title"],
+                "message": event["message"],
+                "target": event.get("target"),
+                "createdAt": event["createdAt"],
+            }
+            for user_id in allowed
+        ]
+        batches = list(chunked(notifications, self.config.batch_size))
+        delivered = sum(self._pool().map(self._deliver_batch, batches))
+        return {
+            "recipients": len(recipients),
+            "delivered": delivered,
+            "rateLimited": len(recipients) - len(allowed),
+        }
+
+    def dispatch_once(self) -> Dict[str, int]:
+        """配信待ちのイベントを1回分（claim_limit件まで）配信"""
+        stats = {"events": 0, "delivered": 0, "rateLimited": 0, "failed": 0}
+        events = self.store.claim(self.config.claim_limit, self.config.lease_seconds)
+        for event in events:
+            try:
+                result = self._fan_out(event)
+            except Exception as e:
+                give_up = int(event.get("attempts", 1)) >= self.config.max_attempts
+                print(
+                    f"ERROR: Notification {event['eventId']} delivery failed: {str(e)}"
+                )
+                self.store.release(event["eventId"], str(e), give_up=give_up)
+                stats["failed"] += 1
+                continue
+            self.store.complete(event["eventId"], result)
+            stats["events"] += 1
+            stats["delivered"] += result["delivered"]
+            stats["rateLimited"] += result["rateLimited"]
+        return stats
+
+    def drain(self, max_rounds: int = 1000) -> Dict[str, int]:
+        """配信待ちがなくなるまで配信"""
+        total = {"events": 0, "delivered": 0, "rateLimited": 0, "failed": 0}
+        for _ in range(max_rounds):
+            stats = self.dispatch_once()
+            for key, value in stats.items():
+                total[key] += value
+            if not stats["events"] and not stats["failed"]:
+                break
+        return total
+
+
+# グローバルインスタンス
+notification_dispatcher = NotificationDispatcher()
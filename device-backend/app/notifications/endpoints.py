@@ -0,0 +1,56 @@
+"""
+通知エンドポイント
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth.dependencies import get_current_user_id
+
+from .dispatcher import notification_dispatcher
+from .models import MarkReadRequest
+
+router = APIRouter(prefix="/notifications", tags=["通知"])
+
+
+def _inbox():
+    inbox = notification_dispatcher.inbox
+    if inbox is None:
+        raise HTTPException(
+            status_code=503, detail="No readable notification channel configured"
+        )
+    return inbox
+
+
+@router.get(
+    "",
+    summary="通知一覧を取得",
+    description="ユーザーの通知を新しい順に返します。nextCursorを次のリクエストのcursorに渡すと続きを取得できます。",
+)
+def list_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    unread: bool = False,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    通知一覧
+
+    - **limit**: 1ページの件数
+    - **cursor**: 前のページのnextCursor
+    - **unread**: 未読のみ
+    """
+    try:
+        page = _inbox().list_for_user(user_id, limit, cursor=cursor, unread_only=unread)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"userId": user_id, **page}
+
+
+@router.post("/read", summary="通知を既読にする", description="指定した通知を既読にします。存在しないIDは無視されます。")
+def mark_notifications_read(
+    body: MarkReadRequest, user_id: str = Depends(get_current_user_id)
+):
+    """既読化"""
+    updated = _inbox().mark_read(user_id, list(dict.fromkeys(body.ids)))
+    return {"updated": updated}
@@ -0,0 +1,73 @@
+"""
+作業提案エンジンの評価結果から通知イベントを発行
+"""
+from typing import Any, Dict, List
+
+from app.devices.cache import device_master_cache
+from app.suggestions.rules import RULE_TEMPLATES
+
+from .dispatcher import NotificationDispatcher, notification_dispatcher
+
+# 通知する優先度と通知種別
+PRIORITY_TYPES = {"urgent": "alert", "high": "warning"}
+
+
+def notify_findings(
+    device_id: str,
+    findings: List[Dict[str, Any]],
+    dispatcher: NotificationDispatcher = notification_dispatcher,
+) -> List[str]:
+    """
+    新たに検出されたルールのうち緊急・高優先度のものを通知
+
+    デバイスにサイトが設定されていればサイト単位（同じサイトの全ユーザー）、
+    なければデバイスの所有者に通知する。重複排除キーはルール×サイトなので、
+    同じサイトの複数デバイスが同時にしきい値を超えても通知は1件にまとまる。
+    """
+    urgent = [f for f in findings if f["priority"] in PRIORITY_TYPES]
+    if not urgent:
+        return []
+    device = device_master_cache.get(device_id) or {}
+    site = device.get("agriculturalSite")
+    target: Dict[str, Any] = {"site": site} if site else {"deviceIds": [device_id]}
+    published = []
+    for finding in urgent:
+        template = RULE_TEMPLATES[finding["rule"]]
+        place = f"{site} " if site else ""
+        event_id = dispatcher.publish(
+            kind=finding["rule"],
+            subject=site or device_id,
+            title=f"{place}{template['title']}",
+            message=f"{device_id}: "
+            + template["description"].format(**finding["evidence"]),
+            target={**target, "deviceId": device_id},
+            notification_type=PRIORITY_TYPES[finding["priority"]],
+        )
+        if event_id:
+            published.append(event_id)
+    return published
+
+
+def notify_offline(
+    devices: List[Dict[str, Any]],
+    dispatcher: NotificationDispatcher = notification_dispatcher,
+) -> List[str]:
+    """オフラインになったデバイスを所有者に通知（デバイスごとに1件、重複排除の時間枠内は1回）"""
+    published = []
+    for device in devices:
+        device_id = device["deviceId"]
+        event_id = dispatcher.publish(
+            kind="device_offline",
+            subject=device_id,
+            title="センサーからの受信が途絶えています",
+            message=(
+                f"{device_id}: 最終受信 {device['lastSeen']}"
+                f"（想定送信間隔 {device['expectedIntervalSeconds']:.0f}秒）から受信がありません。"
+                "電源・通信状態を確認してください。"
+            ),
+            target={"deviceIds": [device_id], "deviceId": device_id},
+            notification_type="warning",
+        )
+        if event_id:
+            published.append(event_id)
+    return published
@@ -0,0 +1,11 @@
+"""
+通知関連のPydanticモデル
+"""
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class MarkReadRequest(BaseModel):
+    """既読化リクエスト"""
+
+    ids: List[str] = Field(..., min_length=1, max_length=100)  # 通知ID（一覧のid）
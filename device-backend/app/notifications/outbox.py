@@ -0,0 +1,247 @@
+"""
+通知アウトボックス
+
+発生した通知イベントを配信前に永続化する。イベントIDは重複排除キー
+（種類・対象・時間枠）から作るため、同じ時間枠内の同じイベントは条件付き書き込みで1件に集約される。
+配信ワーカーはpendingのイベントをリース付きで取得し、配信後にdeliveredへ更新する。
+リース切れ（ワーカー停止など）のイベントは再取得される。
+"""
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from app.aws import aws_clients
+
+from .config import NotificationConfig, notification_config
+
+STATUS_INDEX = "StatusIndex"
+
+
+def now_utc_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def dedup_key(
+    kind: str, subject: str, window_seconds: int, now: Optional[float] = None
+) -> str:
+    """重複排除キー（種類:対象:時間枠番号）"""
+    bucket = int((now or time.time()) // max(window_seconds, 1))
+    return f"{kind}:{subject}:{bucket}"
+
+
+class OutboxStore:
+    """アウトボックスの共通インターフェース"""
+
+    def put(self, event: Dict[str, Any]) -> bool:
+        """イベントを追加（同じeventIdが既にあればFalse）"""
+        raise NotImplementedError
+
+    def claim(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """配信待ちのイベントをリース付きで取得"""
+        raise NotImplementedError
+
+    def complete(self, event_id: str, result: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def release(self, event_id: str, error: str, give_up: bool = False) -> None:
+        """配信失敗時に戻す（give_upの場合はfailedにする）"""
+        raise NotImplementedError
+
+
+class DynamoOutboxStore(OutboxStore):
+    """
+    DynamoDBのアウトボックス
+
+    テーブル: パーティションキー eventId、GSI StatusIndex（status, createdAt）、TTL expiresAt
+    """
+
+    def __init__(self, table_name: str, retention_days: int = 30):
+        self.table = aws_clients.table(table_name)
+        self.retention_days = retention_days
+
+    def put(self, event: Dict[str, Any]) -> bool:
+        from botocore.exceptions import ClientError
+
+        item = {
+            **event,
+            "status": "pending",
+            "attempts": 0,
+            "expiresAt": int(time.time()) + self.retention_days * 86400,
+        }
+        try:
+            self.table.put_item(
+                Item=item, ConditionExpression="attribute_not_exists(eventId)"
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
+
+    def _candidates(
+        self, status: str, limit: int, expired_before: Any = None
+    ) -> List[Dict[str, Any]]:
+        """
+        指定状態のイベントを作成順にlimit件まで取得
+
+        expired_before指定時はリースが切れたものだけに絞り込み、limit件見つかるまでページを読み進める
+        （先頭のイベントがリース中でも、その後ろの取り残されたイベントを再取得できるようにする）。
+        """
+        from boto3.dynamodb.conditions import Attr, Key
+
+        kwargs: Dict[str, Any] = {
+            "IndexName": STATUS_INDEX,
+            "KeyConditionExpression": Key("status").eq(status),
+            "Limit": limit,
+        }
+        if expired_before is not None:
+            kwargs["FilterExpression"] = Attr("leaseUntil").lt(expired_before)
+        items: List[Dict[str, Any]] = []
+        while True:
+            response = self.table.query(**kwargs)
+            items.extend(response.get("Items", []))
+            if (
+                expired_before is None
+                or len(items) >= limit
+                or "LastEvaluatedKey" not in response
+            ):
+                return items[:limit]
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def claim(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        from botocore.exceptions import ClientError
+
+        now = Decimal(str(round(time.time(), 3)))
+        candidates = self._candidates("pending", limit)
+        if len(candidates) < limit:
+            # リース切れの処理中イベントも再取得する
+            candidates += self._candidates(
+                "processing", limit - len(candidates), expired_before=now
+            )
+
+        claimed = []
+        for item in candidates:
+            try:
+                response = self.table.update_item(
+                    Key={"eventId": item["eventId"]},
+                    UpdateExpression=(
+                        "SET #s = :processing, leaseUntil = :lease ADD attempts :one"
+                    ),
+                    ConditionExpression=(
+                        "#s = :pending OR (#s = :processing AND leaseUntil < :now)"
+                    ),
+                    ExpressionAttributeNames={"#s": "status"},
+                    ExpressionAttributeValues={
+                        ":processing": "processing",
+                        ":pending": "pending",
+                        ":lease": now + Decimal(str(lease_seconds)),
+                        ":now": now,
+                        ":one": 1,
+                    },
+                    ReturnValues="ALL_NEW",
+                )
+                claimed.append(response["Attributes"])
+            except ClientError as e:
+                # 他のワーカーが先に取得した
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        return claimed
+
+    def complete(self, event_id: str, result: Dict[str, Any]) -> None:
+        self.table.update_item(
+            Key={"eventId": event_id},
+            UpdateExpression=(
+                "SET #s = :delivered, deliveredAt = :at, #r = :result REMOVE leaseUntil"
+            ),
+            ExpressionAttributeNames={"#s": "status", "#r": "result"},
+            ExpressionAttributeValues={
+                ":delivered": "delivered",
+                ":at": now_utc_iso(),
+                ":result": result,
+            },
+        )
+
+    def release(self, event_id: str, error: str, give_up: bool = False) -> None:
+        self.table.update_item(
+            Key={"eventId": event_id},
+            UpdateExpression="SET #s = :status, lastError = :error REMOVE leaseUntil",
+            ExpressionAttributeNames={"#s": "status"},
+            ExpressionAttributeValues={
+                ":status": "failed" if give_up else "pending",
+                ":error": error[:1000],
+            },
+        )
+
+
+class MemoryOutboxStore(OutboxStore):
+    """プロセス内のアウトボックス（開発・計測用）"""
+
+    def __init__(self):
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[str] = []
+        # 処理中イベントのリース期限
+        self._leases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def put(self, event: Dict[str, Any]) -> bool:
+        with self._lock:
+            if event["eventId"] in self.events:
+                return False
+            self.events[event["eventId"]] = {
+                **event,
+                "status": "pending",
+                "attempts": 0,
+            }
+            self._pending.append(event["eventId"])
+            return True
+
+    def claim(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            ids = self._pending[:limit]
+            del self._pending[: len(ids)]
+            if len(ids) < limit:
+                ids += [
+                    event_id for event_id, lease in self._leases.items() if lease < now
+                ][: limit - len(ids)]
+            claimed = []
+            for event_id in ids:
+                event = self.events[event_id]
+                event.update(
+                    status="processing",
+                    leaseUntil=now + lease_seconds,
+                    attempts=event["attempts"] + 1,
+                )
+                self._leases[event_id] = now + lease_seconds
+                claimed.append(dict(event))
+            return claimed
+
+    def complete(self, event_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._leases.pop(event_id, None)
+            self.events[event_id].update(
+                status="delivered", deliveredAt=now_utc_iso(), result=result
+            )
+
+    def release(self, event_id: str, error: str, give_up: bool = False) -> None:
+        with self._lock:
+            self._leases.pop(event_id, None)
+            self.events[event_id].update(
+                status="failed" if give_up else "pending", lastError=error
+            )
+            if not give_up:
+                self._pending.append(event_id)
+
+
+def create_outbox(config: NotificationConfig = notification_config) -> OutboxStore:
+    """設定からアウトボックスを生成"""
+    backend = config.outbox_backend.lower()
+    if backend == "memory":
+        return MemoryOutboxStore()
+    if backend != "dynamodb":
+        print(
+            f"WARNING: Unknown NOTIFICATION_OUTBOX_BACKEND '{config.outbox_backend}',"
+            " using dynamodb"
+        )
+    return DynamoOutboxStore(config.outbox_table, config.retention_days)
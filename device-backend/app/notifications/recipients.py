@@ -0,0 +1,50 @@
+"""
+通知の宛先解決
+
+イベントの対象（ユーザー・デバイス・サイト）を受信ユーザーの一覧に展開する。
+サイトの所属デバイスは共有キャッシュに保持し、同じサイトのイベントが続いてもスキャンしない。
+"""
+from typing import Any, Dict, List
+
+from app.aws import aws_clients, aws_config
+from app.cache import shared_cache
+from app.devices.ownership import owners_of
+
+site_devices_cache = shared_cache.namespace("site_devices", 300.0)
+
+
+def devices_in_site(site: str) -> List[str]:
+    """サイトに属するデバイスID（DeviceMasterのagriculturalSite）"""
+    cached = site_devices_cache.get(site)
+    if cached is not None:
+        return cached
+    table = aws_clients.table(aws_config.device_master_table)
+    scan_kwargs: Dict[str, Any] = {
+        "FilterExpression": "agriculturalSite = :site",
+        "ExpressionAttributeValues": {":site": site},
+        "ProjectionExpression": "deviceId",
+    }
+    device_ids: List[str] = []
+    while True:
+        response = table.scan(**scan_kwargs)
+        device_ids.extend(item["deviceId"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    site_devices_cache.set(site, device_ids)
+    return device_ids
+
+
+def resolve_recipients(target: Dict[str, Any]) -> List[str]:
+    """
+    宛先ユーザーIDを解決
+
+    target: {"userIds": [...]} / {"deviceIds": [...]} / {"site": "..."}（複数指定時は和集合）
+    """
+    users: Dict[str, None] = dict.fromkeys(target.get("userIds") or [])
+    device_ids = list(target.get("deviceIds") or [])
+    if target.get("site"):
+        device_ids.extend(devices_in_site(target["site"]))
+    if device_ids:
+        users.update(dict.fromkeys(owners_of(device_ids)))
+    return list(users)
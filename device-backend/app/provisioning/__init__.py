@@ -0,0 +1,11 @@
+"""
+デバイスプロビジョニングモジュール
+"""
+from .loader import BulkLoader, Checkpoint, iter_records, normalize_device
+
+__all__ = [
+    "BulkLoader",
+    "Checkpoint",
+    "iter_records",
+    "normalize_device",
+]
@@ -0,0 +1,282 @@
+"""
+DeviceMasterバルクローダー
+
+CSV/JSONLをストリーミングで読み込み、25件単位のBatchWriteItemを
+並列ワーカーで書き込む。チェックポイントにより途中から再開できる。
+PutRequestはアイテム全体を置き換える（クレーム情報が消える）ため、登録済みのデバイスは書き込まずにスキップする。
+"""
+import csv
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from app.aws import aws_clients
+
+# BatchWriteItemの1リクエストあたりの最大件数
+BATCH_WRITE_LIMIT = 25
+MAX_UNPROCESSED_RETRIES = 10
+# 結果に含めるスキップしたデバイスIDの件数
+SKIPPED_SAMPLE_SIZE = 10
+# 数値として扱うCSV列
+NUMERIC_FIELDS = {"lat", "lon"}
+
+
+def now_utc_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _to_decimal(value: Any) -> Any:
+    if value in ("", None):
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return value
+
+
+def normalize_device(record: Dict[str, Any], now: str) -> Dict[str, Any]:
+    """入力レコードをDeviceMasterアイテムに整形"""
+    item: Dict[str, Any] = {}
+    for key, value in record.items():
+        if key is None or value in ("", None):
+            continue
+        if key in NUMERIC_FIELDS:
+            value = _to_decimal(value)
+        elif isinstance(value, float):
+            value = Decimal(str(value))
+        item[key] = value
+    if not item.get("deviceId"):
+        raise ValueError(f"deviceIdがありません: {record}")
+    item["deviceId"] = str(item["deviceId"])
+    item.setdefault("status", "available")
+    item.setdefault("createdAt", now)
+    item.setdefault("updatedAt", now)
+    return item
+
+
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """CSV/JSONLファイルを1件ずつ読み込む"""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line, parse_float=Decimal)
+
+
+class Checkpoint:
+    """
+    再開用チェックポイント
+
+    バッチは並列に完了するため、先頭から連続して完了したバッチ数だけを記録する。
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.batches_done = 0
+        self._completed: Set[int] = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.batches_done = json.load(f).get("batchesDone", 0)
+
+    @property
+    def records_done(self) -> int:
+        return self.batches_done * BATCH_WRITE_LIMIT
+
+    def complete(self, batch_index: int) -> None:
+        with self._lock:
+            self._completed.add(batch_index)
+            advanced = False
+            while self.batches_done in self._completed:
+                self._completed.remove(self.batches_done)
+                self.batches_done += 1
+                advanced = True
+            if advanced:
+                self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"batchesDone": self.batches_done, "updatedAt": now_utc_iso()}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class BulkLoader:
+    """DeviceMasterへの並列バルク書き込み"""
+
+    def __init__(
+        self,
+        table_name: str,
+        workers: int = 8,
+        region_name: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        progress_interval: float = 5.0,
+    ):
+        self.table_name = table_name
+        self.workers = workers
+        self.region_name = region_name
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.progress_interval = progress_interval
+        self.written = 0
+        self.retried = 0
+        self.skipped = 0
+        self.skipped_sample: List[str] = []
+        self._lock = threading.Lock()
+
+    def _backoff(self, attempt: int, message: str) -> None:
+        if attempt > MAX_UNPROCESSED_RETRIES:
+            raise RuntimeError(message)
+        time.sleep(random.uniform(0, min(0.05 * (2**attempt), 5.0)))
+
+    def _existing(self, dynamodb: Any, device_ids: List[str]) -> Set[str]:
+        """登録済みのデバイスID（BatchGetItemでキーだけ取得、UnprocessedKeysは再送）"""
+        existing: Set[str] = set()
+        pending: Dict[str, Any] = {
+            self.table_name: {
+                "Keys": [{"deviceId": device_id} for device_id in device_ids],
+                "ProjectionExpression": "deviceId",
+            }
+        }
+        attempt = 0
+        while pending:
+            response = dynamodb.batch_get_item(RequestItems=pending)
+            existing.update(
+                item["deviceId"]
+                for item in response.get("Responses", {}).get(self.table_name, [])
+            )
+            pending = response.get("UnprocessedKeys") or {}
+            if pending:
+                attempt += 1
+                self._backoff(attempt, "BatchGetItem: 未処理キーが残りました")
+        return existing
+
+    def _write_batch(self, items: List[Dict[str, Any]]) -> None:
+        """
+        1バッチを書き込み、UnprocessedItemsは指数バックオフ（ジッター付き）で再送
+
+        登録済みのデバイスは上書きすると所有者・位置情報が消えるため書き込まない。
+        """
+        dynamodb = aws_clients.resource("dynamodb", self.region_name)
+        # 同一バッチ内の重複キーはValidationExceptionになるため後勝ちで除外
+        unique = {item["deviceId"]: item for item in items}
+        existing = self._existing(dynamodb, list(unique))
+        if existing:
+            with self._lock:
+                self.skipped += len(existing)
+                room = SKIPPED_SAMPLE_SIZE - len(self.skipped_sample)
+                self.skipped_sample.extend(sorted(existing)[: max(room, 0)])
+            unique = {k: v for k, v in unique.items() if k not in existing}
+        if not unique:
+            return
+        pending: Dict[str, Any] = {
+            self.table_name: [
+                {"PutRequest": {"Item": item}} for item in unique.values()
+            ]
+        }
+
+        attempt = 0
+        while pending:
+            response = dynamodb.batch_write_item(RequestItems=pending)
+            pending = response.get("UnprocessedItems") or {}
+            if pending:
+                attempt += 1
+                with self._lock:
+                    self.retried += len(pending.get(self.table_name, []))
+                self._backoff(attempt, "BatchWriteItem: 未処理アイテムが残りました")
+
+        with self._lock:
+            self.written += len(unique)
+
+    def _batches(
+        self, records: Iterable[Dict[str, Any]]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        now = now_utc_iso()
+        skip = self.checkpoint.records_done
+        batch: List[Dict[str, Any]] = []
+        for index, record in enumerate(records):
+            if index < skip:
+                continue
+            batch.append(normalize_device(record, now))
+            if len(batch) == BATCH_WRITE_LIMIT:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _report(self, started: float, final: bool = False) -> None:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        label = "完了" if final else "進捗"
+        print(
+            f"📈 {label}: {self.written}件書き込み "
+            f"({self.written / elapsed:,.0f} items/s, 登録済みでスキップ {self.skipped}件, "
+            f"再送 {self.retried}件, "
+            f"経過 {elapsed:.1f}s)"
+        )
+
+    def load(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        レコードを書き込む
+
+        投入中のバッチ数をworkers×2に制限するため、入力サイズによらずメモリ使用量は一定。
+        """
+        started = time.perf_counter()
+        last_report = started
+        batch_index = self.checkpoint.batches_done
+        if batch_index:
+            print(f"⏩ チェックポイントから再開: {self.checkpoint.records_done}件をスキップ")
+
+        in_flight: Dict[Future, int] = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def drain(return_when: str) -> None:
+                done, _ = wait(list(in_flight), return_when=return_when)
+                for future in done:
+                    index = in_flight.pop(future)
+                    future.result()  # 失敗時はここで例外を送出（チェックポイントは進めない）
+                    self.checkpoint.complete(index)
+
+            for batch in self._batches(records):
+                if len(in_flight) >= self.workers * 2:
+                    drain(FIRST_COMPLETED)
+                in_flight[executor.submit(self._write_batch, batch)] = batch_index
+                batch_index += 1
+
+                if time.perf_counter() - last_report >= self.progress_interval:
+                    self._report(started)
+                    last_report = time.perf_counter()
+
+            if in_flight:
+                drain(ALL_COMPLETED)
+
+        self._report(started, final=True)
+        elapsed = time.perf_counter() - started
+        self.checkpoint.clear()
+        return {
+            "written": self.written,
+            "skipped": self.skipped,
+            "skippedSample": self.skipped_sample,
+            "retried": self.retried,
+            "elapsedSec": round(elapsed, 3),
+            "itemsPerSec": round(self.written / elapsed, 1) if elapsed else 0.0,
+        }
@@ -0,0 +1,33 @@
+"""
+時間・日単位ロールアップモジュール
+
+公開名は初回アクセス時にサブモジュールから読み込む（app.lazy）。
+"""
+from app.lazy import lazy_exports
+
+__all__ = [
+    "rollup_lifespan",
+    "rollup_config",
+    "RollupConfig",
+    "RollupMaterializer",
+    "rollup_materializer",
+    "HistoryPlanner",
+    "choose_resolution",
+    "history_planner",
+    "RollupStore",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "rollup_lifespan": ".background",
+        "rollup_config": ".config",
+        "RollupConfig": ".config",
+        "RollupMaterializer": ".materializer",
+        "rollup_materializer": ".materializer",
+        "HistoryPlanner": ".planner",
+        "choose_resolution": ".planner",
+        "history_planner": ".planner",
+        "RollupStore": ".store",
+    },
+)
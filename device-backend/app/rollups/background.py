@@ -0,0 +1,41 @@
+"""
+ロールアップの定期更新
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from app.liveness.background import active_device_ids
+
+from .config import rollup_config
+
+
+def refresh_active_devices() -> dict:
+    """所有済みデバイスのロールアップを現在時刻まで進める"""
+    from .materializer import rollup_materializer
+
+    return rollup_materializer.refresh(active_device_ids())
+
+
+async def refresh_loop(interval: float) -> None:
+    """一定間隔でロールアップを更新（初回は起動直後、未集計の期間を遡って集計する）"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            stats = await loop.run_in_executor(None, refresh_active_devices)
+            if stats["hourlyBins"] or stats["dailyBins"]:
+                print(f"DEBUG: Rollups refreshed: {stats}")
+        except Exception as e:
+            print(f"ERROR: Rollup refresh failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def rollup_lifespan(app: Any) -> AsyncIterator[None]:
+    """ロールアップ更新タスクを起動・停止するlifespan"""
+    task = None
+    if rollup_config.enabled and rollup_config.scheduler_enabled:
+        task = asyncio.create_task(refresh_loop(rollup_config.refresh_seconds))
+    yield
+    if task is not None:
+        task.cancel()
@@ -0,0 +1,36 @@
+"""
+ロールアップ設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class RollupConfig(BaseSettings):
+    """時間・日単位ロールアップの設定"""
+
+    enabled: bool = Field(default=True, alias="ROLLUP_ENABLED")
+    # ロールアップの保存先（SQLiteファイル、":memory:" でプロセス内）
+    sqlite_path: str = Field(default="data/rollups.db", alias="ROLLUP_SQLITE_PATH")
+
+    # 定期更新（前回の確定時刻より後の生データだけを時間ビンに集計する）
+    scheduler_enabled: bool = Field(default=True, alias="ROLLUP_SCHEDULER_ENABLED")
+    refresh_seconds: float = Field(default=300.0, alias="ROLLUP_REFRESH_SECONDS")
+    # 取り込み遅延を見込み、この時間より前に終わった時間ビンだけを確定する
+    lag_minutes: int = Field(default=10, alias="ROLLUP_LAG_MINUTES")
+    # 初回に遡って集計する日数
+    backfill_days: int = Field(default=120, alias="ROLLUP_BACKFILL_DAYS")
+    device_chunk: int = Field(default=200, alias="ROLLUP_DEVICE_CHUNK")
+
+    # device_historyの自動選択: この時間以下は生データ、hourly_max_hours以下は時間単位、それより長い期間は日単位
+    raw_max_hours: int = Field(default=48, alias="ROLLUP_RAW_MAX_HOURS")
+    hourly_max_hours: int = Field(default=336, alias="ROLLUP_HOURLY_MAX_HOURS")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+rollup_config = RollupConfig()
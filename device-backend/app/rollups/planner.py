@@ -0,0 +1,142 @@
+"""
+履歴クエリのプランナー
+
+長い期間の履歴は、確定済みのロールアップ（日ビン → 時間ビン）と、まだ集計されていない直近の端だけを
+生データから読んで同じ解像度のビンに合成する。ロールアップがないデバイスは時系列リポジトリの
+集計クエリで期間全体を集計する。期間の開始はビンの境界に切り下げる。
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.timeseries import TimeSeriesRepository, timeseries
+
+from .config import RollupConfig, rollup_config
+from .materializer import HOUR_NS, RollupMaterializer, floor_to, rollup_materializer
+from .store import BIN_COLUMNS, DAILY, HOURLY, NS_PER_MINUTE
+
+# 解像度の指定 → ビン幅（分）
+RESOLUTIONS = {"1h": HOURLY, "1d": DAILY}
+Bins = Dict[str, np.ndarray]
+
+
+def choose_resolution(
+    hours: int, requested: Optional[str], config: RollupConfig = rollup_config
+) -> str:
+    """
+    解像度を決める
+
+    未指定は従来どおり生データ（raw）。autoを指定した場合だけ期間の長さから raw / 1h / 1d を選ぶ。
+    """
+    if requested is None:
+        return "raw"
+    if requested != "auto":
+        return requested
+    if not config.enabled or hours <= config.raw_max_hours:
+        return "raw"
+    return "1h" if hours <= config.hourly_max_hours else "1d"
+
+
+def bins_from_raw(columns: Dict[str, np.ndarray]) -> Bins:
+    """生データ（time, distance）を1点ずつのビンとして扱う"""
+    if not columns:
+        return {}
+    valid = ~np.isnan(columns["distance"])
+    values = columns["distance"][valid]
+    return {
+        "time": columns["time"][valid],
+        "minLevel": values,
+        "maxLevel": values,
+        "sumLevel": values,
+        "samples": np.ones(len(values), dtype=np.int64),
+    }
+
+
+def merge_bins(parts: List[Bins], bin_ns: int) -> Bins:
+    """ビン（またはその一部）をbin_ns幅のビンにまとめる（時刻順）"""
+    parts = [part for part in parts if part and len(part["time"])]
+    if not parts:
+        return {}
+    columns = {
+        name: np.concatenate([part[name] for part in parts]) for name in BIN_COLUMNS
+    }
+    keys = columns["time"] // bin_ns * bin_ns
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    unique, starts = np.unique(keys, return_index=True)
+    return {
+        "time": unique,
+        "minLevel": np.minimum.reduceat(columns["minLevel"][order], starts),
+        "maxLevel": np.maximum.reduceat(columns["maxLevel"][order], starts),
+        "sumLevel": np.add.reduceat(columns["sumLevel"][order], starts),
+        "samples": np.add.reduceat(columns["samples"][order], starts),
+    }
+
+
+class HistoryPlanner:
+    """ロールアップと生データの端を組み合わせた履歴"""
+
+    def __init__(
+        self,
+        materializer: RollupMaterializer = rollup_materializer,
+        repository: TimeSeriesRepository = timeseries,
+    ):
+        self.materializer = materializer
+        self.repository = repository
+
+    def history(
+        self, device_id: str, hours: int, resolution: str, now_ns: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        直近hours時間をresolution（1h / 1d）のビンで返す
+
+        Returns:
+            {"bins": time・minLevel・maxLevel・sumLevel・samples列（時刻順）, "plan": 読み取り内訳}
+        """
+        now_ns = now_ns or time.time_ns()
+        minutes = RESOLUTIONS[resolution]
+        bin_ns = minutes * NS_PER_MINUTE
+        start_ns = floor_to(now_ns - hours * HOUR_NS, bin_ns)
+        store = self.materializer.store
+        hourly_mark = store.watermarks([device_id], HOURLY).get(device_id)
+        plan: Dict[str, Any] = {
+            "resolution": resolution,
+            "dailyBins": 0,
+            "hourlyBins": 0,
+            "rawFromNs": None,
+            "rawRows": 0,
+            "source": "rollup",
+        }
+
+        if hourly_mark is None:
+            # まだ集計されていないデバイスは期間全体を集計クエリで読む
+            columns = self.repository.rollup_since([device_id], start_ns, minutes)
+            plan.update(source="raw-aggregate", rawFromNs=start_ns)
+            if not columns:
+                return {"bins": {}, "plan": plan}
+            columns["sumLevel"] = columns["avgLevel"] * columns["samples"]
+            return {"bins": {name: columns[name] for name in BIN_COLUMNS}, "plan": plan}
+
+        parts: List[Bins] = []
+        hourly_from = start_ns
+        if minutes == DAILY:
+            daily_mark = store.watermarks([device_id], DAILY).get(device_id, start_ns)
+            daily = store.read(device_id, DAILY, start_ns, daily_mark)
+            plan["dailyBins"] = len(daily.get("time", ()))
+            parts.append(daily)
+            hourly_from = max(start_ns, daily_mark)
+        hourly = store.read(device_id, HOURLY, hourly_from, hourly_mark)
+        plan["hourlyBins"] = len(hourly.get("time", ()))
+        parts.append(hourly)
+
+        # 確定時刻以降（直近の端）だけ生データを読む
+        raw_from = max(start_ns, hourly_mark)
+        raw = bins_from_raw(self.repository.series_since([device_id], raw_from - 1))
+        plan.update(rawFromNs=raw_from, rawRows=len(raw.get("time", ())))
+        parts.append(raw)
+        return {"bins": merge_bins(parts, bin_ns), "plan": plan}
+
+
+# グローバルインスタンス
+history_planner = HistoryPlanner()
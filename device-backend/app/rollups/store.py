@@ -0,0 +1,161 @@
+"""
+ロールアップストア
+
+デバイスごとの時間・日単位の集計（最小・最大・合計・件数）をSQLiteに保存する。
+平均ではなく合計と件数を持つため、時間ビンを日ビンに、ロールアップと生データの端数を同じビンに
+後から正しく合成できる。集計済みの範囲はデバイス・解像度ごとの確定時刻（watermark）で管理する。
+"""
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from app.aws.dynamodb import chunked
+from app.timeseries.sqlite import SQLiteConnections, placeholders, to_columns
+
+from .config import RollupConfig, rollup_config
+
+NS_PER_MINUTE = 60_000_000_000
+# 解像度（分）
+HOURLY = 60
+DAILY = 1440
+# 1文のIN句に含めるデバイス数（SQLiteのパラメータ数上限より十分小さく）
+PARAMS_CHUNK = 500
+
+ROLLUPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    deviceId TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    minLevel REAL,
+    maxLevel REAL,
+    sumLevel REAL,
+    samples INTEGER,
+    PRIMARY KEY (deviceId, resolution, time)
+) WITHOUT ROWID
+"""
+
+WATERMARKS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    deviceId TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    throughNs INTEGER NOT NULL,
+    PRIMARY KEY (deviceId, resolution)
+) WITHOUT ROWID
+"""
+
+BIN_COLUMNS = ("time", "minLevel", "maxLevel", "sumLevel", "samples")
+
+
+class RollupStore:
+    """SQLiteのロールアップストア"""
+
+    def __init__(self, path: str):
+        self.db = SQLiteConnections(path, [ROLLUPS_SCHEMA, WATERMARKS_SCHEMA])
+
+    def watermarks(self, device_ids: Iterable[str], resolution: int) -> Dict[str, int]:
+        """集計済みの範囲の終端（この時刻より前のビンは確定済み）"""
+        marks: Dict[str, int] = {}
+        with self.db.connection() as conn:
+            for chunk in chunked(list(device_ids), PARAMS_CHUNK):
+                marks.update(
+                    conn.execute(
+                        "SELECT deviceId, throughNs FROM watermarks"
+                        " WHERE resolution = ?"
+                        f" AND deviceId IN ({placeholders(len(chunk))})",
+                        (resolution, *chunk),
+                    ).fetchall()
+                )
+        return marks
+
+    def upsert(
+        self,
+        resolution: int,
+        columns: Dict[str, np.ndarray],
+        through_ns: int,
+        device_ids: Iterable[str],
+    ) -> int:
+        """
+        ビンを書き込み、device_idsの確定時刻をthrough_nsに進める（1トランザクション）
+
+        columnsは deviceId・time・minLevel・maxLevel・sumLevel・samples 列。
+        """
+        rows = (
+            list(zip(*(columns[name].tolist() for name in ("deviceId",) + BIN_COLUMNS)))
+            if columns
+            else []
+        )
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(row[0], resolution, *row[1:]) for row in rows],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+                [(device_id, resolution, through_ns) for device_id in device_ids],
+            )
+        return len(rows)
+
+    def merge_daily(self, device_ids: List[str], since_ns: int, until_ns: int) -> int:
+        """[since_ns, until_ns) の時間ビンから日ビンを作り、確定時刻をuntil_nsに進める"""
+        day_ns = DAILY * NS_PER_MINUTE
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR REPLACE INTO rollups"
+                " SELECT deviceId, ?, (time / ?) * ? AS day,"
+                " min(minLevel), max(maxLevel),"
+                " sum(sumLevel), sum(samples) FROM rollups"
+                " WHERE resolution = ?"
+                f" AND deviceId IN ({placeholders(len(device_ids))})"
+                " AND time >= ? AND time < ? GROUP BY deviceId, day",
+                (DAILY, day_ns, day_ns, HOURLY, *device_ids, since_ns, until_ns),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+                [(device_id, DAILY, until_ns) for device_id in device_ids],
+            )
+        return cursor.rowcount
+
+    def read(
+        self, device_id: str, resolution: int, since_ns: int, until_ns: int
+    ) -> Dict[str, np.ndarray]:
+        """[since_ns, until_ns) のビン（時刻順）"""
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(BIN_COLUMNS)} FROM rollups"
+                " WHERE deviceId = ? AND resolution = ? AND time >= ? AND time < ?"
+                " ORDER BY time",
+                (device_id, resolution, since_ns, until_ns),
+            ).fetchall()
+        return to_columns(BIN_COLUMNS, rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.db.connection() as conn:
+            bins = dict(
+                conn.execute(
+                    "SELECT resolution, count(*) FROM rollups GROUP BY resolution"
+                ).fetchall()
+            )
+            marks = conn.execute(
+                "SELECT resolution, count(*), min(throughNs), max(throughNs)"
+                " FROM watermarks"
+                " GROUP BY resolution"
+            ).fetchall()
+        return {
+            "hourlyBins": bins.get(HOURLY, 0),
+            "dailyBins": bins.get(DAILY, 0),
+            "watermarks": {
+                "hourly"
+                if resolution == HOURLY
+                else "daily": {
+                    "devices": devices,
+                    "oldestNs": oldest,
+                    "newestNs": newest,
+                }
+                for resolution, devices, oldest, newest in marks
+            },
+        }
+
+
+def create_rollup_store(config: RollupConfig = rollup_config) -> RollupStore:
+    """設定からロールアップストアを生成"""
+    return RollupStore(config.sqlite_path)
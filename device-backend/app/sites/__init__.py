@@ -0,0 +1,25 @@
+"""
+拠点・圃場単位の集計モジュール
+
+公開名は初回アクセス時にサブモジュールから読み込む（app.lazy）。
+"""
+from app.lazy import lazy_exports
+
+__all__ = [
+    "site_config",
+    "SiteConfig",
+    "SiteIndex",
+    "ensure_user_sites",
+    "site_index",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "site_config": ".config",
+        "SiteConfig": ".config",
+        "SiteIndex": ".index",
+        "ensure_user_sites": ".index",
+        "site_index": ".index",
+    },
+)
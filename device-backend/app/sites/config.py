@@ -0,0 +1,24 @@
+"""
+圃場集計設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class SiteConfig(BaseSettings):
+    """拠点（agriculturalSite）・圃場（fieldName）単位の集計の設定"""
+
+    # ユーザーの集計をデバイス一覧から作り直す間隔（秒）。それまでは増分更新だけで維持する
+    rebuild_seconds: float = Field(default=3600.0, alias="SITES_REBUILD_SECONDS")
+    # 作成時に最新値を探す期間（時間）
+    latest_window_hours: int = Field(default=168, alias="SITES_LATEST_WINDOW_HOURS")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+site_config = SiteConfig()
@@ -0,0 +1,56 @@
+"""
+圃場集計エンドポイント
+"""
+import time
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.auth.dependencies import get_current_user_id
+
+
+router = APIRouter(prefix="/sites", tags=["圃場集計"])
+
+
+def now_utc_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+@router.get(
+    "",
+    summary="拠点ごとの集計を取得",
+    description="ユーザーのデバイスを拠点ごとにまとめ、台数・オンライン数・最新水位の最小/平均/最大・異常の件数を返します。",
+)
+def list_sites(user_id: str = Depends(get_current_user_id)):
+    """
+    拠点一覧と拠点ごとの集計
+
+    集計は最新値・死活・異常の変化に合わせて更新済みのため、応答は拠点数に比例する。
+    """
+    from .index import ensure_user_sites, site_index
+
+    ensure_user_sites(user_id)
+    sites = site_index.sites(user_id)
+    return {
+        "userId": user_id,
+        "totalSites": len(sites),
+        "generatedAt": now_utc_iso(),
+        "sites": sites,
+    }
+
+
+@router.get(
+    "/{site}", summary="拠点の圃場ごとの集計を取得", description="指定した拠点の集計と、拠点内の圃場ごとの集計を返します。"
+)
+def get_site(site: str, user_id: str = Depends(get_current_user_id)):
+    """
+    拠点の集計
+
+    - **site**: 拠点名（agriculturalSite）
+    """
+    from .index import ensure_user_sites, site_index
+
+    ensure_user_sites(user_id)
+    summary = site_index.site(user_id, site)
+    if summary is None:
+        raise HTTPException(404, "Site not found")
+    return {"userId": user_id, "generatedAt": now_utc_iso(), **summary}
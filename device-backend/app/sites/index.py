@@ -0,0 +1,370 @@
+"""
+拠点・圃場の集計インデックス
+
+ユーザーごとに 拠点 → 圃場 → デバイス の索引と、拠点・圃場単位の集計（デバイス数・オンライン数・
+最新水位の最小/平均/最大・異常のあるデバイス数・最終更新）を保持する。集計は最新値の更新（取り込みAPI）、
+死活の変化、異常の有無の変化、クレームのたびにそのデバイスの所属する集計だけを差し引き・加算して更新するため、
+拠点一覧の応答は拠点数に比例する。最小・最大は、その値を持つデバイスが抜けた集計だけ読み取り時に計算し直す。
+ユーザーの集計はデバイス一覧から一定間隔で作り直し、増分更新で取りこぼした変化を補正する。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from app.devices.cache import device_master_cache
+from app.devices.dashboard import fetch_latest_readings
+from app.devices.ownership import list_user_ownerships
+from app.liveness import liveness_index
+
+from .config import SiteConfig, site_config
+
+
+class DeviceEntry:
+    """デバイスの所属と、集計に使う現在の値"""
+
+    __slots__ = ("site", "field", "level", "last_update", "online", "alert", "owners")
+
+    def __init__(self):
+        self.site = ""
+        self.field = ""
+        self.level: Optional[float] = None
+        self.last_update: Optional[str] = None
+        self.online = False
+        self.alert = False
+        self.owners: Set[str] = set()
+
+
+class GroupStats:
+    """拠点または圃場1つ分の集計"""
+
+    __slots__ = (
+        "devices",
+        "online",
+        "alerts",
+        "levels",
+        "updates",
+        "total",
+        "low",
+        "high",
+        "last_update",
+        "dirty",
+    )
+
+    def __init__(self):
+        self.devices: Set[str] = set()
+        self.online = 0
+        self.alerts = 0
+        # 最新値のあるデバイス → 水位・更新時刻
+        self.levels: Dict[str, float] = {}
+        self.updates: Dict[str, str] = {}
+        self.total = 0.0
+        self.low: Optional[float] = None
+        self.high: Optional[float] = None
+        self.last_update: Optional[str] = None
+        # 最小・最大・最終更新を持つデバイスが抜けた（読み取り時に計算し直す）
+        self.dirty = False
+
+    def add(self, device_id: str, entry: DeviceEntry) -> None:
+        self.devices.add(device_id)
+        self.online += entry.online
+        self.alerts += entry.alert
+        if entry.level is not None:
+            self.levels[device_id] = entry.level
+            self.total += entry.level
+            if not self.dirty:
+                self.low = (
+                    entry.level if self.low is None else min(self.low, entry.level)
+                )
+                self.high = (
+                    entry.level if self.high is None else max(self.high, entry.level)
+                )
+        if entry.last_update is not None:
+            self.updates[device_id] = entry.last_update
+            if not self.dirty and (
+                self.last_update is None or entry.last_update > self.last_update
+            ):
+                self.last_update = entry.last_update
+
+    def remove(self, device_id: str, entry: DeviceEntry) -> None:
+        self.devices.discard(device_id)
+        self.online -= entry.online
+        self.alerts -= entry.alert
+        level = self.levels.pop(device_id, None)
+        if level is not None:
+            self.total -= level
+            if level == self.low or level == self.high:
+                self.dirty = True
+        if self.updates.pop(device_id, None) == self.last_update:
+            self.dirty = True
+
+    def view(self) -> Dict[str, Any]:
+        if self.dirty:
+            values = self.levels.values()
+            self.total = sum(values)
+            self.low = min(values, default=None)
+            self.high = max(values, default=None)
+            self.last_update = max(self.updates.values(), default=None)
+            self.dirty = False
+        reporting = len(self.levels)
+        return {
+            "deviceCount": len(self.devices),
+            "onlineCount": self.online,
+            "offlineCount": len(self.devices) - self.online,
+            "reportingCount": reporting,
+            "minLevel": round(self.low, 2) if self.low is not None else None,
+            "avgLevel": round(self.total / reporting, 2) if reporting else None,
+            "maxLevel": round(self.high, 2) if self.high is not None else None,
+            "alerts": self.alerts,
+            "lastUpdate": self.last_update,
+        }
+
+
+class UserSites:
+    """ユーザー1人分の拠点・圃場の集計"""
+
+    __slots__ = ("sites", "fields", "built_at")
+
+    def __init__(self):
+        self.sites: Dict[str, GroupStats] = {}
+        # 拠点 → 圃場 → 集計
+        self.fields: Dict[str, Dict[str, GroupStats]] = {}
+        self.built_at = time.monotonic()
+
+
+class SiteIndex:
+    """拠点・圃場の集計インデックス"""
+
+    def __init__(self, config: SiteConfig = site_config):
+        self.config = config
+        self._devices: Dict[str, DeviceEntry] = {}
+        self._users: Dict[str, UserSites] = {}
+        self._lock = threading.Lock()
+        self.updates = 0
+
+    def _groups(self, entry: DeviceEntry) -> List[GroupStats]:
+        groups = []
+        for owner in entry.owners:
+            user = self._users.get(owner)
+            if user is None:
+                continue
+            groups.append(user.sites.setdefault(entry.site, GroupStats()))
+            groups.append(
+                user.fields.setdefault(entry.site, {}).setdefault(
+                    entry.field, GroupStats()
+                )
+            )
+        return groups
+
+    def _detach(self, device_id: str, entry: DeviceEntry) -> None:
+        for owner in entry.owners:
+            user = self._users.get(owner)
+            if user is None:
+                continue
+            site = user.sites.get(entry.site)
+            if site is not None:
+                site.remove(device_id, entry)
+                if not site.devices:
+                    del user.sites[entry.site]
+            fields = user.fields.get(entry.site, {})
+            group = fields.get(entry.field)
+            if group is not None:
+                group.remove(device_id, entry)
+                if not group.devices:
+                    del fields[entry.field]
+                    if not fields:
+                        user.fields.pop(entry.site, None)
+
+    def _update(self, device_id: str, mutate: Callable[[DeviceEntry], None]) -> None:
+        """デバイスの値を変更し、所属する集計から差し引いて加え直す"""
+        entry = self._devices.get(device_id)
+        if entry is None:
+            entry = self._devices[device_id] = DeviceEntry()
+        self._detach(device_id, entry)
+        mutate(entry)
+        for group in self._groups(entry):
+            group.add(device_id, entry)
+        self.updates += 1
+
+    def build(self, user_id: str, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        ユーザーの集計をデバイス一覧から作り直す
+
+        rowsは {deviceId, site, field, level, lastUpdate, online, alert} のリスト。
+        """
+        with self._lock:
+            previous = self._users.get(user_id)
+            if previous is not None:
+                owned = {d for group in previous.sites.values() for d in group.devices}
+                for device_id in owned:
+                    entry = self._devices[device_id]
+                    self._detach(device_id, entry)
+                    entry.owners.discard(user_id)
+                    for group in self._groups(entry):
+                        group.add(device_id, entry)
+                    if not entry.owners:
+                        del self._devices[device_id]
+            self._users[user_id] = UserSites()
+
+            for row in rows:
+
+                def mutate(entry: DeviceEntry, row: Dict[str, Any] = row) -> None:
+                    entry.site, entry.field = row["site"], row["field"]
+                    entry.level, entry.last_update = row["level"], row["lastUpdate"]
+                    entry.online, entry.alert = row["online"], row["alert"]
+                    entry.owners.add(user_id)
+
+                self._update(row["deviceId"], mutate)
+
+    def needs_build(self, user_id: str) -> bool:
+        with self._lock:
+            user = self._users.get(user_id)
+            return (
+                user is None
+                or time.monotonic() - user.built_at >= self.config.rebuild_seconds
+            )
+
+    def assign(self, user_id: str, device_id: str, site: str, field: str) -> None:
+        """クレームされたデバイスを追加（そのユーザーの集計を作成済みの場合だけ）"""
+
+        def mutate(entry: DeviceEntry) -> None:
+            entry.site, entry.field = site, field
+            entry.owners.add(user_id)
+
+        with self._lock:
+            if user_id in self._users:
+                self._update(device_id, mutate)
+
+    def observe_latest(self, readings: Dict[str, Dict[str, Any]]) -> int:
+        """最新値の更新（{deviceId: {time, distance}}）を反映。受信したデバイスはオンラインとして扱う"""
+        changed = 0
+        with self._lock:
+            for device_id, reading in readings.items():
+                entry = self._devices.get(device_id)
+                if entry is None or (entry.last_update or "") >= (
+                    reading.get("time") or ""
+                ):
+                    continue
+
+                def mutate(
+                    entry: DeviceEntry, reading: Dict[str, Any] = reading
+                ) -> None:
+                    entry.level, entry.last_update = reading.get(
+                        "distance"
+                    ), reading.get("time")
+                    entry.online = True
+
+                self._update(device_id, mutate)
+                changed += 1
+        return changed
+
+    def observe_status(self, device_ids: Iterable[str], online: bool) -> None:
+        """死活の変化を反映"""
+
+        def mutate(entry: DeviceEntry) -> None:
+            entry.online = online
+
+        with self._lock:
+            for device_id in device_ids:
+                entry = self._devices.get(device_id)
+                if entry is not None and entry.online != online:
+                    self._update(device_id, mutate)
+
+    def observe_alerts(self, alerts: Dict[str, bool]) -> None:
+        """異常の有無の変化を反映"""
+        with self._lock:
+            for device_id, active in alerts.items():
+                entry = self._devices.get(device_id)
+                if entry is None or entry.alert == active:
+                    continue
+
+                def mutate(entry: DeviceEntry, active: bool = active) -> None:
+                    entry.alert = active
+
+                self._update(device_id, mutate)
+
+    def sites(self, user_id: str) -> List[Dict[str, Any]]:
+        """ユーザーの拠点ごとの集計（拠点名順）"""
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return []
+            return [
+                {
+                    "site": site,
+                    "fieldCount": len(user.fields.get(site, {})),
+                    **group.view(),
+                }
+                for site, group in sorted(user.sites.items())
+            ]
+
+    def site(self, user_id: str, site: str) -> Optional[Dict[str, Any]]:
+        """拠点の集計と圃場ごとの集計（拠点がなければNone）"""
+        with self._lock:
+            user = self._users.get(user_id)
+            group = user.sites.get(site) if user is not None else None
+            if group is None:
+                return None
+            fields = user.fields.get(site, {})
+            return {
+                "site": site,
+                "fieldCount": len(fields),
+                **group.view(),
+                "fields": [
+                    {"field": name, **stats.view()}
+                    for name, stats in sorted(fields.items())
+                ],
+            }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "trackedDevices": len(self._devices),
+                "sites": sum(len(user.sites) for user in self._users.values()),
+                "updates": self.updates,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._devices.clear()
+            self._users.clear()
+
+
+# グローバルインスタンス
+site_index = SiteIndex()
+
+
+def ensure_user_sites(user_id: str, index: SiteIndex = site_index) -> None:
+    """ユーザーの集計が未作成または作成から時間が経っていれば、デバイス一覧から作り直す"""
+    if not index.needs_build(user_id):
+        return
+    device_ids = list(
+        dict.fromkeys(o["deviceId"] for o in list_user_ownerships(user_id))
+    )
+    masters = device_master_cache.get_many(device_ids)
+    device_ids = [device_id for device_id in device_ids if device_id in masters]
+    latest = (
+        fetch_latest_readings(device_ids, index.config.latest_window_hours)
+        if device_ids
+        else {}
+    )
+    from app.anomalies import anomaly_engine
+
+    status = liveness_index.status(device_ids)
+    alerts = anomaly_engine.alerting(device_ids)
+    index.build(
+        user_id,
+        [
+            {
+                "deviceId": device_id,
+                "site": masters[device_id].get("agriculturalSite") or "",
+                "field": masters[device_id].get("fieldName") or "",
+                "level": latest.get(device_id, {}).get("distance"),
+                "lastUpdate": latest.get(device_id, {}).get("time"),
+                "online": status.get(device_id) == "online",
+                "alert": alerts.get(device_id, False),
+            }
+            for device_id in device_ids
+        ],
+    )
+    print(f"DEBUG: Site index built for user {user_id}: {len(device_ids)} devices")
@@ -0,0 +1,12 @@
+"""
+起動最適化モジュール
+"""
+from .config import startup_config, StartupConfig
+from .warmup import run_warmup, warmup_lifespan
+
+__all__ = [
+    "startup_config",
+    "StartupConfig",
+    "run_warmup",
+    "warmup_lifespan",
+]
@@ -0,0 +1,36 @@
+"""
+起動モード設定
+"""
+from typing import List
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class StartupConfig(BaseSettings):
+    """起動設定"""
+
+    # standard: ウォームアップ完了後にリクエスト受付 / fast: 即時受付しバックグラウンドでウォームアップ
+    startup_mode: str = Field(default="standard", alias="STARTUP_MODE")
+    warmup_enabled: bool = Field(default=True, alias="WARMUP_ENABLED")
+    # カンマ区切りで先読みするデバイスIDを指定（未指定時は所有済みデバイスから選ぶ）
+    warmup_device_ids: str = Field(default="", alias="WARMUP_DEVICE_IDS")
+    warmup_device_limit: int = Field(default=100, alias="WARMUP_DEVICE_LIMIT")
+
+    @property
+    def fast(self) -> bool:
+        return self.startup_mode.lower() == "fast"
+
+    @property
+    def device_ids(self) -> List[str]:
+        return [d.strip() for d in self.warmup_device_ids.split(",") if d.strip()]
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+startup_config = StartupConfig()
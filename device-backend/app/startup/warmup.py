@@ -0,0 +1,82 @@
+"""
+起動時ウォームアップ処理
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+from app.auth.jwt_handler import jwt_validator
+from app.aws import aws_clients, aws_config
+from app.devices.cache import device_master_cache
+
+from .config import startup_config
+
+
+def prefetch_jwks() -> bool:
+    """CognitoのJWKSを先読み"""
+    return jwt_validator.prefetch()
+
+
+def hot_device_ids() -> List[str]:
+    """先読み対象のデバイスIDを決定"""
+    if startup_config.device_ids:
+        return startup_config.device_ids[: startup_config.warmup_device_limit]
+
+    # 所有済み（=閲覧される）デバイスを1ページだけ取得
+    ownership_tbl = aws_clients.table(aws_config.device_ownership_table)
+    response = ownership_tbl.scan(
+        ProjectionExpression="deviceId, isActive",
+        Limit=startup_config.warmup_device_limit,
+    )
+    return [
+        item["deviceId"]
+        for item in response.get("Items", [])
+        if item.get("isActive") == "true"
+    ]
+
+
+def prefetch_hot_devices() -> int:
+    """アクセスされやすいDeviceMasterアイテムを先読み"""
+    device_ids = hot_device_ids()
+    if not device_ids:
+        return 0
+    return device_master_cache.prefetch(device_ids)
+
+
+def run_warmup() -> Dict[str, Any]:
+    """ウォームアップを実行し、各処理の結果と所要時間を返す"""
+    report: Dict[str, Any] = {}
+    for name, task in (("jwks", prefetch_jwks), ("deviceMaster", prefetch_hot_devices)):
+        started = time.perf_counter()
+        try:
+            result: Any = task()
+        except Exception as e:
+            # ウォームアップの失敗で起動を止めない
+            print(f"WARNING: Warm-up '{name}' failed: {str(e)}")
+            result = None
+        report[name] = {
+            "result": result,
+            "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+        }
+    print(f"INFO: Warm-up finished: {report}")
+    return report
+
+
+@asynccontextmanager
+async def warmup_lifespan(app: Any) -> AsyncIterator[None]:
+    """
+    ウォームアップ用lifespan
+
+    standardモードではウォームアップ完了までリクエスト受付を待ち、
+    fastモードでは受付を先に開始してバックグラウンドでウォームアップする。
+    """
+    task = None
+    if startup_config.warmup_enabled:
+        if startup_config.fast:
+            task = asyncio.get_running_loop().run_in_executor(None, run_warmup)
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, run_warmup)
+    yield
+    if task is not None and not task.done():
+        task.cancel()
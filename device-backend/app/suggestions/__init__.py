@@ -0,0 +1,13 @@
+"""
+作業提案モジュール
+"""
+from .config import suggestion_config, SuggestionConfig
+from .engine import SuggestionEngine, build_work_suggestions, suggestion_engine
+
+__all__ = [
+    "suggestion_config",
+    "SuggestionConfig",
+    "SuggestionEngine",
+    "build_work_suggestions",
+    "suggestion_engine",
+]
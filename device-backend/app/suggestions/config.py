@@ -0,0 +1,43 @@
+"""
+作業提案エンジン設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class SuggestionConfig(BaseSettings):
+    """作業提案の判定しきい値"""
+
+    # 評価に使う直近データの期間（時間）
+    lookback_hours: int = Field(default=24, alias="SUGGESTION_LOOKBACK_HOURS")
+    # 同じデバイスの新着データを確認する最短間隔（秒）
+    refresh_seconds: float = Field(default=60.0, alias="SUGGESTION_REFRESH_SECONDS")
+
+    # 低水位: low_level_cm 未満が low_level_hours 以上続いたら灌水を提案
+    low_level_cm: float = Field(default=10.0, alias="SUGGESTION_LOW_LEVEL_CM")
+    low_level_hours: float = Field(default=3.0, alias="SUGGESTION_LOW_LEVEL_HOURS")
+    critical_level_cm: float = Field(default=5.0, alias="SUGGESTION_CRITICAL_LEVEL_CM")
+
+    # 急上昇/急低下: rate_window_minutes 以内の変化量（cm）
+    rate_window_minutes: int = Field(default=60, alias="SUGGESTION_RATE_WINDOW_MINUTES")
+    rise_cm: float = Field(default=5.0, alias="SUGGESTION_RISE_CM")
+    drop_cm: float = Field(default=5.0, alias="SUGGESTION_DROP_CM")
+    # 急変を検知対象とする直近期間（時間）
+    rate_lookback_hours: float = Field(
+        default=6.0, alias="SUGGESTION_RATE_LOOKBACK_HOURS"
+    )
+
+    # 最終受信からこの時間を超えたらセンサー点検を提案
+    stale_hours: float = Field(default=6.0, alias="SUGGESTION_STALE_HOURS")
+    # 直近データのないデバイスの最終受信時刻を探す期間（時間）
+    stale_seed_hours: int = Field(default=720, alias="SUGGESTION_STALE_SEED_HOURS")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+suggestion_config = SuggestionConfig()
@@ -0,0 +1,27 @@
+"""
+作業提案エンドポイント
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.auth.dependencies import get_current_user_id
+
+from .engine import build_work_suggestions
+
+router = APIRouter(prefix="/work-suggestions", tags=["作業提案"])
+
+
+@router.get(
+    "", summary="作業提案を取得", description="ユーザーの全デバイスの直近データをルールで評価し、作業提案を優先度順に返します。"
+)
+def work_suggestions(
+    priority: Optional[str] = Query(None, pattern="^(urgent|high|medium|low)$"),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    作業提案一覧
+
+    - **priority**: 指定した優先度の提案のみ返す
+    """
+    return build_work_suggestions(user_id, priority=priority)
@@ -0,0 +1,337 @@
+"""
+作業提案エンジン
+
+デバイスごとに直近lookback_hours分の系列と評価結果をプロセス内に保持する。
+Timestreamからは前回取得時刻より後の新着データだけを読み、新着があったデバイスだけ
+ルールを再評価する（新着のないデバイスはキャッシュ済みの結果をそのまま返す）。
+直近lookback_hours分にデータのないデバイスは、より長い期間の最新値から最終受信時刻を補い、
+再起動直後でも長期間受信のないセンサーの点検を提案できるようにする。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.aws.dynamodb import chunked
+from app.devices.cache import device_master_cache
+from app.devices.ownership import list_user_ownerships
+from app.liveness import liveness_index
+from app.timeseries import split_by_key, timeseries
+
+from .config import SuggestionConfig, suggestion_config
+from .rules import (
+    NS_PER_HOUR,
+    PRIORITY_ORDER,
+    RULE_TEMPLATES,
+    Thresholds,
+    evaluate,
+    stale_finding,
+    thresholds_for,
+)
+
+# 1クエリのIN句に含めるデバイス数
+QUERY_DEVICE_CHUNK = 200
+
+Fetch = Callable[[List[str], int], Dict[str, np.ndarray]]
+FetchLatest = Callable[[List[str], int], Dict[str, np.ndarray]]
+FindingsHook = Callable[[str, List[Dict[str, Any]]], Any]
+
+
+def fetch_series_since(device_ids: List[str], since_ns: int) -> Dict[str, np.ndarray]:
+    """時系列リポジトリから新着データを列配列で取得（取得した受信時刻は死活インデックスにも反映）"""
+    columns = timeseries.series_since(device_ids, since_ns)
+    liveness_index.observe_columns(columns)
+    return columns
+
+
+def fetch_latest_since(
+    device_ids: List[str], window_hours: int
+) -> Dict[str, np.ndarray]:
+    """直近window_hours時間内の最新値を列配列で取得（最終受信時刻の補完用）"""
+    columns = timeseries.batch_latest(device_ids, window_hours)
+    liveness_index.observe_columns(columns)
+    return columns
+
+
+class DeviceState:
+    """デバイスごとの直近系列と評価結果"""
+
+    __slots__ = (
+        "time_ns",
+        "values",
+        "watermark_ns",
+        "thresholds",
+        "findings",
+        "checked_at",
+        "version",
+        "seen_ns",
+    )
+
+    def __init__(self):
+        self.time_ns = np.empty(0, dtype=np.int64)
+        self.values = np.empty(0, dtype=np.float64)
+        # 次回の取得開始時刻（この時刻より後のデータを読む）
+        self.watermark_ns: Optional[int] = None
+        self.thresholds: Optional[Thresholds] = None
+        self.findings: List[Dict[str, Any]] = []
+        self.checked_at = 0.0
+        self.version = 0
+        # 保持中の系列より前の最終受信時刻（直近データがない場合に補う）
+        self.seen_ns: Optional[int] = None
+
+    @property
+    def last_ns(self) -> Optional[int]:
+        return int(self.time_ns[-1]) if len(self.time_ns) else None
+
+    @property
+    def last_seen_ns(self) -> Optional[int]:
+        last_ns = self.last_ns
+        return last_ns if last_ns is not None else self.seen_ns
+
+
+class SuggestionEngine:
+    """デバイス単位でキャッシュする作業提案エンジン"""
+
+    def __init__(
+        self,
+        config: SuggestionConfig = suggestion_config,
+        fetch: Fetch = fetch_series_since,
+        fetch_latest: FetchLatest = fetch_latest_since,
+    ):
+        self.config = config
+        self.fetch = fetch
+        self.fetch_latest = fetch_latest
+        self._states: Dict[str, DeviceState] = {}
+        self._lock = threading.Lock()
+        self.evaluations = 0
+        self.skipped = 0
+        # 再評価で新たに該当したルールを受け取るコールバック（通知用）
+        self.on_new_findings: Optional[FindingsHook] = None
+
+    def _state(self, device_id: str) -> DeviceState:
+        state = self._states.get(device_id)
+        if state is None:
+            state = self._states.setdefault(device_id, DeviceState())
+        return state
+
+    def ingest(
+        self,
+        device_id: str,
+        time_ns: np.ndarray,
+        values: np.ndarray,
+        thresholds: Thresholds,
+        watermark_ns: Optional[int] = None,
+    ) -> bool:
+        """
+        新着データを追加し、必要な場合だけルールを再評価する
+
+        Returns:
+            再評価した場合True（新着なし・しきい値変更なしの場合はFalse）
+        """
+        lookback_ns = self.config.lookback_hours * NS_PER_HOUR
+        with self._lock:
+            state = self._state(device_id)
+            last_ns = state.last_ns
+            keep = ~np.isnan(values)
+            if last_ns is not None:
+                keep &= time_ns > last_ns
+            new_times, new_values = time_ns[keep], values[keep]
+            if len(new_times):
+                state.watermark_ns = max(state.watermark_ns or 0, int(new_times[-1]))
+            elif watermark_ns is not None:
+                state.watermark_ns = max(state.watermark_ns or 0, watermark_ns)
+
+            if not len(new_times) and thresholds == state.thresholds:
+                self.skipped += 1
+                return False
+
+            if len(new_times):
+                order = np.argsort(new_times, kind="stable")
+                times = np.concatenate((state.time_ns, new_times[order]))
+                vals = np.concatenate((state.values, new_values[order]))
+                start = np.searchsorted(times, times[-1] - lookback_ns, side="left")
+                state.time_ns, state.values = times[start:], vals[start:]
+            previous = {f["rule"] for f in state.findings}
+            state.thresholds = thresholds
+            state.findings = evaluate(
+                state.time_ns, state.values, thresholds, self.config
+            )
+            state.version += 1
+            self.evaluations += 1
+            raised = [f for f in state.findings if f["rule"] not in previous]
+
+        if raised and self.on_new_findings is not None:
+            try:
+                self.on_new_findings(device_id, raised)
+            except Exception as e:
+                print(f"ERROR: Findings hook failed for {device_id}: {str(e)}")
+        return True
+
+    def refresh(self, thresholds_by_id: Dict[str, Thresholds]) -> Dict[str, int]:
+        """
+        確認間隔を過ぎたデバイスの新着データを取得して反映
+
+        初回のデバイスはlookback_hours分、既知のデバイスは前回取得時刻より後だけを読む。
+        """
+        now = time.monotonic()
+        now_ns = time.time_ns()
+        cold: List[str] = []
+        warm: List[str] = []
+        with self._lock:
+            for device_id in thresholds_by_id:
+                state = self._state(device_id)
+                if now - state.checked_at < self.config.refresh_seconds:
+                    continue
+                state.checked_at = now
+                (warm if state.watermark_ns is not None else cold).append(device_id)
+
+        floor_ns = now_ns - self.config.lookback_hours * NS_PER_HOUR
+        recomputed = 0
+        for group in (cold, warm):
+            for chunk in chunked(group, QUERY_DEVICE_CHUNK):
+                since_ns = min(self._states[d].watermark_ns or floor_ns for d in chunk)
+                series = split_by_key(self.fetch(chunk, max(since_ns, floor_ns)))
+                empty = np.empty(0, dtype=np.int64)
+                for device_id in chunk:
+                    cols = series.get(device_id)
+                    recomputed += self.ingest(
+                        device_id,
+                        cols["time"] if cols else empty,
+                        cols["distance"] if cols else empty.astype(np.float64),
+                        thresholds_by_id[device_id],
+                        watermark_ns=floor_ns,
+                    )
+        self._seed_last_seen(cold + warm, now_ns)
+        return {"checked": len(cold) + len(warm), "recomputed": recomputed}
+
+    def _seed_last_seen(self, device_ids: List[str], now_ns: int) -> None:
+        """
+        直近データのないデバイスの最終受信時刻を、stale_seed_hours内の最新値から補う
+
+        期間内にも受信がなければ期間の開始時刻を最終受信とみなす（少なくともその時間は受信していない）。
+        取得に失敗した場合は補わず、次回の確認で再試行する。
+        """
+        with self._lock:
+            unseen = [d for d in device_ids if self._states[d].last_seen_ns is None]
+        if not unseen:
+            return
+        window_hours = max(self.config.stale_seed_hours, self.config.lookback_hours)
+        floor_ns = now_ns - window_hours * NS_PER_HOUR
+        for chunk in chunked(unseen, QUERY_DEVICE_CHUNK):
+            try:
+                columns = self.fetch_latest(chunk, window_hours)
+            except Exception as e:
+                print(f"ERROR: Failed to fetch last seen times: {str(e)}")
+                continue
+            latest: Dict[str, int] = {}
+            if columns and len(columns.get("time", ())):
+                for device_id, time_ns in zip(
+                    columns["deviceId"].tolist(), columns["time"].tolist()
+                ):
+                    latest[device_id] = max(latest.get(device_id, 0), int(time_ns))
+            with self._lock:
+                for device_id in chunk:
+                    state = self._states[device_id]
+                    if state.last_seen_ns is None:
+                        state.seen_ns = latest.get(device_id, floor_ns)
+
+    def findings(
+        self, device_ids: Iterable[str], now_ns: Optional[int] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """キャッシュ済みの評価結果（経過時間で決まるルールはここで評価）"""
+        now_ns = now_ns or time.time_ns()
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for device_id in device_ids:
+                state = self._states.get(device_id)
+                if state is None:
+                    continue
+                items = list(state.findings)
+                stale = stale_finding(state.last_seen_ns, now_ns, self.config)
+                if stale:
+                    items.append(stale)
+                if items:
+                    result[device_id] = items
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+
+def iso_from_ns(value_ns: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value_ns / 1e9))
+
+
+def to_suggestion(device: Dict[str, Any], finding: Dict[str, Any]) -> Dict[str, Any]:
+    """ルールの評価結果をフロントエンドのWorkSuggestion形式に変換"""
+    template = RULE_TEMPLATES[finding["rule"]]
+    evidence = finding["evidence"]
+    site = device.get("agriculturalSite") or ""
+    field = device.get("fieldName") or ""
+    return {
+        "id": f"{device['deviceId']}:{finding['rule']}",
+        "deviceId": device["deviceId"],
+        "fieldId": f"{site}/{field}",
+        "fieldName": field,
+        "agriculturalSite": site,
+        "priority": finding["priority"],
+        "category": template["category"],
+        "rule": finding["rule"],
+        "title": template["title"],
+        "description": template["description"].format(**evidence),
+        "estimatedDuration": template["estimatedDuration"],
+        "difficulty": template["difficulty"],
+        "weatherDependency": template["weatherDependency"],
+        "equipment": template["equipment"],
+        "steps": template["steps"],
+        "expectedOutcome": template["expectedOutcome"].format(**evidence),
+        "evidence": evidence,
+        "createdAt": iso_from_ns(finding["detectedAtNs"]),
+        "status": "pending",
+    }
+
+
+def sort_suggestions(suggestions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """優先度順、同じ優先度内は新しい順"""
+    suggestions.sort(key=lambda s: s["createdAt"], reverse=True)
+    suggestions.sort(key=lambda s: PRIORITY_ORDER.get(s["priority"], 99))
+    return suggestions
+
+
+# グローバルインスタンス
+suggestion_engine = SuggestionEngine()
+
+
+def build_work_suggestions(
+    user_id: str,
+    priority: Optional[str] = None,
+    engine: SuggestionEngine = suggestion_engine,
+) -> Dict[str, Any]:
+    """ユーザーの全デバイスの作業提案を作成"""
+    device_ids = list(
+        dict.fromkeys(o["deviceId"] for o in list_user_ownerships(user_id))
+    )
+    masters = device_master_cache.get_many(device_ids)
+    thresholds = {
+        device_id: thresholds_for(device, engine.config)
+        for device_id, device in masters.items()
+    }
+    refreshed = engine.refresh(thresholds)
+
+    suggestions = []
+    for device_id, findings in engine.findings(thresholds).items():
+        for finding in findings:
+            if priority and finding["priority"] != priority:
+                continue
+            suggestions.append(to_suggestion(masters[device_id], finding))
+
+    return {
+        "userId": user_id,
+        "totalDevices": len(thresholds),
+        "generatedAt": iso_from_ns(time.time_ns()),
+        "checkedDevices": refreshed["checked"],
+        "recomputedDevices": refreshed["recomputed"],
+        "suggestions": sort_suggestions(suggestions),
+    }
@@ -0,0 +1,210 @@
+"""
+作業提案ルール
+
+デバイスごとの直近系列（時刻はエポックナノ秒、値は水位cm）に対して、
+ウィンドウ計算をNumPyの配列演算でまとめて行い、該当したルールを返す。
+"""
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from .config import SuggestionConfig
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_MINUTE = 60_000_000_000
+
+PRIORITY_ORDER = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
+
+# ルールごとの作業テンプレート（フロントエンドのWorkSuggestionと同じ項目）
+RULE_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "low_level": {
+        "category": "irrigation",
+        "title": "灌水の実施",
+        "description": (
+            "水位が{thresholdCm:.0f}cm未満の状態が{hoursBelow:.1f}時間続いています"
+            "（現在 {level:.1f}cm）。灌水を実施してください。"
+        ),
+        "estimatedDuration": "2-3時間",
+        "difficulty": "easy",
+        "weatherDependency": False,
+        "equipment": ["灌水ホース", "水量計"],
+        "steps": [
+            "取水口・灌水バルブの状態を確認",
+            "灌水を開始",
+            "水位の回復を監視",
+            "適切な水位に達したら停止",
+        ],
+        "expectedOutcome": "水位を{thresholdCm:.0f}cm以上まで回復",
+    },
+    "rapid_rise": {
+        "category": "maintenance",
+        "title": "排水状況の確認",
+        "description": (
+            "{windowMinutes}分間で水位が{changeCm:.1f}cm上昇しました。排水口の詰まりや流入量を確認してください。"
+        ),
+        "estimatedDuration": "30分-1時間",
+        "difficulty": "easy",
+        "weatherDependency": True,
+        "equipment": ["長靴", "スコップ"],
+        "steps": [
+            "排水口・水尻の詰まりを確認",
+            "取水口の開きすぎがないか確認",
+            "降雨による流入の場合は排水を調整",
+        ],
+        "expectedOutcome": "水位上昇の原因を特定し、適正水位を維持",
+    },
+    "rapid_drop": {
+        "category": "maintenance",
+        "title": "漏水の点検",
+        "description": (
+            "{windowMinutes}分間で水位が{changeCm:.1f}cm低下しました。畦畔や排水口からの漏水を点検してください。"
+        ),
+        "estimatedDuration": "1-2時間",
+        "difficulty": "medium",
+        "weatherDependency": False,
+        "equipment": ["長靴", "スコップ", "畦畔補修材"],
+        "steps": [
+            "畦畔の亀裂・モグラ穴を確認",
+            "排水口の板・栓の状態を確認",
+            "漏水箇所を補修",
+        ],
+        "expectedOutcome": "漏水を止め、水位の急低下を防止",
+    },
+    "stale_sensor": {
+        "category": "maintenance",
+        "title": "センサーの点検",
+        "description": "{hoursSince:.1f}時間データを受信していません。センサーの電源・通信状態を確認してください。",
+        "estimatedDuration": "30分",
+        "difficulty": "easy",
+        "weatherDependency": False,
+        "equipment": ["予備電池", "清掃用具"],
+        "steps": [
+            "センサーの電源・電池残量を確認",
+            "通信状態を確認",
+            "必要に応じて再起動・清掃",
+        ],
+        "expectedOutcome": "データ受信の再開",
+    },
+}
+
+
+class Thresholds(NamedTuple):
+    """デバイス（圃場）ごとのしきい値"""
+
+    low_level_cm: float
+    critical_level_cm: float
+
+
+def thresholds_for(
+    device: Optional[Dict[str, Any]], config: SuggestionConfig
+) -> Thresholds:
+    """DeviceMasterに圃場別のしきい値があれば優先する"""
+    device = device or {}
+    low = device.get("lowLevelThresholdCm", config.low_level_cm)
+    critical = device.get("criticalLevelCm", config.critical_level_cm)
+    return Thresholds(float(low), float(critical))
+
+
+def trailing_run_start(mask: np.ndarray) -> Optional[int]:
+    """末尾から連続してTrueが続く区間の開始位置（末尾がFalseならNone）"""
+    if not len(mask) or not mask[-1]:
+        return None
+    breaks = np.flatnonzero(~mask)
+    return int(breaks[-1]) + 1 if len(breaks) else 0
+
+
+def window_change(
+    time_ns: np.ndarray, values: np.ndarray, window_ns: int
+) -> np.ndarray:
+    """各点について、window_ns前の時点（ウィンドウ内の最初の点）からの変化量"""
+    start = np.searchsorted(time_ns, time_ns - window_ns, side="left")
+    return values - values[start]
+
+
+def evaluate(
+    time_ns: np.ndarray,
+    values: np.ndarray,
+    thresholds: Thresholds,
+    config: SuggestionConfig,
+) -> List[Dict[str, Any]]:
+    """系列に対してルールを評価し、該当したルールを返す"""
+    if not len(time_ns):
+        return []
+
+    findings: List[Dict[str, Any]] = []
+    latest_ns = int(time_ns[-1])
+    latest = float(values[-1])
+
+    # 低水位の継続
+    start = trailing_run_start(values < thresholds.low_level_cm)
+    if start is not None:
+        hours_below = (latest_ns - int(time_ns[start])) / NS_PER_HOUR
+        if hours_below >= config.low_level_hours:
+            findings.append(
+                {
+                    "rule": "low_level",
+                    "priority": "urgent"
+                    if latest < thresholds.critical_level_cm
+                    else "high",
+                    "detectedAtNs": latest_ns,
+                    "evidence": {
+                        "level": latest,
+                        "thresholdCm": thresholds.low_level_cm,
+                        "hoursBelow": round(hours_below, 2),
+                    },
+                }
+            )
+
+    # 急上昇・急低下（直近rate_lookback_hours内の点のみ対象）
+    recent = time_ns >= latest_ns - int(config.rate_lookback_hours * NS_PER_HOUR)
+    change = window_change(time_ns, values, config.rate_window_minutes * NS_PER_MINUTE)[
+        recent
+    ]
+    if len(change):
+        recent_times = time_ns[recent]
+        rise_at = int(np.argmax(change))
+        if change[rise_at] >= config.rise_cm:
+            findings.append(
+                {
+                    "rule": "rapid_rise",
+                    "priority": "high",
+                    "detectedAtNs": int(recent_times[rise_at]),
+                    "evidence": {
+                        "changeCm": round(float(change[rise_at]), 2),
+                        "windowMinutes": config.rate_window_minutes,
+                        "level": latest,
+                    },
+                }
+            )
+        drop_at = int(np.argmin(change))
+        if -change[drop_at] >= config.drop_cm:
+            findings.append(
+                {
+                    "rule": "rapid_drop",
+                    "priority": "medium",
+                    "detectedAtNs": int(recent_times[drop_at]),
+                    "evidence": {
+                        "changeCm": round(float(-change[drop_at]), 2),
+                        "windowMinutes": config.rate_window_minutes,
+                        "level": latest,
+                    },
+                }
+            )
+    return findings
+
+
+def stale_finding(
+    last_ns: Optional[int], now_ns: int, config: SuggestionConfig
+) -> Optional[Dict[str, Any]]:
+    """最終受信からの経過時間で判定（新着データがなくても時間経過で変わるため都度評価）"""
+    if last_ns is None:
+        return None
+    hours_since = (now_ns - last_ns) / NS_PER_HOUR
+    if hours_since < config.stale_hours:
+        return None
+    return {
+        "rule": "stale_sensor",
+        "priority": "low",
+        "detectedAtNs": now_ns,
+        "evidence": {"hoursSince": round(hours_since, 2)},
+    }
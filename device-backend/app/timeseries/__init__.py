@@ -0,0 +1,38 @@
+"""
+時系列データモジュール
+"""
+from .decoder import (
+    TimestreamDecoder,
+    concat_pages,
+    float_or_none,
+    format_timestamps,
+    iter_query_pages,
+    query_columns,
+    split_by_key,
+)
+from .config import TimeSeriesConfig, timeseries_config
+from .downsample import lttb, lttb_indices
+from .repository import (
+    TimeSeriesRepository,
+    TimestreamRepository,
+    create_repository,
+    timeseries,
+)
+
+__all__ = [
+    "TimeSeriesConfig",
+    "TimeSeriesRepository",
+    "TimestreamDecoder",
+    "TimestreamRepository",
+    "concat_pages",
+    "create_repository",
+    "float_or_none",
+    "format_timestamps",
+    "iter_query_pages",
+    "lttb",
+    "lttb_indices",
+    "query_columns",
+    "split_by_key",
+    "timeseries",
+    "timeseries_config",
+]
@@ -0,0 +1,24 @@
+"""
+時系列ストレージ設定
+"""
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class TimeSeriesConfig(BaseSettings):
+    """時系列データの保存先設定（Timestreamのデータベース・テーブル名はAWS設定）"""
+
+    # timestream: Amazon Timestream / sqlite: 組み込みSQLite（ローカル開発・負荷試験用）
+    backend: str = Field(default="timestream", alias="TS_BACKEND")
+    # SQLiteのファイルパス（":memory:" でプロセス内）
+    sqlite_path: str = Field(default="data/timeseries.db", alias="TS_SQLITE_PATH")
+
+    model_config = {
+        "env_file": ".env",
+        "case_sensitive": False,
+        "extra": "ignore",
+    }
+
+
+# グローバル設定インスタンス
+timeseries_config = TimeSeriesConfig()
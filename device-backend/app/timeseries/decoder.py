@@ -0,0 +1,130 @@
+"""
+Timestreamクエリ結果のカラム型デコーダー
+
+ColumnInfoを1回だけ解釈し、各ページを行dictを作らずに型付きのNumPy配列へ変換する。
+TIMESTAMPはエポックナノ秒（int64）、DOUBLEはfloat64、NULLはNaN/NaTになる。
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from app.admission import admission_controller
+
+# NaT（datetime64のNULL）をint64として見た値
+NAT_NS = np.iinfo(np.int64).min
+
+
+class TimestreamDecoder:
+    """スキーマを解釈済みのデコーダー"""
+
+    def __init__(self, column_info: List[Dict[str, Any]]):
+        self.names = [column["Name"] for column in column_info]
+        self.types = [
+            column.get("Type", {}).get("ScalarType", "VARCHAR")
+            for column in column_info
+        ]
+
+    @classmethod
+    def from_response(cls, response: Dict[str, Any]) -> "TimestreamDecoder":
+        return cls(response.get("ColumnInfo", []))
+
+    @staticmethod
+    def _convert(values: List[Optional[str]], scalar_type: str) -> np.ndarray:
+        if scalar_type == "TIMESTAMP":
+            # NoneはNaTになる
+            return np.array(values, dtype="datetime64[ns]").view(np.int64)
+        if scalar_type == "DOUBLE":
+            return np.array(
+                ["nan" if v is None else v for v in values], dtype=np.float64
+            )
+        if scalar_type in ("BIGINT", "INTEGER"):
+            if None in values:
+                return np.array(
+                    ["nan" if v is None else v for v in values], dtype=np.float64
+                )
+            return np.array(values, dtype=np.int64)
+        if scalar_type == "BOOLEAN":
+            return np.array([v == "true" for v in values], dtype=bool)
+        return np.array(values, dtype=object)
+
+    def decode_rows(self, rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """1ページ分のRowsを列ごとの配列に変換"""
+        datas = [row["Data"] for row in rows]
+        columns = {}
+        for index, (name, scalar_type) in enumerate(zip(self.names, self.types)):
+            values = [data[index].get("ScalarValue") for data in datas]
+            columns[name] = self._convert(values, scalar_type)
+        return columns
+
+    def empty(self) -> Dict[str, np.ndarray]:
+        return self.decode_rows([])
+
+
+def concat_pages(pages: Iterable[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """ページごとの列配列を連結"""
+    pages = list(pages)
+    if not pages:
+        return {}
+    if len(pages) == 1:
+        return pages[0]
+    return {name: np.concatenate([page[name] for page in pages]) for name in pages[0]}
+
+
+def iter_query_pages(
+    ts_query: Any, query_string: str
+) -> Iterator[Dict[str, np.ndarray]]:
+    """クエリを実行し、NextTokenを辿りながらページ単位で列配列を返す"""
+    decoder: Optional[TimestreamDecoder] = None
+    kwargs: Dict[str, Any] = {"QueryString": query_string}
+    while True:
+        # リクエスト中のクエリはユーザーごとの予算・同時実行枠の範囲で実行する
+        with admission_controller.admit():
+            response = ts_query.query(**kwargs)
+        if decoder is None:
+            decoder = TimestreamDecoder.from_response(response)
+        rows = response.get("Rows", [])
+        if rows:
+            yield decoder.decode_rows(rows)
+        token = response.get("NextToken")
+        if not token:
+            break
+        kwargs["NextToken"] = token
+
+
+def query_columns(ts_query: Any, query_string: str) -> Dict[str, np.ndarray]:
+    """クエリ結果全体を列配列で取得"""
+    return concat_pages(iter_query_pages(ts_query, query_string))
+
+
+def format_timestamps(time_ns: np.ndarray) -> List[Optional[str]]:
+    """エポックナノ秒をTimestreamの文字列形式（'YYYY-MM-DD HH:MM:SS.fffffffff'）に戻す"""
+    strings = np.datetime_as_string(time_ns.view("datetime64[ns]"), unit="ns")
+    return [
+        None if ns == NAT_NS else s.replace("T", " ")
+        for ns, s in zip(time_ns.tolist(), strings.tolist())
+    ]
+
+
+def float_or_none(values: np.ndarray) -> List[Optional[float]]:
+    """float64配列をJSON用のリストに変換（NaNはNone）"""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def split_by_key(
+    columns: Dict[str, np.ndarray], key: str = "deviceId"
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """キー列の値ごとに列配列を分割（キー内の行順は維持）"""
+    if not columns or not len(columns[key]):
+        return {}
+    keys = columns[key]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    unique, starts = np.unique(sorted_keys, return_index=True)
+    bounds = list(starts[1:]) + [len(sorted_keys)]
+    result = {}
+    for value, start, end in zip(unique.tolist(), starts.tolist(), bounds):
+        index = order[start:end]
+        result[value] = {
+            name: array[index] for name, array in columns.items() if name != key
+        }
+    return result
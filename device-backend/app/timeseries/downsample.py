@@ -0,0 +1,67 @@
+"""
+チャート用ダウンサンプリング
+
+Largest-Triangle-Three-Buckets（LTTB）で、急な水位低下やスパイクなどの
+視覚的な極値を残したまま系列をN点に間引く。
+"""
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    LTTBで残す点のインデックスを返す
+
+    前のバケットで選んだ点に依存するためバケット単位のループは残るが、
+    バケット内の三角形面積の計算はすべて配列演算で行う（ループ回数はn_out回）。
+
+    Args:
+        x: 単調増加のx座標（時刻など）
+        y: 値（NaNを含まないこと）
+        n_out: 出力点数（3以上）
+
+    Returns:
+        選択された点のインデックス（昇順）
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+
+    # 先頭と末尾を除いた点をn_out-2個のバケットに分割
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # 次のバケットの平均点（三角形の3点目）を前もってまとめて計算
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    next_starts = np.append(ends[:-1], n - 1)
+    next_ends = np.append(ends[1:], n)
+    counts = next_ends - next_starts
+    avg_x = (cum_x[next_ends] - cum_x[next_starts]) / counts
+    avg_y = (cum_y[next_ends] - cum_y[next_starts]) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        bx = x[start:end]
+        by = y[start:end]
+        # 前の選択点・バケット内の候補・次バケット平均点が作る三角形の面積（の2倍）
+        area = np.abs(
+            (x[prev] - avg_x[i]) * (by - y[prev])
+            - (x[prev] - bx) * (avg_y[i] - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> tuple:
+    """LTTBで間引いた (x, y) を返す（NaNは事前に除外する）"""
+    mask = ~np.isnan(y)
+    x, y = x[mask], y[mask]
+    index = lttb_indices(x, y, n_out)
+    return x[index], y[index]
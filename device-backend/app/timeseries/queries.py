@@ -0,0 +1,119 @@
+"""
+Timestreamクエリ生成
+"""
+from typing import Iterable
+
+from app.aws import aws_config
+
+
+def table_ref() -> str:
+    return f'"{aws_config.ts_db}"."{aws_config.ts_table}"'
+
+
+def sql_literal(value: str) -> str:
+    """文字列リテラルとしてエスケープ"""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def sql_in_list(values: Iterable[str]) -> str:
+    return ", ".join(sql_literal(v) for v in values)
+
+
+def device_latest_query(device_id: str) -> str:
+    """1デバイスの最新値を取得"""
+    return f"""
+    SELECT time, measure_value::double AS distance
+    FROM {table_ref()}
+    WHERE measure_name='distance' AND deviceId = {sql_literal(device_id)}
+    ORDER BY time DESC
+    LIMIT 1
+    """
+
+
+def device_range_query(
+    device_id: str, hours: int, limit: int, ascending: bool = False
+) -> str:
+    """1デバイスの直近hours時間の生データを取得（既定は新しい順）"""
+    return f"""
+    SELECT time, measure_value::double AS distance
+    FROM {table_ref()}
+    WHERE measure_name='distance'
+    AND deviceId = {sql_literal(device_id)}
+    AND time > ago({int(hours)}h)
+    ORDER BY time {"ASC" if ascending else "DESC"}
+    LIMIT {int(limit)}
+    """
+
+
+def latest_by_device_query(device_ids: Iterable[str], window_hours: int) -> str:
+    """複数デバイスの最新値を1クエリで取得"""
+    return f"""
+    SELECT deviceId, max(time) AS time, max_by(measure_value::double, time) AS distance
+    FROM {table_ref()}
+    WHERE measure_name='distance'
+    AND deviceId IN ({sql_in_list(device_ids)})
+    AND time > ago({int(window_hours)}h)
+    GROUP BY deviceId
+    """
+
+
+def binned_series_query(
+    device_ids: Iterable[str], hours: int, bucket_minutes: int
+) -> str:
+    """複数デバイスの時間ビン平均を1クエリで取得（deviceId, 時刻順）"""
+    return f"""
+    SELECT deviceId, bin(time, {int(bucket_minutes)}m) AS time,
+           avg(measure_value::double) AS distance
+    FROM {table_ref()}
+    WHERE measure_name='distance'
+    AND deviceId IN ({sql_in_list(device_ids)})
+    AND time > ago({int(hours)}h)
+    GROUP BY deviceId, bin(time, {int(bucket_minutes)}m)
+    ORDER BY deviceId, time
+    """
+
+
+def series_since_query(device_ids: Iterable[str], since_ns: int) -> str:
+    """複数デバイスの生データを指定時刻（エポックナノ秒）より後だけ取得（deviceId, 時刻順）"""
+    return f"""
+    SELECT deviceId, time, measure_value::double AS distance
+    FROM {table_ref()}
+    WHERE measure_name='distance'
+    AND deviceId IN ({sql_in_list(device_ids)})
+    AND time > from_nanoseconds({int(since_ns)})
+    ORDER BY deviceId, time
+    """
+
+
+def rollup_since_query(
+    device_ids: Iterable[str], since_ns: int, bin_minutes: int
+) -> str:
+    """複数デバイスの時間ビン集計（平均・最小・最大・件数）を指定時刻以降だけ取得"""
+    return f"""
+    SELECT deviceId, bin(time, {int(bin_minutes)}m) AS time,
+           avg(measure_value::double) AS avgLevel,
+           min(measure_value::double) AS minLevel,
+           max(measure_value::double) AS maxLevel,
+           count(*) AS samples
+    FROM {table_ref()}
+    WHERE measure_name='distance'
+    AND deviceId IN ({sql_in_list(device_ids)})
+    AND time >= from_nanoseconds({int(since_ns)})
+    GROUP BY deviceId, bin(time, {int(bin_minutes)}m)
+    ORDER BY deviceId, time
+    """
+
+
+def series_between_query(
+    device_ids: Iterable[str], since_ns: int, until_ns: int
+) -> str:
+    """複数デバイスの [since_ns, until_ns) の生データを取得（deviceId, 時刻順）"""
+    return f"""
+    SELECT deviceId, time, measure_value::double AS distance
+    FROM {table_ref()}
+    WHERE measure_name='distance'
+    AND deviceId IN ({sql_in_list(device_ids)})
+    AND time >= from_nanoseconds({int(since_ns)})
+    AND time < from_nanoseconds({int(until_ns)})
+    ORDER BY deviceId, time
+    """
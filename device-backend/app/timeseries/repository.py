@@ -0,0 +1,144 @@
+"""
+時系列リポジトリ
+
+測定値の読み取りを保存先に依存しない操作（最新値・期間・集計・複数デバイスの最新値）にまとめる。
+結果はどの実装でもTimestreamデコーダーと同じ列配列（時刻: エポックns / 値: float64）で返し、
+該当データがない場合は空のdictを返す。
+"""
+from typing import Dict, Iterable, Iterator
+
+import numpy as np
+
+from app.aws import aws_clients
+
+from .config import TimeSeriesConfig, timeseries_config
+from .decoder import iter_query_pages, query_columns
+from .queries import (
+    binned_series_query,
+    device_latest_query,
+    device_range_query,
+    latest_by_device_query,
+    rollup_since_query,
+    series_between_query,
+    series_since_query,
+)
+
+Columns = Dict[str, np.ndarray]
+
+
+class TimeSeriesRepository:
+    """時系列リポジトリの共通インターフェース"""
+
+    name = "base"
+
+    def latest(self, device_id: str) -> Columns:
+        """1デバイスの最新値（time, distance、最大1行）"""
+        raise NotImplementedError
+
+    def range(
+        self, device_id: str, hours: int, limit: int, ascending: bool = False
+    ) -> Columns:
+        """1デバイスの直近hours時間の生データ（time, distance、最大limit行）"""
+        raise NotImplementedError
+
+    def batch_latest(self, device_ids: Iterable[str], window_hours: int) -> Columns:
+        """複数デバイスの直近window_hours時間内の最新値（deviceId, time, distance）"""
+        raise NotImplementedError
+
+    def aggregate(
+        self, device_ids: Iterable[str], hours: int, bucket_minutes: int
+    ) -> Columns:
+        """複数デバイスの時間ビン平均（deviceId, time, distance、deviceId・時刻順）"""
+        raise NotImplementedError
+
+    def series_since(self, device_ids: Iterable[str], since_ns: int) -> Columns:
+        """複数デバイスのsince_nsより後の生データ（deviceId, time, distance、deviceId・時刻順）"""
+        raise NotImplementedError
+
+    def rollup_since(
+        self, device_ids: Iterable[str], since_ns: int, bin_minutes: int
+    ) -> Columns:
+        """
+        複数デバイスのsince_ns以降の時間ビン集計
+        （deviceId, time, avgLevel, minLevel, maxLevel, samples、deviceId・時刻順）
+        """
+        raise NotImplementedError
+
+    def iter_series(
+        self, device_ids: Iterable[str], since_ns: int, until_ns: int
+    ) -> Iterator[Columns]:
+        """
+        複数デバイスの [since_ns, until_ns) の生データをページ単位で返す
+        （deviceId, time, distance、deviceId・時刻順。全件をメモリに載せずに読むための経路）
+        """
+        raise NotImplementedError
+
+    def write(self, columns: Columns) -> int:
+        """deviceId・time（エポックns）・distance列を書き込み、書き込んだ行数を返す"""
+        raise NotImplementedError
+
+
+class TimestreamRepository(TimeSeriesRepository):
+    """Amazon Timestream（書き込みは取り込みAPIのWriteRecordsで行う）"""
+
+    name = "timestream"
+
+    def __init__(self):
+        self.client = aws_clients.lazy_client("timestream-query")
+
+    def latest(self, device_id: str) -> Columns:
+        return query_columns(self.client, device_latest_query(device_id))
+
+    def range(
+        self, device_id: str, hours: int, limit: int, ascending: bool = False
+    ) -> Columns:
+        return query_columns(
+            self.client, device_range_query(device_id, hours, limit, ascending)
+        )
+
+    def batch_latest(self, device_ids: Iterable[str], window_hours: int) -> Columns:
+        return query_columns(
+            self.client, latest_by_device_query(device_ids, window_hours)
+        )
+
+    def aggregate(
+        self, device_ids: Iterable[str], hours: int, bucket_minutes: int
+    ) -> Columns:
+        return query_columns(
+            self.client, binned_series_query(device_ids, hours, bucket_minutes)
+        )
+
+    def series_since(self, device_ids: Iterable[str], since_ns: int) -> Columns:
+        return query_columns(self.client, series_since_query(device_ids, since_ns))
+
+    def rollup_since(
+        self, device_ids: Iterable[str], since_ns: int, bin_minutes: int
+    ) -> Columns:
+        return query_columns(
+            self.client, rollup_since_query(device_ids, since_ns, bin_minutes)
+        )
+
+    def iter_series(
+        self, device_ids: Iterable[str], since_ns: int, until_ns: int
+    ) -> Iterator[Columns]:
+        return iter_query_pages(
+            self.client, series_between_query(device_ids, since_ns, until_ns)
+        )
+
+
+def create_repository(
+    config: TimeSeriesConfig = timeseries_config,
+) -> TimeSeriesRepository:
+    """設定から時系列リポジトリを生成"""
+    backend = config.backend.lower()
+    if backend == "sqlite":
+        from .sqlite import SQLiteRepository
+
+        return SQLiteRepository(config.sqlite_path)
+    if backend != "timestream":
+        print(f"WARNING: Unknown TS_BACKEND '{config.backend}', using timestream")
+    return TimestreamRepository()
+
+
+# グローバルインスタンス
+timeseries = create_repository()
@@ -0,0 +1,239 @@
+"""
+組み込みSQLiteの時系列リポジトリ（ローカル開発・負荷試験用）
+
+測定値は (deviceId, time) を主キーとするWITHOUT ROWIDテーブルに保存するため、行はデバイスごとに
+時刻順でクラスタ化され、最新値・期間・デバイス単位の集計はいずれもインデックスの範囲走査になる。
+Timestreamと同様にクエリはアドミッション制御の枠内で実行する。
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from app.admission import admission_controller
+
+from .repository import Columns, TimeSeriesRepository
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_MINUTE = 60_000_000_000
+# iter_seriesの1ページの行数
+PAGE_ROWS = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    deviceId TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    distance REAL,
+    PRIMARY KEY (deviceId, time)
+) WITHOUT ROWID
+"""
+
+# 列名ごとの配列型（それ以外はfloat64）
+COLUMN_TYPES = {"deviceId": object, "time": np.int64, "samples": np.int64}
+
+
+def to_columns(names: Sequence[str], rows: List[Tuple[Any, ...]]) -> Columns:
+    """行のリストを列配列に変換（行がなければ空のdict）"""
+    if not rows:
+        return {}
+    return {
+        name: np.array(values, dtype=COLUMN_TYPES.get(name, np.float64))
+        for name, values in zip(names, zip(*rows))
+    }
+
+
+def placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+class SQLiteConnections:
+    """
+    SQLiteファイルへの接続
+
+    ファイルの場合はスレッドごとに接続を持ち（WALで読み取りと書き込みを並行させる）、
+    ":memory:" の場合は1接続をロックで共有する。接続はオートコミットで、まとめて書き込む場合は
+    transaction()を使う。
+    """
+
+    def __init__(self, path: str, schema: Sequence[str] = ()):
+        self.path = path
+        self.in_memory = path == ":memory:"
+        self._local = threading.local()
+        self._shared: Any = None
+        self._lock = threading.Lock()
+        if not self.in_memory and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connection() as conn:
+            for statement in schema:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            check_same_thread=not self.in_memory,
+            isolation_level=None,
+        )
+        if not self.in_memory:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        if self.in_memory:
+            with self._lock:
+                if self._shared is None:
+                    self._shared = self._connect()
+                yield self._shared
+            return
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        yield conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+
+class SQLiteRepository(TimeSeriesRepository):
+    """組み込みSQLite"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.db = SQLiteConnections(path, [SCHEMA])
+
+    def _connection(self):
+        return self.db.connection()
+
+    def _select(self, sql: str, params: Sequence[Any], names: Sequence[str]) -> Columns:
+        with admission_controller.admit(), self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return to_columns(names, rows)
+
+    # ---------- 読み取り ----------
+
+    def latest(self, device_id: str) -> Columns:
+        return self._select(
+            "SELECT time, distance FROM readings WHERE deviceId = ?"
+            " ORDER BY time DESC LIMIT 1",
+            (device_id,),
+            ("time", "distance"),
+        )
+
+    def range(
+        self, device_id: str, hours: int, limit: int, ascending: bool = False
+    ) -> Columns:
+        return self._select(
+            "SELECT time, distance FROM readings WHERE deviceId = ? AND time > ?"
+            f" ORDER BY time {'ASC' if ascending else 'DESC'} LIMIT ?",
+            (device_id, time.time_ns() - int(hours) * NS_PER_HOUR, int(limit)),
+            ("time", "distance"),
+        )
+
+    def batch_latest(self, device_ids: Iterable[str], window_hours: int) -> Columns:
+        # GROUP BYで期間内の全行を集約するより、デバイスごとに主キーを逆順に1行だけ引く方が速い
+        since_ns = time.time_ns() - int(window_hours) * NS_PER_HOUR
+        rows = []
+        with admission_controller.admit(), self._connection() as conn:
+            for device_id in dict.fromkeys(device_ids):
+                row = conn.execute(
+                    "SELECT deviceId, time, distance FROM readings"
+                    " WHERE deviceId = ? AND time > ? ORDER BY time DESC LIMIT 1",
+                    (device_id, since_ns),
+                ).fetchone()
+                if row is not None:
+                    rows.append(row)
+        return to_columns(("deviceId", "time", "distance"), rows)
+
+    def aggregate(
+        self, device_ids: Iterable[str], hours: int, bucket_minutes: int
+    ) -> Columns:
+        ids = list(device_ids)
+        bin_ns = int(bucket_minutes) * NS_PER_MINUTE
+        return self._select(
+            "SELECT deviceId, (time / ?) * ? AS bin, avg(distance) FROM readings"
+            f" WHERE deviceId IN ({placeholders(len(ids))}) AND time > ?"
+            " GROUP BY deviceId, bin ORDER BY deviceId, bin",
+            (bin_ns, bin_ns, *ids, time.time_ns() - int(hours) * NS_PER_HOUR),
+            ("deviceId", "time", "distance"),
+        )
+
+    def series_since(self, device_ids: Iterable[str], since_ns: int) -> Columns:
+        ids = list(device_ids)
+        return self._select(
+            "SELECT deviceId, time, distance FROM readings"
+            f" WHERE deviceId IN ({placeholders(len(ids))}) AND time > ?"
+            " ORDER BY deviceId, time",
+            (*ids, int(since_ns)),
+            ("deviceId", "time", "distance"),
+        )
+
+    def rollup_since(
+        self, device_ids: Iterable[str], since_ns: int, bin_minutes: int
+    ) -> Columns:
+        ids = list(device_ids)
+        bin_ns = int(bin_minutes) * NS_PER_MINUTE
+        return self._select(
+            "SELECT deviceId, (time / ?) * ? AS bin, avg(distance), min(distance),"
+            " max(distance), count(*) FROM readings"
+            f" WHERE deviceId IN ({placeholders(len(ids))}) AND time >= ?"
+            " GROUP BY deviceId, bin ORDER BY deviceId, bin",
+            (bin_ns, bin_ns, *ids, int(since_ns)),
+            ("deviceId", "time", "avgLevel", "minLevel", "maxLevel", "samples"),
+        )
+
+    def iter_series(
+        self, device_ids: Iterable[str], since_ns: int, until_ns: int
+    ) -> Iterator[Columns]:
+        ids = list(device_ids)
+        names = ("deviceId", "time", "distance")
+        sql = (
+            "SELECT deviceId, time, distance FROM readings"
+            f" WHERE deviceId IN ({placeholders(len(ids))}) AND time >= ? AND time < ?"
+            " AND (deviceId, time) > (?, ?) ORDER BY deviceId, time LIMIT ?"
+        )
+        after: Tuple[Any, ...] = ("", -1)
+        while True:
+            # ページごとに主キーの続きから読み直し、接続（:memory:ではロック）はyieldの間に保持しない
+            # （Timestreamと同じくページごとにアドミッション制御を通す）
+            with admission_controller.admit(), self._connection() as conn:
+                rows = conn.execute(
+                    sql, (*ids, int(since_ns), int(until_ns), *after, PAGE_ROWS)
+                ).fetchall()
+            if not rows:
+                break
+            yield to_columns(names, rows)
+            if len(rows) < PAGE_ROWS:
+                break
+            after = rows[-1][:2]
+
+    # ---------- 書き込み ----------
+
+    def write(self, columns: Columns) -> int:
+        rows = list(
+            zip(
+                columns["deviceId"].tolist(),
+                columns["time"].tolist(),
+                columns["distance"].tolist(),
+            )
+        )
+        if not rows:
+            return 0
+        with self.db.transaction() as conn:
+            # Timestreamと同じく (deviceId, time) が同じ測定値は1件として扱う
+            conn.executemany("INSERT OR REPLACE INTO readings VALUES (?, ?, ?)", rows)
+        return len(rows)
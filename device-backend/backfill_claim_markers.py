@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+既存のクレーム済みデバイスにクレーム済みマーカー（claimedBy）を付与するスクリプト
+
+トランザクションによるクレーム処理は DeviceMaster の claimedBy 属性で重複クレームを防ぐため、
+導入前に DeviceOwnership だけで管理されていたデバイスにはこのスクリプトで属性を補完する。
+"""
+
+from botocore.exceptions import ClientError
+
+from app.aws import aws_clients, aws_config
+
+
+def backfill_claim_markers():
+    """有効な所有権を持つデバイスにclaimedByを設定"""
+    ownership_tbl = aws_clients.table(aws_config.device_ownership_table)
+    device_master_tbl = aws_clients.table(aws_config.device_master_table)
+
+    scan_kwargs = {
+        "FilterExpression": "isActive = :active",
+        "ExpressionAttributeValues": {":active": "true"},
+    }
+    updated = skipped = 0
+
+    while True:
+        response = ownership_tbl.scan(**scan_kwargs)
+        for ownership in response.get("Items", []):
+            try:
+                device_master_tbl.update_item(
+                    Key={"deviceId": ownership["deviceId"]},
+                    UpdateExpression=(
+                        "SET claimedBy = :user_id, ownershipId = :ownership_id"
+                    ),
+                    ConditionExpression=(
+                        "attribute_exists(deviceId) AND attribute_not_exists(claimedBy)"
+                    ),
+                    ExpressionAttributeValues={
+                        ":user_id": ownership["userId"],
+                        ":ownership_id": ownership["ownershipId"],
+                    },
+                )
+                updated += 1
+                print(f"✅ デバイス {ownership['deviceId']} にマーカーを設定しました")
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                skipped += 1
+
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    print(f"\n🎉 完了: 設定 {updated}件 / スキップ {skipped}件")
+
+
+if __name__ == "__main__":
+    backfill_claim_markers()
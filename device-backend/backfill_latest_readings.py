@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+最新値ストア（LatestReadingテーブル）の作成とTimestreamからのバックフィル
+
+取り込みAPIは測定値を書き込むたびにLatestReadingを条件付きで更新するが、導入前のデバイスや
+取り込みAPIを経由しないデータはストアにないため、このスクリプトで一度だけ埋める。
+既により新しい値を持つデバイスは上書きしない（取り込みと並行して実行してよい）。
+
+使い方:
+    python backfill_latest_readings.py [--hours 720]
+"""
+
+import argparse
+
+from botocore.exceptions import ClientError
+
+from app.aws import aws_clients, aws_config
+from app.aws.dynamodb import chunked
+from app.devices.latest import DynamoLatestStore
+from app.timeseries import timeseries
+
+# 1クエリのIN句に含めるデバイス数
+QUERY_DEVICE_CHUNK = 200
+
+
+def create_latest_table(name):
+    """LatestReadingテーブルを作成（パーティションキー deviceId）"""
+    dynamodb = aws_clients.resource("dynamodb")
+    try:
+        existing_table = dynamodb.Table(name)
+        existing_table.load()
+        print(f"✅ テーブル '{name}' は既に存在します")
+        return
+    except ClientError:
+        pass
+
+    table = dynamodb.create_table(
+        TableName=name,
+        KeySchema=[{"AttributeName": "deviceId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "deviceId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",  # オンデマンド課金
+    )
+    print(f"⏳ テーブル '{name}' の作成中...")
+    table.wait_until_exists()
+    print(f"✅ テーブル '{name}' が作成されました")
+
+
+def all_device_ids():
+    """DeviceMasterに登録されている全デバイスID"""
+    device_master_tbl = aws_clients.table(aws_config.device_master_table)
+    scan_kwargs = {"ProjectionExpression": "deviceId"}
+    device_ids = []
+    while True:
+        response = device_master_tbl.scan(**scan_kwargs)
+        device_ids.extend(item["deviceId"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return device_ids
+
+
+def backfill_latest_readings(window_hours):
+    """全デバイスの最新値を集約クエリ（200台ごとに1回）で取得してストアに書き込む"""
+    create_latest_table(aws_config.latest_reading_table)
+    store = DynamoLatestStore(aws_config.latest_reading_table)
+
+    device_ids = all_device_ids()
+    print(f"📋 対象デバイス: {len(device_ids)}台（直近{window_hours}時間）")
+    found = written = 0
+    for chunk in chunked(device_ids, QUERY_DEVICE_CHUNK):
+        columns = timeseries.batch_latest(chunk, window_hours)
+        found += len(columns.get("deviceId", ()))
+        written += len(store.put_columns(columns))
+        print(f"⏳ {min(found, len(device_ids))}台分の最新値を取得済み...")
+
+    print(
+        f"\n🎉 完了: 書き込み {written}件 / 既に最新 {found - written}件"
+        f" / データなし {len(device_ids) - found}件"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LatestReadingテーブルをTimestreamからバックフィル")
+    parser.add_argument(
+        "--hours", type=int, default=720, help="最新値を探す期間（時間、既定: 720 = 30日）"
+    )
+    args = parser.parse_args()
+    backfill_latest_readings(args.hours)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+アドミッション制御の公平性の計測
+
+Timestreamの代わりに一定時間スリープする疑似クエリを使い、次の負荷を同時に流す。
+  - heavy: 1000台規模のユーザーがダッシュボードを連続で再読み込み（16スレッド、1リクエスト50クエリ）
+  - light: 通常のユーザー4人（各1スレッド、1リクエスト3クエリ、間隔100ms）
+制御なし（全体の同時実行数だけが上限）と制御あり（AdmissionController）で、
+ユーザーごとのクエリ数・リクエスト時間（p50/p95）・429件数を比較する。
+
+使い方:
+    python benchmarks/bench_admission.py --seconds 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.admission import (  # noqa: E402
+    AdmissionConfig,
+    AdmissionController,
+    AdmissionRejected,
+)
+
+QUERY_SECONDS = 0.02
+CAPACITY = 8  # バックエンドが同時に処理できるクエリ数
+
+
+def run(enabled: bool, seconds: float) -> None:
+    controller = AdmissionController(
+        AdmissionConfig(
+            ADMISSION_ENABLED=enabled,
+            ADMISSION_GLOBAL_CONCURRENCY=CAPACITY,
+            ADMISSION_USER_CONCURRENCY=4,
+            ADMISSION_USER_QUERIES_PER_SECOND=50,
+            ADMISSION_USER_BURST=100,
+            ADMISSION_MAX_WAIT_SECONDS=1.0,
+            ADMISSION_MAX_QUEUED_SECONDS_PER_REQUEST=5.0,
+        )
+    )
+    capacity = threading.Semaphore(CAPACITY)
+    stop_at = time.monotonic() + seconds
+    latencies = defaultdict(list)
+    queries = defaultdict(int)
+    rejected = defaultdict(int)
+    lock = threading.Lock()
+
+    def query(user: str) -> None:
+        with controller.admit():
+            with capacity:
+                time.sleep(QUERY_SECONDS)
+        with lock:
+            queries[user] += 1
+
+    def client(user: str, per_request: int, think: float) -> None:
+        while time.monotonic() < stop_at:
+            started = time.monotonic()
+            try:
+                with controller.tenant(user):
+                    for _ in range(per_request):
+                        query(user)
+            except AdmissionRejected as e:
+                with lock:
+                    rejected[user] += 1
+                # 実際のクライアントと同様にRetry-Afterまで待つ（計測時間内に収まるよう上限付き）
+                time.sleep(min(e.retry_after, 0.5))
+                continue
+            with lock:
+                latencies[user].append(time.monotonic() - started)
+            time.sleep(think)
+
+    threads = [
+        threading.Thread(target=client, args=("heavy", 50, 0.0)) for _ in range(16)
+    ]
+    threads += [
+        threading.Thread(target=client, args=(f"light-{i}", 3, 0.1)) for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"admission {'on ' if enabled else 'off'}:")
+    for user in ["heavy"] + [f"light-{i}" for i in range(4)]:
+        lat = np.array(latencies[user] or [np.nan]) * 1000
+        print(
+            f"  {user:<8} queries/s={queries[user] / seconds:7.1f} "
+            f"requests={len(latencies[user]):5d} "
+            f"p50={np.nanpercentile(lat, 50):7.1f}ms "
+            f"p95={np.nanpercentile(lat, 95):7.1f}ms "
+            f"429={rejected[user]}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="アドミッション制御の公平性の計測")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    run(False, args.seconds)
+    run(True, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+アドバイザー用コンテキスト組み立ての計測
+
+合成の時間ビン集計（デバイス数 × 要約期間）から要約を作成し、
+初回作成・一部デバイスのみ新着がある場合の増分更新・コンテキスト組み立て（スタブモデルで回答）
+の処理時間を計測する。Timestreamの代わりに合成集計を返す取得関数をパイプラインに渡す。
+
+使い方:
+    python benchmarks/bench_advisor_context.py --devices 1000 --budget 1500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.advisor import (  # noqa: E402
+    AdvisorConfig,
+    StubAdvisorModel,
+    SummaryPipeline,
+    assemble_context,
+)
+from app.cache import shared_cache  # noqa: E402
+
+NS_PER_HOUR = 3_600_000_000_000
+
+
+class SyntheticRollups:
+    """デバイスごとの合成時間ビン集計"""
+
+    def __init__(self, device_ids, hours: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        now = time.time_ns() // NS_PER_HOUR * NS_PER_HOUR
+        self.rng = rng
+        self.series = {}
+        for i, device_id in enumerate(device_ids):
+            t = now - np.arange(hours - 1, -1, -1, dtype=np.int64) * NS_PER_HOUR
+            avg = 20 + np.cumsum(rng.normal(0, 0.3, hours))
+            if i % 20 == 0:
+                avg[-6:] -= 14  # 低水位
+            if i % 33 == 0:
+                avg[-30] += 25  # 異常値
+            self.series[device_id] = [t, avg, avg - 1, avg + 1, np.full(hours, 12)]
+
+    def advance(self, device_ids) -> None:
+        """指定デバイスに1ビン追加"""
+        for device_id in device_ids:
+            t, avg, low, high, n = self.series[device_id]
+            value = avg[-1] + self.rng.normal(0, 0.3)
+            self.series[device_id] = [
+                np.append(t, t[-1] + NS_PER_HOUR),
+                np.append(avg, value),
+                np.append(low, value - 1),
+                np.append(high, value + 1),
+                np.append(n, 12),
+            ]
+
+    def fetch(self, device_ids, since_ns, bin_minutes):
+        columns = {
+            k: []
+            for k in ("deviceId", "time", "avgLevel", "minLevel", "maxLevel", "samples")
+        }
+        for device_id in device_ids:
+            t, avg, low, high, n = self.series[device_id]
+            mask = t >= since_ns
+            columns["deviceId"].append(np.full(mask.sum(), device_id, dtype=object))
+            for name, values in zip(
+                ("time", "avgLevel", "minLevel", "maxLevel", "samples"),
+                (t, avg, low, high, n),
+            ):
+                columns[name].append(values[mask])
+        return {k: np.concatenate(v) for k, v in columns.items()}
+
+
+def percentile_ms(samples, q) -> float:
+    return float(np.percentile(samples, q)) * 1000
+
+
+def print_step(label: str, started: float, report) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"{label:<28}{elapsed_ms:>10.1f} ms   {report}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="アドバイザーコンテキスト計測")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--budget", type=int, nargs="+", default=[500, 1500, 4000])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    config = AdvisorConfig()
+    device_ids = [f"device-{i:05d}" for i in range(args.devices)]
+    masters = {
+        d: {
+            "deviceId": d,
+            "agriculturalSite": f"site-{i % 10}",
+            "fieldName": f"field-{i % 50}",
+        }
+        for i, d in enumerate(device_ids)
+    }
+    source = SyntheticRollups(device_ids, config.summary_window_hours)
+    store = shared_cache.namespace("bench_advisor_summary", config.summary_ttl)
+    store.clear()
+    pipeline = SummaryPipeline(config, store=store, fetch=source.fetch)
+    pipeline.remember_user("bench-user", masters)
+    model = StubAdvisorModel()
+
+    started = time.perf_counter()
+    report = pipeline.refresh(masters, force=True)
+    print(f"devices={args.devices:,}  bins/device={config.summary_window_hours}")
+    print_step("cold summaries", started, report)
+
+    changed = device_ids[: args.devices // 10]
+    source.advance(changed)
+    started = time.perf_counter()
+    report = pipeline.refresh(masters, force=True)
+    print_step("incremental (10% new bin)", started, report)
+
+    started = time.perf_counter()
+    report = pipeline.refresh(masters, force=True)
+    print_step("no new data", started, report)
+
+    print(
+        f"\n{'budget':>8}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'tokens':>8}{'full':>6}{'compact':>8}{'omitted':>8}"
+    )
+    for budget in args.budget:
+        samples = []
+        for _ in range(args.iterations):
+            t0 = time.perf_counter()
+            context = assemble_context(
+                "bench-user",
+                budget,
+                device_id=device_ids[1],
+                count=model.count_tokens,
+                pipeline=pipeline,
+            )
+            model.reply("水位が下がっている圃場は？", context["context"])
+            samples.append(time.perf_counter() - t0)
+        print(
+            f"{budget:>8}{percentile_ms(samples, 50):>10.2f}"
+            f"{percentile_ms(samples, 95):>10.2f}"
+            f"{context['tokens']:>8}{len(context['included']):>6}"
+            f"{len(context['compacted']):>8}{context['omitted']:>8}"
+        )
+    store.clear()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
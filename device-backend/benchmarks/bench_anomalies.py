@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+異常検知エンジンの計測
+
+合成した水位系列（ゆるやかな変動 + ノイズに、スパイク・急低下・張り付きを埋め込んだもの）で
+次の処理時間を計測する。
+  - 配列演算による一括判定（score_batch、デバイス数 × 点数）
+  - 1点ずつの増分判定（score_one、状態を持ち越してO(1)）
+  - 比較: 1点ごとにウィンドウ全体の平均・標準偏差を計算し直す方法
+あわせて一括判定と増分判定の判定結果が一致すること、埋め込んだ異常を検出できることを確認する。
+
+使い方:
+    python benchmarks/bench_anomalies.py --devices 200 --points 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.anomalies import (  # noqa: E402
+    KINDS,
+    AnomalyConfig,
+    AnomalyEngine,
+    SeriesState,
+    score_batch,
+    score_one,
+)
+from app.anomalies.detectors import NS_PER_MINUTE  # noqa: E402
+
+INTERVAL_MINUTES = 5
+
+
+def synthetic_series(rng, points):
+    """水位系列と埋め込んだ異常の位置"""
+    time_ns = (
+        1_700_000_000_000_000_000
+        + np.arange(points, dtype=np.int64) * INTERVAL_MINUTES * NS_PER_MINUTE
+    )
+    hours = np.arange(points) * INTERVAL_MINUTES / 60
+    values = 12 + 2 * np.sin(2 * np.pi * hours / 24) + rng.normal(0, 0.3, points)
+    spikes = rng.choice(
+        np.arange(100, points - 100), size=max(points // 2000, 1), replace=False
+    )
+    values[spikes] += rng.choice([-1, 1], size=len(spikes)) * 8
+    drop = points // 2
+    values[drop:] -= 6
+    stuck = points * 3 // 4
+    values[stuck : stuck + 60] = values[stuck]
+    return (
+        time_ns,
+        np.round(values, 2),
+        {"spike": spikes, "sudden_drop": drop, "flatline": stuck},
+    )
+
+
+def naive_z(values, config):
+    """1点ごとに直前ウィンドウの平均・標準偏差を計算し直す（比較用）"""
+    flagged = 0
+    for i in range(config.min_points, len(values)):
+        window = values[max(i - config.window_points, 0) : i]
+        std = max(window.std(), config.min_std_cm)
+        flagged += abs(values[i] - window.mean()) / std >= config.z_threshold
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="異常検知エンジンの計測")
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--points", type=int, default=10000, help="デバイスごとの点数")
+    parser.add_argument("--stream-points", type=int, default=100000, help="増分判定で計測する点数")
+    args = parser.parse_args()
+
+    config = AnomalyConfig()
+    rng = np.random.default_rng(0)
+    series = [synthetic_series(rng, args.points) for _ in range(args.devices)]
+    total = args.devices * args.points
+
+    # 一括判定（エンジン経由: 判定 + 異常のまとめ）
+    engine = AnomalyEngine(config, fetch=lambda ids, since: {})
+    started = time.perf_counter()
+    for i, (time_ns, values, _) in enumerate(series):
+        engine.observe(f"dev-{i:04d}", time_ns, values, hold=False)
+    elapsed = time.perf_counter() - started
+    print(
+        f"一括判定: {args.devices}台 × {args.points:,}点 = {total:,}点 {elapsed:.2f}秒"
+        f"（{total / elapsed / 1e6:.1f}M点/秒）"
+    )
+    found = engine.anomalies([f"dev-{i:04d}" for i in range(args.devices)])
+    print(
+        f"  検出 {len(found):,}件: "
+        + ", ".join(
+            f"{kind} {sum(1 for a in found if a['kind'] == kind)}" for kind in KINDS
+        )
+    )
+
+    # 埋め込んだ異常の検出率（1台目）
+    time_ns, values, planted = series[0]
+    state = SeriesState(config.window_points)
+    flags, _ = score_batch(state, time_ns, values, config)
+    spike_hits = flags["spike"][0][planted["spike"]].mean()
+    drop_hit = bool(flags["sudden_drop"][0][planted["sudden_drop"]])
+    flat_hit = bool(flags["flatline"][0][planted["flatline"] + config.stuck_points - 1])
+    print(f"  1台目: スパイク検出率 {spike_hits:.0%}、急低下 {drop_hit}、張り付き {flat_hit}")
+
+    # 増分判定（1点ずつ）と一括判定の一致
+    n = min(args.stream_points, args.points)
+    state = SeriesState(config.window_points)
+    started = time.perf_counter()
+    scalar = [
+        score_one(state, t, v, config)
+        for t, v in zip(time_ns[:n].tolist(), values[:n].tolist())
+    ]
+    stream_elapsed = time.perf_counter() - started
+    batch_flags, _ = score_batch(
+        SeriesState(config.window_points), time_ns[:n], values[:n], config
+    )
+    mismatches = sum(
+        int((np.array([kind in f for f in scalar]) != batch_flags[kind][0]).sum())
+        for kind in KINDS
+    )
+    print(f"\n増分判定: {n:,}点 {stream_elapsed / n * 1e6:.1f}µs/点（一括判定との不一致 {mismatches}点）")
+
+    # 比較: ウィンドウを毎回計算し直す
+    started = time.perf_counter()
+    naive_z(values[:n], config)
+    naive_elapsed = time.perf_counter() - started
+    print(f"比較（ウィンドウ再計算）: {naive_elapsed / n * 1e6:.1f}µs/点")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+バルクローダーのスループット計測（dynamodb-local使用）
+
+事前に `docker compose up dynamodb-local` でローカルDynamoDBを起動しておく。
+
+使い方:
+    python benchmarks/bench_bulk_load.py --items 20000 --workers 1 4 8 16
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DYNAMODB_ENDPOINT_URL", "http://localhost:8001")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.aws import aws_clients  # noqa: E402
+from app.provisioning import BulkLoader, iter_records  # noqa: E402
+
+TABLE_NAME = "DeviceMasterBench"
+
+
+def recreate_table() -> None:
+    """計測用テーブルを作り直す"""
+    dynamodb = aws_clients.resource("dynamodb")
+    try:
+        dynamodb.Table(TABLE_NAME).delete()
+        dynamodb.Table(TABLE_NAME).wait_until_not_exists()
+    except Exception:
+        pass
+    table = dynamodb.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "deviceId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "deviceId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    table.wait_until_exists()
+
+
+def write_input(path: str, count: int) -> None:
+    """合成デバイスデータをJSONLで出力"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(
+                json.dumps(
+                    {
+                        "deviceId": f"{440525070000000 + i}",
+                        "deviceType": "水位センサー",
+                        "agriculturalSite": f"site-{i % 50:02d}",
+                        "fieldName": f"field-{i % 400:03d}",
+                        "firmwareVersion": f"1.{i % 4}.0",
+                        "isActive": True,
+                    }
+                )
+                + "\n"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="バルクローダー計測")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "devices.jsonl")
+        write_input(input_path, args.items)
+
+        print(f"{'workers':>8}{'items':>10}{'sec':>10}{'items/s':>12}")
+        for workers in args.workers:
+            recreate_table()
+            loader = BulkLoader(TABLE_NAME, workers=workers, progress_interval=1e9)
+            stats = loader.load(iter_records(input_path))
+            print(
+                f"{workers:>8}{stats['written']:>10}{stats['elapsedSec']:>10}"
+                f"{stats['itemsPerSec']:>12}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+コールドスタート計測スクリプト
+
+新しいプロセスで `import main` の所要時間と、lifespan起動から最初のレスポンスまでの
+時間（time-to-first-response）を STARTUP_MODE ごとに計測する。
+関数型デプロイのハンドラー（serverless.handler）についても、import・1回目・2回目の呼び出しの
+所要時間を計測する（2回目も初期化が走っていないことの確認）。
+
+使い方:
+    python benchmarks/bench_cold_start.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子プロセスで実行する計測コード
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    t2 = time.perf_counter()
+    client.get("/debug/aws-pools")
+    t3 = time.perf_counter()
+print(json.dumps({
+    "importMs": (t1 - t0) * 1000,
+    "startupMs": (t2 - t1) * 1000,
+    "firstResponseMs": (t3 - t0) * 1000,
+}))
+"""
+
+# API Gateway（HTTP API）経由の呼び出しを模したイベントでハンドラーを計測
+SERVERLESS_PROBE = r"""
+import json, time
+event = {
+    "version": "2.0", "routeKey": "$default", "rawPath": "/debug/aws-pools",
+    "rawQueryString": "", "headers": {"host": "localhost"}, "isBase64Encoded": False,
+    "requestContext": {"http": {"method": "GET", "path": "/debug/aws-pools",
+                                "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1",
+                                "userAgent": "bench"},
+                       "stage": "$default"},
+}
+t0 = time.perf_counter()
+import serverless
+t1 = time.perf_counter()
+assert serverless.handler(event, None)["statusCode"] == 200
+t2 = time.perf_counter()
+serverless.handler(event, None)
+t3 = time.perf_counter()
+print(json.dumps({
+    "importMs": (t1 - t0) * 1000,
+    "firstResponseMs": (t2 - t0) * 1000,
+    "secondInvokeMs": (t3 - t2) * 1000,
+}))
+"""
+
+
+def measure(mode: str, runs: int, probe: str = PROBE) -> dict:
+    """指定モードでruns回計測し中央値を返す"""
+    env = dict(os.environ, STARTUP_MODE=mode)
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        key: round(statistics.median(s[key] for s in samples), 1) for key in samples[0]
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="コールドスタート計測")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'import(ms)':>12}{'startup(ms)':>14}{'first resp(ms)':>16}")
+    for mode in ("standard", "fast"):
+        result = measure(mode, args.runs)
+        print(
+            f"{mode:<10}{result['importMs']:>12}{result['startupMs']:>14}"
+            f"{result['firstResponseMs']:>16}"
+        )
+
+    print(
+        f"\n{'handler':<10}{'import(ms)':>12}"
+        f"{'first resp(ms)':>16}{'2nd invoke(ms)':>16}"
+    )
+    result = measure("fast", args.runs, SERVERLESS_PROBE)
+    print(
+        f"{'lambda':<10}{result['importMs']:>12}{result['firstResponseMs']:>16}"
+        f"{result['secondInvokeMs']:>16}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
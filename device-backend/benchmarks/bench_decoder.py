@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Timestream結果デコードの計測
+
+従来の行ごとのdict構築ループと、カラム型デコーダーの処理時間・ピークメモリを比較する。
+
+使い方:
+    python benchmarks/bench_decoder.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.timeseries import TimestreamDecoder  # noqa: E402
+
+COLUMN_INFO = [
+    {"Name": "time", "Type": {"ScalarType": "TIMESTAMP"}},
+    {"Name": "distance", "Type": {"ScalarType": "DOUBLE"}},
+]
+
+
+def make_rows(count: int) -> list:
+    """Timestream形式の合成Rowsを作成"""
+    base = 1704067200  # 2024-01-01
+    rows = []
+    for i in range(count):
+        sec = base + i * 60
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(sec)) + ".000000000"
+        rows.append(
+            {
+                "Data": [
+                    {"ScalarValue": stamp},
+                    {"ScalarValue": f"{100 + (i % 500) * 0.1:.1f}"},
+                ]
+            }
+        )
+    return rows
+
+
+def legacy_decode(rows: list) -> list:
+    """従来のエンドポイント実装と同じループ"""
+    history = []
+    for row in rows:
+        data = row["Data"]
+        history.append(
+            {"time": data[0]["ScalarValue"], "distance": float(data[1]["ScalarValue"])}
+        )
+    return history
+
+
+def columnar_decode(rows: list) -> dict:
+    return TimestreamDecoder(COLUMN_INFO).decode_rows(rows)
+
+
+def measure(func, rows: list) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(rows)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="デコーダー計測")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    scale = 1_000_000 / args.rows
+    print(f"rows={args.rows:,}（100万行あたりに換算）")
+    print(f"{'decoder':<10}{'sec/1M rows':>14}{'peak MB/1M rows':>18}")
+    for name, func in (("legacy", legacy_decode), ("columnar", columnar_decode)):
+        elapsed, peak = measure(func, rows)
+        print(f"{name:<10}{elapsed * scale:>14.3f}{peak * scale / 1e6:>18.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
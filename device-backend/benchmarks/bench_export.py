@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+履歴エクスポートの計測
+
+組み込みSQLiteの時系列リポジトリに合成データを書き込み、同じ行（iter_seriesのページ）を
+次の形式でファイルに書き出したときのスループットとファイルサイズを比較する。
+  - JSON（/devices/{deviceId}/history と同じ {time, distance} の整形 + json.dumps）
+  - Parquet（export_history）
+  - Arrow IPCストリーム（export_history）
+あわせてpyarrowのメモリプールのピーク（1行グループ分で頭打ちになること）を表示する。
+
+使い方:
+    python benchmarks/bench_export.py --devices 50 --days 30 --interval 1
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.export import ExportConfig, export_history  # noqa: E402
+from app.timeseries import float_or_none, format_timestamps  # noqa: E402
+from app.timeseries.sqlite import NS_PER_MINUTE, SQLiteRepository  # noqa: E402
+
+
+def export_json(repo, device_ids, since_ns, until_ns, sink):
+    """APIのJSON応答と同じ整形でページごとに書き出す（JSON Lines）"""
+    rows = 0
+    for page in repo.iter_series(device_ids, since_ns, until_ns):
+        for device_id, t, d in zip(
+            page["deviceId"].tolist(),
+            format_timestamps(page["time"]),
+            float_or_none(page["distance"]),
+        ):
+            sink.write(
+                json.dumps({"deviceId": device_id, "time": t, "distance": d}).encode()
+            )
+            sink.write(b"\n")
+        rows += len(page["time"])
+    return {"rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="履歴エクスポートの計測")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=1, help="送信間隔（分）")
+    parser.add_argument("--compression", default="zstd")
+    args = parser.parse_args()
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("❌ pyarrowが必要です（pip install pyarrow）")
+        return
+
+    workdir = tempfile.mkdtemp()
+    repo = SQLiteRepository(os.path.join(workdir, "timeseries.db"))
+    rng = np.random.default_rng(0)
+    device_ids = [f"dev-{i:03d}" for i in range(args.devices)]
+    points = args.days * 24 * 60 // args.interval
+    now_ns = time.time_ns()
+    times = (
+        now_ns - np.arange(points, dtype=np.int64)[::-1] * args.interval * NS_PER_MINUTE
+    )
+    for device_id in device_ids:
+        repo.write(
+            {
+                "deviceId": np.full(points, device_id, dtype=object),
+                "time": times,
+                "distance": np.round(30 + rng.normal(0, 2, points).cumsum() / 50, 2),
+            }
+        )
+    since_ns, until_ns = int(times[0]), now_ns + 1
+    print(f"生データ: {args.devices}台 × {points:,}点（{args.days}日、{args.interval}分間隔）")
+
+    # 読み取りだけの時間（各形式の時間から差し引いて見るための基準）
+    started = time.perf_counter()
+    total = sum(
+        len(page["time"]) for page in repo.iter_series(device_ids, since_ns, until_ns)
+    )
+    read_seconds = time.perf_counter() - started
+
+    config = ExportConfig(EXPORT_COMPRESSION=args.compression)
+    cases = [
+        ("JSON", lambda sink: export_json(repo, device_ids, since_ns, until_ns, sink)),
+        (
+            "Parquet",
+            lambda sink: export_history(
+                device_ids, since_ns, until_ns, "parquet", sink, repo, config
+            ),
+        ),
+        (
+            "Arrow IPC",
+            lambda sink: export_history(
+                device_ids, since_ns, until_ns, "arrow", sink, repo, config
+            ),
+        ),
+    ]
+    print(f"\n{total:,}行（読み取りのみ {read_seconds:.2f}秒、圧縮 {args.compression}）")
+    print(f"{'形式':<12}{'秒':>8}{'行/秒':>14}{'サイズ MiB':>12}{'バイト/行':>10}")
+    for name, fn in cases:
+        path = os.path.join(workdir, f"export-{name}")
+        started = time.perf_counter()
+        with open(path, "wb") as sink:
+            stats = fn(sink)
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(path)
+        print(
+            f"{name:<12}{elapsed:>8.2f}{stats['rows'] / elapsed:>14,.0f}"
+            f"{size / 1024 / 1024:>12.1f}{size / stats['rows']:>10.1f}"
+        )
+
+    peak_mib = pa.default_memory_pool().max_memory() / 1024 / 1024
+    print(
+        f"\npyarrowメモリプールのピーク: {peak_mib:.1f}MiB" f"（行グループ {config.row_group_rows:,}行）"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+水位予測の計測
+
+合成した時間平均の系列（日周変動 + トレンド + ノイズ、一部欠測）で次を計測する。
+  - 初回学習（パラメータ候補36通りを1回の走査で評価）の時間
+  - 1時間ビンあたりの増分更新の時間
+  - キャッシュ済みモデルからの予測（Forecaster.forecast）の応答時間
+  - 直近48時間を予測したときの誤差（MAE）を、前日と同じ値・最後の値を使う素朴な予測と比較
+
+使い方:
+    python benchmarks/bench_forecast.py --devices 200 --days 14
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.forecast import ForecastConfig, Forecaster, fit, predict, update  # noqa: E402
+from app.forecast.model import HOUR_NS  # noqa: E402
+
+HOLDOUT_HOURS = 48
+
+
+def synthetic(rng, hours, start_hour):
+    steps = np.arange(hours)
+    values = (
+        rng.uniform(8, 20)
+        + rng.uniform(1, 4) * np.sin(2 * np.pi * (steps + rng.uniform(0, 24)) / 24)
+        + rng.uniform(-0.05, 0.05) * steps
+        + rng.normal(0, 0.3, hours)
+    )
+    values[rng.random(hours) < 0.03] = np.nan
+    return (start_hour + steps) * HOUR_NS, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="水位予測の計測")
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--days", type=int, default=14)
+    args = parser.parse_args()
+
+    config = ForecastConfig()
+    rng = np.random.default_rng(0)
+    start_hour = time.time_ns() // HOUR_NS - args.days * 24 - HOLDOUT_HOURS
+    series = [
+        synthetic(rng, args.days * 24 + HOLDOUT_HOURS, start_hour)
+        for _ in range(args.devices)
+    ]
+    train = args.days * 24
+
+    fit_ms, errors = [], {"Holt-Winters": [], "前日と同じ": [], "最後の値": []}
+    models = []
+    for times, values in series:
+        started = time.perf_counter()
+        model = fit(times[:train], values[:train], config)
+        fit_ms.append((time.perf_counter() - started) * 1000)
+        models.append(model)
+        actual = values[train:]
+        observed = ~np.isnan(actual)
+        history = values[:train]
+        errors["Holt-Winters"].append(
+            np.abs(predict(model, HOLDOUT_HOURS)["distance"] - actual)[observed]
+        )
+        last_day = np.tile(history[-24:], HOLDOUT_HOURS // 24 + 1)[:HOLDOUT_HOURS]
+        errors["前日と同じ"].append(
+            np.abs(last_day - actual)[observed & ~np.isnan(last_day)]
+        )
+        errors["最後の値"].append(
+            np.abs(history[~np.isnan(history)][-1] - actual)[observed]
+        )
+    print(
+        f"初回学習: {args.devices}台 × {train}時間ビン p50 {np.percentile(fit_ms, 50):.1f}ms"
+        f" p95 {np.percentile(fit_ms, 95):.1f}ms"
+    )
+
+    # 増分更新（1ビンずつ）
+    started = time.perf_counter()
+    applied = 0
+    for model, (times, values) in zip(models, series):
+        for i in range(train, train + HOLDOUT_HOURS):
+            applied += update(model, times[i : i + 1], values[i : i + 1])
+    elapsed = time.perf_counter() - started
+    print(f"増分更新: {applied:,}ビン {elapsed / max(applied, 1) * 1e6:.1f}µs/ビン")
+
+    # キャッシュ済みモデルからの予測
+    forecaster = Forecaster(
+        ForecastConfig(FORECAST_REFRESH_SECONDS=1e9),
+        load=lambda device_id, hours, now_ns: series[int(device_id)][:2],
+    )
+    for i in range(args.devices):
+        forecaster.forecast(str(i), config.horizon_hours)
+    samples = []
+    for i in range(args.devices * 5):
+        started = time.perf_counter()
+        forecaster.forecast(str(i % args.devices), config.horizon_hours)
+        samples.append((time.perf_counter() - started) * 1000)
+    print(
+        f"キャッシュからの予測（{config.horizon_hours}時間）: p50 {np.percentile(samples, 50):.3f}ms"
+        f" p95 {np.percentile(samples, 95):.3f}ms {forecaster.stats()}"
+    )
+
+    print(f"\n直近{HOLDOUT_HOURS}時間の予測誤差（MAE cm）")
+    for name, parts in errors.items():
+        print(f"  {name:<14}{np.concatenate(parts).mean():.3f}")
+
+
+if __name__ == "__main__":
+    main()
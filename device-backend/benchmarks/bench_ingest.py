@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+取り込みバッファの持続スループット計測
+
+WriteRecordsの代わりにMemoryRecordWriter（1回あたりの応答時間と拒否率を模擬）を使い、
+複数のプロデューサーが500件ずつ取り込みを続けた時の書き込み件数/秒を計測する。
+バッファ上限に達した場合、プロデューサーはRetry-After相当だけ待って再送する。
+HTTP層（JSONの解析・検証）の時間は含まない。
+
+使い方:
+    python benchmarks/bench_ingest.py --readings 500000 --latency-ms 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ingest import (  # noqa: E402
+    IngestBackpressure,
+    IngestBuffer,
+    IngestConfig,
+    MemoryRecordWriter,
+    Reading,
+)
+
+
+def run(args, workers: int, reject_rate: float) -> None:
+    config = IngestConfig(
+        INGEST_FLUSH_WORKERS=workers,
+        INGEST_BUFFER_LIMIT=args.buffer_limit,
+        INGEST_FLUSH_INTERVAL_SECONDS=0.2,
+        INGEST_RETRY_BACKOFF_SECONDS=0.05,
+    )
+    writer = MemoryRecordWriter(
+        latency_seconds=args.latency_ms / 1000, reject_rate=reject_rate
+    )
+    writer.keep_rows = False
+    buffer = IngestBuffer(writer, config)
+    buffer.start()
+
+    per_producer = args.readings // args.producers
+    base_ms = int(time.time() * 1000)
+    backpressure = [0]
+
+    def produce(index: int) -> None:
+        for start in range(0, per_producer, args.request_size):
+            readings = [
+                Reading(
+                    f"dev-{(index * per_producer + i) % args.devices:05d}",
+                    base_ms + index * per_producer + i,
+                    20.0,
+                )
+                for i in range(start, min(start + args.request_size, per_producer))
+            ]
+            while True:
+                try:
+                    buffer.accept(readings)
+                    break
+                except IngestBackpressure:
+                    backpressure[0] += 1
+                    time.sleep(0.01)
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=produce, args=(i,)) for i in range(args.producers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    buffer.stop(timeout=120)
+    elapsed = time.perf_counter() - started
+
+    stats = buffer.stats()
+    print(
+        f"workers={workers} reject={reject_rate:.0%}: written={stats['written']:,} "
+        f"in {elapsed:.2f}s -> {stats['written'] / elapsed:,.0f} records/s | "
+        f"WriteRecords calls={writer.calls:,} "
+        f"(avg {writer.records / max(writer.calls, 1):.1f} records) "
+        f"retried={stats['retried']:,} deadLettered={stats['deadLettered']} "
+        f"backpressure waits={backpressure[0]:,}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="取り込みバッファのスループット計測")
+    parser.add_argument("--readings", type=int, default=500000)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--producers", type=int, default=8)
+    parser.add_argument("--request-size", type=int, default=500)
+    parser.add_argument(
+        "--latency-ms", type=float, default=10.0, help="WriteRecords 1回あたりの応答時間"
+    )
+    parser.add_argument("--buffer-limit", type=int, default=50000)
+    args = parser.parse_args()
+    print(
+        f"{args.readings:,} readings / {args.devices:,} devices, "
+        f"WriteRecords latency {args.latency_ms:g} ms"
+    )
+    for workers in (1, 4, 16):
+        run(args, workers, 0.0)
+    run(args, 16, 0.01)
+
+
+if __name__ == "__main__":
+    main()
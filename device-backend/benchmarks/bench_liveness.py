@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+死活インデックスの計測
+
+合成フリート（デバイスごとに5分間隔・位相はばらばら）で、時計を1分ずつ進めながら
+その1分間に送信したデバイスを観測し、期限判定1回あたりの処理時間を計測する。
+一部のデバイス（--silent）は途中で送信を止め、期限（送信間隔×3）後にオフラインになる。
+期限判定は、全デバイスを走査する方式と期限ヒープ（LivenessIndex.check）を比較する。
+
+使い方:
+    python benchmarks/bench_liveness.py --devices 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.liveness import LivenessConfig, LivenessIndex  # noqa: E402
+from app.liveness.index import NS_PER_SECOND  # noqa: E402
+
+INTERVAL_NS = 300 * NS_PER_SECOND
+TICK_NS = 60 * NS_PER_SECOND
+
+
+def full_scan(index: LivenessIndex, now_ns: int) -> int:
+    """比較用: 全デバイスを走査して期限切れを数える"""
+    return sum(
+        1
+        for state in index._states.values()
+        if state.offline_since_ns is None and index.deadline_ns(state) <= now_ns
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="死活インデックスの計測")
+    parser.add_argument("--devices", type=int, default=100000)
+    parser.add_argument("--silent", type=float, default=0.005, help="途中で送信を止めるデバイスの割合")
+    parser.add_argument("--ticks", type=int, default=30)
+    args = parser.parse_args()
+
+    index = LivenessIndex(LivenessConfig(LIVENESS_MIN_GRACE_SECONDS=0), verify=None)
+    rng = np.random.default_rng(0)
+    device_ids = np.array([f"dev-{i:06d}" for i in range(args.devices)])
+    phase = rng.integers(0, INTERVAL_NS, args.devices)
+    silent = rng.random(args.devices) < args.silent
+    now_ns = time.time_ns()
+
+    # 初期化: 直近2回分の送信（起動時の集約クエリ + 最初の観測に相当）
+    for k in (2, 1):
+        sent = now_ns - k * INTERVAL_NS + phase
+        started = time.perf_counter()
+        index.observe_columns({"deviceId": device_ids, "time": sent})
+    print(
+        f"observe_columns (1 point x {args.devices:,} devices): "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+
+    observe_ms, heap_ms, scan_ms = [], [], []
+    flagged = popped = observed = 0
+    for _ in range(args.ticks):
+        start_ns, now_ns = now_ns, now_ns + TICK_NS
+        # この1分間に送信時刻を迎えたデバイス（停止したデバイスを除く）
+        offset = (start_ns - phase) % INTERVAL_NS
+        due = (offset + TICK_NS >= INTERVAL_NS) & ~silent
+        sent = start_ns + (INTERVAL_NS - offset[due])
+        started = time.perf_counter()
+        observed += index.observe_columns({"deviceId": device_ids[due], "time": sent})
+        observe_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        expected = full_scan(index, now_ns)
+        scan_ms.append((time.perf_counter() - started) * 1000)
+
+        before = index.popped
+        started = time.perf_counter()
+        report = index.check(now_ns)
+        heap_ms.append((time.perf_counter() - started) * 1000)
+        popped += index.popped - before
+        flagged += len(report["flagged"])
+        assert len(report["flagged"]) == expected
+
+    print(
+        f"{args.ticks} ticks (1 min each): observed={observed:,} "
+        f"flagged offline={flagged:,} (silent devices={int(silent.sum()):,})"
+    )
+    print(
+        f"  observe per tick : median {np.median(observe_ms):7.2f} ms "
+        f"(~{observed // args.ticks:,} devices)"
+    )
+    print(f"  full scan check  : median {np.median(scan_ms):7.2f} ms / tick")
+    print(
+        f"  heap check       : median {np.median(heap_ms):7.2f} ms / tick "
+        f"(heap entries popped per tick: {popped // args.ticks:,})"
+    )
+    print(f"stats: {index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
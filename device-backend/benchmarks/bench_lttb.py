@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+LTTBダウンサンプリングの計測
+
+使い方:
+    python benchmarks/bench_lttb.py --points 1000000 --out 200 1000 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.timeseries.downsample import lttb  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LTTB計測")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--out", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # 1分間隔の時刻（エポックns）とランダムウォーク + 急落を含む水位
+    x = np.arange(args.points, dtype=np.int64) * 60_000_000_000
+    y = 100 + np.cumsum(rng.normal(0, 0.05, args.points))
+    drops = rng.choice(args.points, 20, replace=False)
+    y[drops] -= 30
+
+    print(f"points={args.points:,}")
+    print(f"{'n_out':>8}{'ms (median)':>14}{'drops kept':>12}")
+    for n_out in args.out:
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            out_x, _ = lttb(x, y, n_out)
+            samples.append((time.perf_counter() - started) * 1000)
+        kept = np.isin(x[drops], out_x).sum()
+        median = sorted(samples)[len(samples) // 2]
+        print(f"{n_out:>8}{median:>14.1f}{kept:>9}/{len(drops)}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
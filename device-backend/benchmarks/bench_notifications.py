@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+通知配信の計測
+
+プロセス内のアウトボックスとメモリチャネルで、10,000件規模のバーストを配信する時間を計測する。
+  - fan-out: 1件のサイトイベントを10,000ユーザーに配信
+  - distinct: 異なる10,000件のイベント（各1ユーザー）を配信
+  - duplicate: 同じイベントを10,000回発行（重複排除で1件に集約される）
+DynamoDBへの書き込み時間は含まない（配信経路の処理コストのみ）。
+
+使い方:
+    python benchmarks/bench_notifications.py --users 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.notifications import (  # noqa: E402
+    MemoryChannel,
+    MemoryOutboxStore,
+    NotificationConfig,
+    NotificationDispatcher,
+)
+
+
+def make_dispatcher(
+    users: int, workers: int, batch_size: int
+) -> NotificationDispatcher:
+    config = NotificationConfig(
+        NOTIFICATION_WORKERS=workers,
+        NOTIFICATION_BATCH_SIZE=batch_size,
+        NOTIFICATION_CLAIM_LIMIT=500,
+        # バースト全体を配信するためレート制限は実質無効にする
+        NOTIFICATION_RATE_BURST=users,
+    )
+    user_ids = [f"user-{i:05d}" for i in range(users)]
+
+    def resolve(target):
+        if target.get("site"):
+            return user_ids
+        return list(target.get("userIds") or [])
+
+    return NotificationDispatcher(
+        store=MemoryOutboxStore(),
+        channels=[MemoryChannel()],
+        resolve=resolve,
+        config=config,
+    )
+
+
+def report(
+    name: str, published: int, publish_s: float, stats: dict, dispatch_s: float
+) -> None:
+    delivered = stats["delivered"]
+    print(
+        f"{name:<10} events={published:>6} delivered={delivered:>6} "
+        f"publish={publish_s * 1000:8.1f}ms dispatch={dispatch_s * 1000:8.1f}ms "
+        f"({delivered / dispatch_s if dispatch_s else 0:,.0f} notifications/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="通知配信の計測")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=25)
+    args = parser.parse_args()
+
+    # fan-out
+    dispatcher = make_dispatcher(args.users, args.workers, args.batch_size)
+    started = time.perf_counter()
+    dispatcher.publish(
+        "low_level",
+        "site-A",
+        "低水位",
+        "水位が低下しています",
+        {"site": "site-A"},
+        notification_type="alert",
+    )
+    published_at = time.perf_counter()
+    stats = dispatcher.drain()
+    report(
+        "fan-out", 1, published_at - started, stats, time.perf_counter() - published_at
+    )
+
+    # distinct
+    dispatcher = make_dispatcher(args.users, args.workers, args.batch_size)
+    started = time.perf_counter()
+    for i in range(args.users):
+        dispatcher.publish(
+            "info", f"subject-{i}", "お知らせ", "テスト", {"userIds": [f"user-{i:05d}"]}
+        )
+    published_at = time.perf_counter()
+    stats = dispatcher.drain(max_rounds=100000)
+    report(
+        "distinct",
+        args.users,
+        published_at - started,
+        stats,
+        time.perf_counter() - published_at,
+    )
+
+    # duplicate
+    dispatcher = make_dispatcher(args.users, args.workers, args.batch_size)
+    started = time.perf_counter()
+    accepted = sum(
+        dispatcher.publish(
+            "low_level",
+            "site-A",
+            "低水位",
+            "水位が低下しています",
+            {"site": "site-A"},
+            notification_type="alert",
+        )
+        is not None
+        for _ in range(args.users)
+    )
+    published_at = time.perf_counter()
+    stats = dispatcher.drain()
+    report(
+        "duplicate",
+        accepted,
+        published_at - started,
+        stats,
+        time.perf_counter() - published_at,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+ロールアップによる90日履歴クエリの計測
+
+組み込みSQLiteの時系列リポジトリに合成データ（デバイスごとにinterval分間隔）を書き込み、
+90日分の日単位・時間単位の履歴を次の方法で取得した応答時間を比較する。
+  - 生データ全件読み込み（LTTBと同じ読み方）
+  - 生データの集計クエリ（ロールアップ導入前の集計方法）
+  - HistoryPlanner（ロールアップ + 直近の生データ）
+あわせて初回の遡り集計と、1時間後の増分集計の時間を計測する。
+
+使い方:
+    python benchmarks/bench_rollups.py --devices 20 --days 100 --interval 1
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rollups import (  # noqa: E402
+    HistoryPlanner,
+    RollupConfig,
+    RollupMaterializer,
+    RollupStore,
+)
+from app.rollups.materializer import HOUR_NS  # noqa: E402
+from app.timeseries.sqlite import NS_PER_MINUTE, SQLiteRepository  # noqa: E402
+
+QUERY_HOURS = 90 * 24
+
+
+def timed(fn, repeat):
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return np.percentile(samples, 50), np.percentile(samples, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ロールアップによる90日履歴クエリの計測")
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--interval", type=int, default=1, help="送信間隔（分）")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    repo = SQLiteRepository(os.path.join(workdir, "timeseries.db"))
+    rng = np.random.default_rng(0)
+    device_ids = [f"dev-{i:03d}" for i in range(args.devices)]
+    points = args.days * 24 * 60 // args.interval
+    now_ns = time.time_ns()
+    times = (
+        now_ns - np.arange(points, dtype=np.int64)[::-1] * args.interval * NS_PER_MINUTE
+    )
+    for device_id in device_ids:
+        repo.write(
+            {
+                "deviceId": np.full(points, device_id, dtype=object),
+                "time": times,
+                "distance": 30 + rng.normal(0, 2, points).cumsum() / 50,
+            }
+        )
+    print(f"生データ: {args.devices}台 × {points:,}点（{args.days}日、{args.interval}分間隔）")
+
+    config = RollupConfig(ROLLUP_BACKFILL_DAYS=args.days, ROLLUP_LAG_MINUTES=10)
+    store = RollupStore(os.path.join(workdir, "rollups.db"))
+    materializer = RollupMaterializer(store, repo, config)
+    planner = HistoryPlanner(materializer, repo)
+
+    started = time.perf_counter()
+    stats = materializer.refresh(device_ids, now_ns)
+    print(f"初回集計: {time.perf_counter() - started:.2f}秒 {stats}")
+
+    # 1時間分の新着データを書き込んで増分集計
+    later_ns = now_ns + HOUR_NS
+    step = args.interval * NS_PER_MINUTE
+    new_times = np.arange(now_ns + step, later_ns + 1, step, dtype=np.int64)
+    for device_id in device_ids:
+        repo.write(
+            {
+                "deviceId": np.full(len(new_times), device_id, dtype=object),
+                "time": new_times,
+                "distance": np.full(len(new_times), 30.0),
+            }
+        )
+    started = time.perf_counter()
+    stats = materializer.refresh(device_ids, later_ns)
+    print(f"増分集計（1時間後）: {(time.perf_counter() - started) * 1000:.1f}ms {stats}")
+
+    def pick(i):
+        return device_ids[i % args.devices]
+
+    start_ns = now_ns - QUERY_HOURS * HOUR_NS
+    cases = [
+        (
+            "生データ全件読み込み",
+            lambda i: repo.range(pick(i), QUERY_HOURS, 10_000_000, ascending=True),
+        ),
+        ("生データ集計 1d", lambda i: repo.rollup_since([pick(i)], start_ns, 1440)),
+        ("生データ集計 1h", lambda i: repo.rollup_since([pick(i)], start_ns, 60)),
+        ("ロールアップ 1d", lambda i: planner.history(pick(i), QUERY_HOURS, "1d")),
+        ("ロールアップ 1h", lambda i: planner.history(pick(i), QUERY_HOURS, "1h")),
+    ]
+    print(f"\n90日履歴（1台）{'p50 ms':>16}{'p95 ms':>10}")
+    for name, fn in cases:
+        p50, p95 = timed(fn, args.repeat)
+        print(f"{name:<20}{p50:>10.2f}{p95:>10.2f}")
+
+    plan = planner.history(device_ids[0], QUERY_HOURS, "1d")["plan"]
+    print(
+        f"\n読み取り内訳（1d）: 日ビン{plan['dailyBins']} 時間ビン{plan['hourlyBins']}"
+        f" 生データ{plan['rawRows']}行"
+    )
+
+
+if __name__ == "__main__":
+    main()
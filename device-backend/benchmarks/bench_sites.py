@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+圃場集計の計測
+
+合成したデバイス（拠点・圃場に分散）で次を計測する。
+  - 集計の作成（SiteIndex.build）の時間
+  - 拠点一覧（SiteIndex.sites）の応答時間を、デバイス一覧から毎回まとめる素朴な集計と比較
+  - 最新値の更新1件あたりの反映時間（SiteIndex.observe_latest）
+
+使い方:
+    python benchmarks/bench_sites.py --devices 100000 --sites 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.sites import SiteConfig, SiteIndex  # noqa: E402
+
+
+def naive_sites(rows):
+    """デバイス一覧から拠点ごとの集計を毎回まとめる"""
+    groups = {}
+    for row in rows:
+        group = groups.setdefault(
+            row["site"],
+            {
+                "devices": 0,
+                "online": 0,
+                "alerts": 0,
+                "levels": [],
+                "fields": set(),
+                "last": None,
+            },
+        )
+        group["devices"] += 1
+        group["online"] += row["online"]
+        group["alerts"] += row["alert"]
+        group["fields"].add(row["field"])
+        if row["level"] is not None:
+            group["levels"].append(row["level"])
+        if row["lastUpdate"] and (
+            group["last"] is None or row["lastUpdate"] > group["last"]
+        ):
+            group["last"] = row["lastUpdate"]
+    return [
+        {
+            "site": site,
+            "deviceCount": g["devices"],
+            "onlineCount": g["online"],
+            "alerts": g["alerts"],
+            "fieldCount": len(g["fields"]),
+            "minLevel": min(g["levels"], default=None),
+            "avgLevel": sum(g["levels"]) / len(g["levels"]) if g["levels"] else None,
+            "maxLevel": max(g["levels"], default=None),
+            "lastUpdate": g["last"],
+        }
+        for site, g in sorted(groups.items())
+    ]
+
+
+def timestamp(seconds):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds)) + ".000000000"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="圃場集計の計測")
+    parser.add_argument("--devices", type=int, default=100_000)
+    parser.add_argument("--sites", type=int, default=500)
+    parser.add_argument("--fields", type=int, default=8, help="拠点あたりの圃場数")
+    parser.add_argument("--updates", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = int(time.time()) - 3600
+    sites = rng.integers(0, args.sites, args.devices)
+    rows = [
+        {
+            "deviceId": f"dev-{i:06d}",
+            "site": f"site-{int(s):04d}",
+            "field": f"field-{int(f)}",
+            "level": float(level),
+            "lastUpdate": timestamp(base + int(offset)),
+            "online": bool(online),
+            "alert": bool(alert),
+        }
+        for i, (s, f, level, offset, online, alert) in enumerate(
+            zip(
+                sites,
+                rng.integers(0, args.fields, args.devices),
+                rng.uniform(0, 30, args.devices),
+                rng.integers(0, 3600, args.devices),
+                rng.random(args.devices) < 0.9,
+                rng.random(args.devices) < 0.02,
+            )
+        )
+    ]
+
+    index = SiteIndex(SiteConfig())
+    started = time.perf_counter()
+    index.build("user", rows)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"集計の作成: {args.devices:,}台 / {args.sites}拠点 {elapsed_ms:.0f}ms")
+
+    for name, run in (
+        ("素朴な集計（毎回デバイス一覧から）", lambda: naive_sites(rows)),
+        ("集計インデックス", lambda: index.sites("user")),
+    ):
+        samples = []
+        for _ in range(20):
+            started = time.perf_counter()
+            result = run()
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"拠点一覧 {name}: p50 {np.percentile(samples, 50):.2f}ms ({len(result)}拠点)")
+
+    # 最新値の更新（取り込みAPIの書き込み結果）を1件ずつ反映
+    targets = rng.integers(0, args.devices, args.updates)
+    levels = rng.uniform(0, 30, args.updates)
+    started = time.perf_counter()
+    for n, (i, level) in enumerate(zip(targets.tolist(), levels.tolist())):
+        index.observe_latest(
+            {f"dev-{i:06d}": {"time": timestamp(base + 3600 + n), "distance": level}}
+        )
+    elapsed = time.perf_counter() - started
+    print(f"最新値の反映: {args.updates:,}件 {elapsed / args.updates * 1e6:.1f}µs/件")
+
+    # 最小・最大の計算し直しを含む拠点一覧
+    started = time.perf_counter()
+    index.sites("user")
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"更新後の拠点一覧（計算し直しを含む）: {elapsed_ms:.2f}ms {index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+作業提案エンジンの計測
+
+合成データ（デバイス数 × lookback期間の5分間隔データ）で、
+初回評価・一部デバイスに新着がある場合の増分評価・新着なしの場合の処理時間を計測する。
+Timestreamの代わりに合成データを返す取得関数をエンジンに渡す。
+
+使い方:
+    python benchmarks/bench_suggestions.py --devices 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.suggestions import SuggestionConfig, SuggestionEngine  # noqa: E402
+from app.suggestions.rules import NS_PER_MINUTE, Thresholds  # noqa: E402
+
+STEP_NS = 5 * NS_PER_MINUTE
+
+
+class SyntheticSource:
+    """デバイスごとの合成系列（一部は低水位・急変を含む）"""
+
+    def __init__(self, device_ids, hours: int, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.now_ns = time.time_ns()
+        points = hours * 12
+        self.series = {}
+        for i, device_id in enumerate(device_ids):
+            t = self.now_ns - np.arange(points, 0, -1, dtype=np.int64) * STEP_NS
+            y = 20 + np.cumsum(self.rng.normal(0, 0.2, points))
+            if i % 10 == 0:
+                y[-60:] = 6.0  # 5時間の低水位
+            if i % 25 == 0:
+                y[-5:] += 8.0  # 急上昇
+            self.series[device_id] = (t, y)
+        self.rows_returned = 0
+
+    def advance(self, device_ids) -> None:
+        """指定デバイスに1点ずつ新着データを追加"""
+        for device_id in device_ids:
+            t, y = self.series[device_id]
+            self.series[device_id] = (
+                np.append(t, t[-1] + STEP_NS),
+                np.append(y, y[-1] + self.rng.normal(0, 0.2)),
+            )
+
+    def fetch(self, device_ids, since_ns):
+        ids, times, values = [], [], []
+        for device_id in device_ids:
+            t, y = self.series[device_id]
+            mask = t > since_ns
+            ids.append(np.full(mask.sum(), device_id, dtype=object))
+            times.append(t[mask])
+            values.append(y[mask])
+        self.rows_returned += sum(len(t) for t in times)
+        return {
+            "deviceId": np.concatenate(ids),
+            "time": np.concatenate(times),
+            "distance": np.concatenate(values),
+        }
+
+
+def timed(label: str, func) -> dict:
+    started = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{label:<32}{elapsed:>10.1f} ms   {result}")
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="作業提案エンジン計測")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--changed", type=float, default=0.1, help="新着があるデバイスの割合")
+    args = parser.parse_args()
+
+    config = SuggestionConfig(SUGGESTION_REFRESH_SECONDS=0)
+    device_ids = [f"device-{i:05d}" for i in range(args.devices)]
+    source = SyntheticSource(device_ids, config.lookback_hours)
+    engine = SuggestionEngine(config, fetch=source.fetch)
+    thresholds = {
+        d: Thresholds(config.low_level_cm, config.critical_level_cm) for d in device_ids
+    }
+
+    print(f"devices={args.devices:,}  points/device={config.lookback_hours * 12}")
+    timed("cold refresh (full history)", lambda: engine.refresh(thresholds))
+    findings = engine.findings(device_ids)
+    print(f"{'devices with suggestions':<32}{len(findings):>10}")
+
+    changed = device_ids[: int(args.devices * args.changed)]
+    source.advance(changed)
+    source.rows_returned = 0
+    timed(f"incremental ({len(changed)} changed)", lambda: engine.refresh(thresholds))
+    print(f"{'rows fetched':<32}{source.rows_returned:>10}")
+
+    source.rows_returned = 0
+    timed("no new readings", lambda: engine.refresh(thresholds))
+
+    timed("findings lookup", lambda: len(engine.findings(device_ids)))
+
+    # 比較: 毎回全デバイスを全期間で再評価した場合
+    def full_recompute():
+        fresh = SuggestionEngine(config, fetch=source.fetch)
+        return fresh.refresh(thresholds)
+
+    timed("full recompute (no cache)", full_recompute)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+組み込みSQLite時系列リポジトリの計測
+
+合成データ（デバイスごとにinterval分間隔、days日分）を書き込み、APIが使う各操作
+（最新値・期間・複数デバイスの最新値・時間ビン集計）の応答時間を計測する。
+比較として、(deviceId, time) の主キーを持たない同じ内容のテーブルで最新値を引いた場合も計測する。
+
+使い方:
+    python benchmarks/bench_timeseries_sqlite.py --devices 1000 --days 7
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.timeseries.sqlite import NS_PER_MINUTE, SQLiteRepository  # noqa: E402
+
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+
+
+def timed(fn, repeat):
+    """repeat回実行した応答時間（ミリ秒）のp50・p95"""
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return np.percentile(samples, 50), np.percentile(samples, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite時系列リポジトリの計測")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--interval", type=int, default=5, help="送信間隔（分）")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--path", default=None, help="DBファイル（省略時は一時ファイル）")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "timeseries.db")
+    repo = SQLiteRepository(path)
+    rng = np.random.default_rng(0)
+    device_ids = [f"dev-{i:05d}" for i in range(args.devices)]
+    points = args.days * NS_PER_DAY // (args.interval * NS_PER_MINUTE)
+    now_ns = time.time_ns()
+    times = (
+        now_ns - np.arange(points, dtype=np.int64)[::-1] * args.interval * NS_PER_MINUTE
+    )
+
+    print(f"書き込み: {args.devices}台 × {points}点 = {args.devices * points:,}行 → {path}")
+    started = time.perf_counter()
+    for start in range(0, args.devices, 50):
+        chunk = device_ids[start : start + 50]
+        repo.write(
+            {
+                "deviceId": np.repeat(np.array(chunk, dtype=object), points),
+                "time": np.tile(times, len(chunk)),
+                "distance": 30 + rng.normal(0, 2, len(chunk) * points).cumsum() / 50,
+            }
+        )
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {elapsed:.1f}秒（{args.devices * points / elapsed:,.0f}行/秒）"
+        f" ファイル {os.path.getsize(path) / 1e6:.0f}MB"
+    )
+
+    def pick(i):
+        return device_ids[(i * 7919) % args.devices]
+
+    def group(i):
+        start = (i * 200) % max(args.devices - 200, 1)
+        return device_ids[start : start + 200]
+
+    cases = [
+        ("latest（1台）", lambda i: repo.latest(pick(i))),
+        ("range 24h LIMIT 100（1台）", lambda i: repo.range(pick(i), 24, 100)),
+        (
+            "range 24h 全件昇順（1台）",
+            lambda i: repo.range(pick(i), 24, 200000, ascending=True),
+        ),
+        ("batch_latest（200台）", lambda i: repo.batch_latest(group(i), 24)),
+        ("aggregate 24h/60分（200台）", lambda i: repo.aggregate(group(i), 24, 60)),
+        (
+            "rollup_since 24h/60分（200台）",
+            lambda i: repo.rollup_since(group(i), now_ns - NS_PER_DAY, 60),
+        ),
+    ]
+    print(f"\n{'操作':<32}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, fn in cases:
+        p50, p95 = timed(fn, args.repeat)
+        print(f"{name:<32}{p50:>10.2f}{p95:>10.2f}")
+
+    # 比較: 主キー（クラスタ化インデックス）なしの同じ内容のテーブル
+    with repo._connection() as conn:
+        conn.execute("DROP TABLE IF EXISTS plain")
+        conn.execute("CREATE TABLE plain AS SELECT * FROM readings")
+
+        def plain_latest(i):
+            conn.execute(
+                "SELECT time, distance FROM plain WHERE deviceId = ?"
+                " ORDER BY time DESC LIMIT 1",
+                (pick(i),),
+            ).fetchall()
+
+        p50, p95 = timed(plain_latest, min(args.repeat, 10))
+        conn.execute("DROP TABLE plain")
+    print(f"{'latest（インデックスなし）':<32}{p50:>10.2f}{p95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,65 @@
 #!/usr/bin/env python3
 """
-DeviceMasterテーブルのデバッグ用スクリプト
+DeviceMasterテーブルのインベントリ/診断スクリプト
+
+1回のストリーミングスキャンでステータス・サイト・ファームウェア別に集計し、
+アイテムはサンプルのみ表示する。
+
+使い方:
+    python debug_devices.py                       # 集計 + サンプル5件
+    python debug_devices.py --metadata-only       # DescribeTableのメタデータのみ（スキャンなし）
+    python debug_devices.py --device 440525060026078
 """
 
-import boto3
-import os
+import argparse
+
+from app.aws import aws_clients, aws_config
+from app.devices.inventory import build_inventory
+
 
-def debug_device_master():
+def print_counts(title, counts):
+    print(f"\n{title}:")
+    for key, count in counts.items():
+        print(f"  - {key}: {count}")
+
+
+def debug_device_master(sample_size=5, scan=True, device_id=None):
     """DeviceMasterテーブルの内容をデバッグ"""
+    table_name = aws_config.device_master_table
     try:
-        # DynamoDBに接続
-        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-        table = dynamodb.Table('DeviceMaster')
-        
         print("🔍 DeviceMasterテーブルのデバッグ開始")
         print("=" * 50)
-        
-        # 1. テーブルの基本情報を取得
-        try:
-            table.load()
-            print(f"✅ テーブル名: {table.table_name}")
-            print(f"✅ テーブル状態: {table.table_status}")
-            print(f"✅ アイテム数: {table.item_count}")
-        except Exception as e:
-            print(f"❌ テーブル情報取得エラー: {str(e)}")
-            return
-        
-        # 2. 全アイテムをスキャン
-        print("\n📋 全アイテムのスキャン:")
-        try:
-            response = table.scan()
-            items = response.get('Items', [])
-            print(f"総アイテム数: {len(items)}")
-            
-            for i, item in enumerate(items, 1):
-                print(f"\n--- アイテム {i} ---")
-                for key, value in item.items():
-                    print(f"  {key}: {value}")
-        except Exception as e:
-            print(f"❌ スキャンエラー: {str(e)}")
-        
-        # 3. status="available"のアイテムをフィルタリング
-        print("\n🔍 status='available'のアイテム:")
-        try:
-            response = table.scan(
-                FilterExpression="#status = :status",
-                ExpressionAttributeNames={
-                    "#status": "status"
-                },
-                ExpressionAttributeValues={
-                    ":status": "available"
-                }
+
+        report = build_inventory(table_name, sample_size=sample_size, scan=scan)
+
+        # 1. テーブルの基本情報
+        meta = report["table"]
+        print(f"✅ テーブル名: {meta['tableName']}")
+        print(f"✅ テーブル状態: {meta['tableStatus']}")
+        print(f"✅ アイテム数（概算）: {meta['approximateItemCount']}")
+        print(f"✅ テーブルサイズ: {meta['tableSizeBytes']} bytes")
+
+        # 2. 集計結果
+        if scan:
+            print(
+                f"\n📋 スキャン件数: {report['totalItems']}"
+                f"（クレーム済み: {report['claimedItems']}）"
             )
-            available_items = response.get('Items', [])
-            print(f"利用可能アイテム数: {len(available_items)}")
-            
-            for i, item in enumerate(available_items, 1):
-                print(f"\n--- 利用可能アイテム {i} ---")
+            print_counts("📊 ステータス別", report["byStatus"])
+            print_counts("📊 サイト別", report["bySite"])
+            print_counts("📊 ファームウェア別", report["byFirmware"])
+
+            print(f"\n🎲 サンプル（{len(report['sample'])}件）:")
+            for i, item in enumerate(report["sample"], 1):
+                print(f"\n--- サンプル {i} ---")
                 for key, value in item.items():
                     print(f"  {key}: {value}")
-        except Exception as e:
-            print(f"❌ フィルタリングエラー: {str(e)}")
-        
-        # 4. 特定のデバイスIDで取得
-        print("\n🎯 特定デバイスID (440525060026078) の取得:")
-        try:
-            response = table.get_item(
-                Key={"deviceId": "440525060026078"}
+
+        # 3. 特定のデバイスIDで取得
+        if device_id:
+            print(f"\n🎯 特定デバイスID ({device_id}) の取得:")
+            response = aws_clients.table(table_name).get_item(
+                Key={"deviceId": device_id}
             )
             if response.get('Item'):
                 print("✅ デバイスが見つかりました:")
@@ -74,14 +67,18 @@ def debug_device_master():
                     print(f"  {key}: {value}")
             else:
                 print("❌ デバイスが見つかりませんでした")
-        except Exception as e:
-            print(f"❌ 特定デバイス取得エラー: {str(e)}")
-        
+
         print("\n" + "=" * 50)
         print("🔍 デバッグ完了")
-        
+
     except Exception as e:
         print(f"❌ デバッグエラー: {str(e)}")
 
+
 if __name__ == "__main__":
-    debug_device_master()
+    parser = argparse.ArgumentParser(description="DeviceMasterインベントリ")
+    parser.add_argument("--sample", type=int, default=5, help="表示するサンプル件数")
+    parser.add_argument("--metadata-only", action="store_true", help="スキャンせずメタデータのみ表示")
+    parser.add_argument("--device", default=None, help="詳細を表示するデバイスID")
+    args = parser.parse_args()
+    debug_device_master(args.sample, not args.metadata_only, args.device)
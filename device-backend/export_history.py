@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+r"""
+履歴データのエクスポートスクリプト（Parquet / Arrow IPC）
+
+指定したデバイス（またはユーザーが所有する全デバイス）の生データを、時系列リポジトリから
+ページ単位で読みながらファイルに書き出す。メモリに載るのは1行グループ分だけ。
+
+使い方:
+    python export_history.py --devices dev-001,dev-002 --days 7 --output history.parquet
+    python export_history.py --user <userId> --start 2026-01-01 --end 2026-04-01 \
+        --format arrow --output history.arrows
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.devices.ownership import list_user_ownerships
+from app.export import ExportUnavailable, export_history
+from app.export.writer import FORMATS
+from app.timeseries import timeseries
+
+
+def parse_time(value):
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def to_ns(value):
+    return int(value.timestamp() * 1_000_000) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="履歴データをParquet / Arrow IPCで書き出す")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--devices", help="カンマ区切りのデバイスID")
+    target.add_argument("--user", help="このユーザーが所有する全デバイスを書き出す")
+    parser.add_argument("--start", help="開始時刻（ISO 8601、省略時は --end の --days 日前）")
+    parser.add_argument("--end", help="終了時刻（ISO 8601、含まない。省略時は現在）")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--output", required=True, help="出力ファイル")
+    args = parser.parse_args()
+
+    if args.devices:
+        device_ids = [d.strip() for d in args.devices.split(",") if d.strip()]
+    else:
+        device_ids = sorted({o["deviceId"] for o in list_user_ownerships(args.user)})
+    if not device_ids:
+        print("❌ 書き出すデバイスがありません")
+        sys.exit(1)
+
+    end_at = parse_time(args.end) if args.end else datetime.now(timezone.utc)
+    start_at = (
+        parse_time(args.start) if args.start else end_at - timedelta(days=args.days)
+    )
+    print(
+        f"📋 {len(device_ids)}台 {start_at:%Y-%m-%d %H:%M} 〜 {end_at:%Y-%m-%d %H:%M}"
+        f"（{timeseries.name}）→ {args.output}"
+    )
+
+    started = time.perf_counter()
+    try:
+        with open(args.output, "wb") as sink:
+            stats = export_history(
+                device_ids, to_ns(start_at), to_ns(end_at), args.format, sink
+            )
+    except ExportUnavailable as e:
+        print(f"❌ {e}（pip install pyarrow）")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    size = os.path.getsize(args.output)
+    print(
+        f"✅ {stats['rows']:,}行（行グループ{stats['rowGroups']}、ページ{stats['pages']}）"
+        f" {size / 1024 / 1024:.1f}MiB {elapsed:.1f}秒"
+        f"（{stats['rows'] / max(elapsed, 1e-9):,.0f}行/秒）"
+    )
+
+
+if __name__ == "__main__":
+    main()
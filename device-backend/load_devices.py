@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+DeviceMasterバルク投入CLI
+
+CSV/JSONLファイルからデバイスをストリーミングで読み込み、並列に投入する。
+登録済みのデバイス（deviceIdが既にあるもの）はクレーム情報を消さないよう書き込まずにスキップする。
+
+使い方:
+    python load_devices.py devices.csv --workers 16 --checkpoint .load_devices.ckpt
+    DYNAMODB_ENDPOINT_URL=http://localhost:8001 python load_devices.py devices.jsonl
+"""
+
+import argparse
+
+from app.aws import aws_config
+from app.provisioning import BulkLoader, iter_records
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="DeviceMasterバルク投入")
+    parser.add_argument("input", help="入力ファイル（.csv または .jsonl）")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="入力形式（省略時は拡張子で判定）")
+    parser.add_argument(
+        "--table", default=aws_config.device_master_table, help="投入先テーブル名"
+    )
+    parser.add_argument("--region", default=None, help="リージョン（省略時はAWS_REGION）")
+    parser.add_argument("--workers", type=int, default=8, help="並列ワーカー数")
+    parser.add_argument("--checkpoint", default=None, help="チェックポイントファイル（再開用）")
+    parser.add_argument(
+        "--progress-interval", type=float, default=5.0, help="進捗表示間隔（秒）"
+    )
+    args = parser.parse_args()
+
+    print(f"🚀 {args.input} を {args.table} に投入します（workers={args.workers}）")
+    loader = BulkLoader(
+        args.table,
+        workers=args.workers,
+        region_name=args.region,
+        checkpoint_path=args.checkpoint,
+        progress_interval=args.progress_interval,
+    )
+    try:
+        stats = loader.load(iter_records(args.input, args.format))
+    except Exception as e:
+        print(f"\n❌ 投入エラー: {str(e)}")
+        if args.checkpoint:
+            print(f"   --checkpoint {args.checkpoint} を指定して再実行すると続きから再開します")
+        return 1
+
+    print(f"\n✅ 投入完了: {stats}")
+    if stats["skipped"]:
+        print(
+            f"⚠️  登録済みのため{stats['skipped']}件をスキップしました"
+            f"（例: {', '.join(stats['skippedSample'])}）"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
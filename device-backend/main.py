@@ -1,37 +1,59 @@
 import os, time
-from decimal import Decimal
+from contextlib import asynccontextmanager
 from typing import Optional
 from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import boto3
 from typing import List
 
 # 認証モジュールのインポート
+from app.advisor import summary_refresh_lifespan
+from app.anomalies.endpoints import router as anomalies_router
+from app.advisor.endpoints import router as advisor_router
 from app.auth.endpoints import router as auth_router
 from app.auth.dependencies import get_current_user_id
+from app.aws import aws_clients, aws_config
+from app.devices import (
+    device_master_cache, latest_reading_cache, latest_store, read_stored, write_back
+)
+from app.devices.claims import (
+    claim_device_atomically, DeviceAlreadyClaimedError, DeviceNotFoundError
+)
+from app.devices.endpoints import router as devices_router
+from app.devices.batch import batch_router
+from app.devices.inventory import build_inventory
+from app.devices.models import ClaimRequest
+from app.devices.ownership import find_ownership, list_user_ownerships
+from app.ingest.endpoints import router as ingest_router
+from app.export.endpoints import router as export_router
+from app.forecast.endpoints import router as forecast_router
+from app.liveness import liveness_index, liveness_lifespan
+from app.liveness.endpoints import router as liveness_router
+from app.notifications import (
+    notification_dispatch_lifespan, notify_findings, notify_offline
+)
+from app.notifications.endpoints import router as notifications_router
+from app.sites.endpoints import router as sites_router
+from app.startup import warmup_lifespan
+from app.suggestions import suggestion_engine
+from app.suggestions.endpoints import router as suggestions_router
+from app.timeseries import float_or_none, format_timestamps, lttb, timeseries
 
 
 # ---------- 環境 ----------
-AWS_REGION   = os.getenv("AWS_REGION", "us-east-1")
-USER_TBL     = os.getenv("USER_TABLE", "UserRegistry")
-DEVICE_MASTER_TBL = os.getenv("DEVICE_MASTER_TABLE", "DeviceMaster")
-DEVICE_OWNERSHIP_TBL = os.getenv("DEVICE_OWNERSHIP_TABLE", "DeviceOwnership")
-TS_DB        = os.getenv("TS_DB", "iot_waterlevel_db")
-TS_TABLE     = os.getenv("TS_TABLE", "distance_table")
-
-dynamodb = boto3.resource("dynamodb", region_name=AWS_REGION)
-user_tbl = dynamodb.Table(USER_TBL)
-device_master_tbl = dynamodb.Table(DEVICE_MASTER_TBL)
-ownership_tbl = dynamodb.Table(DEVICE_OWNERSHIP_TBL)
-ts_query = boto3.client("timestream-query", region_name=AWS_REGION)
+AWS_REGION   = aws_config.region
+USER_TBL     = aws_config.user_table
+DEVICE_MASTER_TBL = aws_config.device_master_table
+DEVICE_OWNERSHIP_TBL = aws_config.device_ownership_table
+# LTTBダウンサンプリング時に読み込む最大行数
+LTTB_MAX_RAW_POINTS = int(os.getenv("LTTB_MAX_RAW_POINTS", "200000"))
 
-# ---------- スキーマ ----------
-class ClaimRequest(BaseModel):
-    deviceId: str
-    lat: float
-    lon: float
+# クライアントは初回利用時に生成される（接続プールはプロセス内で共有）
+user_tbl = aws_clients.table(USER_TBL)
+device_master_tbl = aws_clients.table(DEVICE_MASTER_TBL)
+ownership_tbl = aws_clients.table(DEVICE_OWNERSHIP_TBL)
 
+# ---------- スキーマ ----------
 class DeviceItem(BaseModel):
     deviceId: str
     deviceType: str
@@ -54,7 +76,33 @@ class LatestMetric(BaseModel):
     distance: Optional[float] = None
 
 # ---------- アプリ ----------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動・終了処理"""
+    import anyio.to_thread
+    # 同期エンドポイント用スレッドプールをAWS接続プールと同じ並列度に揃える
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = aws_config.worker_threads
+    # 取り込み・異常検知・ロールアップは使う時に読み込む（import main を軽くするため）
+    from app.ingest import ingest_lifespan
+    from app.rollups import rollup_lifespan
+    connect_hooks()
+    # JWKSとDeviceMasterの先読み（STARTUP_MODE=fastではバックグラウンド実行）
+    async with warmup_lifespan(app):
+        # チャット用要約のバックグラウンド更新
+        async with summary_refresh_lifespan(app):
+            # 通知アウトボックスの配信ワーカー
+            async with notification_dispatch_lifespan(app):
+                # デバイス死活インデックスの期限判定
+                async with liveness_lifespan(app):
+                    # 取り込みバッファのフラッシュ（終了時に残りを書き込む）
+                    async with ingest_lifespan(app):
+                        # 時間・日単位ロールアップの増分集計
+                        async with rollup_lifespan(app):
+                            yield
+
 app = FastAPI(
+    lifespan=lifespan,
     title="IoT Water Level Device Registry API",
     description="""
     ## 水位センサーデバイス管理API
@@ -111,6 +159,10 @@ async def csrf_protection_middleware(request: Request, call_next):
     if request.url.path.startswith("/api/v1/auth/login"):
         return await call_next(request)
     
+    # データ取り込みはCookieを使わずAPIキーで認証するため除外
+    if request.url.path.startswith("/ingest/"):
+        return await call_next(request)
+
     
     # CSRFトークンをチェック
     csrf_token_header = request.headers.get("X-CSRF-Token")
@@ -156,26 +208,112 @@ app.add_middleware(
 # 認証ルーターを追加
 app.include_router(auth_router, prefix="/api/v1")
 
+# デバイス関連ルーターを追加（パスパラメータを持つ /devices/{deviceId} より先に登録する）
+app.include_router(devices_router)
+
+# 作業提案ルーターを追加
+app.include_router(suggestions_router)
+
+# アドバイザー（チャット）ルーターを追加
+app.include_router(advisor_router)
+
+# 通知ルーターを追加
+app.include_router(notifications_router)
+
+# 死活監視ルーターを追加
+app.include_router(liveness_router)
+
+# データ取り込みルーターを追加
+app.include_router(ingest_router)
+
+# 履歴エクスポートルーターを追加
+app.include_router(export_router)
+
+# 異常検知ルーターを追加
+app.include_router(anomalies_router)
+
+# 水位予測ルーターを追加
+app.include_router(forecast_router)
+
+# 圃場集計ルーターを追加
+app.include_router(sites_router)
+
+# 作業提案で新たに検出した緊急・高優先度の項目を通知する
+suggestion_engine.on_new_findings = notify_findings
+
+
+def on_devices_offline(devices):
+    """オフラインになったデバイスを圃場集計に反映し、所有者に通知する"""
+    from app.sites import site_index
+    site_index.observe_status([d["deviceId"] for d in devices], False)
+    notify_offline(devices)
+
+
+def on_devices_online(devices):
+    """受信が再開したデバイスを圃場集計に反映する"""
+    from app.sites import site_index
+    site_index.observe_status([d["deviceId"] for d in devices], True)
+
+
+liveness_index.on_offline = on_devices_offline
+liveness_index.on_online = on_devices_online
+
+def on_readings_written(columns):
+    """取り込んだ測定値で死活インデックス・異常検知・最新値ストア・圃場集計を更新する"""
+    from app.anomalies import anomaly_engine
+    from app.sites import site_index
+    liveness_index.observe_columns(columns)
+    # 書き込めた（より新しかった）デバイスだけキャッシュと圃場集計も差し替える
+    updated = latest_store.put_columns(columns)
+    latest_reading_cache.set_many(updated)
+    site_index.observe_latest(updated)
+    anomaly_engine.observe_columns(columns)
+
+
+def connect_hooks():
+    """
+    取り込みバッファと異常検知エンジンのフックを接続する
+
+    どちらも初回利用時に読み込むため、lifespanの開始時（関数型デプロイではserverlessの初期化時）に呼ぶ。
+    """
+    from app.anomalies import anomaly_engine
+    from app.ingest import ingest_buffer
+    from app.sites import site_index
+    # 継続中の異常の有無の変化を圃場集計に反映する
+    anomaly_engine.on_alerts = site_index.observe_alerts
+    ingest_buffer.on_written = on_readings_written
+
 def now_utc_iso():
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
-def get_next_ownership_id():
-    """次の所有権IDを取得"""
-    try:
-        # 現在の最大IDを取得
-        response = ownership_tbl.scan(
-            ProjectionExpression="ownershipId",
-            Select="ALL_ATTRIBUTES"
-        )
-        
-        max_id = 0
-        for item in response.get('Items', []):
-            ownership_id = int(item['ownershipId'])
-            max_id = max(max_id, ownership_id)
-        
-        return str(max_id + 1)
-    except:
-        return "1"  # 最初のレコード
+
+def get_latest_reading(device_id: str) -> dict:
+    """最新の測定値を取得（共有キャッシュ → 最新値ストア → 時系列リポジトリ）"""
+    cached = latest_reading_cache.get(device_id)
+    if cached is not None:
+        return cached
+    stored = read_stored([device_id]).get(device_id)
+    if stored is not None:
+        latest_reading_cache.set(device_id, stored)
+        return stored
+
+    columns = timeseries.latest(device_id)
+    if not columns or not len(columns["time"]):
+        # 値がない場合はキャッシュしない（受信後すぐに表示されるようにする）
+        return {"time": None, "distance": None}
+    liveness_index.observe(device_id, columns["time"][:1])
+    import numpy as np
+    write_back({
+        "deviceId": np.array([device_id]),
+        "time": columns["time"][:1],
+        "distance": columns["distance"][:1],
+    })
+    latest = {
+        "time": format_timestamps(columns["time"][:1])[0],
+        "distance": float_or_none(columns["distance"][:1])[0],
+    }
+    latest_reading_cache.set(device_id, latest)
+    return latest
 
 # ---------- エンドポイント ----------
 
@@ -184,55 +322,16 @@ def get_next_ownership_id():
           description="利用可能なデバイスを選択してクレームし、位置情報を登録します。")
 def claim_device(body: ClaimRequest, user_id: str = Depends(get_current_user_id)):
     try:
-        # 1. DeviceMasterテーブルから指定されたデバイスが存在するかチェック
-        device_master_response = device_master_tbl.get_item(
-            Key={"deviceId": body.deviceId}
-        )
-        
-        if not device_master_response.get("Item"):
-            raise HTTPException(400, f"Device {body.deviceId} not found in DeviceMaster")
-        
-        device_master = device_master_response["Item"]
-        
-        # 2. 既に他のユーザーがクレームしていないかチェック
-        existing_ownership = ownership_tbl.scan(
-            FilterExpression="deviceId = :device_id AND isActive = :active",
-            ExpressionAttributeValues={
-                ":device_id": body.deviceId,
-                ":active": "true"
-            }
-        )
-        if existing_ownership.get("Items"):
-            raise HTTPException(409, f"Device {body.deviceId} is already claimed by another user")
-        
-        # 3. 次の所有権IDを取得
-        ownership_id = get_next_ownership_id()
-        
-        # 4. DeviceOwnershipに所有権を登録
-        ownership_item = {
-            "ownershipId": ownership_id,
-            "userId": user_id,
-            "deviceId": body.deviceId,
-            "ownershipType": "owner",
-            "assignedAt": now_utc_iso(),
-            "assignedBy": "user",
-            "isActive": "true",
-            "createdAt": now_utc_iso(),
-            "updatedAt": now_utc_iso()
-        }
-        
-        ownership_tbl.put_item(Item=ownership_item)
-        
-        # 5. DeviceMasterの位置情報を更新
-        device_master_tbl.update_item(
-            Key={"deviceId": body.deviceId},
-            UpdateExpression="SET lat = :lat, lon = :lon, updatedAt = :updated_at",
-            ExpressionAttributeValues={
-                ":lat": Decimal(str(body.lat)),
-                ":lon": Decimal(str(body.lon)),
-                ":updated_at": now_utc_iso()
-            }
+        # DeviceMaster更新とDeviceOwnership登録を1トランザクションで実行
+        # （未登録・クレーム済みの場合はアトミックに失敗する）
+        device_master, ownership_item = claim_device_atomically(
+            body.deviceId, user_id, body.lat, body.lon
         )
+        device_master_cache.invalidate(body.deviceId)
+        from app.sites import site_index
+        site_index.assign(user_id, body.deviceId,
+                          device_master.get("agriculturalSite") or "",
+                          device_master.get("fieldName") or "")
         
         print(f"DEBUG: Device {body.deviceId} claimed by user {user_id}")
         
@@ -247,14 +346,16 @@ def claim_device(body: ClaimRequest, user_id: str = Depends(get_current_user_id)
             description=device_master.get("description"),
             firmwareVersion=device_master.get("firmwareVersion"),
             isActive=device_master["isActive"],
-            ownershipType="owner",
+            ownershipType=ownership_item["ownershipType"],
             assignedAt=ownership_item["assignedAt"],
             createdAt=device_master["createdAt"],
-            updatedAt=now_utc_iso(),
+            updatedAt=device_master["updatedAt"],
         )
         
-    except HTTPException:
-        raise
+    except DeviceNotFoundError as e:
+        raise HTTPException(400, str(e))
+    except DeviceAlreadyClaimedError as e:
+        raise HTTPException(409, str(e))
     except Exception as e:
         print(f"ERROR: Failed to claim device: {str(e)}")
         raise HTTPException(500, f"Failed to claim device: {str(e)}")
@@ -264,71 +365,56 @@ def claim_device(body: ClaimRequest, user_id: str = Depends(get_current_user_id)
          description="指定されたデバイスIDの最新の水位測定データを取得します。")
 def latest_metric(deviceId: str, user_id: str = Depends(get_current_user_id)):
     # ユーザーがこのデバイスを所有しているかチェック（DeviceOwnershipベース）
-    ownership_check = ownership_tbl.scan(
-        FilterExpression="userId = :user_id AND deviceId = :device_id AND isActive = :active",
-        ExpressionAttributeValues={
-            ":user_id": user_id,
-            ":device_id": deviceId,
-            ":active": "true"
-        }
-    )
-    if not ownership_check.get("Items"):
+    if not find_ownership(user_id, deviceId):
         raise HTTPException(404, f"Device {deviceId} not found or not owned by user")
     
-    q = f"""
-    SELECT time, measure_value::double AS distance
-    FROM "{TS_DB}"."{TS_TABLE}"
-    WHERE measure_name='distance' AND deviceId = '{deviceId}'
-    ORDER BY time DESC
-    LIMIT 1
-    """
-    res = ts_query.query(QueryString=q)
-    rows = res.get("Rows", [])
-    if not rows:
-        return LatestMetric(deviceId=deviceId, time=None, distance=None)
-    data = rows[0]["Data"]
+    latest = get_latest_reading(deviceId)
     return LatestMetric(
-        deviceId=deviceId,
-        time=data[0]["ScalarValue"],
-        distance=float(data[1]["ScalarValue"])
+        deviceId=deviceId, time=latest["time"], distance=latest["distance"]
     )
 
 @app.get("/devices/{deviceId}/history",
          summary="デバイスの履歴データを取得",
          description="指定されたデバイスIDの過去の水位測定データを取得します。")
-def device_history(deviceId: str, hours: int = 24, limit: int = 100, user_id: str = Depends(get_current_user_id)):
-    """デバイスの履歴データを取得"""
+def device_history(deviceId: str, hours: int = 24, limit: int = 100,
+                   downsample: Optional[str] = None, points: int = 200,
+                   resolution: Optional[str] = None,
+                   user_id: str = Depends(get_current_user_id)):
+    """
+    デバイスの履歴データを取得
+
+    - **downsample**: "lttb" を指定すると期間内の全データをpoints点に間引く（極値を保持）
+    - **points**: ダウンサンプリング後の点数
+    - **resolution**: raw / 1h / 1d / auto（省略時はraw。autoはROLLUP_RAW_MAX_HOURSを超える期間を
+      時間・日単位のロールアップで返す）
+    """
+    if downsample not in (None, "lttb"):
+        raise HTTPException(400, f"Unsupported downsample mode: {downsample}")
+    if resolution not in (None, "auto", "raw", "1h", "1d"):
+        raise HTTPException(400, f"Unsupported resolution: {resolution}")
+    if downsample == "lttb":
+        return device_history_lttb(deviceId, hours, points, user_id)
+
     # ユーザーがこのデバイスを所有しているかチェック（DeviceOwnershipベース）
-    ownership_check = ownership_tbl.scan(
-        FilterExpression="userId = :user_id AND deviceId = :device_id AND isActive = :active",
-        ExpressionAttributeValues={
-            ":user_id": user_id,
-            ":device_id": deviceId,
-            ":active": "true"
-        }
-    )
-    if not ownership_check.get("Items"):
+    if not find_ownership(user_id, deviceId):
         raise HTTPException(404, f"Device {deviceId} not found or not owned by user")
     
-    q = f"""
-    SELECT time, measure_value::double AS distance
-    FROM "{TS_DB}"."{TS_TABLE}"
-    WHERE measure_name='distance' 
-    AND deviceId = '{deviceId}'
-    AND time > ago({hours}h)
-    ORDER BY time DESC
-    LIMIT {limit}
-    """
-    res = ts_query.query(QueryString=q)
-    rows = res.get("Rows", [])
+    from app.rollups import choose_resolution
+    resolution = choose_resolution(hours, resolution)
+    if resolution != "raw":
+        return device_history_rollup(deviceId, hours, limit, resolution)
     
+    # 列配列（時刻: エポックns / 距離: float64）で取得
+    columns = timeseries.range(deviceId, hours, limit)
     history = []
-    for row in rows:
-        data = row["Data"]
-        history.append({
-            "time": data[0]["ScalarValue"],
-            "distance": float(data[1]["ScalarValue"])
-        })
+    if columns:
+        liveness_index.observe(deviceId, columns["time"])
+        history = [
+            {"time": t, "distance": d}
+            for t, d in zip(
+                format_timestamps(columns["time"]), float_or_none(columns["distance"])
+            )
+        ]
     
     return {
         "deviceId": deviceId,
@@ -336,82 +422,110 @@ def device_history(deviceId: str, hours: int = 24, limit: int = 100, user_id: st
         "count": len(history)
     }
 
+
+def device_history_rollup(deviceId: str, hours: int, limit: int, resolution: str):
+    """ロールアップと直近の生データを組み合わせたビン単位の履歴（新しい順、最大limitビン）"""
+    from app.rollups import history_planner
+    result = history_planner.history(deviceId, hours, resolution)
+    bins = result["bins"]
+    history = []
+    if bins:
+        recent = {name: array[::-1][:limit] for name, array in bins.items()}
+        history = [
+            {"time": t, "distance": d, "min": lo, "max": hi, "count": n}
+            for t, d, lo, hi, n in zip(
+                format_timestamps(recent["time"]),
+                float_or_none(recent["sumLevel"] / recent["samples"]),
+                float_or_none(recent["minLevel"]),
+                float_or_none(recent["maxLevel"]),
+                recent["samples"].tolist(),
+            )
+        ]
+
+    return {
+        "deviceId": deviceId,
+        "history": history,
+        "count": len(history),
+        "resolution": resolution,
+        "plan": result["plan"],
+    }
+
+
+def device_history_lttb(deviceId: str, hours: int, points: int, user_id: str):
+    """期間内の全データをLTTBで間引いた履歴（新しい順）"""
+    if not find_ownership(user_id, deviceId):
+        raise HTTPException(404, f"Device {deviceId} not found or not owned by user")
+
+    columns = timeseries.range(deviceId, hours, LTTB_MAX_RAW_POINTS, ascending=True)
+    history = []
+    raw_count = 0
+    if columns:
+        raw_count = len(columns["time"])
+        liveness_index.observe(deviceId, columns["time"])
+        time_ns, distance = lttb(columns["time"], columns["distance"], max(points, 3))
+        # 既存のレスポンスと同じく新しい順で返す
+        history = [
+            {"time": t, "distance": d}
+            for t, d in zip(
+                format_timestamps(time_ns[::-1]), float_or_none(distance[::-1])
+            )
+        ]
+
+    return {
+        "deviceId": deviceId,
+        "history": history,
+        "count": len(history),
+        "rawCount": raw_count,
+        "downsample": "lttb"
+    }
+
 @app.get("/devices/stats",
          summary="全デバイスの統計情報を取得",
          description="登録済みデバイスの統計情報と最新データを一括取得します。")
 def devices_stats(user_id: str = Depends(get_current_user_id)):
     """全デバイスの統計情報を取得"""
+    from app.admission import AdmissionRejected
     
     # 1. DeviceOwnershipからユーザーのデバイス一覧を取得
-    ownership_response = ownership_tbl.scan(
-        FilterExpression="userId = :user_id AND isActive = :active",
-        ExpressionAttributeValues={
-            ":user_id": user_id,
-            ":active": "true"
-        }
-    )
-    ownership_items = ownership_response.get("Items", [])
+    ownership_items = list_user_ownerships(user_id)
+
+    # DeviceMasterからデバイス詳細をまとめて取得
+    devices_by_id = device_master_cache.get_many(o["deviceId"] for o in ownership_items)
+    latest_by_id = latest_reading_cache.get_many(devices_by_id)
+    # キャッシュにないデバイスは最新値ストアからBatchGetItemでまとめて取得
+    from_store = read_stored(d for d in devices_by_id if d not in latest_by_id)
+    latest_reading_cache.set_many(from_store)
+    latest_by_id.update(from_store)
     
     # 2. 各デバイスの最新データを取得
     device_stats = []
     for ownership in ownership_items:
         device_id = ownership["deviceId"]
+        device = devices_by_id.get(device_id)
         try:
-            # DeviceMasterからデバイス詳細を取得
-            device_response = device_master_tbl.get_item(Key={"deviceId": device_id})
-            device = device_response.get("Item")
-            
             if not device:
                 continue
             
-            # Timestreamから最新データを直接取得
-            q = f"""
-            SELECT time, measure_value::double AS distance
-            FROM "{TS_DB}"."{TS_TABLE}"
-            WHERE measure_name='distance' AND deviceId = '{device_id}'
-            ORDER BY time DESC
-            LIMIT 1
-            """
-            
-            result = ts_query.query(QueryString=q)
-            records = result.get('Rows', [])
+            # 最新データを取得（キャッシュ・ストアにない場合のみTimestreamへ問い合わせ）
+            latest = latest_by_id.get(device_id) or get_latest_reading(device_id)
             
-            if records:
-                # 最新のレコードを取得
-                latest_record = records[0]
-                time_value = latest_record['Data'][0].get('ScalarValue')
-                distance_value = latest_record['Data'][1].get('ScalarValue')
-                
-                device_stats.append({
-                    "userId": ownership["userId"],
-                    "deviceId": device_id,
-                    "deviceType": device["deviceType"],
-                    "agriculturalSite": device["agriculturalSite"],
-                    "fieldName": device["fieldName"],
-                    "physicalLocation": device.get("physicalLocation"),
-                    "lat": float(device["lat"]) if device.get("lat") else None,
-                    "lon": float(device["lon"]) if device.get("lon") else None,
-                    "latestDistance": float(distance_value) if distance_value else None,
-                    "lastUpdate": time_value,
-                    "ownershipType": ownership["ownershipType"],
-                    "assignedAt": ownership["assignedAt"]
-                })
-            else:
-                # データがない場合
-                device_stats.append({
-                    "userId": ownership["userId"],
-                    "deviceId": device_id,
-                    "deviceType": device["deviceType"],
-                    "agriculturalSite": device["agriculturalSite"],
-                    "fieldName": device["fieldName"],
-                    "physicalLocation": device.get("physicalLocation"),
-                    "lat": float(device["lat"]) if device.get("lat") else None,
-                    "lon": float(device["lon"]) if device.get("lon") else None,
-                    "latestDistance": None,
-                    "lastUpdate": None,
-                    "ownershipType": ownership["ownershipType"],
-                    "assignedAt": ownership["assignedAt"]
-                })
+            device_stats.append({
+                "userId": ownership["userId"],
+                "deviceId": device_id,
+                "deviceType": device["deviceType"],
+                "agriculturalSite": device["agriculturalSite"],
+                "fieldName": device["fieldName"],
+                "physicalLocation": device.get("physicalLocation"),
+                "lat": float(device["lat"]) if device.get("lat") else None,
+                "lon": float(device["lon"]) if device.get("lon") else None,
+                "latestDistance": latest["distance"],
+                "lastUpdate": latest["time"],
+                "ownershipType": ownership["ownershipType"],
+                "assignedAt": ownership["assignedAt"]
+            })
+        except AdmissionRejected:
+            # クエリ予算切れはデバイス単位で握りつぶさず429を返す
+            raise
         except Exception as e:
             print(f"ERROR: Failed to get latest data for device {device_id}: {str(e)}")
             # データが取得できない場合はデフォルト値で追加
@@ -490,40 +604,72 @@ def get_available_devices():
         # エラー時は空のリストを返す
         return []
 
-@app.get("/debug/devices", summary="デバッグ用: デバイス情報を取得")
-def debug_devices():
-    """デバッグ用: DeviceMasterテーブルの内容を確認"""
+
+@app.get("/debug/devices", summary="デバッグ用: デバイスインベントリを取得")
+def debug_devices(sample: int = 5, scan: bool = True):
+    """デバッグ用: DeviceMasterテーブルをステータス・サイト・ファームウェア別に集計"""
     try:
-        # 全アイテムをスキャン
-        response = device_master_tbl.scan()
-        all_items = response.get("Items", [])
-        
-        # availableなアイテムをフィルタリング
-        available_response = device_master_tbl.scan(
-            FilterExpression="#status = :status",
-            ExpressionAttributeNames={
-                "#status": "status"
-            },
-            ExpressionAttributeValues={
-                ":status": "available"
-            }
+        # 1回のストリーミングスキャンで集計し、アイテムはサンプルのみ返す
+        report = build_inventory(
+            DEVICE_MASTER_TBL, sample_size=min(sample, 50), scan=scan
         )
-        available_items = available_response.get("Items", [])
-        
-        return {
-            "table_name": device_master_tbl.table_name,
-            "total_items": len(all_items),
-            "available_items": len(available_items),
-            "all_items": all_items,
-            "available_items": available_items
-        }
+        report["table_name"] = DEVICE_MASTER_TBL
+        if scan:
+            report["total_items"] = report["totalItems"]
+            report["available_items"] = report["byStatus"].get("available", 0)
+        return report
         
     except Exception as e:
         return {
             "error": str(e),
-            "table_name": device_master_tbl.table_name if 'device_master_tbl' in locals() else "Unknown"
+            "table_name": DEVICE_MASTER_TBL
         }
 
+
+@app.get("/debug/aws-pools", summary="デバッグ用: AWS接続プールの使用状況を取得")
+def debug_aws_pools():
+    """デバッグ用: クライアントごとの接続プール使用状況を確認"""
+    return {
+        "poolSize": aws_config.pool_size,
+        "workerThreads": aws_config.worker_threads,
+        "clients": aws_clients.pool_stats(),
+    }
+
+
+@app.get("/debug/admission", summary="デバッグ用: Timestreamクエリのアドミッション制御状況を取得")
+def debug_admission():
+    """デバッグ用: 同時実行数・許可/拒否件数を確認"""
+    from app.admission import admission_controller
+    return admission_controller.stats()
+
+
+@app.get("/debug/rollups", summary="デバッグ用: 時間・日単位ロールアップの集計状況を取得")
+def debug_rollups():
+    """デバッグ用: ビン数・確定時刻の範囲を確認"""
+    from app.rollups import rollup_materializer
+    return rollup_materializer.store.stats()
+
+
+@app.get("/debug/anomalies", summary="デバッグ用: 異常検知エンジンの状態を取得")
+def debug_anomalies():
+    """デバッグ用: 追跡デバイス数・判定した点数・検出件数を確認"""
+    from app.anomalies import anomaly_engine
+    return anomaly_engine.stats()
+
+
+@app.get("/debug/forecast", summary="デバッグ用: 予測モデルキャッシュの状態を取得")
+def debug_forecast():
+    """デバッグ用: キャッシュ済みモデル数・学習回数・増分更新回数を確認"""
+    from app.forecast import forecaster
+    return forecaster.stats()
+
+
+@app.get("/debug/sites", summary="デバッグ用: 圃場集計インデックスの状態を取得")
+def debug_sites():
+    """デバッグ用: 集計済みユーザー数・追跡デバイス数・拠点数・増分更新回数を確認"""
+    from app.sites import site_index
+    return site_index.stats()
+
 @app.get("/devices", response_model=List[DeviceItem],
          summary="ユーザーのデバイス一覧を取得",
          description="ログインユーザーがクレームしたデバイスの一覧を取得します。")
@@ -532,14 +678,7 @@ def list_devices(user_id: str = Depends(get_current_user_id)):
     print(f"DEBUG: Current user_id: {user_id}")
     
     # 1. DeviceOwnershipからユーザーのデバイス一覧を取得
-    ownership_response = ownership_tbl.scan(
-        FilterExpression="userId = :user_id AND isActive = :active",
-        ExpressionAttributeValues={
-            ":user_id": user_id,
-            ":active": "true"
-        }
-    )
-    ownership_items = ownership_response.get("Items", [])
+    ownership_items = list_user_ownerships(user_id)
     print(f"DEBUG: Found {len(ownership_items)} ownership records for user {user_id}")
     
     # デバイスが存在しない場合は空のリストを返す
@@ -547,15 +686,13 @@ def list_devices(user_id: str = Depends(get_current_user_id)):
         print(f"DEBUG: No devices found for user {user_id}, returning empty list")
         return []
     
+    # 2. DeviceMasterからデバイス詳細をまとめて取得
+    devices_by_id = device_master_cache.get_many(o["deviceId"] for o in ownership_items)
+
     devices = []
     for ownership in ownership_items:
-        # 2. DeviceMasterからデバイス詳細を取得
-        device_response = device_master_tbl.get_item(
-            Key={"deviceId": ownership["deviceId"]}
-        )
-        
-        if device_response.get("Item"):
-            device = device_response["Item"]
+        device = devices_by_id.get(ownership["deviceId"])
+        if device:
             devices.append(DeviceItem(
                 deviceId=device["deviceId"],
                 deviceType=device["deviceType"],
@@ -584,35 +721,16 @@ def get_device(deviceId: str, user_id: str = Depends(get_current_user_id)):
     print(f"DEBUG: Looking for deviceId={deviceId}, userId={user_id}")
     
     # 1. DeviceOwnershipから所有権を確認
-    ownership_response = ownership_tbl.scan(
-        FilterExpression="userId = :user_id AND deviceId = :device_id AND isActive = :active",
-        ExpressionAttributeValues={
-            ":user_id": user_id,
-            ":device_id": deviceId,
-            ":active": "true"
-        }
-    )
-    ownership_items = ownership_response.get("Items", [])
-    print(f"DEBUG: Found {len(ownership_items)} ownership records")
+    ownership = find_ownership(user_id, deviceId)
     
-    if not ownership_items:
+    if not ownership:
         # デバッグ用: ユーザーの全デバイスを確認
-        user_ownership_response = ownership_tbl.scan(
-            FilterExpression="userId = :user_id AND isActive = :active",
-            ExpressionAttributeValues={
-                ":user_id": user_id,
-                ":active": "true"
-            }
-        )
-        user_devices = user_ownership_response.get("Items", [])
+        user_devices = list_user_ownerships(user_id)
         print(f"DEBUG: User has {len(user_devices)} devices: {[d['deviceId'] for d in user_devices]}")
         raise HTTPException(404, f"device not found for userId={user_id}, deviceId={deviceId}")
     
-    ownership = ownership_items[0]
-    
     # 2. DeviceMasterからデバイス詳細を取得
-    device_response = device_master_tbl.get_item(Key={"deviceId": deviceId})
-    device = device_response.get("Item")
+    device = device_master_cache.get(deviceId)
     
     if not device:
         raise HTTPException(404, f"device {deviceId} not found in DeviceMaster")
@@ -632,4 +750,13 @@ def get_device(deviceId: str, user_id: str = Depends(get_current_user_id)):
         assignedAt=ownership["assignedAt"],
         createdAt=device["createdAt"],
         updatedAt=device["updatedAt"],
-    )
\ No newline at end of file
+    )
+
+
+# バッチAPI（POST /devices/batch）で実行可能なGET操作
+# （固定パスはパスパラメータを持つパスより先に登録する）
+batch_router.register("/devices", list_devices)
+batch_router.register("/devices/stats", devices_stats)
+batch_router.register("/devices/{deviceId}", get_device)
+batch_router.register("/devices/{deviceId}/latest", latest_metric)
+batch_router.register("/devices/{deviceId}/history", device_history)
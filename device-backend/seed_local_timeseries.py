@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+ローカル実行用の時系列データ投入スクリプト（TS_BACKEND=sqlite）
+
+DeviceMasterに登録されているデバイスごとに、合成した水位データを組み込みSQLiteに書き込む。
+dynamodb-local（DYNAMODB_ENDPOINT_URL）と組み合わせると、AWSなしでアプリ全体を動かせる。
+
+使い方:
+    TS_BACKEND=sqlite python seed_local_timeseries.py [--days 7] [--interval 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.aws import aws_clients, aws_config
+from app.timeseries import timeseries, timeseries_config
+
+NS_PER_MINUTE = 60_000_000_000
+
+
+def device_ids_from_master():
+    """DeviceMasterに登録されている全デバイスID"""
+    device_master_tbl = aws_clients.table(aws_config.device_master_table)
+    scan_kwargs = {"ProjectionExpression": "deviceId"}
+    device_ids = []
+    while True:
+        response = device_master_tbl.scan(**scan_kwargs)
+        device_ids.extend(item["deviceId"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return device_ids
+
+
+def seed(days, interval_minutes):
+    if timeseries.name != "sqlite":
+        print("❌ TS_BACKEND=sqlite を設定してください（Timestreamには書き込みません）")
+        return
+
+    device_ids = device_ids_from_master()
+    points = days * 24 * 60 // interval_minutes
+    now_ns = time.time_ns()
+    times = (
+        now_ns
+        - np.arange(points, dtype=np.int64)[::-1] * interval_minutes * NS_PER_MINUTE
+    )
+    hours = np.arange(points) * interval_minutes / 60
+    rng = np.random.default_rng(0)
+    print(f"📋 {len(device_ids)}台 × {points}点 → {timeseries_config.sqlite_path}")
+
+    for device_id in device_ids:
+        # 基準水位 + 日周変動 + ノイズ
+        base = rng.uniform(5, 15)
+        distance = (
+            base
+            + 2 * np.sin(2 * np.pi * hours / 24 + rng.uniform(0, 2 * np.pi))
+            + rng.normal(0, 0.3, points)
+        )
+        timeseries.write(
+            {
+                "deviceId": np.full(points, device_id, dtype=object),
+                "time": times,
+                "distance": np.round(distance, 2),
+            }
+        )
+        print(f"✅ {device_id}")
+
+    print(f"\n🎉 完了: {len(device_ids) * points:,}行")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ローカル実行用の時系列データ投入")
+    parser.add_argument("--days", type=int, default=7, help="投入する期間（日）")
+    parser.add_argument("--interval", type=int, default=5, help="測定間隔（分）")
+    args = parser.parse_args()
+    seed(args.days, args.interval)
@@ -0,0 +1,47 @@
+"""
+関数型デプロイ（AWS Lambda + API Gateway等）用のASGIアダプタ
+
+ハンドラー: serverless.handler
+
+Mangumのlifespanは呼び出しごとに起動・終了を繰り返す（ウォームアップやバックグラウンド処理が
+毎回走る）ため使わず、実行環境ごとに1回だけ必要な初期化をモジュール読み込み時に行う。
+要約更新・通知配信・死活判定・ロールアップのスケジューラは起動しないので、
+これらは常駐するデプロイ（uvicorn等）で動かす。
+"""
+import os
+import threading
+
+# コールドスタートを短くするため、ウォームアップはバックグラウンドで行う
+os.environ.setdefault("STARTUP_MODE", "fast")
+
+from mangum import Mangum  # noqa: E402
+
+from app.ingest import ingest_buffer  # noqa: E402
+from app.startup import run_warmup, startup_config  # noqa: E402
+from main import app, connect_hooks  # noqa: E402
+
+
+def init_once() -> None:
+    """実行環境ごとに1回だけ行う初期化（フックの接続、JWKS・DeviceMasterの先読み）"""
+    connect_hooks()
+    if not startup_config.warmup_enabled:
+        return
+    if startup_config.fast:
+        threading.Thread(target=run_warmup, name="warmup", daemon=True).start()
+    else:
+        run_warmup()
+
+
+init_once()
+asgi_handler = Mangum(app, lifespan="off")
+
+
+def handler(event, context):
+    response = asgi_handler(event, context)
+    # 実行環境は呼び出しの間に停止されるため、取り込んだ測定値は応答を返す前に書き込む
+    if ingest_buffer.buffered() and not ingest_buffer.drain():
+        print(
+            f"WARNING: Ingest buffer not drained"
+            f" ({ingest_buffer.buffered()} readings left)"
+        )
+    return response
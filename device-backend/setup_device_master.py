@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 """
 DeviceMasterテーブルの作成と初期データ投入スクリプト
+
+使い方:
+    python setup_device_master.py               # 初期デバイスを投入
+    python setup_device_master.py devices.csv   # CSV/JSONLから投入（load_devices.pyと同じローダー）
 """
 
 import boto3
-import os
+import sys
 import time
-from decimal import Decimal
+
+from app.provisioning import BulkLoader, iter_records
 
 def now_utc_iso():
     """現在のUTC時刻をISO形式で返す"""
@@ -57,10 +62,16 @@ def create_device_master_table():
         print(f"❌ テーブル作成エラー: {str(e)}")
         raise
 
-def insert_initial_devices():
-    """初期デバイスデータを投入"""
-    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-    table = dynamodb.Table('DeviceMaster')
+
+def insert_initial_devices(input_path=None):
+    """初期デバイスデータを投入（バルクローダー経由）"""
+    loader = BulkLoader('DeviceMaster', region_name='us-east-1')
+
+    if input_path:
+        print(f"📝 {input_path} からデバイスデータを投入中...")
+        loader.load(iter_records(input_path))
+        print("🎉 デバイスデータの投入が完了しました")
+        return
     
     # 複数のデバイスデータ
     devices = [
@@ -112,14 +123,7 @@ def insert_initial_devices():
     ]
     
     print(f"📝 {len(devices)}個のデバイスデータを投入中...")
-    
-    for device in devices:
-        try:
-            table.put_item(Item=device)
-            print(f"✅ デバイス {device['deviceId']} を投入しました")
-        except Exception as e:
-            print(f"❌ デバイス {device['deviceId']} の投入に失敗: {str(e)}")
-    
+    loader.load(devices)
     print(f"🎉 デバイスデータの投入が完了しました")
 
 def verify_data():
@@ -153,7 +157,7 @@ def main():
         table = create_device_master_table()
         
         # 2. 初期データ投入
-        insert_initial_devices()
+        insert_initial_devices(sys.argv[1] if len(sys.argv) > 1 else None)
         
         # 3. データ確認
         verify_data()
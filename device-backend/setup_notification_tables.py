@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+通知テーブル（アウトボックス・受信箱）の作成スクリプト
+
+使い方:
+    python setup_notification_tables.py
+"""
+
+import boto3
+
+from app.notifications import notification_config
+from app.notifications.channels import UNREAD_INDEX
+from app.notifications.outbox import STATUS_INDEX
+
+
+def create_table(dynamodb, client, name, key_schema, attributes, index):
+    """テーブルとGSIを作成し、TTL（expiresAt）を有効化"""
+    try:
+        existing_table = dynamodb.Table(name)
+        existing_table.load()
+        print(f"✅ テーブル '{name}' は既に存在します")
+        return existing_table
+    except Exception:
+        pass
+
+    try:
+        table = dynamodb.create_table(
+            TableName=name,
+            KeySchema=key_schema,
+            AttributeDefinitions=attributes,
+            GlobalSecondaryIndexes=[index],
+            BillingMode="PAY_PER_REQUEST",  # オンデマンド課金
+        )
+        print(f"⏳ テーブル '{name}' の作成中...")
+        table.wait_until_exists()
+        client.update_time_to_live(
+            TableName=name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": "expiresAt"},
+        )
+        print(f"✅ テーブル '{name}' が作成されました")
+        return table
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {str(e)}")
+        raise
+
+
+def main():
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    client = dynamodb.meta.client
+
+    # アウトボックス: eventIdで重複排除、StatusIndexで配信待ちを作成順に取得
+    create_table(
+        dynamodb,
+        client,
+        notification_config.outbox_table,
+        key_schema=[{"AttributeName": "eventId", "KeyType": "HASH"}],
+        attributes=[
+            {"AttributeName": "eventId", "AttributeType": "S"},
+            {"AttributeName": "status", "AttributeType": "S"},
+            {"AttributeName": "createdAt", "AttributeType": "S"},
+        ],
+        index={
+            "IndexName": STATUS_INDEX,
+            "KeySchema": [
+                {"AttributeName": "status", "KeyType": "HASH"},
+                {"AttributeName": "createdAt", "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "ALL"},
+        },
+    )
+
+    # 受信箱: ユーザーごとに新しい順でページング、未読のみはUnreadIndex（スパース）
+    create_table(
+        dynamodb,
+        client,
+        notification_config.inbox_table,
+        key_schema=[
+            {"AttributeName": "userId", "KeyType": "HASH"},
+            {"AttributeName": "sortKey", "KeyType": "RANGE"},
+        ],
+        attributes=[
+            {"AttributeName": "userId", "AttributeType": "S"},
+            {"AttributeName": "sortKey", "AttributeType": "S"},
+            {"AttributeName": "unreadAt", "AttributeType": "S"},
+        ],
+        index={
+            "IndexName": UNREAD_INDEX,
+            "KeySchema": [
+                {"AttributeName": "userId", "KeyType": "HASH"},
+                {"AttributeName": "unreadAt", "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "ALL"},
+        },
+    )
+    print("🎉 通知テーブルの準備が完了しました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+テスト共通設定
+
+AWSに接続せずに実行できるよう、バックグラウンド処理を止めてプロセス内のバックエンドを使う。
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("CACHE_BACKEND", "local")
+os.environ.setdefault("LATEST_STORE_BACKEND", "memory")
+os.environ.setdefault("NOTIFICATION_OUTBOX_BACKEND", "memory")
+os.environ.setdefault("NOTIFICATION_DISPATCH_ENABLED", "false")
+os.environ.setdefault("LIVENESS_SCHEDULER_ENABLED", "false")
+os.environ.setdefault("ROLLUP_SCHEDULER_ENABLED", "false")
+os.environ.setdefault("WARMUP_ENABLED", "false")
@@ -0,0 +1,185 @@
+"""
+アドミッション制御のテスト（テナント間の公平性・クエリ予算の拒否・スレッドへのテナント引き継ぎ）
+"""
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.admission import AdmissionConfig, AdmissionController, AdmissionRejected
+from app.admission.controller import FairSlots
+from app.devices import dashboard
+from app.devices.batch import BatchRouter
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+class TestFairSlots:
+    def test_round_robin_between_heavy_and_light_tenants(self):
+        slots = FairSlots(total=1, per_key=1)
+        assert slots.acquire("heavy", timeout=0)
+        granted = []
+
+        def waiter(key):
+            if slots.acquire(key, timeout=5):
+                granted.append(key)
+
+        threads = []
+        # 大量に投げるユーザーが先に3件、軽いユーザー2人が1件ずつ待つ
+        for key in ("heavy", "heavy", "heavy", "light-a", "light-b"):
+            waiting = slots.stats()["waiting"]
+            thread = threading.Thread(target=waiter, args=(key,))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda: slots.stats()["waiting"] == waiting + 1)
+
+        holder = "heavy"
+        for count in range(1, 6):
+            slots.release(holder)
+            wait_until(lambda: len(granted) == count)
+            holder = granted[-1]
+        slots.release(holder)
+        for thread in threads:
+            thread.join()
+
+        # 軽いユーザーは大量のユーザーの待ち行列の後ろではなく1周以内に割り当てられる
+        assert granted == ["heavy", "light-a", "light-b", "heavy", "heavy"]
+        assert slots.stats() == {"inFlight": 0, "waitingUsers": 0, "waiting": 0}
+
+    def test_per_key_limit_leaves_slots_for_others(self):
+        slots = FairSlots(total=3, per_key=2)
+        assert slots.acquire("heavy", timeout=0)
+        assert slots.acquire("heavy", timeout=0)
+        assert not slots.acquire("heavy", timeout=0.01)
+        assert slots.acquire("light", timeout=0)
+
+
+class TestQueryBudget:
+    @pytest.fixture
+    def controller(self):
+        return AdmissionController(
+            AdmissionConfig(
+                ADMISSION_USER_BURST=2,
+                ADMISSION_USER_QUERIES_PER_SECOND=0.1,
+                ADMISSION_MAX_WAIT_SECONDS=0.5,
+            )
+        )
+
+    def run_queries(self, controller, user_id, count):
+        with controller.tenant(user_id):
+            for _ in range(count):
+                with controller.admit():
+                    pass
+
+    def test_exhausted_bucket_is_rejected_with_retry_after(self, controller):
+        self.run_queries(controller, "heavy", 2)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            self.run_queries(controller, "heavy", 1)
+        assert excinfo.value.status_code == 429
+        # 1クエリ分の補充に10秒かかる
+        assert excinfo.value.headers["Retry-After"] == "10"
+        # 他のユーザーの予算には影響しない
+        self.run_queries(controller, "light", 2)
+        assert controller.stats()["rejected"] == 1
+
+    def test_without_tenant_is_not_limited(self, controller):
+        for _ in range(5):
+            with controller.admit():
+                pass
+        assert controller.stats()["admitted"] == 0
+
+    def test_rejection_becomes_429_response(self, controller):
+        app = FastAPI()
+
+        @app.get("/query")
+        def query(user: str):
+            controller.set_tenant(user)
+            with controller.admit():
+                return {"ok": True}
+
+        client = TestClient(app)
+        assert client.get("/query", params={"user": "u1"}).status_code == 200
+        assert client.get("/query", params={"user": "u1"}).status_code == 200
+        response = client.get("/query", params={"user": "u1"})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "10"
+        assert client.get("/query", params={"user": "u2"}).status_code == 200
+
+
+class TestTenantPropagation:
+    def test_batch_operations_run_as_the_requesting_user(self, monkeypatch):
+        from app.admission import admission_controller
+
+        seen = []
+
+        def handler(deviceId: str, user_id: str):
+            tenant = admission_controller.current()
+            seen.append(
+                (
+                    deviceId,
+                    tenant.user_id if tenant else None,
+                    threading.current_thread() is threading.main_thread(),
+                )
+            )
+            return {"deviceId": deviceId}
+
+        router = BatchRouter()
+        router.register("/devices/{deviceId}", handler)
+        results = router.execute(
+            [{"path": f"/devices/d{i}"} for i in range(4)], "user-1"
+        )
+
+        assert [r["status"] for r in results] == [200] * 4
+        assert sorted(seen) == [(f"d{i}", "user-1", False) for i in range(4)]
+
+    def test_dashboard_workers_inherit_the_request_tenant(self, monkeypatch):
+        from app.admission import admission_controller
+
+        seen = {}
+
+        def record(name):
+            def fetch(device_ids, *args):
+                tenant = admission_controller.current()
+                seen[name] = (
+                    tenant.user_id if tenant else None,
+                    threading.current_thread() is threading.main_thread(),
+                )
+                return {}
+
+            return fetch
+
+        monkeypatch.setattr(
+            dashboard,
+            "list_user_ownerships",
+            lambda user_id: [
+                {
+                    "deviceId": "d1",
+                    "userId": user_id,
+                    "ownershipType": "owner",
+                    "assignedAt": "-",
+                }
+            ],
+        )
+        monkeypatch.setattr(
+            dashboard.device_master_cache,
+            "get_many",
+            lambda ids: {d: {"deviceId": d} for d in ids},
+        )
+        monkeypatch.setattr(dashboard, "fetch_latest_readings", record("latest"))
+        monkeypatch.setattr(dashboard, "fetch_sparklines", record("sparklines"))
+
+        admission_controller.set_tenant("user-1")
+        try:
+            result = dashboard.build_dashboard("user-1")
+        finally:
+            admission_controller.set_tenant("")
+
+        assert result["totalDevices"] == 1
+        assert seen == {"latest": ("user-1", False), "sparklines": ("user-1", False)}
@@ -0,0 +1,194 @@
+"""
+アドバイザー用コンテキスト組み立てのテスト（トークン予算での切り詰め順序・要約のバージョン）
+"""
+import time
+
+import numpy as np
+import pytest
+
+from app.advisor import (
+    AdvisorConfig,
+    StubAdvisorModel,
+    SummaryPipeline,
+    assemble_context,
+)
+from app.advisor.context import render_device, render_field
+from app.cache import LocalCacheBackend, SharedCache
+
+NS_PER_HOUR = 3_600_000_000_000
+HOURS = 48
+
+
+class Rollups:
+    """デバイスごとの合成時間ビン集計（Timestreamの代わり）"""
+
+    def __init__(self, levels):
+        now = time.time_ns() // NS_PER_HOUR * NS_PER_HOUR
+        self.series = {}
+        for device_id, avg in levels.items():
+            t = now - np.arange(HOURS - 1, -1, -1, dtype=np.int64) * NS_PER_HOUR
+            self.series[device_id] = [t, avg, avg - 1, avg + 1, np.full(HOURS, 12)]
+        self.calls = 0
+
+    def advance(self, device_id, value):
+        """指定デバイスに1ビン追加"""
+        t, avg, low, high, n = self.series[device_id]
+        self.series[device_id] = [
+            np.append(t, t[-1] + NS_PER_HOUR),
+            np.append(avg, value),
+            np.append(low, value - 1),
+            np.append(high, value + 1),
+            np.append(n, 12),
+        ]
+
+    def fetch(self, device_ids, since_ns, bin_minutes):
+        self.calls += 1
+        columns = {
+            k: []
+            for k in ("deviceId", "time", "avgLevel", "minLevel", "maxLevel", "samples")
+        }
+        for device_id in device_ids:
+            t, avg, low, high, n = self.series[device_id]
+            mask = t >= since_ns
+            columns["deviceId"].append(np.full(mask.sum(), device_id, dtype=object))
+            for name, values in zip(
+                ("time", "avgLevel", "minLevel", "maxLevel", "samples"),
+                (t, avg, low, high, n),
+            ):
+                columns[name].append(values[mask])
+        return {k: np.concatenate(v) for k, v in columns.items()}
+
+
+def levels():
+    wiggle = 0.1 * (-1.0) ** np.arange(HOURS)
+    low = np.full(HOURS, 20.0)
+    low[-6:] = 5.0  # 直近6時間が低水位
+    spike = 20.0 + wiggle
+    spike[-10] += 25  # 異常値
+    return {
+        "d0": low,
+        "d1": 20.0 + 0.1 * np.arange(HOURS) + wiggle,  # 緩やかな上昇
+        "d2": spike,
+        "d3": 20.0 + wiggle,  # 変化なし
+    }
+
+
+MASTERS = {
+    "d0": {"deviceId": "d0", "agriculturalSite": "site-a", "fieldName": "f1"},
+    "d1": {"deviceId": "d1", "agriculturalSite": "site-a", "fieldName": "f1"},
+    "d2": {"deviceId": "d2", "agriculturalSite": "site-b", "fieldName": "f2"},
+    "d3": {"deviceId": "d3", "agriculturalSite": "site-b", "fieldName": "f2"},
+}
+# 指定デバイス → その圃場 → 残りの圃場 → 注意度順のデバイス
+FULL_ORDER = [
+    "header",
+    "device:d3",
+    "field:site-b/f2",
+    "field:site-a/f1",
+    "device:d0",
+    "device:d2",
+    "device:d1",
+]
+
+
+@pytest.fixture
+def source():
+    return Rollups(levels())
+
+
+@pytest.fixture
+def pipeline(source):
+    shared = SharedCache()
+    shared.use_backend(LocalCacheBackend())
+    config = AdvisorConfig(
+        ADVISOR_SUMMARY_WINDOW_HOURS=HOURS, ADVISOR_SUMMARY_BIN_MINUTES=60
+    )
+    pipeline = SummaryPipeline(
+        config, store=shared.namespace("advisor_summary", 3600), fetch=source.fetch
+    )
+    pipeline.remember_user("u1", MASTERS)
+    pipeline.refresh(MASTERS, force=True)
+    return pipeline
+
+
+def tokens(text, model=StubAdvisorModel()):
+    return model.count_tokens(text) + 1
+
+
+def build(pipeline, budget):
+    return assemble_context(
+        "u1",
+        budget,
+        device_id="d3",
+        count=StubAdvisorModel().count_tokens,
+        pipeline=pipeline,
+    )
+
+
+class TestBudget:
+    def test_everything_fits_in_priority_order(self, pipeline):
+        context = build(pipeline, 100_000)
+        assert context["included"] == FULL_ORDER
+        assert context["compacted"] == []
+        assert context["omitted"] == 0
+        assert 0 < context["tokens"] <= context["budget"]
+        assert context["versions"] == {key: 1 for key in FULL_ORDER if key != "header"}
+
+        reply = StubAdvisorModel().reply("水位が下がっている圃場は？", context["context"])
+        assert "注意が必要な項目" in reply["message"]
+        assert reply["promptTokens"] > context["tokens"]
+
+    def test_tight_budget_compacts_then_omits_low_priority_devices(self, pipeline):
+        full = build(pipeline, 100_000)
+        devices, fields = pipeline.summaries("u1", list(MASTERS))
+        header = full["context"].split("\n")[0]
+        fixed = (
+            tokens(header)
+            + tokens(render_device(devices["d3"]))
+            + tokens(render_field(fields["site-b/f2"]))
+            + tokens(render_field(fields["site-a/f1"]))
+        )
+        compact_d0 = tokens(render_device(devices["d0"], compact=True))
+        assert compact_d0 < tokens(render_device(devices["d0"]))
+
+        context = build(pipeline, fixed + compact_d0)
+        assert context["included"] == FULL_ORDER[:4]
+        assert context["compacted"] == ["device:d0"]
+        assert context["omitted"] == 2
+        assert context["tokens"] == fixed + compact_d0
+        assert context["tokens"] <= context["budget"]
+        # 省略したデバイスのバージョンは含めない
+        assert set(context["versions"]) == set(FULL_ORDER[1:5])
+
+    def test_tiny_budget_keeps_only_the_header(self, pipeline):
+        context = build(pipeline, 40)
+        assert context["included"] == ["header"]
+        assert context["omitted"] == len(FULL_ORDER) - 1
+        assert context["versions"] == {}
+
+
+class TestVersions:
+    def test_only_changed_summaries_get_a_new_version(self, pipeline, source):
+        source.advance("d1", 30.0)
+        report = pipeline.refresh(MASTERS, force=True)
+        assert report == {"checked": 4, "changed": 1, "fieldsChanged": 1}
+
+        versions = build(pipeline, 100_000)["versions"]
+        assert versions["device:d1"] == 2
+        assert versions["field:site-a/f1"] == 2
+        assert (
+            versions["device:d0"] == versions["device:d2"] == versions["device:d3"] == 1
+        )
+        assert versions["field:site-b/f2"] == 1
+
+        # 新着がなければバージョンは変わらない
+        assert pipeline.refresh(MASTERS, force=True)["changed"] == 0
+        assert build(pipeline, 100_000)["versions"] == versions
+
+    def test_field_versions_are_per_user(self, pipeline):
+        pipeline.remember_user("u2", {"d2": MASTERS["d2"]})
+        pipeline._save_user_fields("u2", ["d2"], MASTERS)
+        _, fields = pipeline.summaries("u2", ["d2"])
+        assert fields["site-b/f2"]["devices"] == ["d2"]
+        _, fields = pipeline.summaries("u1", list(MASTERS))
+        assert fields["site-b/f2"]["devices"] == ["d2", "d3"]
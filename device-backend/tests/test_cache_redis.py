@@ -0,0 +1,285 @@
+"""
+Redisバックエンドの共有キャッシュのテスト
+
+2つのワーカー（それぞれ別のRedisCacheBackend）が同じRedisを共有する構成で、
+名前空間ごとの無効化と、クレーム・鍵ローテーション時の無効化が他のワーカーに見えることを確認する。
+"""
+import fnmatch
+import time
+
+import pytest
+
+import main
+from app.auth.jwt_handler import CognitoJWTValidator
+from app.cache import RedisCacheBackend, SharedCache
+from app.devices.cache import DeviceMasterCache
+
+
+class FakeRedisServer:
+    """Redisサーバーの代わり（キー → (値, 有効期限)）"""
+
+    def __init__(self):
+        self.data = {}
+
+    def alive(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] <= time.time():
+            del self.data[key]
+            return None
+        return entry
+
+
+class FakeRedis:
+    """redis-py互換のクライアント（RedisCacheBackendが使う操作だけ）"""
+
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+
+    def get(self, key):
+        entry = self.server.alive(key)
+        return entry[0].encode("utf-8") if entry else None
+
+    def set(self, key, value, ex):
+        assert isinstance(ex, int) and ex >= 1
+        self.server.data[key] = (value, time.time() + ex)
+
+    def delete(self, *keys):
+        return sum(self.server.data.pop(key, None) is not None for key in keys)
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def scan_iter(self, match):
+        return iter(
+            [key for key in list(self.server.data) if fnmatch.fnmatchcase(key, match)]
+        )
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands = []
+
+    def set(self, key, value, ex):
+        self.commands.append((key, value, ex))
+
+    def execute(self):
+        for command in self.commands:
+            self.client.set(*command)
+        self.commands = []
+
+
+class FakeTable:
+    """DeviceMasterテーブルの代わり"""
+
+    def __init__(self, items):
+        self.items = items
+        self.reads = 0
+
+    def get_item(self, Key):
+        self.reads += 1
+        item = self.items.get(Key["deviceId"])
+        return {"Item": dict(item)} if item else {}
+
+
+@pytest.fixture
+def server():
+    return FakeRedisServer()
+
+
+def worker_cache(server) -> SharedCache:
+    """1ワーカー分の共有キャッシュ（Redisクライアントはワーカーごとに別）"""
+    shared = SharedCache()
+    shared.use_backend(RedisCacheBackend(FakeRedis(server)))
+    return shared
+
+
+class TestNamespaces:
+    def test_values_are_shared_between_workers(self, server):
+        first, second = worker_cache(server), worker_cache(server)
+        first.namespace("device_master", 60).set_many({"d1": {"n": 1}, "d2": {"n": 2}})
+        assert second.namespace("device_master", 60).get_many(["d1", "d2", "d3"]) == {
+            "d1": {"n": 1},
+            "d2": {"n": 2},
+        }
+
+    def test_invalidation_is_scoped_to_the_namespace(self, server):
+        first, second = worker_cache(server), worker_cache(server)
+        masters = first.namespace("device_master", 60)
+        masters_v2 = first.namespace("device_master_v2", 60)
+        latest = first.namespace("latest_reading", 60)
+        for namespace in (masters, masters_v2, latest):
+            namespace.set("d1", {"namespace": namespace.name})
+            namespace.set("d2", {"namespace": namespace.name})
+
+        second.namespace("device_master", 60).invalidate("d1")
+        assert masters.get("d1") is None
+        assert masters.get("d2") == {"namespace": "device_master"}
+        assert latest.get("d1") == {"namespace": "latest_reading"}
+
+        # 前方一致で他の名前空間（device_master_v2）まで消さない
+        assert second.namespace("device_master", 60).clear() == 1
+        assert masters.get("d2") is None
+        assert masters_v2.get_many(["d1", "d2"]) == {
+            "d1": {"namespace": "device_master_v2"},
+            "d2": {"namespace": "device_master_v2"},
+        }
+        assert latest.get("d2") == {"namespace": "latest_reading"}
+
+    def test_ttl_expires_entries(self, server):
+        namespace = worker_cache(server).namespace("short", 0.2)
+        namespace.set("k", 1)
+        assert namespace.get("k") == 1
+        # 1秒未満のTTLは1秒に切り上げられる
+        entry = server.data["iot-waterlevel:short:k"]
+        assert 0.5 < entry[1] - time.time() <= 1.0
+
+
+class TestClaimInvalidation:
+    def test_claim_on_one_worker_is_seen_by_another(self, server, monkeypatch):
+        table = FakeTable(
+            {
+                "d1": {
+                    "deviceId": "d1",
+                    "agriculturalSite": "site-a",
+                    "fieldName": "f1",
+                    "isActive": True,
+                }
+            }
+        )
+        api_worker = DeviceMasterCache(
+            "DeviceMaster", worker_cache(server).namespace("device_master", 600)
+        )
+        reader = DeviceMasterCache(
+            "DeviceMaster", worker_cache(server).namespace("device_master", 600)
+        )
+        api_worker._table = reader._table = table
+
+        assert "claimedBy" not in reader.get("d1")
+        assert reader.get("d1") is not None
+        assert table.reads == 1
+
+        def claim(device_id, user_id, lat, lon):
+            table.items[device_id].update(
+                claimedBy=user_id, createdAt="-", updatedAt="-", deviceType="水位センサー"
+            )
+            return table.items[device_id], {"ownershipType": "owner", "assignedAt": "-"}
+
+        monkeypatch.setattr(main, "claim_device_atomically", claim)
+        monkeypatch.setattr(main, "device_master_cache", api_worker)
+        main.claim_device(
+            main.ClaimRequest(deviceId="d1", lat=35.0, lon=139.0), user_id="u1"
+        )
+
+        # 別ワーカーのキャッシュからも消えており、次の読み取りでクレーム後の値を取得する
+        assert reader.get("d1")["claimedBy"] == "u1"
+        assert table.reads == 2
+
+
+class TestJwksRotation:
+    @pytest.fixture
+    def keys(self):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from jose.backends import RSAKey
+
+        keys = {}
+        for kid in ("old", "new"):
+            private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            pem = private.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+            public = RSAKey(pem, "RS256").public_key().to_dict()
+            keys[kid] = (pem, {**public, "kid": kid})
+        return keys
+
+    def test_unknown_kid_refreshes_jwks_for_all_workers(
+        self, server, keys, monkeypatch
+    ):
+        from jose import jwt
+
+        import requests
+        from app.auth import jwt_handler
+
+        published = {"keys": [keys["old"][1]]}
+        fetches = []
+
+        class Response:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return published
+
+        def fetch(url, timeout):
+            fetches.append(url)
+            return Response()
+
+        monkeypatch.setattr(requests, "get", fetch)
+        monkeypatch.setattr(
+            jwt_handler.cognito_config, "jwks_url", "https://example.com/jwks.json"
+        )
+
+        first, second = CognitoJWTValidator(), CognitoJWTValidator()
+        first.shared_jwks = worker_cache(server).namespace("jwks", 3600)
+        second.shared_jwks = worker_cache(server).namespace("jwks", 3600)
+        assert first.prefetch()
+        assert second._find_key("old") is not None
+        assert len(fetches) == 1
+
+        # 鍵ローテーション: 新しい鍵で署名されたトークンが届く
+        published = {"keys": [keys["old"][1], keys["new"][1]]}
+        token = jwt.encode(
+            {"sub": "u1"},
+            keys["new"][0].decode(),
+            algorithm="RS256",
+            headers={"kid": "new"},
+        )
+        assert first._get_public_key(token) is not None
+        assert len(fetches) == 2
+
+        # 共有キャッシュが更新されているため、もう一方のワーカーは取得元に問い合わせない
+        second.jwks_cache_time = 0
+        assert second._get_public_key(token) is not None
+        assert len(fetches) == 2
+
+    def test_unknown_kid_refetch_is_throttled(self, server, keys, monkeypatch):
+        from jose import jwt
+
+        import requests
+        from app.auth import jwt_handler
+
+        fetches = []
+
+        class Response:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"keys": [keys["old"][1]]}
+
+        monkeypatch.setattr(
+            requests, "get", lambda url, timeout: fetches.append(url) or Response()
+        )
+        monkeypatch.setattr(
+            jwt_handler.cognito_config, "jwks_url", "https://example.com/jwks.json"
+        )
+
+        validator = CognitoJWTValidator()
+        validator.shared_jwks = worker_cache(server).namespace("jwks", 3600)
+        token = jwt.encode(
+            {"sub": "u1"},
+            keys["new"][0].decode(),
+            algorithm="RS256",
+            headers={"kid": "forged"},
+        )
+        for _ in range(5):
+            with pytest.raises(jwt_handler.CognitoJWTError):
+                validator._get_public_key(token)
+        # 初回の取得と、未知のkidによる再取得1回だけ
+        assert len(fetches) == 2
@@ -0,0 +1,269 @@
+"""
+デバイスクレームのテスト
+
+DynamoDBの代わりに、DeviceMaster・DeviceOwnershipをメモリに持ちTransactWriteItemsの条件式と
+CancellationReasonsを再現するスタブを使う。
+"""
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+from boto3.dynamodb.types import TypeDeserializer
+from fastapi import HTTPException
+
+import main
+from app.aws import aws_config
+from app.devices import claims
+from app.devices.claims import (
+    DeviceAlreadyClaimedError,
+    DeviceNotFoundError,
+    claim_device_atomically,
+)
+
+deserializer = TypeDeserializer()
+
+
+def master_item(device_id, **attrs):
+    return {
+        "deviceId": device_id,
+        "deviceType": "水位センサー",
+        "agriculturalSite": "北圃場",
+        "fieldName": "A-1",
+        "isActive": "true",
+        "createdAt": "2024-01-01T00:00:00Z",
+        "updatedAt": "2024-01-01T00:00:00Z",
+        **attrs,
+    }
+
+
+class FakeDynamoDB:
+    """boto3のDynamoDBリソースの代わり（クレーム処理が使う操作だけ）"""
+
+    def __init__(self, masters):
+        self.masters = {item["deviceId"]: dict(item) for item in masters}
+        self.ownerships = {}
+        # デバイスID → TransactionConflictで取り消す残り回数
+        self.conflicts = {}
+        # transact_write_itemsに渡されたアクション数
+        self.transactions = []
+        self.lock = threading.Lock()
+        self.meta = SimpleNamespace(client=self)
+
+    def Table(self, name):
+        assert name == aws_config.device_master_table
+        return self
+
+    def get_item(self, Key, ConsistentRead=False):
+        return {"Item": dict(self.masters[Key["deviceId"]])}
+
+    def batch_get_item(self, RequestItems):
+        ((table, request),) = RequestItems.items()
+        found = [
+            dict(self.masters[key["deviceId"]])
+            for key in request["Keys"]
+            if key["deviceId"] in self.masters
+        ]
+        return {"Responses": {table: found}}
+
+    def _reason(self, device_id):
+        master = self.masters.get(device_id)
+        if self.conflicts.get(device_id):
+            self.conflicts[device_id] -= 1
+            return {"Code": "TransactionConflict"}
+        if master is None:
+            return {"Code": "ConditionalCheckFailed"}
+        if master.get("claimedBy"):
+            return {"Code": "ConditionalCheckFailed", "Item": {"claimedBy": "x"}}
+        return {"Code": "None"}
+
+    def transact_write_items(self, TransactItems):
+        with self.lock:
+            self.transactions.append(len(TransactItems))
+            updates = [item["Update"] for item in TransactItems[0::2]]
+            puts = [item["Put"] for item in TransactItems[1::2]]
+            reasons = []
+            for update in updates:
+                device_id = deserializer.deserialize(update["Key"]["deviceId"])
+                reasons.extend([self._reason(device_id), {"Code": "None"}])
+            if any(r["Code"] != "None" for r in reasons):
+                raise ClientError(
+                    {
+                        "Error": {"Code": "TransactionCanceledException"},
+                        "CancellationReasons": reasons,
+                    },
+                    "TransactWriteItems",
+                )
+            for update, put in zip(updates, puts):
+                values = {
+                    key: deserializer.deserialize(value)
+                    for key, value in update["ExpressionAttributeValues"].items()
+                }
+                device_id = deserializer.deserialize(update["Key"]["deviceId"])
+                self.masters[device_id].update(
+                    lat=values[":lat"],
+                    lon=values[":lon"],
+                    updatedAt=values[":updated_at"],
+                    claimedBy=values[":user_id"],
+                    ownershipId=values[":ownership_id"],
+                )
+                item = {
+                    key: deserializer.deserialize(value)
+                    for key, value in put["Item"].items()
+                }
+                self.ownerships[item["ownershipId"]] = item
+        return {}
+
+
+@pytest.fixture
+def dynamodb(monkeypatch):
+    fake = FakeDynamoDB(
+        [
+            master_item("free-1"),
+            master_item("free-2"),
+            master_item("taken", claimedBy="someone"),
+        ]
+    )
+    monkeypatch.setattr(claims.aws_clients, "resource", lambda name: fake)
+    monkeypatch.setattr(claims.time, "sleep", lambda seconds: None)
+    return fake
+
+
+def test_claim_updates_master_and_registers_ownership(dynamodb):
+    master, ownership = claim_device_atomically("free-1", "u1", 35.5, 139.25)
+
+    assert dynamodb.transactions == [2]
+    assert master["claimedBy"] == "u1"
+    assert master["ownershipId"] == ownership["ownershipId"]
+    assert float(master["lat"]) == 35.5 and float(master["lon"]) == 139.25
+    assert dynamodb.ownerships[ownership["ownershipId"]]["deviceId"] == "free-1"
+    assert ownership["userId"] == "u1" and ownership["ownershipType"] == "owner"
+
+
+def test_ownership_id_is_fresh_uuid(dynamodb):
+    _, first = claim_device_atomically("free-1", "u1", 35.0, 139.0)
+    _, second = claim_device_atomically("free-2", "u1", 35.0, 139.0)
+
+    assert uuid.UUID(hex=first["ownershipId"]).hex == first["ownershipId"]
+    assert first["ownershipId"] != second["ownershipId"]
+
+
+def test_unknown_device_is_not_found(dynamodb):
+    with pytest.raises(DeviceNotFoundError):
+        claim_device_atomically("missing", "u1", 35.0, 139.0)
+
+    with pytest.raises(HTTPException) as e:
+        main.claim_device(
+            main.ClaimRequest(deviceId="missing", lat=35.0, lon=139.0), user_id="u1"
+        )
+    assert e.value.status_code == 400
+    assert dynamodb.ownerships == {}
+
+
+def test_claimed_device_conflicts(dynamodb):
+    with pytest.raises(DeviceAlreadyClaimedError):
+        claim_device_atomically("taken", "u1", 35.0, 139.0)
+
+    with pytest.raises(HTTPException) as e:
+        main.claim_device(
+            main.ClaimRequest(deviceId="taken", lat=35.0, lon=139.0), user_id="u1"
+        )
+    assert e.value.status_code == 409
+    assert dynamodb.masters["taken"]["claimedBy"] == "someone"
+
+
+def test_concurrent_claim_conflicts(dynamodb):
+    # 同じデバイスへの同時クレームに負けた場合（TransactionConflict）
+    dynamodb.conflicts["free-1"] = 1
+    with pytest.raises(HTTPException) as e:
+        main.claim_device(
+            main.ClaimRequest(deviceId="free-1", lat=35.0, lon=139.0), user_id="u1"
+        )
+    assert e.value.status_code == 409
+    assert "claimedBy" not in dynamodb.masters["free-1"]
+    assert dynamodb.ownerships == {}
+
+
+def test_chunk_maps_cancellation_reasons_to_devices(dynamodb):
+    # 1回目は条件式で失敗した2台の巻き添えで全体が取り消され、残りの2台だけ再実行する
+    results = claims._claim_chunk(
+        "u1",
+        [
+            ("free-1", 35.0, 139.0),
+            ("missing", 35.0, 139.0),
+            ("free-2", 35.0, 139.0),
+            ("taken", 35.0, 139.0),
+        ],
+    )
+
+    assert dynamodb.transactions == [8, 4]
+    assert {device_id: r["status"] for device_id, r in results.items()} == {
+        "free-1": "claimed",
+        "missing": "not_found",
+        "free-2": "claimed",
+        "taken": "conflict",
+    }
+    assert dynamodb.masters["free-2"]["claimedBy"] == "u1"
+
+
+def test_chunk_retries_transaction_conflicts(dynamodb):
+    dynamodb.conflicts["free-2"] = 1
+    results = claims._claim_chunk(
+        "u1", [("free-1", 35.0, 139.0), ("free-2", 35.0, 139.0)]
+    )
+
+    assert dynamodb.transactions == [4, 4]
+    assert [r["status"] for r in results.values()] == ["claimed", "claimed"]
+
+
+def test_chunk_gives_up_after_max_attempts(dynamodb):
+    dynamodb.conflicts["free-1"] = claims.BULK_CLAIM_MAX_ATTEMPTS
+    results = claims._claim_chunk("u1", [("free-1", 35.0, 139.0)])
+
+    assert len(dynamodb.transactions) == claims.BULK_CLAIM_MAX_ATTEMPTS
+    assert results["free-1"]["status"] == "error"
+    assert "claimedBy" not in dynamodb.masters["free-1"]
+
+
+def test_bulk_claim_reports_duplicates_after_request_order(dynamodb):
+    results = claims.claim_devices_bulk(
+        "u1",
+        [
+            ("free-1", 35.0, 139.0),
+            ("taken", 35.0, 139.0),
+            ("free-1", 36.0, 140.0),
+            ("missing", 35.0, 139.0),
+        ],
+    )
+
+    assert [(r["deviceId"], r["status"]) for r in results] == [
+        ("free-1", "claimed"),
+        ("taken", "conflict"),
+        ("missing", "not_found"),
+        ("free-1", "duplicate"),
+    ]
+    # 事前検証で除外したデバイスはトランザクションに含めない。重複は最初の指定を使う
+    assert dynamodb.transactions == [2]
+    assert float(dynamodb.masters["free-1"]["lat"]) == 35.0
+
+
+def test_bulk_claim_splits_into_chunks_and_keeps_request_order(dynamodb):
+    device_ids = [f"dev-{i:03d}" for i in range(120)]
+    dynamodb.masters.update(
+        (device_id, master_item(device_id)) for device_id in device_ids
+    )
+    dynamodb.masters["dev-007"]["claimedBy"] = "someone"
+    dynamodb.conflicts["dev-099"] = 1
+    requested = list(reversed(device_ids))
+
+    results = claims.claim_devices_bulk(
+        "u1", [(device_id, 35.0, 139.0) for device_id in requested]
+    )
+
+    assert [r["deviceId"] for r in results] == requested
+    assert sum(r["status"] == "claimed" for r in results) == 119
+    assert results[requested.index("dev-007")]["status"] == "conflict"
+    # 119台を50台ずつ（1台2アクション）。競合したチャンクだけ再実行される
+    assert max(dynamodb.transactions) == 2 * claims.BULK_CLAIM_CHUNK_SIZE
+    assert sorted(dynamodb.transactions) == [38, 100, 100, 100]
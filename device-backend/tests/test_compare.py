@@ -0,0 +1,80 @@
+"""
+複数デバイス比較のテスト（データの欠けたデバイスも共通の時刻軸に揃える）
+"""
+import time
+
+import numpy as np
+import pytest
+
+from app.devices import compare
+from app.devices.compare import NS_PER_MINUTE, align_bins, build_comparison
+from app.timeseries import format_timestamps
+from app.timeseries.sqlite import SQLiteRepository
+
+STEP_NS = 5 * NS_PER_MINUTE
+BIN_NS = 30 * NS_PER_MINUTE
+
+
+@pytest.fixture
+def readings(monkeypatch):
+    """a: 直近3時間の5分間隔、b: 10分間隔で途中の1時間が欠けている、c: データなし"""
+    now_ns = time.time_ns()
+    rows = []
+    for i in range(36):
+        time_ns = now_ns - NS_PER_MINUTE // 60 - i * STEP_NS
+        rows.append(("a", time_ns, float(i)))
+        if i % 2 == 0 and not 10 <= i < 22:
+            rows.append(("b", time_ns, 100.0 + i))
+    repo = SQLiteRepository(":memory:")
+    repo.write(
+        {
+            "deviceId": np.array([r[0] for r in rows], dtype=object),
+            "time": np.array([r[1] for r in rows], dtype=np.int64),
+            "distance": np.array([r[2] for r in rows]),
+        }
+    )
+    monkeypatch.setattr(compare, "timeseries", repo)
+    return now_ns, rows
+
+
+def expected_series(rows, device_id, axis):
+    bins = {}
+    for d, time_ns, value in rows:
+        if d == device_id:
+            bins.setdefault(time_ns // BIN_NS * BIN_NS, []).append(value)
+    return [
+        pytest.approx(np.mean(bins[t])) if t in bins else None for t in axis.tolist()
+    ]
+
+
+def test_series_share_time_axis_with_nulls_for_gaps(readings):
+    now_ns, rows = readings
+    result = build_comparison(["b", "a", "c"], 3, 30, now_ns=now_ns)
+
+    start_ns = (now_ns - 3 * 60 * NS_PER_MINUTE) // BIN_NS * BIN_NS
+    axis = np.arange(start_ns, now_ns, BIN_NS, dtype=np.int64)
+    assert result["deviceIds"] == ["b", "a", "c"]
+    assert len(result["time"]) == len(axis) == 7
+    assert result["time"] == format_timestamps(axis)
+    assert list(result["series"]) == ["b", "a", "c"]
+    assert all(len(series) == len(axis) for series in result["series"].values())
+
+    assert result["series"]["a"] == expected_series(rows, "a", axis)
+    assert result["series"]["b"] == expected_series(rows, "b", axis)
+    # bの欠けている1時間はnullのビンになる
+    assert result["series"]["b"].count(None) >= 1
+    assert result["series"]["c"] == [None] * len(axis)
+
+
+def test_align_bins_ignores_unknown_devices_and_out_of_range_times():
+    columns = {
+        "deviceId": np.array(["a", "x", "b", "a", "b"], dtype=object),
+        "time": np.array([0, 0, 2, -1, 3], dtype=np.int64) * BIN_NS,
+        "distance": np.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+    }
+
+    matrix = align_bins(columns, ["a", "b"], 0, BIN_NS, 3)
+    np.testing.assert_array_equal(
+        matrix, [[1.0, np.nan, np.nan], [np.nan, np.nan, 3.0]]
+    )
+    assert np.isnan(align_bins({}, ["a"], 0, BIN_NS, 2)).all()
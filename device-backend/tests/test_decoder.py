@@ -0,0 +1,116 @@
+"""
+Timestreamクエリ結果デコーダーのテスト（型付き列への変換・NULL・時刻の文字列化）
+"""
+import numpy as np
+
+from app.timeseries import TimestreamDecoder, format_timestamps, query_columns
+from app.timeseries.decoder import NAT_NS
+
+COLUMN_INFO = [
+    {"Name": "deviceId", "Type": {"ScalarType": "VARCHAR"}},
+    {"Name": "time", "Type": {"ScalarType": "TIMESTAMP"}},
+    {"Name": "distance", "Type": {"ScalarType": "DOUBLE"}},
+    {"Name": "samples", "Type": {"ScalarType": "BIGINT"}},
+    {"Name": "online", "Type": {"ScalarType": "BOOLEAN"}},
+]
+
+
+def row(*values):
+    return {
+        "Data": [
+            {"NullValue": True} if value is None else {"ScalarValue": value}
+            for value in values
+        ]
+    }
+
+
+def test_decode_rows_converts_each_scalar_type():
+    decoder = TimestreamDecoder(COLUMN_INFO)
+    columns = decoder.decode_rows(
+        [
+            row("a", "2024-01-01 00:00:00.000000000", "1.5", "3", "true"),
+            row("b", "2024-01-01 00:00:01.123456789", "-2", "4", "false"),
+        ]
+    )
+
+    assert list(columns) == ["deviceId", "time", "distance", "samples", "online"]
+    assert columns["deviceId"].dtype == object
+    assert columns["deviceId"].tolist() == ["a", "b"]
+    assert columns["time"].dtype == np.int64
+    assert columns["time"].tolist() == [
+        1_704_067_200_000_000_000,
+        1_704_067_201_123_456_789,
+    ]
+    assert columns["distance"].dtype == np.float64
+    assert columns["distance"].tolist() == [1.5, -2.0]
+    assert columns["samples"].dtype == np.int64
+    assert columns["samples"].tolist() == [3, 4]
+    assert columns["online"].dtype == bool
+    assert columns["online"].tolist() == [True, False]
+
+
+def test_nulls_become_nan_and_nat():
+    decoder = TimestreamDecoder(COLUMN_INFO)
+    columns = decoder.decode_rows(
+        [
+            row("a", None, None, None, None),
+            row("b", "2024-01-01 00:00:00.000000000", "1.0", "2", "true"),
+        ]
+    )
+
+    assert columns["time"].tolist()[0] == NAT_NS
+    assert np.isnat(columns["time"].view("datetime64[ns]")[0])
+    assert np.isnan(columns["distance"][0]) and columns["distance"][1] == 1.0
+    # NULLを含む整数列はNaNを表せるようfloat64になる
+    assert columns["samples"].dtype == np.float64
+    assert np.isnan(columns["samples"][0]) and columns["samples"][1] == 2.0
+    assert columns["online"].tolist() == [False, True]
+
+
+def test_empty_keeps_names_and_dtypes():
+    empty = TimestreamDecoder(COLUMN_INFO).empty()
+
+    assert [(name, array.dtype, len(array)) for name, array in empty.items()] == [
+        ("deviceId", object, 0),
+        ("time", np.int64, 0),
+        ("distance", np.float64, 0),
+        ("samples", np.int64, 0),
+        ("online", bool, 0),
+    ]
+
+
+def test_format_timestamps_round_trips_and_keeps_nat():
+    strings = ["2024-01-01 00:00:00.000000000", "2024-02-29 23:59:59.999999999"]
+    decoder = TimestreamDecoder(COLUMN_INFO[1:2])
+    time_ns = decoder.decode_rows([row(s) for s in strings] + [row(None)])["time"]
+
+    assert format_timestamps(time_ns) == strings + [None]
+    assert format_timestamps(np.array([], dtype=np.int64)) == []
+
+
+class PagedQuery:
+    """NextTokenで2ページに分けて返すtimestream-queryクライアントの代わり"""
+
+    def __init__(self):
+        self.calls = []
+
+    def query(self, **kwargs):
+        self.calls.append(kwargs)
+        if "NextToken" not in kwargs:
+            return {
+                "ColumnInfo": COLUMN_INFO[:3],
+                "Rows": [row("a", "2024-01-01 00:00:00.000000000", "1")],
+                "NextToken": "page-2",
+            }
+        # 2ページ目以降はColumnInfoの解釈を使い回す
+        return {"Rows": [row("b", None, None)]}
+
+
+def test_query_columns_follows_next_token():
+    client = PagedQuery()
+    columns = query_columns(client, "SELECT 1")
+
+    assert [call.get("NextToken") for call in client.calls] == [None, "page-2"]
+    assert columns["deviceId"].tolist() == ["a", "b"]
+    assert columns["time"].tolist() == [1_704_067_200_000_000_000, NAT_NS]
+    assert columns["distance"][0] == 1.0 and np.isnan(columns["distance"][1])
@@ -0,0 +1,80 @@
+"""
+LTTBダウンサンプリングのテスト（端点と極値の保持・間引き不要な入力）
+"""
+import numpy as np
+import pytest
+
+from app.timeseries import lttb, lttb_indices
+
+
+def series(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.int64) * 60_000_000_000
+    y = 50 + rng.normal(0, 0.2, n).cumsum() * 0.1
+    return x, y
+
+
+def reference_lttb(x, y, n_out):
+    """1点ずつ三角形の面積を計算する素朴な実装（バケット分割は同じ）"""
+    n = len(x)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64).tolist()
+    selected = [0]
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (end, edges[i + 2]) if i < n_out - 3 else (n - 1, n)
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        prev = selected[-1]
+        areas = [
+            abs(
+                (x[prev] - avg_x) * (y[j] - y[prev])
+                - (x[prev] - x[j]) * (avg_y - y[prev])
+            )
+            for j in range(start, end)
+        ]
+        selected.append(start + areas.index(max(areas)))
+    return selected + [n - 1]
+
+
+def test_keeps_first_and_last_points():
+    x, y = series()
+    index = lttb_indices(x, y, 50)
+
+    assert len(index) == 50
+    assert index[0] == 0 and index[-1] == len(x) - 1
+    assert np.all(np.diff(index) > 0)
+
+
+def test_keeps_local_extremes():
+    x, y = series()
+    # 急な水位低下とスパイクを1点ずつ入れる
+    y[301] -= 40
+    y[702] += 40
+    out_x, out_y = lttb(x, y, 40)
+
+    assert x[301] in out_x and x[702] in out_x
+    assert out_y.min() == y[301] and out_y.max() == y[702]
+
+
+def test_matches_pointwise_reference():
+    x, y = series(n=500, seed=3)
+    x = x.astype(np.float64)
+
+    assert lttb_indices(x, y, 37).tolist() == reference_lttb(x.tolist(), y.tolist(), 37)
+
+
+@pytest.mark.parametrize("n_out", [100, 150])
+def test_returns_input_unchanged_when_no_downsampling_needed(n_out):
+    x, y = series(n=100)
+    out_x, out_y = lttb(x, y, n_out)
+
+    assert out_x.tolist() == x.tolist() and out_y.tolist() == y.tolist()
+
+
+def test_drops_nan_before_downsampling():
+    x, y = series(n=10)
+    y[[2, 5]] = np.nan
+    out_x, out_y = lttb(x, y, 20)
+
+    assert out_x.tolist() == np.delete(x, [2, 5]).tolist()
+    assert not np.isnan(out_y).any()
@@ -0,0 +1,156 @@
+"""
+履歴エクスポートのテスト（行グループ単位の書き出し・ストリーミング応答・空の期間）
+"""
+import asyncio
+import functools
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+import pytest
+
+from app.export import endpoints, writer
+from app.export.config import ExportConfig
+from app.timeseries.sqlite import NS_PER_MINUTE, SQLiteRepository
+
+START_NS = 1_704_067_200_000_000_000  # 2024-01-01T00:00:00Z
+ROWS_PER_DEVICE = 50
+
+
+@pytest.fixture
+def repo():
+    repository = SQLiteRepository(":memory:")
+    times = START_NS + np.arange(ROWS_PER_DEVICE, dtype=np.int64) * NS_PER_MINUTE
+    for index, device_id in enumerate(["b", "a", "c"]):
+        distance = np.arange(ROWS_PER_DEVICE, dtype=np.float64) + 100 * index
+        distance[3] = np.nan
+        repository.write(
+            {
+                "deviceId": np.full(ROWS_PER_DEVICE, device_id, dtype=object),
+                "time": times,
+                "distance": distance,
+            }
+        )
+    return repository
+
+
+@pytest.fixture
+def config():
+    return ExportConfig(
+        EXPORT_DEVICE_CHUNK=2,
+        EXPORT_ROW_GROUP_ROWS=40,
+        EXPORT_CHUNK_BYTES=512,
+        EXPORT_QUEUE_CHUNKS=2,
+        EXPORT_COMPRESSION="none",
+    )
+
+
+def until(minutes):
+    return START_NS + minutes * NS_PER_MINUTE
+
+
+def test_parquet_is_written_in_row_groups(repo, config):
+    sink = io.BytesIO()
+    stats = writer.export_history(
+        ["a", "b", "c"], START_NS, until(ROWS_PER_DEVICE), "parquet", sink, repo, config
+    )
+
+    parquet = pq.ParquetFile(io.BytesIO(sink.getvalue()))
+    assert stats["rows"] == parquet.metadata.num_rows == 3 * ROWS_PER_DEVICE
+    assert stats["rowGroups"] == parquet.num_row_groups > 1
+    # 行グループはページをrow_group_rows行まで溜めてから書き出す（ページの途中では切らない）
+    sizes = [parquet.metadata.row_group(i).num_rows for i in range(stats["rowGroups"])]
+    assert all(size >= config.row_group_rows for size in sizes[:-1])
+
+    table = parquet.read()
+    assert table.schema == writer.history_schema()
+    assert table["deviceId"].to_pylist() == ["a"] * 50 + ["b"] * 50 + ["c"] * 50
+    assert table["time"].cast(pa.int64()).to_pylist()[:2] == [
+        START_NS,
+        START_NS + NS_PER_MINUTE,
+    ]
+    # NaNはnullとして書き出す
+    assert table["distance"].null_count == 3
+
+
+def test_arrow_stream_is_sent_in_bounded_chunks(repo, config):
+    chunks = list(
+        writer.stream_export(
+            ["c", "a"],
+            START_NS,
+            until(ROWS_PER_DEVICE),
+            "arrow",
+            config=config,
+            repository=repo,
+        )
+    )
+
+    # 最後以外のチャンクはchunk_bytes以上で、キューに溜めずに順に送る
+    assert len(chunks) > 1
+    assert all(len(chunk) >= config.chunk_bytes for chunk in chunks[:-1])
+    table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+    assert table.num_rows == 2 * ROWS_PER_DEVICE
+    assert table["deviceId"].to_pylist() == ["a"] * 50 + ["c"] * 50
+
+
+@pytest.fixture
+def export_as_user(monkeypatch, repo, config):
+    """エンドポイントを呼び出して (応答, 本文) を返す"""
+    monkeypatch.setattr(
+        endpoints,
+        "list_user_ownerships",
+        lambda user_id: [{"deviceId": d} for d in ("a", "b", "c")],
+    )
+    monkeypatch.setattr(
+        writer,
+        "stream_export",
+        functools.partial(writer.stream_export, config=config, repository=repo),
+    )
+
+    async def collect(response):
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    def call(**params):
+        query = {"deviceIds": None, "start": None, "end": None, "days": 30}
+        response = endpoints.export_history_file(**{**query, **params}, user_id="u")
+        return response, asyncio.run(collect(response))
+
+    return call
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_endpoint_streams_file_with_content_type(export_as_user, fmt):
+    response, body = export_as_user(
+        deviceIds="b",
+        start="2024-01-01T00:10:00",
+        end="2024-01-01T00:20:00Z",
+        format=fmt,
+    )
+
+    media_type, extension = writer.FORMATS[fmt]
+    assert response.media_type == media_type
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="history-20240101T001000Z-20240101T002000Z'
+        f'.{extension}"'
+    )
+    if fmt == "parquet":
+        table = pq.read_table(io.BytesIO(body))
+    else:
+        table = pa.ipc.open_stream(body).read_all()
+    assert table["deviceId"].to_pylist() == ["b"] * 10
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_empty_range_returns_valid_empty_file(export_as_user, fmt):
+    _, body = export_as_user(
+        start="2023-12-01T00:00:00Z", end="2023-12-02T00:00:00Z", format=fmt
+    )
+
+    if fmt == "parquet":
+        table = pq.read_table(io.BytesIO(body))
+    else:
+        table = pa.ipc.open_stream(body).read_all()
+    assert table.num_rows == 0
+    assert table.schema == writer.history_schema()
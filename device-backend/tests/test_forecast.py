@@ -0,0 +1,117 @@
+"""
+水位予測のテスト（増分更新と学習し直しの条件・履歴が短い場合の扱い）
+"""
+import time
+
+import numpy as np
+import pytest
+
+from app.forecast import ForecastConfig, Forecaster
+from app.forecast.model import HOUR_NS, fit
+
+FIRST_HOUR = 1_700_000_000_000_000_000 // HOUR_NS
+
+
+def hourly(count, first_hour=FIRST_HOUR, seed=0):
+    """日周期の変動と緩やかな低下を持つ時間平均の系列"""
+    hours = np.arange(first_hour, first_hour + count, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    values = (
+        50
+        + 5 * np.sin(2 * np.pi * (hours % 24) / 24)
+        - 0.05 * (hours - FIRST_HOUR)
+        + rng.normal(0, 0.3, count)
+    )
+    return hours * HOUR_NS, values
+
+
+class Series:
+    """load_hourlyの代わり（availableまでの時間ビンを返す）"""
+
+    def __init__(self, available):
+        self.times, self.values = hourly(24 * 7)
+        self.available = available
+        self.calls = 0
+
+    def __call__(self, device_id, hours, now_ns):
+        self.calls += 1
+        return self.times[: self.available], self.values[: self.available]
+
+
+def config(**values):
+    defaults = {"FORECAST_REFRESH_SECONDS": 0, "FORECAST_REFIT_AFTER_BINS": 6}
+    return ForecastConfig(**{**defaults, **values})
+
+
+def wait_refreshed(forecaster, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while forecaster.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert not forecaster.stats()["pending"]
+
+
+def test_new_bins_update_state_until_refit_threshold():
+    series = Series(available=72)
+    forecaster = Forecaster(config(), load=series)
+
+    first, source = forecaster.model("a")
+    assert source == "cold" and first.kind == "holt-winters"
+    assert forecaster.stats()["fits"] == 1
+
+    # 4ビン増えた時点では学習済みのパラメータのまま状態だけ更新する
+    series.available = 76
+    assert forecaster.model("a") == (first, "cache")
+    wait_refreshed(forecaster)
+    assert forecaster.stats()["fits"] == 1 and forecaster.stats()["updates"] == 1
+    assert first.bins == 76 and first.bins_since_fit == 4
+    assert first.last_hour == FIRST_HOUR + 75
+
+    # 前回の学習から6ビン以上増えたら学習し直したモデルに置き換える
+    series.available = 78
+    forecaster.model("a")
+    wait_refreshed(forecaster)
+    assert forecaster.stats()["fits"] == 2
+    refit, _ = forecaster.model("a")
+    wait_refreshed(forecaster)
+    assert refit is not first
+    assert refit.bins == 78 and refit.bins_since_fit == 0
+
+
+def test_refresh_waits_for_interval():
+    series = Series(available=72)
+    forecaster = Forecaster(config(FORECAST_REFRESH_SECONDS=3600), load=series)
+
+    forecaster.model("a")
+    series.available = 100
+    assert forecaster.model("a")[1] == "cache"
+    assert forecaster.stats()["pending"] == 0 and series.calls == 1
+
+
+def test_short_history_falls_back_to_non_seasonal_model():
+    # 季節成分は2周期（48ビン）分から使い、それより短い場合はトレンドだけのモデル
+    model = fit(*hourly(30), config())
+
+    assert model is not None and model.kind == "holt" and model.gamma == 0.0
+    assert not model.season.any()
+    assert fit(*hourly(48), config()).kind == "holt-winters"
+
+
+@pytest.mark.parametrize("available", [0, 11])
+def test_too_short_history_has_no_forecast(available):
+    forecaster = Forecaster(config(), load=Series(available))
+
+    assert forecaster.forecast("a", 24) is None
+    assert forecaster.stats()["cachedModels"] == 0
+
+
+def test_forecast_continues_after_last_trained_bin():
+    forecaster = Forecaster(config(), load=Series(available=72))
+    result = forecaster.forecast("a", 24)
+
+    assert result["source"] == "cold"
+    assert result["model"]["trainedThroughNs"] == (FIRST_HOUR + 71) * HOUR_NS
+    assert result["time"].tolist() == [
+        (FIRST_HOUR + 72 + i) * HOUR_NS for i in range(24)
+    ]
+    assert np.all(result["lower"] <= result["distance"])
+    assert np.all(result["distance"] <= result["upper"])
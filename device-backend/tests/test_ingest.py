@@ -0,0 +1,185 @@
+"""
+取り込みバッファのテスト（MemoryRecordWriterへの書き込み）
+"""
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.ingest import (
+    IngestBackpressure,
+    IngestBuffer,
+    IngestConfig,
+    MemoryRecordWriter,
+    Reading,
+    build_batches,
+)
+from app.ingest import buffer as buffer_module, endpoints
+from app.ingest.models import IngestRequest
+from app.ingest.writer import NS_PER_MS, Rejection
+
+START_MS = 1_700_000_000_000
+
+
+def readings(device_id, count, start=0):
+    return [
+        Reading(device_id, START_MS + (start + i) * 1000, 10.0 + i)
+        for i in range(count)
+    ]
+
+
+def config(**values):
+    defaults = {
+        "INGEST_BATCH_RECORDS": 10,
+        "INGEST_FLUSH_INTERVAL_SECONDS": 60,
+        "INGEST_FLUSH_WORKERS": 2,
+        "INGEST_RETRY_BACKOFF_SECONDS": 0,
+    }
+    return IngestConfig(**{**defaults, **values})
+
+
+def wait_idle(buffer, timeout=5.0):
+    """書き込み中のバッチが完了するまで待つ"""
+    deadline = time.monotonic() + timeout
+    while buffer.stats()["inFlight"] and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert not buffer.stats()["inFlight"]
+
+
+def test_build_batches_groups_full_devices_and_mixes_the_rest():
+    batch_readings = readings("a", 250) + readings("b", 30) + readings("c", 5)
+    batches = build_batches(batch_readings, "distance", 100)
+
+    single = [b for b in batches if "Dimensions" in b.common]
+    mixed = [b for b in batches if "Dimensions" not in b.common]
+    # aの100件ずつ2回はdeviceIdを共通属性に入れ、残り50件とb・cを混ぜて詰める
+    assert [len(b.records) for b in single] == [100, 100]
+    assert all(b.common["Dimensions"][0]["Value"] == "a" for b in single)
+    assert all("Dimensions" not in r for b in single for r in b.records)
+    assert [len(b.records) for b in mixed] == [85]
+    assert {r["Dimensions"][0]["Value"] for r in mixed[0].records} == {"a", "b", "c"}
+    assert sorted(r for b in batches for r in b.readings) == sorted(batch_readings)
+
+
+def test_build_batches_caps_size_at_write_records_limit():
+    batches = build_batches(readings("a", 250), "distance", 500)
+
+    assert [len(b.records) for b in batches] == [100, 100, 50]
+    assert batches[0].records[0] == {"Time": str(START_MS), "MeasureValue": "10.0"}
+
+
+def test_size_trigger_flushes_whole_batches_only():
+    writer = MemoryRecordWriter()
+    buffer = IngestBuffer(writer, config())
+    buffer.accept(readings("a", 25))
+
+    assert buffer.flush(force=False) == 2
+    wait_idle(buffer)
+    assert writer.records == 20
+    assert buffer.stats()["pending"] == 5
+
+
+def test_age_trigger_flushes_partial_batch():
+    writer = MemoryRecordWriter()
+    buffer = IngestBuffer(writer, config(INGEST_FLUSH_INTERVAL_SECONDS=0.05))
+    buffer.accept(readings("a", 5))
+
+    assert buffer.flush(force=False) == 0
+    time.sleep(0.06)
+    assert buffer.flush(force=False) == 1
+    wait_idle(buffer)
+    assert writer.records == 5
+
+
+def test_written_hook_receives_nanosecond_columns():
+    written = []
+    buffer = IngestBuffer(MemoryRecordWriter(), config())
+    buffer.on_written = written.append
+    buffer.accept(readings("a", 3))
+    assert buffer.drain()
+
+    columns = written[0]
+    assert columns["deviceId"].tolist() == ["a", "a", "a"]
+    assert columns["time"][0] == START_MS * NS_PER_MS
+    assert columns["distance"].tolist() == [10.0, 11.0, 12.0]
+
+
+def test_full_buffer_rejects_with_503(monkeypatch):
+    buffer = IngestBuffer(MemoryRecordWriter(), config(INGEST_BUFFER_LIMIT=10))
+    buffer.accept(readings("a", 8))
+    with pytest.raises(IngestBackpressure):
+        buffer.accept(readings("b", 5))
+    assert buffer.stats()["rejectedRequests"] == 1
+    assert buffer.buffered() == 8
+
+    monkeypatch.setattr(buffer_module, "ingest_buffer", buffer)
+    body = IngestRequest(
+        readings=[{"deviceId": "b", "time": "2024-01-01T00:00:00Z", "distance": 1.0}]
+        * 3
+    )
+    with pytest.raises(HTTPException) as e:
+        endpoints.ingest_readings(body, "key")
+    assert e.value.status_code == 503
+    assert int(e.value.headers["Retry-After"]) >= 1
+
+    # 書き込みが進めば再び受け付ける
+    assert buffer.drain()
+    assert endpoints.ingest_readings(body, "key").accepted == 3
+
+
+def test_retryable_rejections_are_retried_until_dead_lettered():
+    writer = MemoryRecordWriter(reject_rate=0.3, seed=1)
+    buffer = IngestBuffer(writer, config(INGEST_MAX_ATTEMPTS=3))
+    buffer.accept(readings("a", 200))
+    assert buffer.drain()
+
+    stats = buffer.stats()
+    assert stats["retried"] > 0
+    assert stats["written"] == writer.records == len(writer.rows)
+    assert stats["written"] + stats["deadLettered"] == 200
+    # 3回とも拒否された（0.3 ** 3 の確率）ものだけデッドレターに残る
+    assert 0 < stats["deadLettered"] < 20
+    assert all(d["attempts"] == 3 for d in buffer.dead_letters)
+
+
+class ConflictWriter(MemoryRecordWriter):
+    """先頭のレコードを既存値との衝突（再試行不可）として拒否する"""
+
+    def write(self, common, records):
+        rejected = super().write(common, records)
+        return rejected + [Rejection(0, "ExistingVersion conflict", False)]
+
+
+class FailingOnceWriter(MemoryRecordWriter):
+    """最初の呼び出しだけバッチ全体が失敗する（スロットリングなど）"""
+
+    def write(self, common, records):
+        if not self.calls:
+            self.calls += 1
+            raise RuntimeError("Throttled")
+        return super().write(common, records)
+
+
+def test_non_retryable_rejection_goes_straight_to_dead_letters():
+    buffer = IngestBuffer(ConflictWriter(), config())
+    buffer.accept(readings("a", 10))
+    assert buffer.drain()
+
+    stats = buffer.stats()
+    assert stats["retried"] == 0
+    assert stats["written"] == 9
+    assert stats["deadLettered"] == 1
+    assert buffer.dead_letters[0]["attempts"] == 1
+
+
+def test_failed_batch_is_retried_as_a_whole():
+    writer = FailingOnceWriter()
+    buffer = IngestBuffer(writer, config())
+    buffer.accept(readings("a", 10))
+    assert buffer.drain()
+
+    stats = buffer.stats()
+    assert stats["writeErrors"] == 1
+    assert stats["retried"] == 10
+    assert stats["written"] == writer.records == 10
+    assert stats["deadLettered"] == 0
@@ -0,0 +1,83 @@
+"""
+最新測定値ストアの条件付き書き込みのテスト（古い値は拒否し、新しい値で上書きする）
+"""
+import numpy as np
+import pytest
+from botocore.exceptions import ClientError
+
+from app.devices import latest as latest_module
+from app.devices.latest import DynamoLatestStore, MemoryLatestStore
+
+T0 = 1_704_067_200_000_000_000  # 2024-01-01T00:00:00Z
+NS_PER_SECOND = 1_000_000_000
+
+
+class FakeLatestTable:
+    """LatestReadingテーブルの代わり（put_itemの条件式だけを評価する）"""
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, Item, ConditionExpression, ExpressionAttributeValues):
+        assert ConditionExpression == "attribute_not_exists(deviceId) OR timeNs < :t"
+        current = self.items.get(Item["deviceId"])
+        if current and current["timeNs"] >= ExpressionAttributeValues[":t"]:
+            raise ClientError(
+                {"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem"
+            )
+        self.items[Item["deviceId"]] = Item
+
+
+@pytest.fixture(params=["memory", "dynamodb"])
+def store(request, monkeypatch):
+    if request.param == "memory":
+        return MemoryLatestStore()
+    table = FakeLatestTable()
+    monkeypatch.setattr(latest_module.aws_clients, "table", lambda name: table)
+    monkeypatch.setattr(
+        latest_module,
+        "batch_get_items",
+        lambda name, keys: [
+            table.items[k["deviceId"]] for k in keys if k["deviceId"] in table.items
+        ],
+    )
+    return DynamoLatestStore("LatestReading")
+
+
+def test_stale_write_is_rejected_and_newer_write_wins(store):
+    assert store.put_if_newer("a", T0, 10.0)
+    # 同じ時刻・古い時刻は書き込まない
+    assert not store.put_if_newer("a", T0, 11.0)
+    assert not store.put_if_newer("a", T0 - NS_PER_SECOND, 12.0)
+    assert store.get_many(["a"])["a"] == {
+        "time": "2024-01-01 00:00:00.000000000",
+        "distance": 10.0,
+        "timeNs": T0,
+    }
+
+    assert store.put_if_newer("a", T0 + NS_PER_SECOND, 13.5)
+    assert store.get_many(["a", "missing"]) == {
+        "a": {
+            "time": "2024-01-01 00:00:01.000000000",
+            "distance": 13.5,
+            "timeNs": T0 + NS_PER_SECOND,
+        }
+    }
+
+
+def test_put_columns_writes_each_device_latest_once(store):
+    store.put_if_newer("b", T0 + 5 * NS_PER_SECOND, 1.0)
+    columns = {
+        "deviceId": np.array(["a", "b", "a", "a"], dtype=object),
+        "time": T0 + np.array([1, 2, 3, 4], dtype=np.int64) * NS_PER_SECOND,
+        # NaNの行は最新値にしない
+        "distance": np.array([20.0, 30.0, 21.0, np.nan]),
+    }
+
+    # bは既により新しい値があるため更新しない
+    assert store.put_columns(columns) == {
+        "a": {"time": "2024-01-01 00:00:03.000000000", "distance": 21.0}
+    }
+    stored = store.get_many(["a", "b"])
+    assert stored["a"]["distance"] == 21.0
+    assert stored["b"]["timeNs"] == T0 + 5 * NS_PER_SECOND
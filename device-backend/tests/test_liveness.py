@@ -0,0 +1,143 @@
+"""
+死活インデックスのテスト（期限ヒープの積み直し・オフライン前の確認・復帰）
+"""
+import numpy as np
+import pytest
+
+from app.liveness import LivenessConfig, LivenessIndex
+from app.liveness.index import NS_PER_SECOND
+
+T0 = 1_700_000_000 * NS_PER_SECOND
+
+
+def at(seconds):
+    return T0 + int(seconds * NS_PER_SECOND)
+
+
+class FakeVerify:
+    """時系列の最新値クエリの代わり（呼び出しを記録し、登録した最終受信時刻を返す）"""
+
+    def __init__(self):
+        self.calls = []
+        self.latest = {}
+        self.error = None
+
+    def __call__(self, device_ids, window_hours):
+        self.calls.append((list(device_ids), window_hours))
+        if self.error is not None:
+            raise self.error
+        found = [d for d in device_ids if d in self.latest]
+        return {
+            "deviceId": np.array(found, dtype=object),
+            "time": np.array([self.latest[d] for d in found], dtype=np.int64),
+        }
+
+
+@pytest.fixture
+def verify():
+    return FakeVerify()
+
+
+@pytest.fixture
+def index(verify):
+    # 送信間隔60秒 × 3 = 最終受信から180秒でオフライン
+    config = LivenessConfig(
+        LIVENESS_DEFAULT_INTERVAL_SECONDS=60,
+        LIVENESS_MIN_GRACE_SECONDS=60,
+        LIVENESS_GRACE_FACTOR=3,
+    )
+    liveness = LivenessIndex(config, verify=verify)
+    liveness.transitions = []
+    liveness.on_offline = lambda d: liveness.transitions.append(("offline", d))
+    liveness.on_online = lambda d: liveness.transitions.append(("online", d))
+    return liveness
+
+
+def test_newer_reading_reschedules_popped_entry_without_verify(index, verify):
+    index.observe("a", at(0))
+    # 期限は遅くなるだけなのでヒープには積み直さず、取り出した時に積み直す
+    index.observe("a", at(60))
+    assert index.stats()["scheduled"] == 1
+
+    report = index.check(at(200))
+    assert report == {"flagged": [], "rescheduled": 1, "verified": 0}
+    assert verify.calls == []
+    assert index.status(["a"]) == {"a": "online"}
+
+    # 期限前の判定ではヒープを取り出さない
+    popped = index.popped
+    index.check(at(230))
+    assert index.popped == popped
+
+
+def test_earlier_deadline_supersedes_queued_entry(index):
+    index.observe("a", at(0))
+    # 送信間隔が下限の30秒と推定されると期限（20 + 90秒）が早まり、新しい期限で積み直す
+    index.observe("a", np.array([at(10), at(20)]))
+    assert index.stats()["scheduled"] == 2
+
+    report = index.check(at(111))
+    assert [d["deviceId"] for d in report["flagged"]] == ["a"]
+    # 古い（遅い）期限のエントリは取り出しても何もしない
+    index.observe("a", at(182))
+    assert index.check(at(200))["flagged"] == []
+
+
+def test_expired_device_is_verified_before_going_offline(index, verify):
+    index.observe("a", at(0))
+    index.observe("b", at(0))
+    # bはアプリを経由せずに取り込まれた新しい受信がある
+    verify.latest["b"] = at(150)
+
+    report = index.check(at(181))
+    # 最終受信から181秒 → 切り上げた1時間に余裕を1時間足して探す
+    assert verify.calls == [(["a", "b"], 2)]
+    assert [d["deviceId"] for d in report["flagged"]] == ["a"]
+    assert report["rescheduled"] == 1 and report["verified"] == 2
+    assert index.status(["a", "b"]) == {"a": "offline", "b": "online"}
+    assert index.transitions == [("offline", report["flagged"])]
+    assert report["flagged"][0]["offlineSince"] == "2023-11-14T22:16:20Z"
+    assert [d["deviceId"] for d in index.offline()] == ["a"]
+
+
+def test_failed_verify_keeps_devices_online_until_confirmed(index, verify):
+    index.observe("a", at(0))
+    verify.error = RuntimeError("Throttled")
+
+    report = index.check(at(181))
+    assert report["flagged"] == [] and report["rescheduled"] == 1
+    assert index.status(["a"]) == {"a": "online"}
+    assert index.transitions == []
+
+    # 確認できるようになった次の判定でオフラインにする
+    verify.error = None
+    report = index.check(at(211))
+    assert len(verify.calls) == 2
+    assert [d["deviceId"] for d in report["flagged"]] == ["a"]
+
+
+def test_new_reading_brings_offline_device_back_online(index):
+    index.observe("a", np.array([at(0), at(60)]))
+    index.check(at(300))
+    assert index.status(["a"]) == {"a": "offline"}
+
+    assert index.observe("a", at(3600))
+    assert index.status(["a"]) == {"a": "online"}
+    assert index.offline() == []
+    kind, devices = index.transitions[-1]
+    assert kind == "online" and devices[0]["deviceId"] == "a"
+    # 途絶期間は送信間隔の推定に使わない
+    assert devices[0]["expectedIntervalSeconds"] == 60.0
+
+    # 復帰後は新しい最終受信時刻からの期限で判定する
+    assert index.check(at(3700))["flagged"] == []
+    assert [d["deviceId"] for d in index.check(at(3781))["flagged"]] == ["a"]
+
+
+def test_stale_observation_is_ignored(index):
+    index.observe("a", at(100))
+
+    assert not index.observe("a", at(50))
+    columns = {"deviceId": np.array(["a"], dtype=object), "time": np.array([at(100)])}
+    assert index.observe_columns(columns) == 0
+    assert index.stats()["scheduled"] == 1
@@ -0,0 +1,214 @@
+"""
+通知アウトボックス・配信のテスト（重複排除・ユーザーごとのレート制限・再試行・受信箱のページ送り）
+"""
+import pytest
+
+from app.notifications import (
+    MemoryChannel,
+    MemoryOutboxStore,
+    NotificationConfig,
+    NotificationDispatcher,
+    TokenBucketLimiter,
+)
+from app.notifications.channels import decode_cursor
+
+
+class FlakyChannel(MemoryChannel):
+    """最初のfailures回の配信だけ失敗するチャネル"""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.calls = 0
+
+    def deliver(self, notifications):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("channel unavailable")
+        return super().deliver(notifications)
+
+
+def make_dispatcher(channel=None, recipients=("u1",), **settings):
+    config = NotificationConfig(
+        **{
+            "NOTIFICATION_OUTBOX_BACKEND": "memory",
+            "NOTIFICATION_CHANNELS": "memory",
+            "NOTIFICATION_WORKERS": 2,
+            **settings,
+        }
+    )
+    channel = channel if channel is not None else MemoryChannel()
+    dispatcher = NotificationDispatcher(
+        store=MemoryOutboxStore(),
+        channels=[channel],
+        resolve=lambda target: list(target.get("userIds", recipients)),
+        config=config,
+    )
+    return dispatcher, channel
+
+
+def publish(dispatcher, subject="site-a", **kwargs):
+    return dispatcher.publish(
+        "offline",
+        subject,
+        "オフライン",
+        f"{subject}が停止しました",
+        {"userIds": kwargs.pop("users", ["u1"])},
+        **kwargs,
+    )
+
+
+class TestDedup:
+    def test_same_event_in_window_is_collapsed(self):
+        dispatcher, channel = make_dispatcher()
+        first = publish(dispatcher)
+        assert first is not None
+        assert publish(dispatcher) is None
+        assert publish(dispatcher, subject="site-b") is not None
+
+        stats = dispatcher.drain()
+        assert stats["events"] == 2
+        assert channel.delivered == 2
+        assert len(channel.list_for_user("u1", 10)["items"]) == 2
+
+    def test_zero_window_disables_dedup(self):
+        dispatcher, channel = make_dispatcher()
+        assert publish(dispatcher, dedup_window_seconds=0) is not None
+        assert publish(dispatcher, dedup_window_seconds=0) is not None
+        assert dispatcher.drain()["delivered"] == 2
+
+    def test_unknown_type_is_rejected(self):
+        dispatcher, _ = make_dispatcher()
+        with pytest.raises(ValueError):
+            publish(dispatcher, notification_type="fatal")
+
+
+class TestRateLimit:
+    def test_bucket_refills_over_time(self):
+        limiter = TokenBucketLimiter(rate_per_minute=60, burst=2)
+        assert limiter.allow("u1", now=100.0)
+        assert limiter.allow("u1", now=100.0)
+        assert not limiter.allow("u1", now=100.0)
+        # 他のユーザーは別のバケット
+        assert limiter.allow("u2", now=100.0)
+        assert limiter.allow("u1", now=101.0)
+
+    def test_limited_per_user(self):
+        dispatcher, channel = make_dispatcher(
+            NOTIFICATION_RATE_BURST=2, NOTIFICATION_RATE_PER_MINUTE=0.001
+        )
+        for i in range(3):
+            publish(dispatcher, subject=f"site-{i}", users=["heavy"])
+        publish(dispatcher, subject="site-x", users=["heavy", "light"])
+
+        stats = dispatcher.drain()
+        assert stats == {"events": 4, "delivered": 3, "rateLimited": 2, "failed": 0}
+        assert len(channel.list_for_user("heavy", 10)["items"]) == 2
+        assert len(channel.list_for_user("light", 10)["items"]) == 1
+
+
+class TestRetry:
+    def test_failed_delivery_is_retried_without_spending_tokens(self):
+        channel = FlakyChannel(failures=1)
+        dispatcher, _ = make_dispatcher(
+            channel, NOTIFICATION_RATE_BURST=1, NOTIFICATION_RATE_PER_MINUTE=0.001
+        )
+        event_id = publish(dispatcher)
+
+        assert dispatcher.dispatch_once()["failed"] == 1
+        event = dispatcher.store.events[event_id]
+        assert event["status"] == "pending"
+        assert event["lastError"] == "channel unavailable"
+
+        # 失敗した配信のトークンは戻っているので、バースト1でも再試行で配信される
+        assert dispatcher.dispatch_once() == {
+            "events": 1,
+            "delivered": 1,
+            "rateLimited": 0,
+            "failed": 0,
+        }
+        event = dispatcher.store.events[event_id]
+        assert event["status"] == "delivered"
+        assert event["attempts"] == 2
+
+    def test_gives_up_after_max_attempts(self):
+        channel = FlakyChannel(failures=10)
+        dispatcher, _ = make_dispatcher(channel, NOTIFICATION_MAX_ATTEMPTS=3)
+        event_id = publish(dispatcher)
+
+        stats = dispatcher.drain()
+        assert stats["failed"] == 3
+        assert stats["events"] == 0
+        event = dispatcher.store.events[event_id]
+        assert event["status"] == "failed"
+        assert event["attempts"] == 3
+        assert dispatcher.store.claim(10, 60) == []
+
+    def test_expired_lease_is_reclaimed(self):
+        store = MemoryOutboxStore()
+        store.put({"eventId": "e1"})
+        assert [e["eventId"] for e in store.claim(10, lease_seconds=-1)] == ["e1"]
+        reclaimed = store.claim(10, lease_seconds=60)
+        assert [e["eventId"] for e in reclaimed] == ["e1"]
+        assert reclaimed[0]["attempts"] == 2
+        # リース中のイベントは再取得しない
+        assert store.claim(10, lease_seconds=60) == []
+
+
+class TestInboxPagination:
+    @pytest.fixture
+    def channel(self):
+        channel = MemoryChannel()
+        channel.deliver(
+            [
+                {
+                    "userId": "u1",
+                    "eventId": f"e{i}",
+                    "type": "info",
+                    "title": f"t{i}",
+                    "message": "-",
+                    "createdAt": f"2026-10-01T00:00:{i:02d}Z",
+                }
+                for i in range(5)
+            ]
+            + [
+                {
+                    "userId": "u2",
+                    "eventId": "other",
+                    "type": "info",
+                    "title": "-",
+                    "message": "-",
+                    "createdAt": "2026-10-01T00:00:30Z",
+                }
+            ]
+        )
+        return channel
+
+    def test_pages_newest_first_until_exhausted(self, channel):
+        titles = []
+        cursor = None
+        for _ in range(5):
+            page = channel.list_for_user("u1", 2, cursor)
+            titles.append([item["title"] for item in page["items"]])
+            cursor = page["nextCursor"]
+            if cursor is None:
+                break
+        assert titles == [["t4", "t3"], ["t2", "t1"], ["t0"]]
+        assert (
+            decode_cursor(channel.list_for_user("u1", 2)["nextCursor"])["userId"]
+            == "u1"
+        )
+
+    def test_exact_page_has_no_next_cursor(self, channel):
+        page = channel.list_for_user("u1", 5)
+        assert len(page["items"]) == 5
+        assert page["nextCursor"] is None
+
+    def test_unread_only_skips_read_items(self, channel):
+        first = channel.list_for_user("u1", 2)
+        assert channel.mark_read("u1", [item["id"] for item in first["items"]]) == 2
+        page = channel.list_for_user("u1", 2, unread_only=True)
+        assert [item["title"] for item in page["items"]] == ["t2", "t1"]
+        page = channel.list_for_user("u1", 2, page["nextCursor"], unread_only=True)
+        assert [item["title"] for item in page["items"]] == ["t0"]
+        assert page["nextCursor"] is None
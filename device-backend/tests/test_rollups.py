@@ -0,0 +1,60 @@
+"""
+ロールアップ履歴のテスト（ロールアップ + 生データの端 = 生データの集計）
+"""
+import numpy as np
+import pytest
+
+from app.rollups import HistoryPlanner, RollupConfig, RollupMaterializer, RollupStore
+from app.rollups.materializer import HOUR_NS, floor_to
+from app.rollups.store import BIN_COLUMNS
+from app.timeseries.sqlite import NS_PER_MINUTE, SQLiteRepository
+
+# 時間ビンの途中（37分）を現在時刻にして、直近の時間・日ビンを端数にする
+NOW_NS = 1_700_000_000_000_000_000 // HOUR_NS * HOUR_NS + 37 * NS_PER_MINUTE
+# 測定値は時間ビンの途中（4日と5時間17分前）から7分間隔
+DATA_FROM_NS = NOW_NS - (4 * 24 + 5) * HOUR_NS - 17 * NS_PER_MINUTE
+
+
+@pytest.fixture
+def planner():
+    repo = SQLiteRepository(":memory:")
+    times = np.arange(DATA_FROM_NS, NOW_NS + 1, 7 * NS_PER_MINUTE, dtype=np.int64)
+    rng = np.random.default_rng(0)
+    repo.write(
+        {
+            "deviceId": np.full(len(times), "dev", dtype=object),
+            "time": times,
+            "distance": np.round(30 + rng.normal(0, 2, len(times)).cumsum() / 10, 2),
+        }
+    )
+    config = RollupConfig(ROLLUP_BACKFILL_DAYS=10, ROLLUP_LAG_MINUTES=10)
+    materializer = RollupMaterializer(RollupStore(":memory:"), repo, config)
+    # 2回に分けて集計する（2回目は前回の確定時刻より後だけを増分で集計）
+    materializer.refresh(["dev"], NOW_NS - 2 * HOUR_NS)
+    materializer.refresh(["dev"], NOW_NS)
+    return HistoryPlanner(materializer, repo)
+
+
+@pytest.mark.parametrize(
+    "hours, resolution",
+    [(30, "1h"), (110, "1h"), (50, "1d"), (120, "1d")],
+)
+def test_rollups_with_raw_edge_equal_raw_aggregate(planner, hours, resolution):
+    result = planner.history("dev", hours, resolution, now_ns=NOW_NS)
+    plan = result["plan"]
+    minutes = 60 if resolution == "1h" else 1440
+
+    # 同じ期間（開始はビンの境界に切り下げ）を生データから集計したもの
+    start_ns = floor_to(NOW_NS - hours * HOUR_NS, minutes * NS_PER_MINUTE)
+    expected = planner.repository.rollup_since(["dev"], start_ns, minutes)
+    expected["sumLevel"] = expected["avgLevel"] * expected["samples"]
+
+    assert plan["source"] == "rollup"
+    assert plan["rawRows"] > 0 and plan["hourlyBins"] > 0
+    if resolution == "1d":
+        assert plan["dailyBins"] > 0
+    bins = result["bins"]
+    assert bins["time"].tolist() == expected["time"].tolist()
+    assert bins["samples"].tolist() == expected["samples"].tolist()
+    for name in BIN_COLUMNS[1:4]:
+        np.testing.assert_allclose(bins[name], expected[name])
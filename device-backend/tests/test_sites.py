@@ -0,0 +1,106 @@
+"""
+拠点・圃場集計インデックスの増分更新のテスト（作り直した集計と一致すること）
+"""
+import pytest
+
+from app.sites import SiteConfig, SiteIndex
+
+T1 = "2024-01-01 00:00:00.000000000"
+T2 = "2024-01-01 00:05:00.000000000"
+T3 = "2024-01-01 00:10:00.000000000"
+
+
+def row(device_id, site, field, level, last_update, online=True, alert=False):
+    return {
+        "deviceId": device_id,
+        "site": site,
+        "field": field,
+        "level": level,
+        "lastUpdate": last_update,
+        "online": online,
+        "alert": alert,
+    }
+
+
+@pytest.fixture
+def index():
+    index = SiteIndex(SiteConfig())
+    index.build(
+        "u",
+        [
+            row("a", "north", "f1", 10.0, T1),
+            row("b", "north", "f1", 30.0, T1),
+            row("c", "north", "f2", 20.0, T1, online=False),
+            row("d", "south", "f3", 50.0, T1),
+        ],
+    )
+    return index
+
+
+def rebuilt(rows):
+    index = SiteIndex(SiteConfig())
+    index.build("u", rows)
+    return index
+
+
+def test_observe_latest_updates_only_the_device_aggregates(index):
+    assert index.observe_latest({"c": {"time": T2, "distance": 26.0}}) == 1
+
+    north = index.site("u", "north")
+    assert north["minLevel"] == 10.0 and north["maxLevel"] == 30.0
+    assert north["avgLevel"] == 22.0
+    # 受信したデバイスはオンラインとして扱う
+    assert north["onlineCount"] == 3 and north["lastUpdate"] == T2
+    assert [f["avgLevel"] for f in north["fields"]] == [20.0, 26.0]
+    assert index.site("u", "south")["lastUpdate"] == T1
+
+
+def test_stale_update_is_ignored(index):
+    index.observe_latest({"a": {"time": T3, "distance": 12.0}})
+    updates = index.stats()["updates"]
+
+    # 保持している時刻以前の値と、インデックスにないデバイスは反映しない
+    stale = {
+        "a": {"time": T2, "distance": 99.0},
+        "b": {"time": T1, "distance": 99.0},
+        "x": {"time": T3, "distance": 99.0},
+    }
+    assert index.observe_latest(stale) == 0
+    assert index.stats()["updates"] == updates
+    north = index.site("u", "north")
+    assert north["maxLevel"] == 30.0 and north["lastUpdate"] == T3
+
+
+def test_device_moving_between_sites_matches_rebuild(index):
+    # bをnorthからsouthの新しい圃場へ移し、移動後の最新値を反映する
+    index.assign("u", "b", "south", "f4")
+    index.observe_latest({"b": {"time": T2, "distance": 40.0}})
+
+    north = index.site("u", "north")
+    # 最大値を持っていたbが抜けた拠点は読み取り時に計算し直す
+    assert north["deviceCount"] == 2 and north["maxLevel"] == 20.0
+    assert north["lastUpdate"] == T1
+    assert [f["field"] for f in north["fields"]] == ["f1", "f2"]
+    assert [f["field"] for f in index.site("u", "south")["fields"]] == ["f3", "f4"]
+
+    expected = rebuilt(
+        [
+            row("a", "north", "f1", 10.0, T1),
+            row("b", "south", "f4", 40.0, T2),
+            row("c", "north", "f2", 20.0, T1, online=False),
+            row("d", "south", "f3", 50.0, T1),
+        ]
+    )
+    assert index.sites("u") == expected.sites("u")
+    for site in ("north", "south"):
+        assert index.site("u", site) == expected.site("u", site)
+
+
+def test_emptied_site_and_field_are_removed(index):
+    index.assign("u", "d", "north", "f2")
+
+    assert index.site("u", "south") is None
+    assert [s["site"] for s in index.sites("u")] == ["north"]
+    north = index.site("u", "north")
+    assert north["deviceCount"] == 4 and north["maxLevel"] == 50.0
+    assert [f["deviceCount"] for f in north["fields"]] == [2, 2]
@@ -0,0 +1,55 @@
+"""
+作業提案エンジンのテスト（再起動直後の長期間受信のないセンサー）
+"""
+import time
+
+import numpy as np
+
+from app.suggestions import SuggestionConfig
+from app.suggestions.engine import SuggestionEngine
+from app.suggestions.rules import NS_PER_HOUR, thresholds_for
+
+
+def columns(rows):
+    return {
+        "deviceId": np.array([r[0] for r in rows], dtype=object),
+        "time": np.array([r[1] for r in rows], dtype=np.int64),
+        "distance": np.array([r[2] for r in rows], dtype=np.float64),
+    }
+
+
+def test_sensor_silent_beyond_lookback_is_stale_after_cold_start():
+    config = SuggestionConfig(
+        SUGGESTION_LOOKBACK_HOURS=24,
+        SUGGESTION_STALE_HOURS=6,
+        SUGGESTION_STALE_SEED_HOURS=720,
+        SUGGESTION_REFRESH_SECONDS=0,
+    )
+    now_ns = time.time_ns()
+    recent = now_ns - NS_PER_HOUR
+    latest_calls = []
+
+    def fetch(device_ids, since_ns):
+        return columns([("fresh", recent, 20.0)] if "fresh" in device_ids else [])
+
+    def fetch_latest(device_ids, window_hours):
+        latest_calls.append((sorted(device_ids), window_hours))
+        return columns([("silent", now_ns - 48 * NS_PER_HOUR, 18.0)])
+
+    engine = SuggestionEngine(config, fetch=fetch, fetch_latest=fetch_latest)
+    thresholds = {
+        d: thresholds_for({"deviceId": d}, config) for d in ("fresh", "silent", "never")
+    }
+    engine.refresh(thresholds)
+
+    # 直近データのないデバイスだけ、長い期間の最新値をまとめて1回問い合わせる
+    assert latest_calls == [(["never", "silent"], 720)]
+    findings = engine.findings(thresholds, now_ns)
+    assert "fresh" not in findings
+    assert findings["silent"][0]["rule"] == "stale_sensor"
+    assert round(findings["silent"][0]["evidence"]["hoursSince"]) == 48
+    assert round(findings["never"][0]["evidence"]["hoursSince"]) == 720
+
+    # 補完済みのデバイスは再度問い合わせない
+    engine.refresh(thresholds)
+    assert len(latest_calls) == 1
@@ -0,0 +1,163 @@
+"""
+SQLite時系列リポジトリのテスト（":memory:"）
+
+結果の列名・型がTimestreamRepository（スタブのクエリ応答をデコーダーで変換したもの）と一致することも確認する。
+"""
+import time
+
+import numpy as np
+import pytest
+
+from app.timeseries import TimestreamRepository, concat_pages
+from app.timeseries import sqlite as sqlite_module
+from app.timeseries.sqlite import NS_PER_MINUTE, SQLiteRepository
+
+STEP_NS = 5 * NS_PER_MINUTE
+
+
+def columns(rows):
+    return {
+        "deviceId": np.array([r[0] for r in rows], dtype=object),
+        "time": np.array([r[1] for r in rows], dtype=np.int64),
+        "distance": np.array([r[2] for r in rows], dtype=np.float64),
+    }
+
+
+@pytest.fixture
+def data():
+    """a: 直近3時間の5分間隔（36点）、b: 直近の3点、c: 2日前の1点"""
+    now_ns = time.time_ns() // STEP_NS * STEP_NS
+    rows = [("a", now_ns - i * STEP_NS, float(i)) for i in range(36)]
+    rows += [("b", now_ns - i * STEP_NS, 100.0 + i) for i in range(3)]
+    rows += [("c", now_ns - 48 * 12 * STEP_NS, 50.0)]
+    return now_ns, rows
+
+
+@pytest.fixture
+def repo(data):
+    repository = SQLiteRepository(":memory:")
+    repository.write(columns(data[1]))
+    return repository
+
+
+class FakeTimestreamQuery:
+    """timestream-queryクライアントの代わり（1行だけ返す）"""
+
+    def __init__(self, column_info, row):
+        self.column_info = column_info
+        self.row = row
+
+    def query(self, QueryString, **kwargs):
+        return {
+            "ColumnInfo": [
+                {"Name": name, "Type": {"ScalarType": scalar_type}}
+                for name, scalar_type in self.column_info
+            ],
+            "Rows": [{"Data": [{"ScalarValue": value} for value in self.row]}],
+        }
+
+
+TS_VALUE = "2024-01-01 00:00:00.000000000"
+RAW = [("time", "TIMESTAMP"), ("distance", "DOUBLE")]
+BY_DEVICE = [("deviceId", "VARCHAR")] + RAW
+ROLLUP = [
+    ("deviceId", "VARCHAR"),
+    ("time", "TIMESTAMP"),
+    ("avgLevel", "DOUBLE"),
+    ("minLevel", "DOUBLE"),
+    ("maxLevel", "DOUBLE"),
+    ("samples", "BIGINT"),
+]
+SAMPLE_VALUES = {"VARCHAR": "a", "TIMESTAMP": TS_VALUE, "DOUBLE": "1.5", "BIGINT": "3"}
+
+
+def timestream_shape(column_info, call):
+    repository = TimestreamRepository()
+    row = [SAMPLE_VALUES[scalar_type] for _, scalar_type in column_info]
+    repository.client = FakeTimestreamQuery(column_info, row)
+    return shape(call(repository))
+
+
+def shape(result):
+    return [(name, array.dtype) for name, array in result.items()]
+
+
+@pytest.mark.parametrize(
+    "column_info, call",
+    [
+        (RAW, lambda r: r.latest("a")),
+        (RAW, lambda r: r.range("a", 1, 10)),
+        (BY_DEVICE, lambda r: r.batch_latest(["a", "b"], 24)),
+        (BY_DEVICE, lambda r: r.aggregate(["a", "b"], 3, 30)),
+        (BY_DEVICE, lambda r: r.series_since(["a", "b"], 0)),
+        (ROLLUP, lambda r: r.rollup_since(["a", "b"], 0, 60)),
+        (BY_DEVICE, lambda r: concat_pages(r.iter_series(["a"], 0, 2**62))),
+    ],
+)
+def test_column_shapes_match_timestream(repo, column_info, call):
+    assert shape(call(repo)) == timestream_shape(column_info, call)
+
+
+def test_latest_and_range(repo, data):
+    now_ns, _ = data
+
+    latest = repo.latest("a")
+    assert latest["time"].tolist() == [now_ns]
+    assert latest["distance"].tolist() == [0.0]
+
+    newest = repo.range("a", 1, 5)
+    assert newest["time"].tolist() == [now_ns - i * STEP_NS for i in range(5)]
+    oldest = repo.range("a", 1, 5, ascending=True)
+    assert np.all(np.diff(oldest["time"]) == STEP_NS)
+    assert oldest["time"][0] > now_ns - 60 * NS_PER_MINUTE
+    assert repo.latest("missing") == {} and repo.range("missing", 1, 5) == {}
+
+
+def test_batch_latest_skips_devices_outside_window(repo, data):
+    now_ns, _ = data
+
+    result = repo.batch_latest(["a", "c", "b", "a"], 24)
+    assert result["deviceId"].tolist() == ["a", "b"]
+    assert result["time"].tolist() == [now_ns, now_ns]
+    assert result["distance"].tolist() == [0.0, 100.0]
+    assert repo.batch_latest(["c"], 24) == {}
+
+
+def test_aggregate_averages_time_bins(repo, data):
+    _, rows = data
+    bin_ns = 30 * NS_PER_MINUTE
+
+    result = repo.aggregate(["a"], 3, 30)
+    expected = {}
+    for device_id, time_ns, value in rows:
+        if device_id == "a" and time_ns > time.time_ns() - 3 * 60 * NS_PER_MINUTE:
+            expected.setdefault(time_ns // bin_ns * bin_ns, []).append(value)
+    assert result["time"].tolist() == sorted(expected)
+    assert result["distance"].tolist() == [
+        pytest.approx(np.mean(expected[b])) for b in sorted(expected)
+    ]
+
+
+def test_iter_series_pages_through_range(monkeypatch, repo, data):
+    now_ns, rows = data
+    monkeypatch.setattr(sqlite_module, "PAGE_ROWS", 7)
+    since_ns, until_ns = now_ns - 30 * STEP_NS, now_ns
+
+    pages = list(repo.iter_series(["b", "a"], since_ns, until_ns))
+    assert all(len(page["time"]) <= 7 for page in pages)
+    merged = concat_pages(pages)
+    expected = sorted(
+        (d, t, v) for d, t, v in rows if d in ("a", "b") and since_ns <= t < until_ns
+    )
+    assert len(pages) == -(-len(expected) // 7)
+    read = zip(*(merged[name].tolist() for name in ("deviceId", "time", "distance")))
+    assert list(read) == expected
+    assert list(repo.iter_series(["missing"], since_ns, until_ns)) == []
+
+
+def test_write_replaces_same_device_and_time(repo, data):
+    now_ns, _ = data
+    assert repo.write(columns([("a", now_ns, 9.5)])) == 1
+
+    assert repo.latest("a")["distance"].tolist() == [9.5]
+    assert len(repo.series_since(["a"], 0)["time"]) == 36
@@ -2,6 +2,7 @@
 
 import React, { useState, useRef, useEffect } from 'react';
 import { AuthGuard } from '@/components/AuthGuard';
+import { deviceApi } from '@/lib/api';
 
 interface ChatMessage {
   id: string;
@@ -100,12 +101,22 @@ export default function ChatPage() {
     setInputMessage('');
     setIsLoading(true);
 
-    // ダミーのAI応答をシミュレート
-    setTimeout(() => {
-      const aiResponse = getAIResponse(inputMessage);
-      setMessages(prev => [...prev, aiResponse]);
+    // 圃場データの要約をコンテキストにしたアドバイザー応答（取得できない場合はダミー応答）
+    try {
+      const reply = await deviceApi.advisorChat(userMessage.message);
+      setMessages(prev => [...prev, {
+        id: Date.now().toString(),
+        type: 'ai',
+        message: reply.message,
+        timestamp: new Date().toISOString(),
+        suggestions: reply.suggestions
+      }]);
+    } catch (err) {
+      console.error('アドバイザーの応答取得に失敗しました:', err);
+      setMessages(prev => [...prev, getAIResponse(userMessage.message)]);
+    } finally {
       setIsLoading(false);
-    }, 1500);
+    }
   };
 
   const handleSuggestionClick = (suggestion: string) => {
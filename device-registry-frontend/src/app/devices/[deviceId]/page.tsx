@@ -25,17 +25,11 @@ export default function DeviceDetailPage() {
       try {
         setLoading(true);
         
-        // デバイス基本情報を取得
-        const deviceData = await deviceApi.getDevice(deviceId);
-        setDevice(deviceData);
-
-        // 最新データを取得
-        const latestData = await deviceApi.getLatestMetric(deviceId);
-        setLatestMetric(latestData);
-
-        // 履歴データを取得（過去24時間）
-        const historyData = await deviceApi.getDeviceHistory(deviceId, 24);
-        setHistory(historyData.history || []);
+        // デバイス基本情報・最新データ・履歴（過去24時間）を1リクエストで取得
+        const overview = await deviceApi.getDeviceOverview(deviceId, 24);
+        setDevice(overview.device);
+        setLatestMetric(overview.latest);
+        setHistory(overview.history?.history || []);
 
       } catch (err) {
         setError("データの取得に失敗しました");
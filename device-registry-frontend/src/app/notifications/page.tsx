@@ -1,8 +1,9 @@
 'use client';
 
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { AuthGuard } from '@/components/AuthGuard';
 import Link from 'next/link';
+import { deviceApi } from '@/lib/api';
 
 interface Notification {
   id: string;
@@ -69,6 +70,24 @@ const mockNotifications: Notification[] = [
   }
 ];
 
+type ApiNotification = Awaited<ReturnType<typeof deviceApi.getNotifications>>['items'][number];
+
+// APIの通知を画面表示用に変換
+const toNotification = (item: ApiNotification): Notification => ({
+  id: item.id,
+  type: item.type,
+  title: item.title,
+  message: item.message,
+  deviceId: item.target?.deviceId,
+  deviceName: item.target?.deviceId,
+  timestamp: item.timestamp,
+  isRead: item.read,
+  priority: item.type === 'alert' ? 'high' : item.type === 'warning' ? 'medium' : 'low',
+  actionRequired: item.type === 'alert' || item.type === 'warning',
+});
+
+const PAGE_SIZE = 50;
+
 const getNotificationIcon = (type: string) => {
   switch (type) {
     case 'alert':
@@ -132,8 +151,34 @@ const getPriorityColor = (priority: string) => {
 export default function NotificationsPage() {
   const [notifications, setNotifications] = useState<Notification[]>(mockNotifications);
   const [filter, setFilter] = useState<'all' | 'unread' | 'high'>('all');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [fromApi, setFromApi] = useState(false);
+
+  // バックエンドの通知を取得（取得できない場合はダミーデータを表示）
+  const loadNotifications = (cursor?: string) => {
+    deviceApi.getNotifications({ limit: PAGE_SIZE, cursor })
+      .then((data) => {
+        const items = data.items.map(toNotification);
+        setNotifications(prev => (cursor ? [...prev, ...items] : items));
+        setNextCursor(data.nextCursor);
+        setFromApi(true);
+      })
+      .catch((err) => console.error('通知の取得に失敗しました:', err));
+  };
+
+  useEffect(() => {
+    loadNotifications();
+  }, []);
+
+  const markRead = (ids: string[]) => {
+    if (fromApi && ids.length > 0) {
+      deviceApi.markNotificationsRead(ids)
+        .catch((err) => console.error('既読化に失敗しました:', err));
+    }
+  };
 
   const markAsRead = (id: string) => {
+    markRead([id]);
     setNotifications(prev => 
       prev.map(notification => 
         notification.id === id 
@@ -144,6 +189,7 @@ export default function NotificationsPage() {
   };
 
   const markAllAsRead = () => {
+    markRead(notifications.filter(n => !n.isRead).map(n => n.id).slice(0, 100));
     setNotifications(prev => 
       prev.map(notification => ({ ...notification, isRead: true }))
     );
@@ -339,6 +385,17 @@ export default function NotificationsPage() {
             ))
           )}
         </div>
+
+        {nextCursor && (
+          <div className="mt-6 text-center">
+            <button
+              onClick={() => loadNotifications(nextCursor)}
+              className="px-4 py-2 text-sm font-medium text-blue-600 hover:text-blue-800"
+            >
+              さらに読み込む
+            </button>
+          </div>
+        )}
       </div>
     </AuthGuard>
   );
@@ -1,8 +1,9 @@
 'use client';
 
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { AuthGuard } from '@/components/AuthGuard';
 import Link from 'next/link';
+import { deviceApi } from '@/lib/api';
 
 interface WorkSuggestion {
   id: string;
@@ -201,6 +202,13 @@ export default function WorkSuggestionsPage() {
   const [filter, setFilter] = useState<'all' | 'urgent' | 'high' | 'pending'>('all');
   const [selectedSuggestion, setSelectedSuggestion] = useState<WorkSuggestion | null>(null);
 
+  // バックエンドの作業提案を取得（取得できない場合はダミーデータを表示）
+  useEffect(() => {
+    deviceApi.getWorkSuggestions()
+      .then((data) => setSuggestions(data.suggestions as WorkSuggestion[]))
+      .catch((err) => console.error('作業提案の取得に失敗しました:', err));
+  }, []);
+
   const updateSuggestionStatus = (id: string, status: 'pending' | 'in_progress' | 'completed') => {
     setSuggestions(prev => 
       prev.map(suggestion => 
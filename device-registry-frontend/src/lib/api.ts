@@ -2,7 +2,7 @@
  * APIクライアント
  */
 
-import type { Device, DeviceDetail, DeviceHistory, DashboardData, LatestMetric } from '@/types';
+import type { Device, DeviceDetail, DeviceHistory, DashboardData, LatestMetric, SiteSummary } from '@/types';
 
 const API_BASE_URL: string = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8003';
 const API_PREFIX: string = process.env.NEXT_PUBLIC_API_PREFIX || '/api/v1';
@@ -103,6 +103,17 @@ export const deviceApi = {
       body: JSON.stringify({ deviceId, lat, lon }),
     }),
 
+  // デバイス一括登録
+  claimDevicesBulk: (devices: Array<{ deviceId: string; lat: number; lon: number }>): Promise<{
+    claimed: number;
+    failed: number;
+    results: Array<{ deviceId: string; status: string; detail?: string; assignedAt?: string }>;
+  }> =>
+    fetchApi('/devices/claim/bulk', {
+      method: 'POST',
+      body: JSON.stringify({ devices }),
+    }),
+
   // 最新データ取得
   getLatestMetric: (deviceId: string): Promise<LatestMetric> =>
     fetchApi<LatestMetric>(`/devices/${deviceId}/latest`),
@@ -111,6 +122,177 @@ export const deviceApi = {
   getDeviceHistory: (deviceId: string, hours: number = 24, limit: number = 100): Promise<DeviceHistory> =>
     fetchApi<DeviceHistory>(`/devices/${deviceId}/history?hours=${hours}&limit=${limit}`),
 
+  // 水位予測（thresholdを指定するとその水位に達する時刻も返す）
+  getForecast: (deviceId: string, hours: number = 48, threshold?: number): Promise<{
+    deviceId: string;
+    horizonHours: number;
+    source: 'cache' | 'cold';
+    model: { kind: string; alpha: number; beta: number; gamma: number; sigma: number; level: number; bins: number; trainedThrough: string; fittedAt: string };
+    points: Array<{ time: string; distance: number; lower: number; upper: number }>;
+    threshold: { value: number; direction: 'below' | 'above'; crossesAt: string | null; hoursUntil: number | null } | null;
+  }> =>
+    fetchApi(`/devices/${encodeURIComponent(deviceId)}/forecast?hours=${hours}${threshold !== undefined ? `&threshold=${threshold}` : ''}`),
+
+  // ダッシュボード一括取得（デバイス・最新値・スパークライン）
+  getDashboard: (sparklineHours: number = 24, bucketMinutes: number = 30): Promise<{
+    userId: string;
+    totalDevices: number;
+    generatedAt: string;
+    devices: Array<{
+      deviceId: string;
+      deviceType: string;
+      agriculturalSite: string;
+      fieldName: string;
+      physicalLocation?: string;
+      lat?: number;
+      lon?: number;
+      latestDistance: number | null;
+      lastUpdate: string | null;
+      sparkline: { time: string[]; distance: Array<number | null> };
+    }>;
+  }> =>
+    fetchApi(`/devices/dashboard?sparklineHours=${sparklineHours}&bucketMinutes=${bucketMinutes}`),
+
+  // 複数デバイスの履歴を共通の時刻軸に揃えて取得（series の各配列は time と同じ長さ、欠測はnull）
+  compareHistory: (deviceIds: string[], hours: number = 24, bucketMinutes: number = 30): Promise<{
+    deviceIds: string[];
+    hours: number;
+    bucketMinutes: number;
+    time: string[];
+    series: Record<string, Array<number | null>>;
+  }> =>
+    fetchApi(`/devices/compare?deviceIds=${deviceIds.map(encodeURIComponent).join(',')}&hours=${hours}&bucketMinutes=${bucketMinutes}`),
+
+  // 異常検知結果の取得（deviceId指定時はそのデバイスのみ、新しい順）
+  getAnomalies: (options: {
+    deviceId?: string;
+    hours?: number;
+    kind?: 'spike' | 'sudden_drop' | 'sudden_rise' | 'flatline';
+    limit?: number;
+  } = {}): Promise<{
+    totalDevices: number;
+    hours: number;
+    counts: Record<string, number>;
+    anomalies: Array<{
+      deviceId: string;
+      kind: 'spike' | 'sudden_drop' | 'sudden_rise' | 'flatline';
+      start: string;
+      end: string;
+      points: number;
+      value: number;
+      score: number;
+      ongoing: boolean;
+    }>;
+  }> => {
+    const params = new URLSearchParams({ hours: String(options.hours ?? 24) });
+    if (options.kind) params.set('kind', options.kind);
+    if (options.limit) params.set('limit', String(options.limit));
+    const path = options.deviceId ? `/anomalies/${encodeURIComponent(options.deviceId)}` : '/anomalies';
+    return fetchApi(`${path}?${params}`);
+  },
+
+  // 拠点ごとの集計（台数・オンライン数・最新水位の最小/平均/最大・異常のあるデバイス数）
+  getSites: (): Promise<{
+    userId: string;
+    totalSites: number;
+    generatedAt: string;
+    sites: SiteSummary[];
+  }> =>
+    fetchApi('/sites'),
+
+  // 拠点の集計と圃場ごとの集計
+  getSite: (site: string): Promise<SiteSummary & {
+    userId: string;
+    generatedAt: string;
+    fields: Array<Omit<SiteSummary, 'site' | 'fieldCount'> & { field: string }>;
+  }> =>
+    fetchApi(`/sites/${encodeURIComponent(site)}`),
+
+  // 複数のGET操作を1リクエストで実行（結果は操作ごとのstatus付き）
+  batch: (operations: Array<{ id?: string; path: string }>): Promise<{
+    succeeded: number;
+    failed: number;
+    results: Array<{ id?: string; path: string; status: number; body?: any; detail?: any }>;
+  }> =>
+    fetchApi('/devices/batch', {
+      method: 'POST',
+      body: JSON.stringify({ operations }),
+    }),
+
+  // デバイス詳細・最新データ・履歴をまとめて取得
+  getDeviceOverview: async (deviceId: string, hours: number = 24, limit: number = 100): Promise<{
+    device: DeviceDetail;
+    latest: LatestMetric | null;
+    history: DeviceHistory | null;
+  }> => {
+    const id = encodeURIComponent(deviceId);
+    const { results } = await deviceApi.batch([
+      { id: 'device', path: `/devices/${id}` },
+      { id: 'latest', path: `/devices/${id}/latest` },
+      { id: 'history', path: `/devices/${id}/history?hours=${hours}&limit=${limit}` },
+    ]);
+    const byId = Object.fromEntries(results.map((r) => [r.id, r]));
+    if (byId.device.status !== 200) {
+      throw new ApiError(byId.device.detail || 'API request failed', byId.device.status);
+    }
+    return {
+      device: byId.device.body,
+      latest: byId.latest.status === 200 ? byId.latest.body : null,
+      history: byId.history.status === 200 ? byId.history.body : null,
+    };
+  },
+
+  // 作業提案取得（優先度順）
+  getWorkSuggestions: (priority?: 'urgent' | 'high' | 'medium' | 'low'): Promise<{
+    userId: string;
+    totalDevices: number;
+    generatedAt: string;
+    suggestions: Array<Record<string, any>>;
+  }> =>
+    fetchApi(`/work-suggestions${priority ? `?priority=${priority}` : ''}`),
+
+  // アドバイザーに質問（圃場データの要約をコンテキストに使用）
+  advisorChat: (message: string, deviceId?: string): Promise<{
+    model: string;
+    message: string;
+    suggestions: string[];
+    context: { tokens: number; budget: number; included: string[]; omitted: number };
+  }> =>
+    fetchApi('/advisor/chat', {
+      method: 'POST',
+      body: JSON.stringify({ message, deviceId }),
+    }),
+
+  // 通知一覧取得（新しい順、nextCursorで続きを取得）
+  getNotifications: (params: { limit?: number; cursor?: string; unread?: boolean } = {}): Promise<{
+    userId: string;
+    items: Array<{
+      id: string;
+      eventId: string;
+      type: 'alert' | 'warning' | 'info' | 'success';
+      title: string;
+      message: string;
+      target?: { deviceId?: string; site?: string };
+      timestamp: string;
+      read: boolean;
+    }>;
+    nextCursor: string | null;
+  }> => {
+    const query = new URLSearchParams();
+    if (params.limit) query.set('limit', String(params.limit));
+    if (params.cursor) query.set('cursor', params.cursor);
+    if (params.unread) query.set('unread', 'true');
+    const qs = query.toString();
+    return fetchApi(`/notifications${qs ? `?${qs}` : ''}`);
+  },
+
+  // 通知を既読にする
+  markNotificationsRead: (ids: string[]): Promise<{ updated: number }> =>
+    fetchApi('/notifications/read', {
+      method: 'POST',
+      body: JSON.stringify({ ids }),
+    }),
+
   // 統計情報取得
   getStats: (): Promise<DashboardData> =>
     fetchApi<DashboardData>('/devices/stats'),
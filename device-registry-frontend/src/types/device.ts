@@ -75,3 +75,18 @@ export interface DashboardData {
   devices: DeviceStats[];
 }
 
+
+// 拠点（agriculturalSite）ごとの集計
+export interface SiteSummary {
+  site: string;
+  fieldCount: number;
+  deviceCount: number;
+  onlineCount: number;
+  offlineCount: number;
+  reportingCount: number;
+  minLevel: number | null;
+  avgLevel: number | null;
+  maxLevel: number | null;
+  alerts: number;
+  lastUpdate: string | null;
+}